@@ -0,0 +1,46 @@
+<#
+.SYNOPSIS
+    Shared Graph $batch helper, dot-sourced by the batch scripts:
+        . (Join-Path $PSScriptRoot "GraphBatch.ps1")
+    Parallel scripts pass it into their runspaces as text:
+        $invokeGraphBatch = ${function:Invoke-GraphBatch}.ToString()
+        ${function:Invoke-GraphBatch} = $using:invokeGraphBatch
+#>
+
+# --- $batch helper: 20 requests per call, 429/5xx retried (Retry-After honoured) ---
+# -RetryNotFound also retries 404 (objects created seconds ago are not replicated yet)
+function Invoke-GraphBatch {
+    param([Parameter(Mandatory)] [object[]]$Requests, [string]$Api = 'v1.0', [switch]$RetryNotFound)
+
+    $responses = @{}
+    $pending = @($Requests)
+    $attempt = 0
+
+    while ($pending.Count -gt 0 -and $attempt -lt 5) {
+        $attempt++
+        $retry = [System.Collections.Generic.List[object]]::new()
+        $wait = 0
+
+        for ($i = 0; $i -lt $pending.Count; $i += 20) {
+            $end = [math]::Min($i + 19, $pending.Count - 1)
+            $chunk = @($pending[$i..$end])
+            $batch = Invoke-MgGraphRequest -Method POST -Uri "https://graph.microsoft.com/$Api/`$batch" `
+                -Body (@{ requests = $chunk } | ConvertTo-Json -Depth 8) -ContentType 'application/json'
+
+            foreach ($r in $batch.responses) {
+                $transient = $r.status -eq 429 -or $r.status -ge 500 -or ($RetryNotFound -and $r.status -eq 404)
+                if ($transient -and $attempt -lt 5) {
+                    $retry.Add(($chunk | Where-Object { $_.id -eq $r.id } | Select-Object -First 1))
+                    $wait = [math]::Max($wait, [math]::Max([int]($r.headers.'Retry-After'), 2 * $attempt))
+                } else {
+                    $responses[$r.id] = $r
+                }
+            }
+        }
+
+        $pending = @($retry)
+        if ($pending.Count -gt 0) { Start-Sleep -Seconds $wait }
+    }
+
+    return $responses
+}
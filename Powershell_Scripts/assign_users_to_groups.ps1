@@ -1,6 +1,8 @@
 param(
     [string[]]$UserUPNs,
-    [string[]]$GroupIDs
+    [string[]]$GroupIDs,
+    [string]$UserUPNsFile,  # Optional text file, one UPN per line (large selections exceed the command-line limit)
+    [string]$PairsFile   # Optional JSON file: [{ "UserUPN": ..., "GroupId": ... }] — only these user/group pairs are processed
 )
 
 # --- Normalize GroupIDs array ---
@@ -19,6 +21,9 @@ if ($GroupIDs -is [string]) {
 $GroupIDs = $normalizedGroups | Select-Object -Unique
 
 # --- Normalize UserUPNs array ---
+if ($UserUPNsFile) {
+    $UserUPNs = @($UserUPNs) + @(Get-Content -LiteralPath $UserUPNsFile -Encoding UTF8) | Where-Object { $_ }
+}
 $normalizedUsers = @()
 if ($UserUPNs -is [string]) {
     $normalizedUsers = ($UserUPNs -split "[,; ]+") | ForEach-Object { $_.Trim() } | Where-Object { $_ }
@@ -33,6 +38,18 @@ if ($UserUPNs -is [string]) {
 }
 $UserUPNs = $normalizedUsers | Select-Object -Unique
 
+# --- Target groups per user (every group for every user, or the explicit pairs) ---
+$targets = [ordered]@{}
+if ($PairsFile) {
+    foreach ($pair in (Get-Content -LiteralPath $PairsFile -Raw -Encoding UTF8 | ConvertFrom-Json)) {
+        if (-not $targets.Contains($pair.UserUPN)) { $targets[$pair.UserUPN] = [System.Collections.Generic.List[string]]::new() }
+        $targets[$pair.UserUPN].Add($pair.GroupId)
+    }
+} else {
+    foreach ($upn in $UserUPNs) { $targets[$upn] = @($GroupIDs) }
+}
+$UserUPNs = @($targets.Keys)
+
 # --- Setup Environment ---
 $ErrorActionPreference = "Stop"
 $ProgressPreference = "SilentlyContinue"
@@ -41,7 +58,7 @@ $ProgressPreference = "SilentlyContinue"
 $InformationPreference = "SilentlyContinue"
 $WarningPreference = "SilentlyContinue"
 $VerbosePreference = "SilentlyContinue"
-$result = @()
+$result = [System.Collections.Generic.List[object]]::new()
 
 # --- Connect to Graph ---
 try {
@@ -53,96 +70,174 @@ try {
     Connect-MgGraph -Scopes "User.Read.All","Group.ReadWrite.All","Directory.ReadWrite.All" -NoWelcome | Out-Null
 }
 
-Import-Module Microsoft.Graph.Users -ErrorAction SilentlyContinue
-Import-Module Microsoft.Graph.Groups -ErrorAction SilentlyContinue
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
+
+function Add-PairResult {
+    param($upn, $userId, $groupId, $groupName, [string]$code, [string]$status)
+
+    $result.Add([PSCustomObject]@{
+        Phase     = "Assign"
+        UserUPN   = $upn
+        UserId    = $userId
+        GroupId   = $groupId
+        GroupName = $groupName
+        Result    = $code
+        Status    = $status
+    })
+}
+
+function Get-ErrorStatus {
+    param($response)
 
-# --- Main logic ---
+    $msg = [string]$response.body.error.message
+    if ($response.status -eq 403 -or $msg -match "Insufficient privileges") { return "⚠️ Permission denied" }
+    if ($response.status -eq 400) { return "❌ Invalid request (check group type or membership): $msg" }
+    return "❌ Group error: $msg"
+}
+
+# --- 1) Resolve users and groups in bulk ---
+$userRequests = @(for ($i = 0; $i -lt $UserUPNs.Count; $i++) {
+    @{ id = "u$i"; method = "GET"; url = "/users/$([uri]::EscapeDataString($UserUPNs[$i]))?`$select=id,userPrincipalName" }
+})
+$allGroupIds = @($targets.Values | ForEach-Object { $_ } | Select-Object -Unique)
+$groupRequests = @(for ($i = 0; $i -lt $allGroupIds.Count; $i++) {
+    @{ id = "g$i"; method = "GET"; url = "/groups/$($allGroupIds[$i])?`$select=id,displayName,groupTypes" }
+})
+
+$lookups = if ($userRequests.Count + $groupRequests.Count -gt 0) { Invoke-GraphBatch -Requests ($userRequests + $groupRequests) } else { @{} }
+
+$userIds = @{}
+for ($i = 0; $i -lt $UserUPNs.Count; $i++) {
+    $r = $lookups["u$i"]
+    if ($r -and $r.status -eq 200) { $userIds[$UserUPNs[$i]] = $r.body.id }
+}
+
+$groups = @{}
+$groupErrors = @{}
+for ($i = 0; $i -lt $allGroupIds.Count; $i++) {
+    $r = $lookups["g$i"]
+    if ($r -and $r.status -eq 200) { $groups[$allGroupIds[$i]] = $r.body } else { $groupErrors[$allGroupIds[$i]] = $r }
+}
+
+# --- 2) Current members of every target group (paged once per group) ---
+$existing = @{}
+$writableGroups = @($groups.Keys | Where-Object { -not ($groups[$_].groupTypes -contains "DynamicMembership") })
+foreach ($gid in $writableGroups) {
+    $existing[$gid] = [System.Collections.Generic.HashSet[string]]::new()
+}
+$memberPages = @{}
+if ($writableGroups.Count -gt 0) {
+    $memberPages = Invoke-GraphBatch -Requests @(foreach ($gid in $writableGroups) {
+        @{ id = $gid; method = "GET"; url = "/groups/$gid/members?`$select=id&`$top=999" }
+    })
+}
+foreach ($gid in $writableGroups) {
+    $page = $memberPages[$gid]
+    while ($page) {
+        $body = if ($page.body) { $page.body } else { $page }
+        foreach ($m in $body.value) { [void]$existing[$gid].Add($m.id) }
+        $next = $body.'@odata.nextLink'
+        $page = if ($next) { Invoke-MgGraphRequest -Method GET -Uri $next } else { $null }
+    }
+}
+
+# --- 3) Classify every pair, collect the members to add per group ---
+$toAdd = @{}   # group id -> List of @{ upn; id }
 foreach ($upn in $UserUPNs) {
-    try {
-        $escaped = $upn.Replace("'", "''")
-        $user = Get-MgUser -Filter "startswith(userPrincipalName,'$escaped')" -All |
-                Where-Object { $_.UserPrincipalName -ieq $upn }
-
-        if (-not $user) {
-            $result += [PSCustomObject]@{
-                UserUPN   = $upn
-                GroupName = "N/A"
-                Status    = "❌ User not found"
-            }
+    $uid = $userIds[$upn]
+    if (-not $uid) {
+        Add-PairResult $upn $null $null "N/A" "notfound" "❌ User not found"
+        continue
+    }
+
+    foreach ($gid in ($targets[$upn] | Select-Object -Unique)) {
+        $g = $groups[$gid]
+        if (-not $g) {
+            $err = $groupErrors[$gid]
+            Add-PairResult $upn $uid $gid "N/A" "failed" $(if ($err -and $err.status -ne 404) { Get-ErrorStatus $err } else { "❌ Group not found" })
+            continue
+        }
+        if ($g.groupTypes -contains "DynamicMembership") {
+            Add-PairResult $upn $uid $gid $g.displayName "skipped" "⏭️ Skipped (Dynamic group)"
+            continue
+        }
+        if ($existing[$gid].Contains($uid)) {
+            Add-PairResult $upn $uid $gid $g.displayName "already" "ℹ️ Already a member"
             continue
         }
+        if (-not $toAdd.ContainsKey($gid)) { $toAdd[$gid] = [System.Collections.Generic.List[object]]::new() }
+        $toAdd[$gid].Add(@{ upn = $upn; id = $uid })
+    }
+}
+
+# --- 4) Write: PATCH members@odata.bind, 20 members per request, sent through $batch ---
+$patches = [System.Collections.Generic.List[object]]::new()
+$chunkMembers = @{}
+foreach ($gid in $toAdd.Keys) {
+    $members = $toAdd[$gid]
+    for ($i = 0; $i -lt $members.Count; $i += 20) {
+        $end = [math]::Min($i + 19, $members.Count - 1)
+        $chunk = @($members[$i..$end])
+        $id = "p$($patches.Count)"
+        $chunkMembers[$id] = @{ group = $gid; members = $chunk }
+        $patches.Add(@{
+            id      = $id
+            method  = "PATCH"
+            url     = "/groups/$gid"
+            headers = @{ "Content-Type" = "application/json" }
+            body    = @{ "members@odata.bind" = @($chunk | ForEach-Object { "https://graph.microsoft.com/v1.0/directoryObjects/$($_.id)" }) }
+        })
+    }
+}
 
-        foreach ($gid in $GroupIDs) {
-            try {
-                $group = Get-MgGroup -GroupId $gid -ErrorAction Stop
-
-                # Skip dynamic groups
-                if ($group.GroupTypes -contains "DynamicMembership") {
-                    $result += [PSCustomObject]@{
-                        UserUPN   = $upn
-                        GroupName = $group.DisplayName
-                        Status    = "⏭️ Skipped (Dynamic group)"
-                    }
-                    continue
-                }
-
-                # Check if already member
-                $existing = Get-MgGroupMember -GroupId $gid -All -ErrorAction SilentlyContinue |
-                            Where-Object { $_.Id -eq $user.Id }
-
-                if ($existing) {
-                    $result += [PSCustomObject]@{
-                        UserUPN   = $upn
-                        GroupName = $group.DisplayName
-                        Status    = "ℹ️ Already a member"
-                    }
-                    continue
-                }
-
-                # Add user to group via REST
-                $uri = "https://graph.microsoft.com/v1.0/groups/$($gid)/members/`$ref"
-                $body = @{
-                    "@odata.id" = "https://graph.microsoft.com/v1.0/directoryObjects/$($user.Id)"
-                } | ConvertTo-Json -Compress
-
-                Invoke-MgGraphRequest -Method POST -Uri $uri -Body $body -ContentType "application/json" -ErrorAction Stop
-
-                $result += [PSCustomObject]@{
-                    UserUPN   = $upn
-                    GroupName = $group.DisplayName
-                    Status    = "✅ Added successfully"
-                }
-            }
-            catch {
-                $msg = $_.Exception.Message
-                if ($msg -match "Insufficient privileges") {
-                    $status = "⚠️ Permission denied"
-                } elseif ($msg -match "BadRequest") {
-                    $status = "❌ Invalid request (check group type or membership)"
-                } else {
-                    $status = "❌ Group error: $msg"
-                }
-
-                $result += [PSCustomObject]@{
-                    UserUPN   = $upn
-                    GroupName = $group.DisplayName
-                    Status    = $status
-                }
-            }
+$patchResults = if ($patches.Count -gt 0) { Invoke-GraphBatch -Requests $patches } else { @{} }
+
+# A rejected chunk is retried member by member so every pair gets its own status
+$singles = [System.Collections.Generic.List[object]]::new()
+$singleMembers = @{}
+foreach ($id in $chunkMembers.Keys) {
+    $r = $patchResults[$id]
+    $gid = $chunkMembers[$id].group
+    if ($r -and $r.status -in @(200, 204)) {
+        foreach ($m in $chunkMembers[$id].members) {
+            Add-PairResult $m.upn $m.id $gid $groups[$gid].displayName "added" "✅ Added successfully"
         }
+        continue
     }
-    catch {
-        $result += [PSCustomObject]@{
-            UserUPN   = $upn
-            GroupName = "N/A"
-            Status    = "❌ General error: $($_.Exception.Message)"
+    foreach ($m in $chunkMembers[$id].members) {
+        $sid = "s$($singles.Count)"
+        $singleMembers[$sid] = @{ group = $gid; member = $m }
+        $singles.Add(@{
+            id      = $sid
+            method  = "POST"
+            url     = "/groups/$gid/members/`$ref"
+            headers = @{ "Content-Type" = "application/json" }
+            body    = @{ "@odata.id" = "https://graph.microsoft.com/v1.0/directoryObjects/$($m.id)" }
+        })
+    }
+}
+
+if ($singles.Count -gt 0) {
+    $singleResults = Invoke-GraphBatch -Requests $singles
+    foreach ($sid in $singleMembers.Keys) {
+        $r = $singleResults[$sid]
+        $gid = $singleMembers[$sid].group
+        $m = $singleMembers[$sid].member
+        if ($r -and $r.status -in @(200, 204)) {
+            Add-PairResult $m.upn $m.id $gid $groups[$gid].displayName "added" "✅ Added successfully"
+        } elseif ($r -and [string]$r.body.error.message -match "already exist") {
+            Add-PairResult $m.upn $m.id $gid $groups[$gid].displayName "already" "ℹ️ Already a member"
+        } else {
+            Add-PairResult $m.upn $m.id $gid $groups[$gid].displayName "failed" $(if ($r) { Get-ErrorStatus $r } else { "❌ No response" })
         }
     }
 }
 
 # --- Always output clean JSON for the app ---
-if (-not $result) {
-    $result = @([PSCustomObject]@{
+if ($result.Count -eq 0) {
+    $result.Add([PSCustomObject]@{
+        Phase     = "Assign"
         UserUPN   = "None"
         GroupName = "None"
         Status    = "No operations performed"
@@ -152,8 +247,8 @@ if (-not $result) {
 try {
     # Force UTF-8 output and write pure JSON only
     [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
-    ($result | ConvertTo-Json -Depth 6) | Write-Host
+    (ConvertTo-Json -InputObject @($result) -Depth 6) | Write-Host
 } catch {
     Write-Error "JSON serialization failed: $($_.Exception.Message)"
 }
-exit 0
\ No newline at end of file
+exit 0
@@ -1,5 +1,9 @@
 param (
-    [string]$CsvPath
+    [string]$CsvPath,
+    [string]$JournalPath,                # Checkpoint journal (JSON lines); defaults to <csv>.journal.jsonl
+    [ValidateSet('Resume', 'Restart')]
+    [string]$JournalMode = 'Resume',     # Restart moves the existing journal aside and starts from row 1
+    [int]$ThrottleLimit = 4              # Parallel $batch creation runspaces
 )
 
 $ErrorActionPreference = 'Stop'
@@ -20,6 +24,16 @@ if (-not (Test-Path -LiteralPath $CsvPath)) {
     throw "❌ CSV file not found: $CsvPath"
 }
 
+if (-not $JournalPath) {
+    $JournalPath = [System.IO.Path]::ChangeExtension($CsvPath, ".journal.jsonl")
+}
+$journalDir = Split-Path -Parent $JournalPath
+if ($journalDir -and -not (Test-Path $journalDir)) {
+    New-Item -ItemType Directory -Path $journalDir -Force | Out-Null
+}
+
+$startTime = Get-Date
+
 # -------------------------------
 # Helper: strong password when blank (optional)
 # -------------------------------
@@ -48,6 +62,67 @@ function New-StrongPassword([int]$Length = 16) {
     -join ($base | Sort-Object { Get-Random })
 }
 
+# -------------------------------
+# Helper: $batch (Invoke-GraphBatch, shared with the other batch scripts)
+# -------------------------------
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
+
+function Test-Ok($response) { return $response -and $response.status -ge 200 -and $response.status -lt 300 }
+
+function Get-BatchError($response) {
+    if (-not $response) { return "no response" }
+    $msg = $response.body.error.message
+    return $(if ($msg) { "HTTP $($response.status): $msg" } else { "HTTP $($response.status)" })
+}
+
+# -------------------------------
+# Checkpoint journal: one JSON line per row state change, last line per row hash wins
+# -------------------------------
+$journalLock = [object]::new()
+
+function Add-JournalEntries {
+    param([object[]]$Entries)
+
+    $lines = @($Entries | ForEach-Object {
+        $_.Time = (Get-Date).ToUniversalTime().ToString("o")
+        $_ | ConvertTo-Json -Compress
+    })
+    if ($lines.Count -eq 0) { return }
+
+    [System.Threading.Monitor]::Enter($journalLock)
+    try {
+        [System.IO.File]::AppendAllLines($JournalPath, [string[]]$lines, [System.Text.UTF8Encoding]::new($false))
+    } finally {
+        [System.Threading.Monitor]::Exit($journalLock)
+    }
+}
+
+function New-JournalEntry($row, [string]$status, [string]$id, [string]$err) {
+    return [ordered]@{ Hash = $row.Hash; Row = $row.LineNo; UPN = $row.UPN; Status = $status; Id = $id; Error = $err; Time = $null }
+}
+
+if ($JournalMode -eq 'Restart' -and (Test-Path -LiteralPath $JournalPath)) {
+    $aside = "$JournalPath.$(Get-Date -Format 'yyyyMMdd-HHmmss').bak"
+    Move-Item -LiteralPath $JournalPath -Destination $aside
+    Write-Host "♻️ Previous journal moved to $aside" -ForegroundColor DarkCyan
+}
+
+$journal = @{}
+if (Test-Path -LiteralPath $JournalPath) {
+    foreach ($line in [System.IO.File]::ReadLines($JournalPath)) {
+        if (-not $line.Trim()) { continue }
+        try {
+            $entry = $line | ConvertFrom-Json
+            $journal[$entry.Hash] = $entry
+        } catch {
+            # A line cut short by a crash: the row is simply processed again
+        }
+    }
+    Write-Host "📒 Resuming from journal ($($journal.Count) row(s) recorded): $JournalPath" -ForegroundColor Cyan
+} else {
+    Write-Host "📒 Journal: $JournalPath" -ForegroundColor DarkCyan
+}
+
 # -------------------------------
 # CSV parsing by column index
 # -------------------------------
@@ -61,6 +136,10 @@ $headers = $parser.ReadFields()
 Write-Host "📋 Detected columns ($($headers.Count)):" -ForegroundColor Cyan
 Write-Host "  " ($headers -join ' | ')
 
+$rows = [System.Collections.Generic.List[object]]::new()
+$seen = [System.Collections.Generic.HashSet[string]]::new()
+$sha = [System.Security.Cryptography.SHA256]::Create()
+
 $lineNo = 1
 while (-not $parser.EndOfData) {
     $lineNo++
@@ -72,205 +151,386 @@ while (-not $parser.EndOfData) {
         continue
     }
 
-    # ------------------------------------------------------
-    # Column mapping (0-based index, exact order you gave)
-    # ------------------------------------------------------
-    $DisplayName             = $cells[0].Trim()
-    $GivenName               = $cells[1].Trim()
-    $Surname                 = $cells[2].Trim()
-    $UPN                     = $cells[3].Trim()
-    $Password                = $cells[4]
-    $JobTitle                = $cells[5].Trim()
-    $CompanyName             = $cells[6].Trim()
-    $Department              = $cells[7].Trim()
-    $EmployeeId              = $cells[8].Trim()
-    $City                    = $cells[9].Trim()
-    $Country                 = $cells[10].Trim()
-    $State                   = $cells[11].Trim()
-    $OfficeLocation          = $cells[12].Trim()
-    $StreetAddress           = $cells[13].Trim()
-    $ManagerUPN              = $cells[14].Trim()
-    $SponsorsRaw             = $cells[15].Trim()
-    $UsageLocation           = $cells[16].Trim()
-    $PostalCode              = $cells[17].Trim()
-    $BusinessPhoneMobileRaw  = $cells[18].Trim()   # NOTE: header is combined
-    $OtherEmailsRaw          = $cells[19].Trim()
-    $AgeGroup                = $cells[20].Trim()
-    $ConsentForMinor         = $cells[21].Trim()
-    $AccessPackage           = $cells[22].Trim()   # not used at creation time
-
-    if (-not $UPN) {
+    if (-not $cells[3].Trim()) {
         Write-Host "⚠️  Skipping row $lineNo — missing UPN."
         continue
     }
 
-    # Already exists?
-    $existing = Get-MgUser -Filter "userPrincipalName eq '$($UPN.Replace("'", "''"))'" -ErrorAction SilentlyContinue
-    if ($existing) {
-        Write-Host "⚠️  User already exists: $UPN"
+    # Row identity for the journal: hash of the raw cells, so an edited row is processed again
+    $hash = [System.Convert]::ToHexString($sha.ComputeHash([System.Text.Encoding]::UTF8.GetBytes(($cells -join "`u{1F}"))))
+    if (-not $seen.Add($hash)) {
+        Write-Host "⚠️  Skipping row $lineNo — duplicate of an earlier row." -ForegroundColor Yellow
         continue
     }
 
-    Write-Host "`n============================================================"
-    Write-Host "Processing user: $UPN"
-    Write-Host "============================================================`n"
+    # ------------------------------------------------------
+    # Column mapping (0-based index, exact order you gave)
+    # ------------------------------------------------------
+    $rows.Add([PSCustomObject]@{
+        Hash                   = $hash
+        LineNo                 = $lineNo
+        DisplayName            = $cells[0].Trim()
+        GivenName              = $cells[1].Trim()
+        Surname                = $cells[2].Trim()
+        UPN                    = $cells[3].Trim()
+        Password               = $cells[4]
+        JobTitle               = $cells[5].Trim()
+        CompanyName            = $cells[6].Trim()
+        Department             = $cells[7].Trim()
+        EmployeeId             = $cells[8].Trim()
+        City                   = $cells[9].Trim()
+        Country                = $cells[10].Trim()
+        State                  = $cells[11].Trim()
+        OfficeLocation         = $cells[12].Trim()
+        StreetAddress          = $cells[13].Trim()
+        ManagerUPN             = $cells[14].Trim()
+        SponsorsRaw            = $cells[15].Trim()
+        UsageLocation          = $cells[16].Trim()
+        PostalCode             = $cells[17].Trim()
+        BusinessPhoneMobileRaw = $cells[18].Trim()   # NOTE: header is combined
+        OtherEmailsRaw         = $cells[19].Trim()
+        AgeGroup               = $cells[20].Trim()
+        ConsentForMinor        = $cells[21].Trim()
+        AccessPackage          = $cells[22].Trim()
+        Id                     = $null
+    })
+}
 
-    # Normalize usage location (must be 2 letters)
-    if ($UsageLocation) {
-        $UsageLocation = $UsageLocation.Substring(0, [Math]::Min(2, $UsageLocation.Length)).ToUpperInvariant()
+# Clean up parser
+$parser.Close()
+$sha.Dispose()
+
+# ------------------------------------------------------
+# Sort rows by journal state
+#   done / exists → skipped, created → follow-ups only, anything else → (re)created
+#   (submitted / failed rows whose UPN now exists are picked up by the existence check)
+# ------------------------------------------------------
+$toCreate = [System.Collections.Generic.List[object]]::new()
+$toFinish = [System.Collections.Generic.List[object]]::new()
+$skipped = 0
+
+foreach ($row in $rows) {
+    $entry = $journal[$row.Hash]
+    switch ($entry.Status) {
+        { $_ -in @('done', 'exists') } { $skipped++; continue }
+        'created' { $row.Id = $entry.Id; $toFinish.Add($row); continue }
+        default { $toCreate.Add($row) }
     }
+}
 
-    # Password: auto-generate if blank or too weak (less than 8 chars or missing complexity)
-    $generated = $false
+Write-Host ("`n{0} row(s): {1} already completed, {2} to create, {3} awaiting manager/sponsors/access package." -f `
+    $rows.Count, $skipped, $toCreate.Count, $toFinish.Count)
+
+# ------------------------------------------------------
+# Existence check ($batch) — existing users are journaled and skipped
+# ------------------------------------------------------
+$summary = @{ created = 0; exists = 0; failed = 0; done = 0 }
+
+if ($toCreate.Count -gt 0) {
+    Write-Host "`n🔎 Checking $($toCreate.Count) UPN(s) for existing accounts..."
+    $check = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $toCreate.Count; $i++) {
+        @{ id = "$i"; method = "GET"; url = "/users/$([uri]::EscapeDataString($toCreate[$i].UPN))?`$select=id" }
+    })
+
+    $pending = [System.Collections.Generic.List[object]]::new()
+    $entries = [System.Collections.Generic.List[object]]::new()
+    for ($i = 0; $i -lt $toCreate.Count; $i++) {
+        $row = $toCreate[$i]
+        $r = $check["$i"]
+        if (Test-Ok $r) {
+            if ($journal[$row.Hash].Status -in @('submitted', 'failed')) {
+                # POSTed by an earlier run that died (or lost the response) before journaling the outcome: finish it
+                $row.Id = $r.body.id
+                $entries.Add((New-JournalEntry $row 'created' $row.Id $null))
+                $toFinish.Add($row)
+                Write-Host "♻️ $($row.UPN) was created by a previous run — completing it." -ForegroundColor DarkCyan
+            } else {
+                $entries.Add((New-JournalEntry $row 'exists' $r.body.id $null))
+                $summary.exists++
+                Write-Host "⚠️  User already exists: $($row.UPN)"
+            }
+        } else {
+            $pending.Add($row)
+        }
+    }
+    Add-JournalEntries $entries
+    $toCreate = $pending
+}
 
-    if ([string]::IsNullOrWhiteSpace($Password) -or
-        $Password.Length -lt 8 -or
-        -not ($Password -match '[A-Z]' -and $Password -match '[a-z]' -and $Password -match '\d' -and $Password -match '[@#$%&*+\-_!?]')) {
+# ------------------------------------------------------
+# Creation — 20 users per $batch, batches spread over parallel runspaces
+# ------------------------------------------------------
+if ($toCreate.Count -gt 0) {
+    Write-Host "`n🚀 Creating $($toCreate.Count) user(s) ($ThrottleLimit parallel runspaces)..."
+
+    $chunks = [System.Collections.Generic.List[object]]::new()
+    for ($i = 0; $i -lt $toCreate.Count; $i += 20) {
+        $end = [math]::Min($i + 19, $toCreate.Count - 1)
+        $chunk = [System.Collections.Generic.List[object]]::new()
+
+        foreach ($row in $toCreate[$i..$end]) {
+            # Normalize usage location (must be 2 letters)
+            $UsageLocation = $row.UsageLocation
+            if ($UsageLocation) {
+                $UsageLocation = $UsageLocation.Substring(0, [Math]::Min(2, $UsageLocation.Length)).ToUpperInvariant()
+            }
 
-        $Password = New-StrongPassword 16
-        $generated = $true
-        Write-Host "🔐 Generated new strong password for user: $UPN" -ForegroundColor Cyan
-    } else {
-        Write-Host "🔎 Using password from CSV for user: $UPN"
-    }
+            # Password: auto-generate if blank or too weak (less than 8 chars or missing complexity)
+            $Password = $row.Password
+            $generated = $false
+            if ([string]::IsNullOrWhiteSpace($Password) -or
+                $Password.Length -lt 8 -or
+                -not ($Password -match '[A-Z]' -and $Password -match '[a-z]' -and $Password -match '\d' -and $Password -match '[@#$%&*+\-_!?]')) {
 
-    Write-Host "   → Final password used: $Password" -ForegroundColor DarkGray
+                $Password = New-StrongPassword 16
+                $generated = $true
+            }
 
-    $passwordProfile = @{
-        Password = $Password
-        ForceChangePasswordNextSignIn = $true
-    }
+            $userDetails = @{
+                accountEnabled    = $true
+                displayName       = $row.DisplayName
+                userPrincipalName = $row.UPN
+                mailNickname      = ($row.UPN.Split('@')[0] -replace '[^a-zA-Z0-9]', '')
+                passwordProfile   = @{
+                    password                      = $Password
+                    forceChangePasswordNextSignIn = $true
+                }
+            }
 
-    $userDetails = @{
-        AccountEnabled    = $true
-        DisplayName       = $DisplayName
-        UserPrincipalName = $UPN
-        MailNickname      = ($UPN.Split('@')[0] -replace '[^a-zA-Z0-9]', '')
-        PasswordProfile   = $passwordProfile
+            # Optional scalar attributes
+            if ($row.GivenName)       { $userDetails.givenName       = $row.GivenName }
+            if ($row.Surname)         { $userDetails.surname         = $row.Surname }
+            if ($row.JobTitle)        { $userDetails.jobTitle        = $row.JobTitle }
+            if ($row.CompanyName)     { $userDetails.companyName     = $row.CompanyName }
+            if ($row.Department)      { $userDetails.department      = $row.Department }
+            if ($row.EmployeeId)      { $userDetails.employeeId      = $row.EmployeeId }
+            if ($row.City)            { $userDetails.city            = $row.City }
+            if ($row.State)           { $userDetails.state           = $row.State }
+            if ($row.Country)         { $userDetails.country         = $row.Country }
+            if ($row.OfficeLocation)  { $userDetails.officeLocation  = $row.OfficeLocation }
+            if ($row.StreetAddress)   { $userDetails.streetAddress   = $row.StreetAddress }
+            if ($row.PostalCode)      { $userDetails.postalCode      = $row.PostalCode }
+            if ($UsageLocation)       { $userDetails.usageLocation   = $UsageLocation }
+            if ($row.AgeGroup)        { $userDetails.ageGroup        = $row.AgeGroup } # Minor|NotAdult|Adult
+            if ($row.ConsentForMinor) { $userDetails.consentProvidedForMinor = $row.ConsentForMinor } # Granted|Denied|notRequired
+
+            # Lists
+            if ($row.BusinessPhoneMobileRaw) { $userDetails.businessPhones = @($row.BusinessPhoneMobileRaw) } # single combined column
+            if ($row.OtherEmailsRaw)         { $userDetails.otherMails     = @($row.OtherEmailsRaw -split ';') }
+
+            $chunk.Add([PSCustomObject]@{
+                Row       = $row
+                Password  = $Password
+                Generated = $generated
+                Request   = @{
+                    id      = "$($row.LineNo)"
+                    method  = "POST"
+                    url     = "/users"
+                    headers = @{ "Content-Type" = "application/json" }
+                    body    = $userDetails
+                }
+            })
+        }
+        $chunks.Add($chunk)
     }
 
-    # Optional scalar attributes
-    if ($GivenName)       { $userDetails.GivenName       = $GivenName }
-    if ($Surname)         { $userDetails.Surname         = $Surname }
-    if ($JobTitle)        { $userDetails.JobTitle        = $JobTitle }
-    if ($CompanyName)     { $userDetails.CompanyName     = $CompanyName }
-    if ($Department)      { $userDetails.Department      = $Department }
-    if ($EmployeeId)      { $userDetails.EmployeeId      = $EmployeeId }
-    if ($City)            { $userDetails.City            = $City }
-    if ($State)           { $userDetails.State           = $State }
-    if ($Country)         { $userDetails.Country         = $Country }
-    if ($OfficeLocation)  { $userDetails.OfficeLocation  = $OfficeLocation }
-    if ($StreetAddress)   { $userDetails.StreetAddress   = $StreetAddress }
-    if ($PostalCode)      { $userDetails.PostalCode      = $PostalCode }
-    if ($UsageLocation)   { $userDetails.UsageLocation   = $UsageLocation }
-    if ($AgeGroup)        { $userDetails.AgeGroup        = $AgeGroup } # Minor|NotAdult|Adult
-    if ($ConsentForMinor) { $userDetails.ConsentProvidedForMinor = $ConsentForMinor } # Granted|Denied|notRequired
-
-    # Lists
-    if ($BusinessPhoneMobileRaw) { $userDetails.BusinessPhones = @($BusinessPhoneMobileRaw) } # single combined column
-    if ($OtherEmailsRaw)         { $userDetails.OtherMails     = $OtherEmailsRaw -split ';' }
-
-    # Create user
-    try {
-        $newUser = New-MgUser -BodyParameter $userDetails
-        Write-Host "✅ Created: $UPN (User ID: $($newUser.Id))" -ForegroundColor Green
-    }
-    catch {
-        Write-Host "❌ Failed to create: $UPN - $($_.Exception.Message)" -ForegroundColor Red
-        continue
-    }
+    $created = [System.Collections.Concurrent.ConcurrentBag[object]]::new()
+    $failures = [System.Collections.Concurrent.ConcurrentBag[object]]::new()
+    $invokeGraphBatch = ${function:Invoke-GraphBatch}.ToString()
+    $addJournalEntries = ${function:Add-JournalEntries}.ToString()
+    $newJournalEntry = ${function:New-JournalEntry}.ToString()
+    $getBatchError = ${function:Get-BatchError}.ToString()
+
+    $chunks | ForEach-Object -Parallel {
+        $chunk = $_
+        $created = $using:created
+        $failures = $using:failures
+        $journalLock = $using:journalLock
+        $JournalPath = $using:JournalPath
+        ${function:Invoke-GraphBatch} = $using:invokeGraphBatch
+        ${function:Add-JournalEntries} = $using:addJournalEntries
+        ${function:New-JournalEntry} = $using:newJournalEntry
+        ${function:Get-BatchError} = $using:getBatchError
+
+        # Journal the attempt before the POST: a crash mid-batch leaves 'submitted' rows,
+        # which the next run's existence check turns into 'created' instead of 'exists'
+        Add-JournalEntries @($chunk | ForEach-Object { New-JournalEntry $_.Row 'submitted' $null $null })
 
-    # Manager (by UPN)
-    if ($ManagerUPN) {
         try {
-            $manager = Get-MgUser -Filter "userPrincipalName eq '$($ManagerUPN.Replace("'", "''"))'" -ErrorAction Stop
-            if ($manager) {
-                $ref = @{ '@odata.id' = "https://graph.microsoft.com/v1.0/users/$($manager.Id)" }
-                Set-MgUserManagerByRef -UserId $newUser.Id -BodyParameter $ref
-                Write-Host "   - ✅ Manager set: $ManagerUPN"
-            }
+            $responses = Invoke-GraphBatch -Requests @($chunk | ForEach-Object { $_.Request })
         } catch {
-            Write-Host "❌ Manager assignment failed ($ManagerUPN): $($_.Exception.Message)" -ForegroundColor Yellow
+            $responses = @{}
         }
-    }
 
-    # Sponsors (beta, comma/semicolon separated list)
-    if ($SponsorsRaw) {
-        $sponsorUPNs = $SponsorsRaw -split '[,;]'
-        foreach ($s in $sponsorUPNs) {
-            $s = $s.Trim()
-            if (-not $s) { continue }
-            try {
-                $sObj = Get-MgUser -Filter "userPrincipalName eq '$($s.Replace("'", "''"))'" -ErrorAction Stop
-                if ($sObj) {
-                    $body = @{ '@odata.id' = "https://graph.microsoft.com/v1.0/users/$($sObj.Id)" }
-                    Invoke-MgGraphRequest -Method POST -Uri "https://graph.microsoft.com/beta/users/$($newUser.Id)/sponsors/`$ref" -Body $body
-                    Write-Host "   - ✅ Sponsor added: $s"
-                }
-            } catch {
-                Write-Host "❌ Sponsor add failed ($s): $($_.Exception.Message)" -ForegroundColor Yellow
+        $entries = [System.Collections.Generic.List[object]]::new()
+        foreach ($item in $chunk) {
+            $row = $item.Row
+            $r = $responses[$item.Request.id]
+            if ($r -and $r.status -eq 201) {
+                $row.Id = $r.body.id
+                $entries.Add((New-JournalEntry $row 'created' $row.Id $null))
+                $created.Add($row)
+                $note = if ($item.Generated) { "generated password" } else { "password from CSV" }
+                Write-Host "✅ Created: $($row.UPN) (User ID: $($row.Id)) — ${note}: $($item.Password)" -ForegroundColor Green
+            } else {
+                $err = Get-BatchError $r
+                $entries.Add((New-JournalEntry $row 'failed' $null $err))
+                $failures.Add($row)
+                Write-Host "❌ Failed to create: $($row.UPN) - $err" -ForegroundColor Red
             }
         }
+
+        # Checkpoint after every batch
+        Add-JournalEntries $entries
+    } -ThrottleLimit $ThrottleLimit
+
+    $summary.created = $created.Count
+    $summary.failed = $failures.Count
+    foreach ($row in $created) { $toFinish.Add($row) }
+}
+
+# ------------------------------------------------------
+# Manager, sponsors and access package ($batch), journaled as 'done' per chunk
+# ------------------------------------------------------
+if ($toFinish.Count -gt 0) {
+    Write-Host "`n🔗 Setting manager / sponsors / access package for $($toFinish.Count) user(s)..."
+
+    # UPN → object id, users created in this run first (not necessarily replicated yet)
+    $ids = @{}
+    foreach ($row in $toFinish) { $ids[$row.UPN.ToLowerInvariant()] = $row.Id }
+
+    $refUpns = @($toFinish | ForEach-Object {
+        if ($_.ManagerUPN) { $_.ManagerUPN }
+        if ($_.SponsorsRaw) { $_.SponsorsRaw -split '[,;]' | ForEach-Object { $_.Trim() } | Where-Object { $_ } }
+    } | ForEach-Object { $_.ToLowerInvariant() } | Where-Object { -not $ids.ContainsKey($_) } | Select-Object -Unique)
+
+    if ($refUpns.Count -gt 0) {
+        $lookup = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $refUpns.Count; $i++) {
+            @{ id = "$i"; method = "GET"; url = "/users/$([uri]::EscapeDataString($refUpns[$i]))?`$select=id" }
+        })
+        for ($i = 0; $i -lt $refUpns.Count; $i++) {
+            if (Test-Ok $lookup["$i"]) { $ids[$refUpns[$i]] = $lookup["$i"].body.id }
+        }
     }
 
-    # ------------------------------------------------------
-    # Access Package assignment
-    # ------------------------------------------------------
-    if ($AccessPackage) {
-        Write-Host "🧩 CSV Access Package detected: '$AccessPackage'" -ForegroundColor Cyan
+    # Access packages by name (same JSON the single-user flow uses)
+    $accessPackages = @{}
+    $jsonPath = Join-Path $PSScriptRoot "..\JSONs\AccessPackages.json"
+    if (($toFinish | Where-Object { $_.AccessPackage }) -and (Test-Path $jsonPath)) {
+        try {
+            foreach ($ap in (Get-Content -Raw -Path $jsonPath | ConvertFrom-Json)) {
+                $accessPackages[$ap.AccessPackageName] = $ap
+            }
+        } catch {
+            Write-Host "⚠️ Failed to read or parse AccessPackages.json: $_" -ForegroundColor Yellow
+        }
+    }
 
-        # Locate the AccessPackages.json file (same folder structure)
-        $scriptDir = Split-Path -Parent $MyInvocation.MyCommand.Path
-        $jsonPath  = Join-Path $scriptDir "..\JSONs\AccessPackages.json"
+    for ($i = 0; $i -lt $toFinish.Count; $i += 20) {
+        $end = [math]::Min($i + 19, $toFinish.Count - 1)
+        $chunk = @($toFinish[$i..$end])
+        $v1 = [System.Collections.Generic.List[object]]::new()
+        $beta = [System.Collections.Generic.List[object]]::new()
+        $notes = @{}
+
+        foreach ($row in $chunk) {
+            $notes[$row.Hash] = [System.Collections.Generic.List[string]]::new()
+
+            if ($row.ManagerUPN) {
+                $mgrId = $ids[$row.ManagerUPN.ToLowerInvariant()]
+                if ($mgrId) {
+                    $v1.Add(@{
+                        id = "$($row.LineNo)_mgr"; method = "PUT"; url = "/users/$($row.Id)/manager/`$ref"
+                        headers = @{ "Content-Type" = "application/json" }
+                        body = @{ '@odata.id' = "https://graph.microsoft.com/v1.0/users/$mgrId" }
+                    })
+                } else {
+                    $notes[$row.Hash].Add("manager not found ($($row.ManagerUPN))")
+                }
+            }
 
-        if (Test-Path $jsonPath) {
-            try {
-                $jsonContent = Get-Content -Raw -Path $jsonPath | ConvertFrom-Json
-                $ap = $jsonContent | Where-Object { $_.AccessPackageName -eq $AccessPackage }
+            if ($row.SponsorsRaw) {
+                $n = 0
+                foreach ($s in ($row.SponsorsRaw -split '[,;]' | ForEach-Object { $_.Trim() } | Where-Object { $_ })) {
+                    $sId = $ids[$s.ToLowerInvariant()]
+                    if (-not $sId) { $notes[$row.Hash].Add("sponsor not found ($s)"); continue }
+                    $n++
+                    $beta.Add(@{
+                        id = "$($row.LineNo)_sp$n"; method = "POST"; url = "/users/$($row.Id)/sponsors/`$ref"
+                        headers = @{ "Content-Type" = "application/json" }
+                        body = @{ '@odata.id' = "https://graph.microsoft.com/v1.0/users/$sId" }
+                    })
+                }
+            }
 
+            if ($row.AccessPackage) {
+                $ap = $accessPackages[$row.AccessPackage]
                 if ($ap) {
                     $policy = $ap.Policies | Where-Object { $_.Status -eq "Enabled" } | Select-Object -First 1
                     if (-not $policy) { $policy = $ap.Policies[0] }
+                    $v1.Add(@{
+                        id = "$($row.LineNo)_ap"; method = "POST"; url = "/identityGovernance/entitlementManagement/assignmentRequests"
+                        headers = @{ "Content-Type" = "application/json" }
+                        body = @{
+                            requestType = "AdminAdd"
+                            assignment  = @{
+                                targetId           = $row.Id
+                                assignmentPolicyId = $policy.PolicyId
+                                accessPackageId    = $ap.AccessPackageId
+                            }
+                        }
+                    })
+                } else {
+                    $notes[$row.Hash].Add("access package '$($row.AccessPackage)' not found in JSON")
+                }
+            }
+        }
 
-                    $accessPackageId = $ap.AccessPackageId
-                    $policyId = $policy.PolicyId
-
-                    Write-Host "🎁 Assigning Access Package '$AccessPackage' (AccessPackageID: $accessPackageId | PolicyID: $policyId)..." -ForegroundColor Cyan
+        $responses = @{}
+        try {
+            if ($v1.Count -gt 0) { $responses += Invoke-GraphBatch -Requests $v1 -RetryNotFound }
+            if ($beta.Count -gt 0) { $responses += Invoke-GraphBatch -Requests $beta -Api 'beta' -RetryNotFound }
+        } catch {
+            Write-Host "❌ Follow-up batch failed: $($_.Exception.Message) — rows stay pending for the next run." -ForegroundColor Red
+            continue
+        }
 
-                    # Build the request body
-                    $params = @{
-                        requestType = "AdminAdd"
-                        assignment  = @{
-                            targetId           = $newUser.Id
-                            assignmentPolicyId = $policyId
-                            accessPackageId    = $accessPackageId
-                        }
-                    }
-
-                    try {
-                        $response = New-MgEntitlementManagementAssignmentRequest -BodyParameter $params -ErrorAction Stop
-                        if ($response.id) {
-                            Write-Host "   - ✅ Access Package assigned successfully (Request ID: $($response.id))" -ForegroundColor Green
-                        } else {
-                            Write-Host "   - ⚠️ Access Package request succeeded but no ID returned. Verify in Entra portal." -ForegroundColor Yellow
-                        }
-                    } catch {
-                        Write-Host "❌ Failed to assign Access Package '$AccessPackage' - $($_.Exception.Message)" -ForegroundColor Red
-                        if ($_.ErrorDetails.Message) {
-                            Write-Host "🪣 Graph Response: $($_.ErrorDetails.Message)" -ForegroundColor DarkYellow
-                        }
-                    }
+        $entries = [System.Collections.Generic.List[object]]::new()
+        foreach ($row in $chunk) {
+            $parts = [System.Collections.Generic.List[string]]::new()
+            foreach ($key in @($responses.Keys | Where-Object { $_ -like "$($row.LineNo)_*" })) {
+                $r = $responses[$key]
+                $what = switch -Wildcard ($key) { "*_mgr" { "manager" } "*_ap" { "access package" } default { "sponsor" } }
+                # An existing sponsor link comes back as 400 "already exist"
+                if ((Test-Ok $r) -or ($what -eq "sponsor" -and "$($r.body.error.message)" -like "*already exist*")) {
+                    $parts.Add("$what ✅")
                 } else {
-                    Write-Host "⚠️ Access Package '$AccessPackage' not found in JSON." -ForegroundColor Yellow
+                    $notes[$row.Hash].Add("$what failed — $(Get-BatchError $r)")
                 }
-            } catch {
-                Write-Host "⚠️ Failed to read or parse AccessPackages.json: $_" -ForegroundColor Yellow
             }
-        } else {
-            Write-Host "⚠️ AccessPackages.json not found in $jsonPath" -ForegroundColor Yellow
+
+            $warn = $notes[$row.Hash]
+            $entries.Add((New-JournalEntry $row 'done' $row.Id ($warn -join '; ')))
+            $summary.done++
+            $line = "   - $($row.UPN): " + $(if ($parts.Count) { $parts -join ', ' } else { "nothing to set" })
+            Write-Host $line
+            foreach ($w in $warn) { Write-Host "     ⚠️ $w" -ForegroundColor Yellow }
         }
+
+        # Checkpoint after every batch
+        Add-JournalEntries $entries
     }
 }
 
-# Clean up parser
-$parser.Close()
\ No newline at end of file
+# ------------------------------------------------------
+# Summary
+# ------------------------------------------------------
+$duration = (Get-Date) - $startTime
+Write-Host "`n============================================================"
+Write-Host ("Created: {0} | Already existing: {1} | Failed: {2} | Completed: {3} | Skipped (journal): {4}" -f `
+    $summary.created, $summary.exists, $summary.failed, $summary.done, $skipped)
+Write-Host "Journal: $JournalPath"
+if ($summary.failed -gt 0) {
+    Write-Host "Re-run the same CSV to retry failed rows; completed rows are skipped." -ForegroundColor Yellow
+}
+Write-Host "⏱️ Total duration: $($duration.ToString())"
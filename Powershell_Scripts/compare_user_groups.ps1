@@ -1,8 +1,7 @@
 param(
-    [Parameter(Mandatory = $true)]
     [string]$User1,
-    [Parameter(Mandatory = $true)]
-    [string]$User2
+    [string]$User2,
+    [string[]]$Users   # N-way mode: many UPNs, memberships fetched through $batch
 )
 
 $ErrorActionPreference = "Stop"
@@ -50,6 +49,76 @@ function Get-EntraUserGroups {
     }
 }
 
+# 2️⃣b N-way mode: transitive groups of every UPN, 20 users per $batch call, pages followed per user
+function Get-EntraUsersGroupsBatch {
+    param([string[]]$UPNs)
+
+    $memberships = [ordered]@{}
+    $pending = [System.Collections.Generic.List[object]]::new()
+    for ($i = 0; $i -lt $UPNs.Count; $i++) {
+        $memberships[$UPNs[$i]] = [System.Collections.Generic.List[object]]::new()
+        $pending.Add(@{
+            id  = "$i"
+            upn = $UPNs[$i]
+            url = "/users/$($UPNs[$i])/transitiveMemberOf/microsoft.graph.group?`$select=id,displayName&`$top=999"
+        })
+    }
+
+    $attempt = 0
+    while ($pending.Count -gt 0 -and $attempt -lt 6) {
+        $attempt++
+        $current = @($pending)
+        $pending = [System.Collections.Generic.List[object]]::new()
+        $retry = $false
+
+        for ($i = 0; $i -lt $current.Count; $i += 20) {
+            $end = [math]::Min($i + 19, $current.Count - 1)
+            $chunk = @($current[$i..$end])
+            $body = @{ requests = @($chunk | ForEach-Object { @{ id = $_.id; method = "GET"; url = $_.url } }) } |
+                ConvertTo-Json -Depth 5
+            $result = Invoke-MgGraphRequest -Method POST -Uri 'https://graph.microsoft.com/v1.0/$batch' `
+                -Body $body -ContentType 'application/json'
+
+            foreach ($r in $result.responses) {
+                $req = $chunk | Where-Object { $_.id -eq $r.id } | Select-Object -First 1
+                if ($r.status -eq 200) {
+                    foreach ($g in $r.body.value) {
+                        $memberships[$req.upn].Add([ordered]@{ Id = $g.id; DisplayName = $g.displayName })
+                    }
+                    $next = $r.body.'@odata.nextLink'
+                    if ($next) {
+                        $pending.Add(@{ id = $req.id; upn = $req.upn; url = $next.Replace('https://graph.microsoft.com/v1.0', '') })
+                    }
+                } elseif ($r.status -eq 429 -or $r.status -ge 500) {
+                    $pending.Add($req)
+                    $retry = $true
+                } else {
+                    Write-Warning "⚠️ Could not read groups for $($req.upn) (HTTP $($r.status))"
+                }
+            }
+        }
+
+        # Pages are fetched right away, throttled requests wait a little
+        if ($retry) { Start-Sleep -Seconds (5 * $attempt) } else { $attempt = 0 }
+    }
+
+    return $memberships
+}
+
+if ($Users) {
+    # If Python sends "user1,user2", split it into an array
+    $upns = @($Users | ForEach-Object { $_ -split "[,; ]+" } | ForEach-Object { $_.Trim() } | Where-Object { $_ } |
+        Select-Object -Unique)
+
+    $result = [ordered]@{ Memberships = Get-EntraUsersGroupsBatch -UPNs $upns }
+    $result | ConvertTo-Json -Depth 6 | Out-String
+    return
+}
+
+if (-not $User1 -or -not $User2) {
+    throw "Specify -User1 and -User2, or -Users for an N-way comparison."
+}
+
 # 3️⃣ Compare memberships
 $user1Groups = Get-EntraUserGroups -UPN $User1
 $user2Groups = Get-EntraUserGroups -UPN $User2
@@ -4,16 +4,24 @@
 # =====================================================================
 
 param(
-    [Parameter(Mandatory = $true)]
-    [string[]]$upn   # Accepts one OR many UPNs
+    [string[]]$upn,              # Accepts one OR many UPNs
+    [string]$UpnFile,            # Optional text file, one UPN per line (large selections exceed the command-line limit)
+    [int]$ThrottleLimit = 4      # Parallel Exchange Online runspaces
 )
 
 # If Python sends "user1,user2", split it into an array
 if ($upn.Count -eq 1 -and $upn[0] -like "*,*") {
     $upn = $upn[0] -split ","
 }
+if ($UpnFile) {
+    $upn = @($upn) + @(Get-Content -LiteralPath $UpnFile -Encoding UTF8)
+}
 
-$upns = $upn
+$upns = @($upn | ForEach-Object { "$_".Trim() } | Where-Object { $_ } | Select-Object -Unique)
+if ($upns.Count -eq 0) {
+    Write-Host "❌ No UPN supplied." -ForegroundColor Red
+    return
+}
 
 $PSStyle.OutputRendering = 'PlainText'
 
@@ -44,248 +52,357 @@ try {
     Write-Host "⚠️ Exchange Online not available or insufficient permissions. DL cleanup will be skipped." -ForegroundColor Cyan
 }
 
-foreach ($u in $upns) {
-    Write-Host "`n============================================================"
-    Write-Host "Processing: $u"
-    Write-Host "============================================================`n"
-
-    # --- Validate user ---
-    $user = Get-MgUser -UserId $u -ErrorAction SilentlyContinue
-    if (-not $user) {
-        Write-Host "❌ User '$u' not found." -ForegroundColor Red
-        continue
-    }
+$adminUpn = if ($exoAvailable) { (Get-ConnectionInformation | Select-Object -First 1).UserPrincipalName } else { $null }
+$startTime = Get-Date
+
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
 
-    # --- Disable the user ---
-    Write-Host "Disabling account: $($user.DisplayName) <$($user.UserPrincipalName)>"
-    Update-MgUser -UserId $user.Id -AccountEnabled:$false
-    Write-Host "✅ User has been disabled successfully." -ForegroundColor Green
-
-    # =================================================================
-    # GROUP MEMBERSHIPS: Remove user from all direct groups
-    #  - Security / non-mail-enabled      -> Graph
-    #  - Microsoft 365 "Unified" groups   -> EXO Remove-UnifiedGroupLinks
-    #  - Mail-enabled security / DL       -> EXO Remove-DistributionGroupMember
-    #  - On-prem synced groups            -> report (must remove on-prem)
-    # =================================================================
-
-    $dynamic   = @()
-    $failed    = @()
-    $skipped   = @()
-    $exoTried  = $false
-
-    $memberships = Get-MgUserMemberOfAsGroup -UserId $user.Id -All
-    if (-not $memberships) {
-        Write-Host "User is not a direct member of any groups." -ForegroundColor Yellow
+function New-JsonRequest {
+    param([string]$id, [string]$method, [string]$url, $body)
+
+    $req = @{ id = $id; method = $method; url = $url }
+    if ($null -ne $body) {
+        $req.headers = @{ "Content-Type" = "application/json" }
+        $req.body = $body
     }
-    else {
-        Write-Host "User is direct member of $($memberships.Count) groups. Attempting removal..."
+    return $req
+}
 
-        foreach ($g in $memberships) {
-            # Pull full group properties we need to decide the path
-            $grp = Get-MgGroup -GroupId $g.Id -Property "id,displayName,groupTypes,mailEnabled,securityEnabled,onPremisesSyncEnabled,membershipRule,mail" -ErrorAction SilentlyContinue
+function Test-Ok($response) { return $response -and $response.status -ge 200 -and $response.status -lt 300 }
 
-            if (-not $grp) {
-                $failed += [PSCustomObject]@{ DisplayName = $g.DisplayName; Id = $g.Id; Error = "Lookup failed" }
-                continue
-            }
+function Get-BatchError($response) {
+    if (-not $response) { return "no response" }
+    $msg = $response.body.error.message
+    return $(if ($msg) { "HTTP $($response.status): $msg" } else { "HTTP $($response.status)" })
+}
 
-            # --- Dynamic groups: cannot remove a specific member
-            if ($grp.membershipRule) {
-                $dynamic += $grp
-                Write-Host "⚠️ Dynamic group (cannot remove manually): $($grp.DisplayName)" -ForegroundColor Cyan
-                continue
-            }
+# Per-user report, filled stage by stage
+$report = [ordered]@{}
+foreach ($u in $upns) {
+    $report[$u] = [ordered]@{
+        UPN = $u; Id = $null; DisplayName = $null; Status = "Pending"
+        Disabled = $false; SessionsRevoked = $false
+        GroupsRemoved = 0; Dynamic = [System.Collections.Generic.List[string]]::new()
+        Hybrid = [System.Collections.Generic.List[string]]::new()
+        Failed = [System.Collections.Generic.List[string]]::new()
+        ExchangeGroups = [System.Collections.Generic.List[object]]::new()
+        Manager = "None"; RolesRemoved = 0; EligibleRoles = 0; Licenses = 0; AccessPackages = 0
+        RemainingGroups = $null
+    }
+}
 
-            # --- On-prem synced groups: must be changed on-prem
-            if ($grp.onPremisesSyncEnabled) {
-                $skipped += [PSCustomObject]@{ DisplayName = $grp.DisplayName; Id = $grp.Id; Reason = "On-prem synced (hybrid) – modify in on-prem AD" }
-                Write-Host "⏭️ Hybrid group (on-prem synced): $($grp.DisplayName) — must remove on-prem." -ForegroundColor DarkYellow
-                continue
-            }
+function Write-UserResult {
+    param($r)
 
-            $isUnified = ($grp.groupTypes -contains "Unified")
-            $isMailEnabled = [bool]$grp.mailEnabled
+    if ($r.Status -eq "NotFound") {
+        Write-Host "❌ $($r.UPN) — user not found." -ForegroundColor Red
+        return
+    }
 
-            try {
-                if ($isUnified) {
-                    # Microsoft 365 Group (Unified) – use EXO
-                    if (-not $exoAvailable) { throw "Exchange Online not connected" }
-                    $exoTried = $true
-                    # Use identity by SMTP address when available; fall back to DisplayName
-                    $identity = if ($grp.mail) { $grp.mail } else { $grp.DisplayName }
-                    Remove-UnifiedGroupLinks -Identity $identity -LinkType Members -Links $user.UserPrincipalName -Confirm:$false -ErrorAction Stop
-                    Write-Host "Removed from M365 Group (Unified): $($grp.DisplayName)" -ForegroundColor Yellow
-                }
-                elseif ($isMailEnabled) {
-                    # Mail-enabled security group / Distribution list – use EXO
-                    if (-not $exoAvailable) { throw "Exchange Online not connected" }
-                    $exoTried = $true
-                    $identity = if ($grp.mail) { $grp.mail } else { $grp.DisplayName }
-                    Remove-DistributionGroupMember -Identity $identity `
-                        -Member $user.UserPrincipalName `
-                        -BypassSecurityGroupManagerCheck `
-                        -Confirm:$false -ErrorAction Stop
-                    Write-Host "Removed from mail-enabled group/DL: $($grp.DisplayName)" -ForegroundColor Yellow
-                }
-                else {
-                    # Plain security group – use Graph
-                    Remove-MgGroupMemberDirectoryObjectByRef -GroupId $grp.Id -DirectoryObjectId $user.Id -ErrorAction Stop
-                    Write-Host "Removed from security group: $($grp.DisplayName)" -ForegroundColor Yellow
-                }
-            }
-            catch {
-                $msg = $_.Exception.Message
-                $failed += [PSCustomObject]@{ DisplayName = $grp.DisplayName; Id = $grp.Id; Error = $msg }
-                Write-Host "❌ Could not remove from group: $($grp.DisplayName) — $msg" -ForegroundColor Red
-            }
-        }
+    $parts = @(
+        $(if ($r.Disabled) { "disabled" } else { "NOT disabled" }),
+        $(if ($r.SessionsRevoked) { "sessions revoked" } else { "sessions NOT revoked" }),
+        "$($r.GroupsRemoved) group(s) removed",
+        "manager: $($r.Manager)",
+        "$($r.RolesRemoved) role(s) removed",
+        "$($r.Licenses) license(s) removed",
+        "$($r.AccessPackages) access package(s) removed"
+    )
+
+    $color = if ($r.Failed.Count -gt 0 -or -not $r.Disabled) { "Yellow" } else { "Green" }
+    Write-Host "✅ $($r.DisplayName) <$($r.UPN)> — $($parts -join ', ')" -ForegroundColor $color
+    foreach ($g in $r.Dynamic) { Write-Host "   ⚠️ Dynamic group (cannot remove manually): $g" -ForegroundColor Cyan }
+    foreach ($g in $r.Hybrid)  { Write-Host "   ⏭️ Hybrid group (on-prem synced): $g — must remove on-prem." -ForegroundColor DarkYellow }
+    foreach ($f in $r.Failed)  { Write-Host "   ❌ $f" -ForegroundColor Red }
+    if ($r.EligibleRoles -gt 0) {
+        Write-Host "   ⚠️ $($r.EligibleRoles) eligible role(s) left — remove them via Entra PIM." -ForegroundColor Cyan
     }
+}
 
-    if ($exoTried -eq $false -and $exoAvailable -eq $false) {
-        Write-Host "ℹ️ Note: Some groups may be mail-enabled/M365; connect to Exchange Online to remove those memberships." -ForegroundColor DarkYellow
+# =================================================================
+# STAGE 1: Resolve users ($batch)
+# =================================================================
+Write-Host "`n[1/6] Resolving $($upns.Count) user(s)..."
+$lookups = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $upns.Count; $i++) {
+    New-JsonRequest "u$i" "GET" "/users/$([uri]::EscapeDataString($upns[$i]))?`$select=id,displayName,userPrincipalName"
+})
+
+$users = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $upns.Count; $i++) {
+    $r = $lookups["u$i"]
+    $entry = $report[$upns[$i]]
+    if (Test-Ok $r) {
+        $entry.Id = $r.body.id
+        $entry.DisplayName = $r.body.displayName
+        $users.Add($entry)
+    } else {
+        $entry.Status = "NotFound"
+        Write-UserResult $entry
     }
+}
+if ($users.Count -eq 0) {
+    try { Disconnect-ExchangeOnline -Confirm:$false -ErrorAction SilentlyContinue } catch {}
+    Disconnect-MgGraph | Out-Null
+    return
+}
+
+# =================================================================
+# STAGE 2: Disable accounts + revoke sessions ($batch)
+# =================================================================
+Write-Host "[2/6] Disabling $($users.Count) account(s) and revoking sessions..."
+$requests = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $users.Count; $i++) {
+    $requests.Add((New-JsonRequest "d$i" "PATCH" "/users/$($users[$i].Id)" @{ accountEnabled = $false }))
+    $requests.Add((New-JsonRequest "r$i" "POST" "/users/$($users[$i].Id)/revokeSignInSessions" @{}))
+}
+$writes = Invoke-GraphBatch -Requests $requests
+for ($i = 0; $i -lt $users.Count; $i++) {
+    $u = $users[$i]
+    $u.Disabled = Test-Ok $writes["d$i"]
+    $u.SessionsRevoked = Test-Ok $writes["r$i"]
+    if (-not $u.Disabled) { $u.Failed.Add("Disable failed — $(Get-BatchError $writes["d$i"])") }
+    if (-not $u.SessionsRevoked) { $u.Failed.Add("Session revocation failed — $(Get-BatchError $writes["r$i"])") }
+}
 
-    # =================================================================
-    # MANAGER: Remove manager relationship
-    # =================================================================
-    try {
-        $currentManager = Get-MgUserManager -UserId $user.Id -ErrorAction SilentlyContinue
-        if ($currentManager) {
-            Remove-MgUserManagerByRef -UserId $user.Id -ErrorAction Stop
-            Write-Host "Manager removed." -ForegroundColor Yellow
-        } else {
-            Write-Host "No manager assigned to user." -ForegroundColor Green
+# =================================================================
+# STAGE 3: Discover memberships, manager, roles, licenses, access packages ($batch)
+# =================================================================
+Write-Host "[3/6] Reading memberships, manager, roles, licenses and access packages..."
+$groupSelect = "id,displayName,groupTypes,mailEnabled,securityEnabled,onPremisesSyncEnabled,membershipRule,mail"
+$requests = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $users.Count; $i++) {
+    $id = $users[$i].Id
+    $requests.Add((New-JsonRequest "g$i" "GET" "/users/$id/memberOf/microsoft.graph.group?`$select=$groupSelect&`$top=999"))
+    $requests.Add((New-JsonRequest "m$i" "GET" "/users/$id/manager?`$select=id"))
+    $requests.Add((New-JsonRequest "a$i" "GET" "/roleManagement/directory/roleAssignments?`$filter=principalId eq '$id'"))
+    $requests.Add((New-JsonRequest "e$i" "GET" "/roleManagement/directory/roleEligibilitySchedules?`$filter=principalId eq '$id'"))
+    $requests.Add((New-JsonRequest "l$i" "GET" "/users/$id/licenseDetails?`$select=skuId"))
+    $requests.Add((New-JsonRequest "p$i" "GET" "/identityGovernance/entitlementManagement/assignments?`$filter=target/objectId eq '$id'"))
+}
+$found = Invoke-GraphBatch -Requests $requests
+
+# =================================================================
+# STAGE 4: Graph removals ($batch; security-group removals grouped per group)
+# =================================================================
+Write-Host "[4/6] Removing Graph memberships, manager, roles, licenses and access packages..."
+$removals = [System.Collections.Generic.List[object]]::new()
+$owners = @{}   # request id -> @{ user; label; kind }
+$securityRemovals = [System.Collections.Generic.List[object]]::new()
+
+for ($i = 0; $i -lt $users.Count; $i++) {
+    $u = $users[$i]
+
+    # Groups (follow paging for users in more than 999 groups)
+    $groups = [System.Collections.Generic.List[object]]::new()
+    $page = $found["g$i"]
+    if (Test-Ok $page) {
+        $body = $page.body
+        while ($body) {
+            foreach ($g in $body.value) { $groups.Add($g) }
+            $body = if ($body.'@odata.nextLink') { Invoke-MgGraphRequest -Method GET -Uri $body.'@odata.nextLink' } else { $null }
         }
-    } catch {
-        Write-Host "❌ Could not remove manager — $($_.Exception.Message)" -ForegroundColor Red
+    } else {
+        $u.Failed.Add("Could not read group memberships — $(Get-BatchError $page)")
     }
 
-    # =================================================================
-    # EXCHANGE: Remove from all DLs (if EXO available)
-    # =================================================================
-    if ($exoAvailable) {
-        Write-Host "Checking for mail-enabled security groups / DL memberships..."
-        $allDLs  = Get-DistributionGroup -ResultSize Unlimited -ErrorAction SilentlyContinue
-        $userDLs = @()
-
-        foreach ($dl in $allDLs) {
-            try {
-                $members  = Get-DistributionGroupMember -Identity $dl.Identity -ResultSize Unlimited -ErrorAction Stop
-                $isMember = $members | Where-Object { $_.PrimarySmtpAddress -ieq $user.UserPrincipalName }
-                if ($isMember) { $userDLs += $dl }
-            } catch { }
+    foreach ($g in $groups) {
+        if ($g.membershipRule) { $u.Dynamic.Add($g.displayName); continue }
+        if ($g.onPremisesSyncEnabled) { $u.Hybrid.Add($g.displayName); continue }
+        if (($g.groupTypes -contains "Unified") -or $g.mailEnabled) {
+            # Microsoft 365 groups and mail-enabled groups / DLs go through Exchange Online
+            $u.ExchangeGroups.Add([pscustomobject]@{
+                DisplayName = $g.displayName
+                Identity    = if ($g.mail) { $g.mail } else { $g.displayName }
+                Unified     = [bool]($g.groupTypes -contains "Unified")
+            })
+            continue
         }
+        $securityRemovals.Add(@{ user = $u; group = $g })
+    }
 
-        if ($userDLs.Count -gt 0) {
-            Write-Host "User is member of $($userDLs.Count) DL(s). Removing..."
-            foreach ($dl in $userDLs) {
-                try {
-                    Remove-DistributionGroupMember -Identity $dl.Identity -Member $user.UserPrincipalName -Confirm:$false -ErrorAction Stop
-                    Write-Host "Removed from DL: $($dl.DisplayName)" -ForegroundColor Yellow
-                } catch {
-                    Write-Host "❌ Could not remove from DL: $($dl.DisplayName) — $($_.Exception.Message)" -ForegroundColor Red
-                }
-            }
-        } else {
-            Write-Host "No DL memberships found." -ForegroundColor Green
+    # Manager
+    $mgr = $found["m$i"]
+    if (Test-Ok $mgr) {
+        $rid = "mgr$i"
+        $removals.Add((New-JsonRequest $rid "DELETE" "/users/$($u.Id)/manager/`$ref"))
+        $owners[$rid] = @{ user = $u; kind = "manager"; label = "manager" }
+    }
+
+    # Active roles (eligible ones are reported only, as before)
+    $roles = $found["a$i"]
+    if (Test-Ok $roles) {
+        $n = 0
+        foreach ($ra in $roles.body.value) {
+            $rid = "ra$i-$n"; $n++
+            $removals.Add((New-JsonRequest $rid "DELETE" "/roleManagement/directory/roleAssignments/$($ra.id)"))
+            $owners[$rid] = @{ user = $u; kind = "role"; label = "role assignment RoleDefinitionId=$($ra.roleDefinitionId)" }
         }
     }
+    $eligible = $found["e$i"]
+    if (Test-Ok $eligible) { $u.EligibleRoles = @($eligible.body.value).Count }
+
+    # Licenses (one assignLicense call removes them all)
+    $lic = $found["l$i"]
+    if ((Test-Ok $lic) -and @($lic.body.value).Count -gt 0) {
+        $rid = "lic$i"
+        $skus = @($lic.body.value | ForEach-Object { $_.skuId })
+        $removals.Add((New-JsonRequest $rid "POST" "/users/$($u.Id)/assignLicense" @{ addLicenses = @(); removeLicenses = $skus }))
+        $owners[$rid] = @{ user = $u; kind = "licenses"; label = "licenses"; count = $skus.Count }
+    }
 
-    # =================================================================
-    # ROLES: Active + Eligible
-    # =================================================================
-    $activeRoles = Get-MgRoleManagementDirectoryRoleAssignment -Filter "principalId eq '$($user.Id)'" -All
-    if ($activeRoles) {
-        Write-Host "User has $($activeRoles.Count) active role assignment(s). Removing..."
-        foreach ($ra in $activeRoles) {
-            try {
-                Remove-MgRoleManagementDirectoryRoleAssignment -UnifiedRoleAssignmentId $ra.Id -ErrorAction Stop
-                Write-Host "Removed active role assignment: RoleDefinitionId=$($ra.RoleDefinitionId)" -ForegroundColor Yellow
-            } catch {
-                Write-Host "❌ Could not remove active role assignment — $($_.Exception.Message)" -ForegroundColor Red
-            }
+    # Access packages (delivered assignments only)
+    $aps = $found["p$i"]
+    if (Test-Ok $aps) {
+        $n = 0
+        foreach ($ap in ($aps.body.value | Where-Object { $_.state -eq "delivered" })) {
+            $rid = "ap$i-$n"; $n++
+            $removals.Add((New-JsonRequest $rid "POST" "/identityGovernance/entitlementManagement/assignmentRequests" `
+                @{ requestType = "adminRemove"; assignment = @{ id = $ap.id } }))
+            $owners[$rid] = @{ user = $u; kind = "accessPackage"; label = "access package $($ap.id)" }
         }
     } else {
-        Write-Host "No active role assignments found." -ForegroundColor Green
+        $u.Failed.Add("Could not query access packages — $(Get-BatchError $aps)")
+    }
+}
+
+# Security-group removals, grouped per group so every group is handled in consecutive calls
+$n = 0
+foreach ($byGroup in ($securityRemovals | Group-Object { $_.group.id })) {
+    foreach ($item in $byGroup.Group) {
+        $rid = "sg$n"; $n++
+        $removals.Add((New-JsonRequest $rid "DELETE" "/groups/$($item.group.id)/members/$($item.user.Id)/`$ref"))
+        $owners[$rid] = @{ user = $item.user; kind = "group"; label = "group $($item.group.displayName)" }
     }
+}
 
-    $eligibleRoles = Get-MgRoleManagementDirectoryRoleEligibilitySchedule -Filter "principalId eq '$($user.Id)'" -All
-    if ($eligibleRoles) {
-        Write-Host "User has $($eligibleRoles.Count) eligible role assignment(s)." -ForegroundColor Yellow
-        foreach ($er in $eligibleRoles) {
-            Write-Host "⚠️ Eligible role (cannot remove via Graph API): RoleDefinitionId=$($er.RoleDefinitionId)" -ForegroundColor Cyan
+$removed = if ($removals.Count -gt 0) { Invoke-GraphBatch -Requests $removals } else { @{} }
+foreach ($rid in $owners.Keys) {
+    $o = $owners[$rid]
+    $r = $removed[$rid]
+    $u = $o.user
+    if (Test-Ok $r) {
+        switch ($o.kind) {
+            "group"         { $u.GroupsRemoved++ }
+            "manager"       { $u.Manager = "removed" }
+            "role"          { $u.RolesRemoved++ }
+            "licenses"      { $u.Licenses = $o.count }
+            "accessPackage" { $u.AccessPackages++ }
         }
-        Write-Host "Note: Eligible role assignments must be removed via Entra PIM (portal) or beta Graph API." -ForegroundColor DarkGray
     } else {
-        Write-Host "No eligible role assignments found." -ForegroundColor Green
+        if ($o.kind -eq "manager") { $u.Manager = "removal failed" }
+        $u.Failed.Add("Could not remove $($o.label) — $(Get-BatchError $r)")
     }
+}
+
+# =================================================================
+# STAGE 5: Exchange Online (throttled parallel runspaces, one EXO connection each)
+#          Each user's result is printed as soon as their Exchange work is done.
+# =================================================================
+if (-not $exoAvailable) {
+    Write-Host "[5/6] ℹ️ Exchange Online not connected — M365 / mail-enabled groups and DLs are left in place.`n" -ForegroundColor DarkYellow
+    foreach ($u in $users) {
+        foreach ($g in $u.ExchangeGroups) { $u.Failed.Add("Exchange Online not connected — $($g.DisplayName) kept") }
+        $u.Status = "Done"
+        Write-UserResult $u
+    }
+} else {
+    Write-Host "[5/6] Exchange cleanup ($ThrottleLimit parallel runspaces)...`n"
+
+    $count = [math]::Max(1, [math]::Min($ThrottleLimit, $users.Count))
+    $chunks = [System.Collections.Generic.List[object]]::new()
+    for ($c = 0; $c -lt $count; $c++) {
+        $chunks.Add(@(for ($i = $c; $i -lt $users.Count; $i += $count) { $users[$i] }))
+    }
+
+    $writeUserResult = ${function:Write-UserResult}.ToString()
+
+    $chunks | ForEach-Object -Parallel {
+        $chunk = $_
+        $adminUpn = $using:adminUpn
+        ${function:Write-UserResult} = $using:writeUserResult
 
-    # =================================================================
-    # LICENSES
-    # =================================================================
-    $licenses = Get-MgUserLicenseDetail -UserId $user.Id -All
-    if ($licenses) {
-        Write-Host "User has $($licenses.Count) assigned license(s). Removing..."
-        $skuIds = $licenses.SkuId
         try {
-            Set-MgUserLicense -UserId $user.Id -AddLicenses @() -RemoveLicenses $skuIds
-            Write-Host "✅ Removed all licenses from user." -ForegroundColor Yellow
+            Import-Module ExchangeOnlineManagement -ErrorAction Stop
+            Connect-ExchangeOnline -UserPrincipalName $adminUpn -ShowBanner:$false -ErrorAction Stop
         } catch {
-            Write-Host "❌ Could not remove licenses — $($_.Exception.Message)" -ForegroundColor Red
+            foreach ($u in $chunk) {
+                $u.Failed.Add("Exchange Online connection failed — mail groups and DLs kept")
+                $u.Status = "Done"
+                Write-UserResult $u
+            }
+            return
         }
-    } else {
-        Write-Host "No licenses assigned." -ForegroundColor Green
-    }
 
-    # =================================================================
-    # ACCESS PACKAGES
-    # =================================================================
-    try {
-        $accessPackages = Get-MgEntitlementManagementAssignment `
-            -Filter "target/objectId eq '$($user.Id)' and state eq 'Delivered'" `
-            -ExpandProperty target -All -ErrorAction Stop
-
-        if ($accessPackages) {
-            Write-Host "User has $($accessPackages.Count) access package assignment(s). Removing..."
-            foreach ($package in $accessPackages) {
+        foreach ($u in $chunk) {
+            $handled = [System.Collections.Generic.HashSet[string]]::new([System.StringComparer]::OrdinalIgnoreCase)
+
+            # M365 / mail-enabled groups found through Graph
+            foreach ($g in $u.ExchangeGroups) {
+                [void]$handled.Add($g.Identity)
                 try {
-                    $params = @{ requestType = "adminRemove"; assignment = @{ id = $package.Id } }
-                    New-MgEntitlementManagementAssignmentRequest -BodyParameter $params -ErrorAction Stop
-                    Write-Host "Removed access package: $($package.Id)" -ForegroundColor Yellow
+                    if ($g.Unified) {
+                        Remove-UnifiedGroupLinks -Identity $g.Identity -LinkType Members -Links $u.UPN -Confirm:$false -ErrorAction Stop
+                    } else {
+                        Remove-DistributionGroupMember -Identity $g.Identity -Member $u.UPN `
+                            -BypassSecurityGroupManagerCheck -Confirm:$false -ErrorAction Stop
+                    }
+                    $u.GroupsRemoved++
                 } catch {
-                    Write-Host "❌ Could not remove access package $($package.Id) — $($_.Exception.Message)" -ForegroundColor Red
+                    $u.Failed.Add("Could not remove from $($g.DisplayName) — $($_.Exception.Message)")
                 }
             }
-        } else {
-            Write-Host "No access package assignments found." -ForegroundColor Green
-        }
-    } catch {
-        Write-Host "⚠️ Failed to query/remove access packages — $($_.Exception.Message)" -ForegroundColor Cyan
-    }
 
-    # =================================================================
-    # Verification (per user)
-    # =================================================================
-    Start-Sleep -Seconds 5
-    $remaining = Get-MgUserMemberOfAsGroup -UserId $user.Id -All
-    if (-not $remaining) {
-        Write-Host "🎯 Verification: user now has 0 direct group memberships (Graph)." -ForegroundColor Green
-    } else {
-        Write-Host "🔎 Verification: user still has $($remaining.Count) group(s):" -ForegroundColor Yellow
-        $remaining | ForEach-Object { Write-Host " - $($_.DisplayName) ($($_.Id))" }
-    }
+            # Any remaining DL membership, found with one recipient filter instead of scanning every DL
+            try {
+                $dn = (Get-User -Identity $u.UPN -ErrorAction Stop).DistinguishedName
+                $escapedDn = $dn.Replace("'", "''")
+                $dls = @(Get-Recipient -Filter "Members -eq '$escapedDn'" -ResultSize Unlimited `
+                    -RecipientTypeDetails MailUniversalDistributionGroup, MailUniversalSecurityGroup, MailNonUniversalGroup `
+                    -ErrorAction Stop)
+                foreach ($dl in $dls) {
+                    if ($handled.Contains([string]$dl.PrimarySmtpAddress)) { continue }
+                    try {
+                        Remove-DistributionGroupMember -Identity $dl.Identity -Member $u.UPN `
+                            -BypassSecurityGroupManagerCheck -Confirm:$false -ErrorAction Stop
+                        $u.GroupsRemoved++
+                    } catch {
+                        $u.Failed.Add("Could not remove from DL $($dl.DisplayName) — $($_.Exception.Message)")
+                    }
+                }
+            } catch {
+                $u.Failed.Add("DL lookup failed — $($_.Exception.Message)")
+            }
 
-    if ($dynamic.Count -gt 0) {
-        Write-Host "`nℹ️ Dynamic groups (rule-based, cannot be removed manually):"
-        $dynamic | ForEach-Object { Write-Host " - $($_.DisplayName)" }
-    }
-    if ($failed.Count -gt 0) {
-        Write-Host "`n❗ Groups that failed removal (check errors):"
-        $failed | ForEach-Object { Write-Host " - $($_.DisplayName): $($_.Error)" }
+            $u.Status = "Done"
+            Write-UserResult $u
+        }
+    } -ThrottleLimit $ThrottleLimit
+}
+
+# =================================================================
+# STAGE 6: Verification ($batch) — direct groups still left per user
+# =================================================================
+Write-Host "`n[6/6] Verifying remaining direct group memberships..."
+$check = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $users.Count; $i++) {
+    New-JsonRequest "v$i" "GET" "/users/$($users[$i].Id)/memberOf/microsoft.graph.group?`$select=id,displayName&`$top=999"
+})
+for ($i = 0; $i -lt $users.Count; $i++) {
+    $r = $check["v$i"]
+    if (-not (Test-Ok $r)) { continue }
+    $left = @($r.body.value)
+    $users[$i].RemainingGroups = $left.Count
+    if ($left.Count -gt 0) {
+        Write-Host "🔎 $($users[$i].UPN) still has $($left.Count) direct group(s): $(($left | ForEach-Object { $_.displayName }) -join ', ')" -ForegroundColor Yellow
     }
 }
 
+$duration = (Get-Date) - $startTime
+$done = @($report.Values | Where-Object { $_.Status -eq "Done" })
+$notFound = @($report.Values | Where-Object { $_.Status -eq "NotFound" })
+$withIssues = @($done | Where-Object { $_.Failed.Count -gt 0 -or -not $_.Disabled })
+Write-Host "`n🎯 Processed $($done.Count) user(s) in $($duration.ToString('hh\:mm\:ss')) — $($withIssues.Count) with issues, $($notFound.Count) not found." -ForegroundColor Green
+
 # Optional clean-up
 try { Disconnect-ExchangeOnline -Confirm:$false -ErrorAction SilentlyContinue } catch {}
-Disconnect-MgGraph | Out-Null
\ No newline at end of file
+Disconnect-MgGraph | Out-Null
@@ -1,6 +1,8 @@
 <#
 .SYNOPSIS
     Generate Temporary Access Pass(es) for one or more users.
+    Requests go 20 per $batch, batches run in parallel runspaces; each user's result
+    is emitted as a "##RESULT## {json}" line as soon as its batch completes.
 #>
 
 param(
@@ -8,13 +10,15 @@ param(
     [string[]]$UserPrincipalName,
 
     [int]$LifetimeInMinutes = 60,
-    [switch]$OneTimeUse
+    [switch]$OneTimeUse,
+    [int]$ThrottleLimit = 4      # Parallel $batch runspaces
 )
 
 # --- Handle comma-separated list ---
 if ($UserPrincipalName.Count -eq 1 -and $UserPrincipalName[0] -like "*,*") {
     $UserPrincipalName = $UserPrincipalName[0] -split ","
 }
+$UserPrincipalName = @($UserPrincipalName | ForEach-Object { $_.Trim() } | Where-Object { $_ } | Select-Object -Unique)
 
 Write-Host "`n🪪 Generating Temporary Access Pass(es)..." -ForegroundColor Cyan
 Write-Host "Connecting to Microsoft Graph..." -ForegroundColor Yellow
@@ -39,65 +43,87 @@ catch {
     [System.Environment]::Exit(1)
 }
 
-$results = @()
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
 
-foreach ($upn in $UserPrincipalName) {
-    Write-Host "`n→ Processing user: $upn" -ForegroundColor Cyan
-    try {
-        $user = Get-MgUser -UserId $upn -ErrorAction Stop
-
-        $startUtc  = (Get-Date).ToUniversalTime()
-        $expiryUtc = $startUtc.AddMinutes($LifetimeInMinutes)
+$body = @{
+    lifetimeInMinutes = $LifetimeInMinutes
+    isUsableOnce      = [bool]$OneTimeUse
+}
 
-        $body = @{
-            startDateTime      = $startUtc.ToString("yyyy-MM-ddTHH:mm:ssZ")
-            lifetimeInMinutes  = $LifetimeInMinutes
-            isUsableOnce       = [bool]$OneTimeUse
-        }
+$chunks = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $UserPrincipalName.Count; $i += 20) {
+    $end = [math]::Min($i + 19, $UserPrincipalName.Count - 1)
+    $chunks.Add(@($UserPrincipalName[$i..$end]))
+}
 
-        # Create TAP
-        $tap = New-MgUserAuthenticationTemporaryAccessPassMethod -UserId $user.Id -BodyParameter $body
+Write-Host "→ $($UserPrincipalName.Count) user(s), $($chunks.Count) batch(es), $ThrottleLimit in parallel`n" -ForegroundColor Cyan
 
-        # Try to fetch full TAP (may be empty)
-        $tapFull = Get-MgUserAuthenticationTemporaryAccessPassMethod -UserId $user.Id |
-            Sort-Object -Property startDateTime -Descending |
-            Select-Object -First 1
+$succeeded = [System.Collections.Concurrent.ConcurrentBag[string]]::new()
+$invokeGraphBatch = ${function:Invoke-GraphBatch}.ToString()
 
-        # Fallback expiration if null
-        $expiry = if ($tapFull.ExpirationDateTime) {
-            $tapFull.ExpirationDateTime
-        } else {
-            $expiryUtc.ToString("yyyy-MM-ddTHH:mm:ssZ")
-        }
+$chunks | ForEach-Object -Parallel {
+    $chunk = $_
+    $body = $using:body
+    $succeeded = $using:succeeded
+    ${function:Invoke-GraphBatch} = $using:invokeGraphBatch
 
-        $result = [PSCustomObject]@{
-            UserUPN             = $upn
-            TemporaryAccessPass = $tap.TemporaryAccessPass
-            ExpirationDateTime  = $expiry
-            OneTimeUse          = [bool]$tap.IsUsableOnce
-            Status              = "✅ Success"
+    $requests = @(for ($i = 0; $i -lt $chunk.Count; $i++) {
+        @{
+            id      = "$i"
+            method  = "POST"
+            url     = "/users/$([uri]::EscapeDataString($chunk[$i]))/authentication/temporaryAccessPassMethods"
+            headers = @{ "Content-Type" = "application/json" }
+            body    = $body
         }
-        $results += $result
+    })
 
-        Write-Host "   🔑 TAP: $($tap.TemporaryAccessPass)" -ForegroundColor Yellow
-        Write-Host "   ⏰ Expires: $($expiry)" -ForegroundColor DarkGray
+    try {
+        $responses = Invoke-GraphBatch -Requests $requests
+    } catch {
+        $responses = @{}
+        $batchError = $_.Exception.Message
     }
-    catch {
-        $results += [PSCustomObject]@{
-            UserUPN = $upn
-            TemporaryAccessPass = ""
-            ExpirationDateTime  = ""
-            OneTimeUse = $false
-            Status = "❌ Failed — $($_.Exception.Message)"
+
+    for ($i = 0; $i -lt $chunk.Count; $i++) {
+        $upn = $chunk[$i]
+        $r = $responses["$i"]
+
+        if ($r -and $r.status -eq 201) {
+            $tap = $r.body
+            # A TAP that starts immediately may come back without startDateTime: fall back to now + lifetime
+            $startUtc = if ($tap.startDateTime) { ([datetime]$tap.startDateTime).ToUniversalTime() } else { (Get-Date).ToUniversalTime() }
+            $lifetime = if ($tap.lifetimeInMinutes) { [int]$tap.lifetimeInMinutes } else { [int]$body.lifetimeInMinutes }
+            $expiry = $startUtc.AddMinutes($lifetime)
+            $result = [ordered]@{
+                UserUPN             = $upn
+                TemporaryAccessPass = $tap.temporaryAccessPass
+                ExpirationDateTime  = $expiry.ToString("yyyy-MM-ddTHH:mm:ssZ")
+                OneTimeUse          = [bool]$tap.isUsableOnce
+                Status              = "✅ Success"
+            }
+            $succeeded.Add($upn)
+            Write-Host "✅ TAP created for $upn (expires $($result.ExpirationDateTime))" -ForegroundColor Green
+        } else {
+            $msg = if ($r) { "HTTP $($r.status): $($r.body.error.message)" } else { $batchError }
+            $result = [ordered]@{
+                UserUPN             = $upn
+                TemporaryAccessPass = ""
+                ExpirationDateTime  = ""
+                OneTimeUse          = $false
+                Status              = "❌ Failed — $msg"
+            }
+            Write-Host "❌ Failed to create TAP for $upn — $msg" -ForegroundColor Red
         }
-        Write-Host "❌ Failed to create TAP for $upn — $($_.Exception.Message)" -ForegroundColor Red
+
+        # Machine-readable line: picked up by the app's results table, kept out of the console and log
+        Write-Host ("##RESULT## " + ($result | ConvertTo-Json -Compress))
     }
-}
+} -ThrottleLimit $ThrottleLimit
 
-# Print single summary JSON (no duplicates)
 Write-Host "`n────────────── Summary ──────────────" -ForegroundColor Cyan
-Write-Host ($results | ConvertTo-Json -Depth 3)
+Write-Host "TAP(s) created: $($succeeded.Count) / $($UserPrincipalName.Count)"
 Write-Host "─────────────────────────────────────" -ForegroundColor Cyan
 
 Disconnect-MgGraph | Out-Null
-[System.Environment]::Exit(0)
\ No newline at end of file
+[System.Environment]::Exit(0)
@@ -1,6 +1,8 @@
 param(
     [string[]]$UserUPNs,
-    [string[]]$GroupIDs
+    [string[]]$GroupIDs,
+    [string]$UserUPNsFile,  # Optional text file, one UPN per line (large selections exceed the command-line limit)
+    [string]$PairsFile      # Optional JSON file: [{ "UserUPN": ..., "GroupId": ... }] — only these user/group pairs are processed
 )
 
 # --- Normalize GroupIDs array ---
@@ -16,9 +18,12 @@ if ($GroupIDs -is [string]) {
         }
     }
 }
-$GroupIDs = $normalizedGroups | Select-Object -Unique
+$GroupIDs = @($normalizedGroups | Select-Object -Unique)
 
 # --- Normalize UserUPNs array ---
+if ($UserUPNsFile) {
+    $UserUPNs = @($UserUPNs) + @(Get-Content -LiteralPath $UserUPNsFile -Encoding UTF8) | Where-Object { $_ }
+}
 $normalizedUsers = @()
 if ($UserUPNs -is [string]) {
     $normalizedUsers = ($UserUPNs -split "[,; ]+") | ForEach-Object { $_.Trim() } | Where-Object { $_ }
@@ -31,7 +36,20 @@ if ($UserUPNs -is [string]) {
         }
     }
 }
-$UserUPNs = $normalizedUsers | Select-Object -Unique
+$UserUPNs = @($normalizedUsers | Select-Object -Unique)
+
+# --- Target groups per user (every group for every user, or the explicit pairs) ---
+$targets = [ordered]@{}
+if ($PairsFile) {
+    foreach ($pair in (Get-Content -LiteralPath $PairsFile -Raw -Encoding UTF8 | ConvertFrom-Json)) {
+        if (-not $targets.Contains($pair.UserUPN)) { $targets[$pair.UserUPN] = [System.Collections.Generic.List[string]]::new() }
+        $targets[$pair.UserUPN].Add($pair.GroupId)
+    }
+} else {
+    foreach ($upn in $UserUPNs) { $targets[$upn] = @($GroupIDs) }
+}
+$UserUPNs = @($targets.Keys)
+$GroupIDs = @($targets.Values | ForEach-Object { $_ } | Select-Object -Unique)
 
 $ErrorActionPreference = "Stop"
 $ProgressPreference = "SilentlyContinue"
@@ -39,7 +57,7 @@ $ProgressPreference = "SilentlyContinue"
 $InformationPreference = "SilentlyContinue"
 $WarningPreference = "SilentlyContinue"
 $VerbosePreference = "SilentlyContinue"
-$result = @()
+$result = [System.Collections.Generic.List[object]]::new()
 
 # --- Connect to Graph ---
 try {
@@ -51,84 +69,101 @@ try {
     Connect-MgGraph -Scopes "User.Read.All","Group.ReadWrite.All","Directory.ReadWrite.All" -NoWelcome | Out-Null
 }
 
-Import-Module Microsoft.Graph.Users -ErrorAction SilentlyContinue
-Import-Module Microsoft.Graph.Groups -ErrorAction SilentlyContinue
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
+
+function Add-PairResult {
+    param($upn, $userId, $groupId, $groupName, [string]$code, [string]$status)
+
+    $result.Add([PSCustomObject]@{
+        Phase     = "Remove"
+        UserUPN   = $upn
+        UserId    = $userId
+        GroupId   = $groupId
+        GroupName = $groupName
+        Result    = $code
+        Status    = $status
+    })
+}
+
+function Get-ErrorStatus {
+    param($response)
+
+    $msg = [string]$response.body.error.message
+    if ($response.status -eq 403 -or $msg -match "Insufficient privileges") { return "⚠️ Permission denied" }
+    if ($response.status -eq 400) { return "❌ Invalid request: $msg" }
+    return "❌ Group error: $msg"
+}
+
+# --- 1) Resolve users and groups in bulk ---
+$userRequests = @(for ($i = 0; $i -lt $UserUPNs.Count; $i++) {
+    @{ id = "u$i"; method = "GET"; url = "/users/$([uri]::EscapeDataString($UserUPNs[$i]))?`$select=id,userPrincipalName" }
+})
+$groupRequests = @(for ($i = 0; $i -lt $GroupIDs.Count; $i++) {
+    @{ id = "g$i"; method = "GET"; url = "/groups/$($GroupIDs[$i])?`$select=id,displayName,groupTypes" }
+})
 
+$lookups = if ($userRequests.Count + $groupRequests.Count -gt 0) { Invoke-GraphBatch -Requests ($userRequests + $groupRequests) } else { @{} }
+
+$userIds = @{}
+for ($i = 0; $i -lt $UserUPNs.Count; $i++) {
+    $r = $lookups["u$i"]
+    if ($r -and $r.status -eq 200) { $userIds[$UserUPNs[$i]] = $r.body.id }
+}
+
+$groups = @{}
+$groupErrors = @{}
+for ($i = 0; $i -lt $GroupIDs.Count; $i++) {
+    $r = $lookups["g$i"]
+    if ($r -and $r.status -eq 200) { $groups[$GroupIDs[$i]] = $r.body } else { $groupErrors[$GroupIDs[$i]] = $r }
+}
+
+# --- 2) One DELETE .../members/{id}/$ref per pair, 20 per $batch call ---
+$deletes = [System.Collections.Generic.List[object]]::new()
+$deletePairs = @{}
 foreach ($upn in $UserUPNs) {
-    try {
-        $escaped = $upn.Replace("'", "''")
-        $user = Get-MgUser -Filter "startswith(userPrincipalName,'$escaped')" -All |
-                Where-Object { $_.UserPrincipalName -ieq $upn }
-
-        if (-not $user) {
-            $result += [PSCustomObject]@{
-                Phase     = "Remove"
-                UserUPN   = $upn
-                GroupName = "N/A"
-                Status    = "❌ User not found"
-            }
+    $uid = $userIds[$upn]
+    if (-not $uid) {
+        Add-PairResult $upn $null $null "N/A" "notfound" "❌ User not found"
+        continue
+    }
+
+    foreach ($gid in ($targets[$upn] | Select-Object -Unique)) {
+        $g = $groups[$gid]
+        if (-not $g) {
+            $err = $groupErrors[$gid]
+            Add-PairResult $upn $uid $gid "N/A" "failed" $(if ($err -and $err.status -ne 404) { Get-ErrorStatus $err } else { "❌ Group not found" })
             continue
         }
-
-        foreach ($gid in $GroupIDs) {
-            try {
-                $group = Get-MgGroup -GroupId $gid -ErrorAction Stop
-
-                # Check membership first
-                $isMember = $false
-                try {
-                    $members = Get-MgGroupMember -GroupId $gid -All -ErrorAction Stop
-                    $isMember = $members | Where-Object { $_.Id -eq $user.Id } | ForEach-Object { $true } | Select-Object -First 1
-                } catch { }
-
-                if (-not $isMember) {
-                    $result += [PSCustomObject]@{
-                        Phase     = "Remove"
-                        UserUPN   = $upn
-                        GroupName = $group.DisplayName
-                        Status    = "ℹ️ Not a member"
-                    }
-                    continue
-                }
-
-                # Remove via REST: DELETE /groups/{id}/members/{userId}/$ref
-                $uri = "https://graph.microsoft.com/v1.0/groups/$($gid)/members/$($user.Id)/`$ref"
-                Invoke-MgGraphRequest -Method DELETE -Uri $uri -ErrorAction Stop
-
-                $result += [PSCustomObject]@{
-                    Phase     = "Remove"
-                    UserUPN   = $upn
-                    GroupName = $group.DisplayName
-                    Status    = "✅ Removed successfully"
-                }
-            }
-            catch {
-                $msg = $_.Exception.Message
-                $status = if ($msg -match "Insufficient privileges") { "⚠️ Permission denied" }
-                          elseif ($msg -match "BadRequest") { "❌ Invalid request" }
-                          else { "❌ Group error: $msg" }
-
-                $result += [PSCustomObject]@{
-                    Phase     = "Remove"
-                    UserUPN   = $upn
-                    GroupName = $group.DisplayName
-                    Status    = $status
-                }
-            }
+        if ($g.groupTypes -contains "DynamicMembership") {
+            Add-PairResult $upn $uid $gid $g.displayName "skipped" "⏭️ Skipped (Dynamic group)"
+            continue
         }
+
+        $id = "d$($deletes.Count)"
+        $deletePairs[$id] = @{ upn = $upn; uid = $uid; gid = $gid }
+        $deletes.Add(@{ id = $id; method = "DELETE"; url = "/groups/$gid/members/$uid/`$ref" })
     }
-    catch {
-        $result += [PSCustomObject]@{
-            Phase     = "Remove"
-            UserUPN   = $upn
-            GroupName = "N/A"
-            Status    = "❌ General error: $($_.Exception.Message)"
+}
+
+if ($deletes.Count -gt 0) {
+    $deleteResults = Invoke-GraphBatch -Requests $deletes
+    foreach ($id in $deletePairs.Keys) {
+        $pair = $deletePairs[$id]
+        $r = $deleteResults[$id]
+        $name = $groups[$pair.gid].displayName
+        if ($r -and $r.status -eq 204) {
+            Add-PairResult $pair.upn $pair.uid $pair.gid $name "removed" "✅ Removed successfully"
+        } elseif ($r -and $r.status -eq 404) {
+            Add-PairResult $pair.upn $pair.uid $pair.gid $name "notmember" "ℹ️ Not a member"
+        } else {
+            Add-PairResult $pair.upn $pair.uid $pair.gid $name "failed" $(if ($r) { Get-ErrorStatus $r } else { "❌ No response" })
         }
     }
 }
 
-if (-not $result) {
-    $result = @([PSCustomObject]@{
+if ($result.Count -eq 0) {
+    $result.Add([PSCustomObject]@{
         Phase     = "Remove"
         UserUPN   = "None"
         GroupName = "None"
@@ -139,8 +174,8 @@ if (-not $result) {
 try {
     # Force UTF-8 output and write pure JSON only
     [Console]::OutputEncoding = [System.Text.Encoding]::UTF8
-    ($result | ConvertTo-Json -Depth 6) | Write-Host
+    (ConvertTo-Json -InputObject @($result) -Depth 6) | Write-Host
 } catch {
     Write-Error "JSON serialization failed: $($_.Exception.Message)"
 }
-exit 0
\ No newline at end of file
+exit 0
@@ -5,9 +5,16 @@ param(
     [Parameter(Mandatory = $true)]
     [string]$NewPasswordBase64,
 
-    [switch]$NoForceChange
+    [switch]$NoForceChange,
+    [int]$ThrottleLimit = 4      # Parallel $batch runspaces
 )
 
+# Handle comma-separated input
+if ($UserPrincipalName.Count -eq 1 -and $UserPrincipalName[0] -like "*,*") {
+    $UserPrincipalName = $UserPrincipalName[0] -split ","
+}
+$UserPrincipalName = @($UserPrincipalName | ForEach-Object { $_.Trim() } | Where-Object { $_ } | Select-Object -Unique)
+
 # Determine if the user must change password
 $ForceChangeAtNextLogin = -not $NoForceChange
 
@@ -34,46 +41,84 @@ Connect-MgGraph -Scopes "User.ReadWrite.All","Directory.ReadWrite.All", "User-Pa
 $ctx = Get-MgContext
 Write-Host "✅ Connected as: $($ctx.Account)" -ForegroundColor Green
 
-$results = @()
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
 
-foreach ($upn in $UserPrincipalName) {
-    Write-Host "`n→ Processing user: $upn" -ForegroundColor Cyan
-    try {
-        $user = Get-MgUser -UserId $upn -ErrorAction Stop
-
-        $body = @{
-            passwordProfile = @{
-                forceChangePasswordNextSignIn = $ForceChangeAtNextLogin
-                password                      = $NewPassword
-            }
-        }
+$body = @{
+    passwordProfile = @{
+        forceChangePasswordNextSignIn = $ForceChangeAtNextLogin
+        password                      = $NewPassword
+    }
+}
 
-        Update-MgUser -UserId $user.Id -BodyParameter $body -ErrorAction Stop
+$chunks = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $UserPrincipalName.Count; $i += 20) {
+    $end = [math]::Min($i + 19, $UserPrincipalName.Count - 1)
+    $chunks.Add(@($UserPrincipalName[$i..$end]))
+}
 
-        $results += [PSCustomObject]@{
-            UserUPN     = $upn
-            NewPassword = $NewPassword
-            ForceChange = $ForceChangeAtNextLogin
-            Status      = "✅ Password reset successfully"
+Write-Host "→ $($UserPrincipalName.Count) user(s), $($chunks.Count) batch(es), $ThrottleLimit in parallel`n" -ForegroundColor Cyan
+
+$succeeded = [System.Collections.Concurrent.ConcurrentBag[string]]::new()
+$invokeGraphBatch = ${function:Invoke-GraphBatch}.ToString()
+
+$chunks | ForEach-Object -Parallel {
+    $chunk = $_
+    $body = $using:body
+    $succeeded = $using:succeeded
+    $NewPassword = $using:NewPassword
+    $ForceChangeAtNextLogin = $using:ForceChangeAtNextLogin
+    ${function:Invoke-GraphBatch} = $using:invokeGraphBatch
+
+    $requests = @(for ($i = 0; $i -lt $chunk.Count; $i++) {
+        @{
+            id      = "$i"
+            method  = "PATCH"
+            url     = "/users/$([uri]::EscapeDataString($chunk[$i]))"
+            headers = @{ "Content-Type" = "application/json" }
+            body    = $body
         }
+    })
 
-        Write-Host "   🔑 New Password: $NewPassword" -ForegroundColor Yellow
-
+    try {
+        $responses = Invoke-GraphBatch -Requests $requests
+    } catch {
+        $responses = @{}
+        $batchError = $_.Exception.Message
     }
-    catch {
-        $results += [PSCustomObject]@{
-            UserUPN     = $upn
-            NewPassword = ""
-            ForceChange = $ForceChangeAtNextLogin
-            Status      = "❌ Failed — $($_.Exception.Message)"
+
+    for ($i = 0; $i -lt $chunk.Count; $i++) {
+        $upn = $chunk[$i]
+        $r = $responses["$i"]
+
+        if ($r -and $r.status -ge 200 -and $r.status -lt 300) {
+            $result = [ordered]@{
+                UserUPN     = $upn
+                NewPassword = $NewPassword
+                ForceChange = $ForceChangeAtNextLogin
+                Status      = "✅ Password reset successfully"
+            }
+            $succeeded.Add($upn)
+            Write-Host "✅ Password reset for $upn" -ForegroundColor Green
+        } else {
+            $msg = if ($r) { "HTTP $($r.status): $($r.body.error.message)" } else { $batchError }
+            $result = [ordered]@{
+                UserUPN     = $upn
+                NewPassword = ""
+                ForceChange = $ForceChangeAtNextLogin
+                Status      = "❌ Failed — $msg"
+            }
+            Write-Host "❌ Failed to reset password for $upn — $msg" -ForegroundColor Red
         }
-        Write-Host "❌ Failed to reset password for $upn — $($_.Exception.Message)" -ForegroundColor Red
+
+        # Machine-readable line: picked up by the app's results table, kept out of the console and log
+        Write-Host ("##RESULT## " + ($result | ConvertTo-Json -Compress))
     }
-}
+} -ThrottleLimit $ThrottleLimit
 
 Write-Host "`n────────────── Summary ──────────────" -ForegroundColor Cyan
-Write-Host ($results | ConvertTo-Json -Depth 3)
+Write-Host "Password(s) reset: $($succeeded.Count) / $($UserPrincipalName.Count)"
 Write-Host "─────────────────────────────────────" -ForegroundColor Cyan
 
 Disconnect-MgGraph | Out-Null
-exit 0
\ No newline at end of file
+exit 0
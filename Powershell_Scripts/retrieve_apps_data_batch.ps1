@@ -2,44 +2,16 @@
 # Intune Detected Apps - Aggregated Summary Report
 # ==============================================
 
+param(
+    [switch]$Incremental  # Only query devices whose lastSyncDateTime moved since the cached run
+)
+
 # --- CONNECT ---
 Connect-MgGraph -Scopes "DeviceManagementManagedDevices.Read.All"
 Write-Host "[+] Connected to Microsoft Graph." -ForegroundColor Green
 
-# --- BATCH FUNCTION ---
-function Send-MgGraphBatchRequests {
-    param (
-        [Parameter(Mandatory)] $requests,
-        [Parameter()] [ValidateSet('beta','v1.0')] $Apiversion = 'v1.0',
-        [int] $batchSize = 20
-    )
-
-    $batches = [System.Collections.Generic.List[pscustomobject]]::new()
-    $responses = [System.Collections.Concurrent.ConcurrentBag[System.Object]]::new()
-
-    for ($i = 0; $i -lt $requests.Count; $i += $batchSize) {
-        $end = [math]::Min($i + $batchSize - 1, $requests.Count - 1)
-        $batches.Add(@{
-            'Method'      = 'Post'
-            'Uri'         = "https://graph.microsoft.com/$Apiversion/`$batch"
-            'ContentType' = 'application/json'
-            'Body'        = @{ 'requests' = @($requests[$i..$end]) } | ConvertTo-Json -Depth 5
-        })
-    }
-
-    $batches | ForEach-Object {
-        $result = Invoke-MgGraphRequest @_
-        foreach ($r in $result.responses) {
-            $responses.Add([pscustomobject]@{
-                requestid = $r.id
-                body      = $r.body
-                error     = $r.error
-            })
-        }
-    }
-
-    return $responses
-}
+# --- BATCH FUNCTION ($batch, 429/5xx retried) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
 
 # --- PREPARE OUTPUT FOLDER ---
 $ScriptDir = Split-Path -Parent $MyInvocation.MyCommand.Path
@@ -54,15 +26,18 @@ if (!(Test-Path $ReportFolder)) {
 $outputPath = Join-Path $ReportFolder ("{0}_IntuneDetectedApps.csv" -f $timestamp)
 Write-Host "Reports will be saved under: $ReportFolder" -ForegroundColor DarkCyan
 
+# ✅ Per-device cache: device id -> last sync time, name, user and detected app rows
+$cachePath = Join-Path $ReportFolder "DetectedAppsCache.json"
+
 # --- RETRIEVE DEVICES ---
 $scriptStart = Get-Date
 $timer = [System.Diagnostics.Stopwatch]::StartNew()
 Write-Host "[+] Retrieving all devices..."
 
-$devices = Invoke-MgGraphRequest -Method GET -Uri "https://graph.microsoft.com/beta/deviceManagement/managedDevices?`$select=id,deviceName" -OutputType PSObject
-$allDevices = @()
+$devices = Invoke-MgGraphRequest -Method GET -Uri "https://graph.microsoft.com/beta/deviceManagement/managedDevices?`$select=id,deviceName,userDisplayName,lastSyncDateTime" -OutputType PSObject
+$allDevices = [System.Collections.Generic.List[object]]::new()
 do {
-    $allDevices += $devices.value
+    foreach ($d in $devices.value) { $allDevices.Add($d) }
     $next = $devices.'@odata.nextLink'
     if ($next) {
         $devices = Invoke-MgGraphRequest -Uri $next -Method GET -OutputType PSObject
@@ -71,61 +46,124 @@ do {
 $devices = $allDevices
 Write-Host ("    → Retrieved {0} devices." -f $devices.Count)
 
+# --- LOAD CACHE ---
+$cache = @{}
+if ($Incremental -and (Test-Path $cachePath)) {
+    $cachedJson = Get-Content $cachePath -Raw | ConvertFrom-Json -AsHashtable
+    if ($cachedJson) { $cache = $cachedJson }
+    Write-Host ("    → Loaded cache for {0} devices." -f $cache.Count)
+}
+
+# Normalized UTC "o" string for a sync time, whether it arrives as [datetime] (Graph, or the cache read back
+# through ConvertFrom-Json, which turns ISO strings into dates) or as a string
+function Get-SyncKey($value) {
+    if (-not $value) { return "" }
+    if ($value -is [datetimeoffset]) { return $value.UtcDateTime.ToString("o") }
+    if ($value -is [datetime]) {
+        if ($value.Kind -eq [System.DateTimeKind]::Unspecified) {
+            $value = [datetime]::SpecifyKind($value, [System.DateTimeKind]::Utc)
+        }
+        return $value.ToUniversalTime().ToString("o")
+    }
+    $parsed = [datetimeoffset]::MinValue
+    if ([datetimeoffset]::TryParse([string]$value, [cultureinfo]::InvariantCulture,
+            [System.Globalization.DateTimeStyles]::AssumeUniversal, [ref]$parsed)) {
+        return $parsed.UtcDateTime.ToString("o")
+    }
+    return [string]$value
+}
+
+$devicesToQuery = [System.Collections.Generic.List[object]]::new()
+foreach ($device in $devices) {
+    $entry = $cache[$device.Id]
+    if (-not $entry -or (Get-SyncKey $entry.LastSync) -ne (Get-SyncKey $device.lastSyncDateTime)) {
+        $devicesToQuery.Add($device)
+    }
+}
+Write-Host ("    → {0} devices to query, {1} served from cache." -f $devicesToQuery.Count, ($devices.Count - $devicesToQuery.Count))
+
 # --- BUILD BATCH REQUESTS ---
 Write-Host "[+] Building batch requests..."
 $requests = [System.Collections.Generic.List[object]]::new()
-foreach ($device in $devices) {
+$queried = [System.Collections.Generic.HashSet[string]]::new()
+foreach ($device in $devicesToQuery) {
+    [void]$queried.Add($device.Id)
     $requests.Add(@{
         id     = "$($device.Id)_apps"
         method = "GET"
         url    = "/deviceManagement/managedDevices/$($device.Id)/detectedApps"
     })
-    $requests.Add(@{
-        id     = "$($device.Id)_user"
-        method = "GET"
-        url    = "/deviceManagement/managedDevices/$($device.Id)?`$select=userDisplayName"
-    })
 }
 
 # --- EXECUTE BATCHES ---
 Write-Host "[+] Sending batched requests..."
-$responsesList = Send-MgGraphBatchRequests -requests $requests -Apiversion 'beta'
-Write-Host ("    → Received {0} responses." -f $responsesList.Count)
+$responsesById = if ($requests.Count -gt 0) { Invoke-GraphBatch -Requests $requests -Api 'beta' } else { @{} }
+Write-Host ("    → Received {0} responses." -f $responsesById.Count)
 
-# --- PROCESS RAW DATA ---
+# --- UPDATE CACHE WITH FRESH RESULTS ---
 Write-Host "[+] Processing responses..."
-$appData = [System.Collections.Concurrent.ConcurrentBag[PSCustomObject]]::new()
+$freshCache = @{}
 
 foreach ($device in $devices) {
     $deviceId   = $device.Id
     $deviceName = $device.deviceName
 
-    $appsResponse = $responsesList | Where-Object { $_.requestid -eq "$deviceId`_apps" }
-    $userResponse = $responsesList | Where-Object { $_.requestid -eq "$deviceId`_user" }
+    $userDisplayName = if ($device.userDisplayName) { $device.userDisplayName } else { "N/A" }
 
-    $userDisplayName = if ($userResponse -and $userResponse.body.userDisplayName) {
-        $userResponse.body.userDisplayName
-    } else {
-        "N/A"
+    $appsResponse = $responsesById["$deviceId`_apps"]
+    if (-not $queried.Contains($deviceId)) {
+        # Unchanged device: keep cached rows, refresh name/user from the listing
+        if ($cache.ContainsKey($deviceId)) {
+            $entry = $cache[$deviceId]
+            $entry.DeviceName = $deviceName
+            $entry.UserDisplayName = $userDisplayName
+            $freshCache[$deviceId] = $entry
+        }
+        continue
     }
 
-    if ($appsResponse.error) {
-        Write-Warning "Error for $deviceName $($appsResponse.error.message)"
+    # $batch sub-responses carry failures in status/body.error: only a 200 is cached, anything else keeps the
+    # previous entry (its old LastSync makes the next -Incremental run query the device again)
+    if (-not $appsResponse -or $appsResponse.status -ne 200) {
+        $reason = if ($appsResponse) { "HTTP $($appsResponse.status) $($appsResponse.body.error.message)" } else { "no response" }
+        Write-Warning "Error for $deviceName $reason"
+        if ($cache.ContainsKey($deviceId)) { $freshCache[$deviceId] = $cache[$deviceId] }
         continue
     }
 
-    foreach ($app in $appsResponse.body.value) {
+    $freshCache[$deviceId] = @{
+        LastSync        = Get-SyncKey $device.lastSyncDateTime
+        DeviceName      = $deviceName
+        UserDisplayName = $userDisplayName
+        Apps            = @($appsResponse.body.value | ForEach-Object {
+            @{
+                AppDisplayName = $_.displayName
+                Version        = $_.version
+                Publisher      = $_.publisher
+                Platform       = $_.platform
+            }
+        })
+    }
+}
+
+# --- PROCESS RAW DATA (cache + fresh results) ---
+$appData = [System.Collections.Generic.List[PSCustomObject]]::new()
+
+foreach ($entry in $freshCache.Values) {
+    foreach ($app in $entry.Apps) {
         $appData.Add([PSCustomObject]@{
-            AppDisplayName  = $app.displayName
-            Version         = $app.version
-            Publisher       = $app.publisher
-            Platform        = $app.platform
-            DeviceName      = $deviceName
-            UserDisplayName = $userDisplayName
+            AppDisplayName  = $app.AppDisplayName
+            Version         = $app.Version
+            Publisher       = $app.Publisher
+            Platform        = $app.Platform
+            DeviceName      = $entry.DeviceName
+            UserDisplayName = $entry.UserDisplayName
         })
     }
 }
 
+$freshCache | ConvertTo-Json -Depth 5 -Compress | Set-Content -Path $cachePath -Encoding UTF8
+
 Write-Host ("    → Total app-device pairs collected: {0}" -f $appData.Count)
 
 # --- AGGREGATE BY APP ---
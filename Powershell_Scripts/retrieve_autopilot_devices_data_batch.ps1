@@ -1,5 +1,11 @@
+param(
+    [switch]$EnrichManagedDevice  # Add Intune managed device columns (fetched through $batch)
+)
+
 # Connect to Graph
-Connect-MgGraph -Scopes "DeviceManagementServiceConfig.Read.All,Device.Read.All"
+$scopes = "DeviceManagementServiceConfig.Read.All,Device.Read.All"
+if ($EnrichManagedDevice) { $scopes += ",DeviceManagementManagedDevices.Read.All" }
+Connect-MgGraph -Scopes $scopes
 Write-Host "[+] Connected. Getting Autopilot devices..."
 
 # Folder where the CSV will be stored
@@ -7,32 +13,110 @@ $scriptDir = Split-Path -Parent $MyInvocation.MyCommand.Path
 $folder = Join-Path $scriptDir "..\Database_Autopilot_Devices"
 New-Item -ItemType Directory -Path $folder -Force | Out-Null
 
-# Get Autopilot devices
-$ap = Invoke-MgGraphRequest -Method GET `
-    -Uri "https://graph.microsoft.com/beta/deviceManagement/windowsAutopilotDeviceIdentities" `
-    -OutputType PSObject
-
-$rows = foreach ($d in $ap.value) {
-    [pscustomobject]@{
-        SerialNumber                = $d.serialNumber
-        Manufacturer                = $d.manufacturer
-        Model                       = $d.model
-        GroupTag                    = $d.groupTag
-        EnrollmentState             = $d.enrollmentState
-        DeploymentProfileStatus     = $d.deploymentProfileAssignmentStatus
-        LastContact                 = $d.lastContactedDateTime
-        AssignedUser                = $d.userPrincipalName
-        AADDeviceId                 = $d.azureActiveDirectoryDeviceId
-        ManagedDeviceId             = $d.managedDeviceId
-        UserlessEnrollmentStatus    = $d.userlessEnrollmentStatus
-    }
-}
-
 # Output filename (Timestamped)
 $timestamp = Get-Date -Format "yyyyMMdd_HHmm"
 $out = Join-Path $folder "${timestamp}_AutopilotDevices.csv"
+# Pages are streamed to a temp file that only becomes the snapshot once paging completed:
+# a run that fails halfway must not leave a truncated CSV the app would list as the newest export
+$tmp = "$out.tmp"
+
+# $batch helper with 429/5xx retries (Invoke-GraphBatch), shared with the other scripts
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
+
+# Managed device details for one page of Autopilot devices (20 requests per $batch, throttling retried)
+function Get-ManagedDeviceDetails {
+    param (
+        [Parameter(Mandatory)] [string[]] $ids
+    )
+
+    $responses = Invoke-GraphBatch -Api 'beta' -Requests @($ids | ForEach-Object {
+        @{
+            id     = $_
+            method = "GET"
+            url    = "/deviceManagement/managedDevices/$($_)?`$select=id,deviceName,complianceState,lastSyncDateTime,osVersion"
+        }
+    })
+
+    $details = @{}
+    $failed = 0
+    foreach ($id in $ids) {
+        $r = $responses[$id]
+        if ($r -and $r.status -eq 200) { $details[$id] = $r.body } else { $failed++ }
+    }
+    if ($failed -gt 0) {
+        Write-Warning "Managed device details unavailable for $failed device(s) on this page, their enrichment columns stay empty."
+    }
+    return $details
+}
+
+# Page through every Autopilot device and stream each page to the CSV
+$emptyId = "00000000-0000-0000-0000-000000000000"
+$nextLink = "https://graph.microsoft.com/beta/deviceManagement/windowsAutopilotDeviceIdentities"
+$total = 0
+$pageCount = 0
+
+if (Test-Path $tmp) { Remove-Item $tmp -Force }
+
+try {
+    while ($nextLink) {
+        $ap = Invoke-MgGraphRequest -Method GET -Uri $nextLink -OutputType PSObject -ErrorAction Stop
+        $nextLink = $ap.'@odata.nextLink'
+        $pageCount++
+
+        $managed = @{}
+        if ($EnrichManagedDevice) {
+            $ids = @($ap.value.managedDeviceId | Where-Object { $_ -and $_ -ne $emptyId } | Select-Object -Unique)
+            if ($ids.Count -gt 0) { $managed = Get-ManagedDeviceDetails -ids $ids }
+        }
+
+        $rows = foreach ($d in $ap.value) {
+            $row = [ordered]@{
+                SerialNumber                = $d.serialNumber
+                Manufacturer                = $d.manufacturer
+                Model                       = $d.model
+                GroupTag                    = $d.groupTag
+                EnrollmentState             = $d.enrollmentState
+                DeploymentProfileStatus     = $d.deploymentProfileAssignmentStatus
+                LastContact                 = $d.lastContactedDateTime
+                AssignedUser                = $d.userPrincipalName
+                AADDeviceId                 = $d.azureActiveDirectoryDeviceId
+                ManagedDeviceId             = $d.managedDeviceId
+                UserlessEnrollmentStatus    = $d.userlessEnrollmentStatus
+            }
+
+            if ($EnrichManagedDevice) {
+                $m = if ($d.managedDeviceId) { $managed[$d.managedDeviceId] } else { $null }
+                $row.ManagedDeviceName      = $m.deviceName
+                $row.ComplianceState        = $m.complianceState
+                $row.LastSyncDateTime       = $m.lastSyncDateTime
+                $row.OSVersion              = $m.osVersion
+            }
+
+            [pscustomobject]$row
+        }
+
+        # Export CSV (append page by page, header written with the first page)
+        if ($rows) {
+            $rows | Export-Csv $tmp -NoTypeInformation -Encoding UTF8 -Append
+            $total += @($rows).Count
+        }
+        Write-Host ("    → Page {0}: {1} devices exported so far" -f $pageCount, $total)
+    }
+}
+catch {
+    if (Test-Path $tmp) { Remove-Item $tmp -Force }
+    Write-Host "❌ Paging Autopilot devices failed after $pageCount page(s), no snapshot written: $($_.Exception.Message)" -ForegroundColor Red
+    exit 1
+}
+
+if ($total -eq 0) {
+    # Keep an empty report with headers so the app still lists this snapshot
+    $headers = "SerialNumber", "Manufacturer", "Model", "GroupTag", "EnrollmentState", "DeploymentProfileStatus",
+        "LastContact", "AssignedUser", "AADDeviceId", "ManagedDeviceId", "UserlessEnrollmentStatus"
+    if ($EnrichManagedDevice) { $headers += "ManagedDeviceName", "ComplianceState", "LastSyncDateTime", "OSVersion" }
+    Set-Content -Path $tmp -Value (($headers | ForEach-Object { '"{0}"' -f $_ }) -join ",") -Encoding UTF8
+}
 
-# Export CSV
-$rows | Export-Csv $out -NoTypeInformation -Encoding UTF8
+Move-Item -LiteralPath $tmp -Destination $out -Force
 
-Write-Host "✅ Autopilot Devices report exported to $out" -ForegroundColor Green
\ No newline at end of file
+Write-Host "✅ Autopilot Devices report exported to $out ($total devices)" -ForegroundColor Green
@@ -1,113 +1,106 @@
-<#  Retrieves BitLocker keys by Device **DisplayName** (delegated auth)
+<#  Retrieves BitLocker keys by Entra device id (delegated auth)
     Requires: BitLockerKey.Read.All + Device.Read.All
-    Emits: ###JSON_START### ... ###JSON_END###  #>
+    Device ids come from the app's devices snapshot; -DeviceNames is only used for names
+    the snapshot could not resolve. Key lists and key values are read through $batch.
+    Emits: one "##RESULT## {json}" line per key  #>
 
 param(
-    [string]$DeviceIds    = "",      # unused for Option A, keep for future
-    [string]$DeviceNames  = ""       # comma-separated from Python
+    [string]$DeviceIds    = "",      # comma-separated Entra (Azure AD) device ids from Python
+    [string]$DeviceNames  = ""       # comma-separated names that still need a lookup
 )
 
 # Connect (delegated)
 Connect-MgGraph -Scopes "BitlockerKey.Read.All","Device.Read.All" | Out-Null
 
-# Normalize incoming names to an array, trimming empties
-$names = @()
-if ($DeviceNames) {
-    $names = $DeviceNames.Split(',', [System.StringSplitOptions]::RemoveEmptyEntries) |
-        ForEach-Object { $_.Trim() } |
-        Where-Object { $_ -ne "" }
+function Emit-Result {
+    param($obj)
+    Write-Host ("##RESULT## " + ($obj | ConvertTo-Json -Depth 6 -Compress))
 }
 
-$results = @()
+function New-KeyRow($keyId, $deviceId, $deviceName, $created, $recoveryKey) {
+    return [ordered]@{
+        KeyId           = $keyId
+        DeviceId        = $deviceId
+        DeviceName      = $deviceName
+        CreatedDateTime = $created
+        CreatedBy       = ""
+        RecoveryKey     = $recoveryKey
+    }
+}
 
-foreach ($name in $names) {
-    try {
-        # escape single quotes for OData filter: O'Brien -> O''Brien
-        $safeName = $name -replace "'", "''"
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
 
-        # 1) resolve device by displayName
-        $dev = Get-MgDevice -Filter "displayName eq '$safeName'" -Select id,deviceId,displayName -ConsistencyLevel eventual -CountVariable cnt -ErrorAction Stop
+# Normalize incoming ids / names to arrays, trimming empties
+$ids = @($DeviceIds.Split(',', [System.StringSplitOptions]::RemoveEmptyEntries) | ForEach-Object { $_.Trim() } | Where-Object { $_ })
+$names = @($DeviceNames.Split(',', [System.StringSplitOptions]::RemoveEmptyEntries) | ForEach-Object { $_.Trim() } | Where-Object { $_ })
+$emitted = 0
 
-        if (-not $dev) {
-            $results += [pscustomobject]@{
-                KeyId           = "N/A"
-                DeviceId        = "N/A"
-                DeviceName      = $name
-                CreatedDateTime = ""
-                CreatedBy       = ""
-                RecoveryKey     = "Device not found"
-            }
+# device id -> display name (known for names resolved here)
+$deviceNames = @{}
+
+# 1) names the snapshot did not know: one $batch of displayName filters
+if ($names.Count -gt 0) {
+    $lookup = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $names.Count; $i++) {
+        $filter = [uri]::EscapeDataString("displayName eq '$($names[$i].Replace("'", "''"))'")
+        @{ id = "$i"; method = "GET"; url = "/devices?`$filter=$filter&`$select=deviceId,displayName" }
+    })
+    for ($i = 0; $i -lt $names.Count; $i++) {
+        $found = @($lookup["$i"].body.value | Where-Object { $_.deviceId })
+        if ($found.Count -eq 0) {
+            Emit-Result (New-KeyRow "N/A" "N/A" $names[$i] "" "Device not found"); $emitted++
             continue
         }
+        foreach ($d in $found) {
+            $ids += $d.deviceId
+            $deviceNames[$d.deviceId] = $d.displayName
+        }
+    }
+}
 
-        foreach ($d in $dev) {
-            # 2) list recovery key objects for this deviceId to obtain their IDs
-            $rkList = Get-MgInformationProtectionBitlockerRecoveryKey `
-                        -Filter "deviceId eq '$($d.deviceId)'" `
-                        -Select id,deviceId,createdDateTime `
-                        -ErrorAction Stop
+$ids = @($ids | Select-Object -Unique)
 
-            if (-not $rkList) {
-                $results += [pscustomobject]@{
-                    KeyId           = "N/A"
-                    DeviceId        = $d.deviceId
-                    DeviceName      = $d.displayName
-                    CreatedDateTime = ""
-                    CreatedBy       = ""
-                    RecoveryKey     = "No key found"
-                }
-                continue
-            }
+# 2) recovery key objects per device ($batch)
+$lists = if ($ids.Count -gt 0) {
+    Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $ids.Count; $i++) {
+        $filter = [uri]::EscapeDataString("deviceId eq '$($ids[$i])'")
+        @{ id = "$i"; method = "GET"; url = "/informationProtection/bitlocker/recoveryKeys?`$filter=$filter&`$select=id,deviceId,createdDateTime" }
+    })
+} else { @{} }
 
-            foreach ($rk in $rkList) {
-                try {
-                    $rkFull = Invoke-MgGraphRequest -Method GET `
-                        -Uri "https://graph.microsoft.com/v1.0/informationProtection/bitlocker/recoveryKeys/$($rk.Id)?`$select=key" `
-                        -ErrorAction Stop
+$keys = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $ids.Count; $i++) {
+    $r = $lists["$i"]
+    if (-not $r -or $r.status -ne 200) {
+        Emit-Result (New-KeyRow "N/A" $ids[$i] $deviceNames[$ids[$i]] "" "Error: HTTP $($r.status) $($r.body.error.message)"); $emitted++
+        continue
+    }
+    if (-not $r.body.value) {
+        Emit-Result (New-KeyRow "N/A" $ids[$i] $deviceNames[$ids[$i]] "" "No key found"); $emitted++
+        continue
+    }
+    foreach ($rk in $r.body.value) { $keys.Add($rk) }
+}
 
-                    # Extract key value — Graph returns it in AdditionalProperties
-                    if ($rkFull.PSObject.Properties.Name -contains "key") {
-                        $keyValue = $rkFull.key
-                    } elseif ($rkFull.AdditionalProperties.ContainsKey("key")) {
-                        $keyValue = $rkFull.AdditionalProperties["key"]
-                    } else {
-                        $keyValue = "Key not returned"
-                    }
-                }
-                catch {
-                    $keyValue = "Error retrieving key"
-                }
+# 3) key values ($batch, one request per key)
+if ($keys.Count -gt 0) {
+    $values = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $keys.Count; $i++) {
+        @{ id = "$i"; method = "GET"; url = "/informationProtection/bitlocker/recoveryKeys/$($keys[$i].id)?`$select=key" }
+    })
 
-                $results += [pscustomobject]@{
-                    KeyId           = $rk.Id
-                    DeviceId        = $d.deviceId
-                    DeviceName      = $d.displayName
-                    CreatedDateTime = $rk.createdDateTime
-                    CreatedBy       = ""
-                    RecoveryKey     = $keyValue
-                }
-            }
-        }
-    }
-    catch {
-        $results += [pscustomobject]@{
-            KeyId           = "N/A"
-            DeviceId        = "N/A"
-            DeviceName      = $name
-            CreatedDateTime = ""
-            CreatedBy       = ""
-            RecoveryKey     = "Error: $($_.Exception.Message)"
-        }
+    for ($i = 0; $i -lt $keys.Count; $i++) {
+        $rk = $keys[$i]
+        $v = $values["$i"]
+        $keyValue = if ($v -and $v.status -eq 200 -and $v.body.key) { $v.body.key }
+                    elseif ($v -and $v.status -eq 200) { "Key not returned" }
+                    else { "Error retrieving key" }
+        Emit-Result (New-KeyRow $rk.id $rk.deviceId $deviceNames[$rk.deviceId] $rk.createdDateTime $keyValue); $emitted++
     }
 }
 
 # Fallback if nothing at all
-if (-not $results) {
-    $results = @([pscustomobject]@{
-        KeyId           = "N/A"; DeviceId = "N/A"; DeviceName = ""; CreatedDateTime = ""; CreatedBy = ""; RecoveryKey = "No input"
-    })
+if ($emitted -eq 0) {
+    Emit-Result (New-KeyRow "N/A" "N/A" "" "" "No input")
 }
 
-Write-Output "###JSON_START###"
-$results | ConvertTo-Json -Depth 6
-Write-Output "###JSON_END###"
\ No newline at end of file
+Write-Host "✅ $($keys.Count) recovery key(s) for $($ids.Count) device(s)"
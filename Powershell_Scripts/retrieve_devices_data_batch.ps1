@@ -1,4 +1,8 @@
 # Requires: PowerShell 7+, Microsoft.Graph
+param(
+    [switch]$Incremental  # Reuse rows of the previous snapshot for devices whose lastSyncDateTime did not move
+)
+
 Connect-MgGraph -Scopes "DeviceManagementManagedDevices.Read.All"
 
 $startTime = Get-Date
@@ -6,24 +10,36 @@ Write-Host "⏱️ Script started at $startTime"
 Write-Host "🔄 Fetching managed devices list from Microsoft Graph..."
 
 $baseUri = "https://graph.microsoft.com/beta/deviceManagement/managedDevices"
-$deviceList = @()
-$nextLink = $baseUri
 
-while ($nextLink) {
-    $page = Invoke-MgGraphRequest -Uri $nextLink -Method GET
-    $deviceList += $page.value
-    $nextLink = $page.'@odata.nextLink'
+# Properties needed to build a CSV row (used as $select for the detail requests)
+$detailProperties = @(
+    "id", "deviceName", "serialNumber", "model", "manufacturer", "operatingSystem", "osVersion",
+    "deviceType", "joinType", "aadRegistered", "azureADDeviceId", "deviceEnrollmentType",
+    "deviceRegistrationState", "autopilotEnrolled", "managedDeviceOwnerType", "managementState",
+    "managementAgent", "isEncrypted", "jailBroken", "complianceState", "lastSyncDateTime",
+    "enrolledDateTime", "usersLoggedOn", "deviceActionResults", "emailAddress", "userPrincipalName",
+    "userDisplayName", "managedDeviceName", "wiFiMacAddress", "ethernetMacAddress",
+    "totalStorageSpaceInBytes", "freeStorageSpaceInBytes", "partnerReportedThreatState",
+    "windowsActiveMalwareCount", "windowsRemediatedMalwareCount", "chassisType", "isSupervised",
+    "retireAfterDateTime", "managementCertificateExpirationDate", "notes"
+)
+
+function ConvertTo-UtcDate {
+    param ($value)
+
+    if (-not $value) { return $null }
+    if ($value -is [datetime]) { return $value.ToUniversalTime() }
+
+    $parsed = [datetime]::MinValue
+    if ([datetime]::TryParse([string]$value, [cultureinfo]::CurrentCulture,
+            [System.Globalization.DateTimeStyles]::AdjustToUniversal, [ref]$parsed)) {
+        return $parsed
+    }
+    return $null
 }
 
-Write-Host "📦 Total devices to process: $($deviceList.Count)"
-Write-Host "🚀 Fetching full device details in parallel..."
-
-$results = $deviceList | ForEach-Object -Parallel {
-
-    $id = $_.id
-    $baseUri = "https://graph.microsoft.com/beta/deviceManagement/managedDevices"
-
-    $fullDevice = Invoke-MgGraphRequest -Uri "$baseUri/$id" -Method GET
+function ConvertTo-DeviceRow {
+    param ([Parameter(Mandatory)] $fullDevice)
 
     $logon = $fullDevice.usersLoggedOn |
         Sort-Object -Property lastLogOnDateTime -Descending |
@@ -77,22 +93,132 @@ $results = $deviceList | ForEach-Object -Parallel {
         ManagementCertificateExpiry = $fullDevice.managementCertificateExpirationDate
         Notes = $fullDevice.notes
     }
+}
 
-} -ThrottleLimit 10 -AsJob | Receive-Job -Wait
+# --- List devices (only what is needed to detect changes) ---
+$deviceList = [System.Collections.Generic.List[object]]::new()
+$nextLink = "${baseUri}?`$select=id,lastSyncDateTime"
 
-# ✅ Output formatting and location
-$timestamp = Get-Date -Format "yyyyMMdd-HHmmss"
-$outputDir = Join-Path $PSScriptRoot "..\Database_Devices"
-$outputPath = Join-Path $outputDir "${timestamp}_EntraDevices.csv"
+while ($nextLink) {
+    $page = Invoke-MgGraphRequest -Uri $nextLink -Method GET
+    foreach ($d in $page.value) { $deviceList.Add($d) }
+    $nextLink = $page.'@odata.nextLink'
+}
 
+Write-Host "📦 Total devices: $($deviceList.Count)"
+
+# --- Output location ---
+$outputDir = Join-Path $PSScriptRoot "..\Database_Devices"
 if (-not (Test-Path $outputDir)) {
     New-Item -Path $outputDir -ItemType Directory -Force | Out-Null
 }
 
+# --- Previous snapshot (incremental mode) ---
+$cachedRows = @{}
+if ($Incremental) {
+    $previousCsv = Get-ChildItem -Path $outputDir -Filter "*_EntraDevices.csv" -ErrorAction SilentlyContinue |
+        Sort-Object Name -Descending |
+        Select-Object -First 1
+
+    if ($previousCsv) {
+        Write-Host "♻️ Comparing against previous snapshot: $($previousCsv.Name)"
+        foreach ($row in (Import-Csv -Path $previousCsv.FullName -Encoding UTF8)) {
+            if ($row.Id) { $cachedRows[$row.Id] = $row }
+        }
+    } else {
+        Write-Host "⚠️ No previous snapshot found, fetching all devices."
+    }
+}
+
+$toFetch = [System.Collections.Generic.List[string]]::new()
+foreach ($d in $deviceList) {
+    $cached = $cachedRows[$d.id]
+    if ($cached) {
+        $previousSync = ConvertTo-UtcDate $cached.LastSyncDateTime
+        $currentSync = ConvertTo-UtcDate $d.lastSyncDateTime
+        if ($previousSync -and $currentSync -and [math]::Abs(($currentSync - $previousSync).TotalSeconds) -lt 1) {
+            continue
+        }
+    }
+    $toFetch.Add($d.id)
+}
+
+Write-Host "🚀 Fetching details for $($toFetch.Count) new/changed devices ($($deviceList.Count - $toFetch.Count) reused)..."
+
+# --- Detail fetch through $batch (20 requests per batch, retried on throttling) ---
+$select = $detailProperties -join ","
+$details = [System.Collections.Concurrent.ConcurrentDictionary[string, object]]::new()
+$pending = @($toFetch)
+$attempt = 0
+
+while ($pending.Count -gt 0 -and $attempt -lt 4) {
+    $attempt++
+    if ($attempt -gt 1) {
+        Write-Host "⏳ Retrying $($pending.Count) throttled requests (attempt $attempt)..."
+        Start-Sleep -Seconds (10 * $attempt)
+    }
+
+    $batches = [System.Collections.Generic.List[object]]::new()
+    for ($i = 0; $i -lt $pending.Count; $i += 20) {
+        $end = [math]::Min($i + 19, $pending.Count - 1)
+        $batches.Add(@($pending[$i..$end]))
+    }
+
+    $failed = [System.Collections.Concurrent.ConcurrentBag[string]]::new()
+
+    $batches | ForEach-Object -Parallel {
+        $details = $using:details
+        $failed = $using:failed
+        $select = $using:select
+
+        $requests = @($_ | ForEach-Object {
+            @{ id = $_; method = "GET"; url = "/deviceManagement/managedDevices/$($_)?`$select=$select" }
+        })
+        $body = @{ requests = $requests } | ConvertTo-Json -Depth 5
+
+        try {
+            $result = Invoke-MgGraphRequest -Method POST -Uri 'https://graph.microsoft.com/beta/$batch' `
+                -Body $body -ContentType 'application/json'
+        } catch {
+            # Whole batch failed, retry every request
+            foreach ($r in $requests) { $failed.Add($r.id) }
+            return
+        }
+
+        foreach ($r in $result.responses) {
+            if ($r.status -eq 200) {
+                [void]$details.TryAdd($r.id, $r.body)
+            } elseif ($r.status -eq 429 -or $r.status -ge 500) {
+                $failed.Add($r.id)
+            }
+        }
+    } -ThrottleLimit 5
+
+    $pending = @($failed)
+}
+
+if ($pending.Count -gt 0) {
+    Write-Host "⚠️ $($pending.Count) devices could not be fetched; previous rows are kept when available."
+}
+
+# --- Assemble rows in listing order: fresh details first, cached rows otherwise ---
+$results = foreach ($d in $deviceList) {
+    $fullDevice = $null
+    if ($details.TryGetValue($d.id, [ref]$fullDevice)) {
+        ConvertTo-DeviceRow $fullDevice
+    } elseif ($cachedRows.ContainsKey($d.id)) {
+        $cachedRows[$d.id]
+    }
+}
+
+# ✅ Output formatting and location
+$timestamp = Get-Date -Format "yyyyMMdd-HHmmss"
+$outputPath = Join-Path $outputDir "${timestamp}_EntraDevices.csv"
+
 $results | Export-Csv -Path $outputPath -NoTypeInformation -Encoding UTF8
 
 $endTime = Get-Date
 $duration = $endTime - $startTime
 
 Write-Host "`n✅ Export complete: $outputPath"
-Write-Host "⏱️ Total duration: $($duration.ToString())"
\ No newline at end of file
+Write-Host "⏱️ Total duration: $($duration.ToString())"
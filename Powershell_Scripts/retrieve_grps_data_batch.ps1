@@ -1,3 +1,8 @@
+param(
+    [switch]$Incremental,      # Use /groups/delta and merge the changes into the previous snapshot
+    [switch]$ExportMembership  # Page every group's members and write a *_EntraGroupMembers.csv edge file
+)
+
 # Connect to Microsoft Graph
 Connect-MgGraph -Scopes "Group.Read.All", "GroupMember.Read.All", "RoleManagement.Read.Directory", "Application.Read.All", "Policy.Read.All", "User.Read.All"
 
@@ -15,7 +20,8 @@ function Send-MgGraphBatchRequests {
     param (
         [Parameter(Mandatory)] $requests,
         [Parameter()] [ValidateSet('beta','v1.0')] $Apiversion = 'v1.0',
-        [int] $batchSize = 20
+        [int] $batchSize = 20,
+        [int] $throttleLimit = 5
     )
 
     $batches = [System.Collections.Generic.List[pscustomobject]]::new()
@@ -31,59 +37,292 @@ function Send-MgGraphBatchRequests {
         })
     }
 
-    $batches | ForEach-Object {
-        $result = Invoke-MgGraphRequest @_ 
+    $batches | ForEach-Object -Parallel {
+        $responses = $using:responses
+        $result = Invoke-MgGraphRequest @_
         foreach ($r in $result.responses) {
             $responses.Add([pscustomobject]@{
                 requestid   = $r.id.Split(":")[0]
                 requesttype = $r.id.Split(":")[1]
+                status      = $r.status
                 body        = $r.body
                 error       = $r.error
             })
         }
-    }
+    } -ThrottleLimit $throttleLimit
 
     return $responses
 }
 
+# $batch helper with 429/5xx retries (Invoke-GraphBatch), shared with the other scripts
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
+
+# Follow a delta link (or initial delta request) until the final @odata.deltaLink
+function Invoke-GraphDeltaQuery {
+    param (
+        [Parameter(Mandatory)] [string] $Uri
+    )
+
+    $changed = [System.Collections.Generic.HashSet[string]]::new()
+    $removed = [System.Collections.Generic.HashSet[string]]::new()
+    $deltaLink = $null
+    $next = $Uri
+
+    while ($next) {
+        $page = Invoke-MgGraphRequest -Method GET -Uri $next
+        foreach ($item in $page.value) {
+            if ($item.ContainsKey('@removed')) {
+                [void]$changed.Remove($item.id)
+                [void]$removed.Add($item.id)
+            } else {
+                [void]$removed.Remove($item.id)
+                [void]$changed.Add($item.id)
+            }
+        }
+        $next = $page.'@odata.nextLink'
+        if ($page.'@odata.deltaLink') { $deltaLink = $page.'@odata.deltaLink' }
+    }
+
+    return [pscustomobject]@{
+        Changed   = $changed
+        Removed   = $removed
+        DeltaLink = $deltaLink
+    }
+}
+
+# Page the direct members of every group through $batch (follows @odata.nextLink, retries throttled requests)
+function Get-GroupMembershipEdges {
+    param (
+        [Parameter(Mandatory)] [string[]] $groupIds
+    )
+
+    $edges = [System.Collections.Generic.List[object]]::new()
+    $pending = [System.Collections.Generic.List[object]]::new()
+    foreach ($groupId in $groupIds) {
+        $pending.Add(@{ id = "$($groupId):members"; method = "GET"; url = "/groups/$groupId/members?`$select=id,displayName&`$top=999" })
+    }
+
+    while ($pending.Count -gt 0) {
+        $urls = @{}
+        foreach ($request in $pending) { $urls[$request.id] = $request.url }
+
+        $pageResponses = Send-MgGraphBatchRequests -requests $pending -Apiversion 'v1.0'
+        $pending = [System.Collections.Generic.List[object]]::new()
+        $throttled = $false
+
+        foreach ($r in $pageResponses) {
+            $requestId = "$($r.requestid):members"
+            if ($r.status -eq 429 -or $r.status -ge 500) {
+                $pending.Add(@{ id = $requestId; method = "GET"; url = $urls[$requestId] })
+                $throttled = $true
+                continue
+            }
+            if (-not $r.body -or -not $r.body.value) { continue }
+
+            foreach ($member in $r.body.value) {
+                $edges.Add([pscustomobject]@{
+                    GroupId     = $r.requestid
+                    MemberId    = $member.id
+                    MemberType  = $member.'@odata.type' -replace '^#microsoft\.graph\.', ''
+                    DisplayName = $member.displayName
+                })
+            }
+
+            $nextLink = $r.body.'@odata.nextLink'
+            if ($nextLink) {
+                $pending.Add(@{ id = $requestId; method = "GET"; url = ($nextLink -replace '^https://graph\.microsoft\.com/v1\.0', '') })
+            }
+        }
+
+        if ($throttled) { Start-Sleep -Seconds 10 }
+    }
+
+    return $edges
+}
+
+# Append a value to the list stored under key (creates the list on first use)
+function Add-IndexValue {
+    param (
+        [Parameter(Mandatory)] [hashtable] $index,
+        [Parameter(Mandatory)] [string] $key,
+        $value
+    )
+
+    if (-not $index.ContainsKey($key)) {
+        $index[$key] = [System.Collections.Generic.List[string]]::new()
+    }
+    if ($value -and -not $index[$key].Contains($value)) {
+        $index[$key].Add($value)
+    }
+}
+
+# Columns computed from tenant-wide lookups (hash lookups, cheap to refresh for every group)
+function Get-GroupReferenceColumns {
+    param (
+        [Parameter(Mandatory)] [string] $id
+    )
+
+    return [ordered]@{
+        "Is Teams Team"                   = $teamsGroupSet.Contains($id)
+        "Referenced In CA Policy Include" = $caIncludeByGroup[$id] -join ", "
+        "Referenced In CA Policy Exclude" = $caExcludeByGroup[$id] -join ", "
+        "Assigned Roles"                  = $rolesByPrincipal[$id] -join ", "
+        "Referenced in App Roles"         = $appRolesReferences[$id] -join ", "
+    }
+}
+
+$groupProperties = "Id", "DisplayName", "GroupTypes", "Mail", "MailEnabled", "Visibility", "CreatedDateTime", "Description", "MembershipRule", "MembershipRuleProcessingState"
+
+# Delta state (delta link + snapshot it applies to). Selecting "members" flags a group as
+# changed when its membership changes; owner changes are not tracked by /groups/delta.
+$folder = Join-Path (Split-Path -Parent $PSCommandPath) "..\Database_Groups"
+if (!(Test-Path $folder)) { New-Item -ItemType Directory -Path $folder | Out-Null }
+$deltaStatePath = Join-Path $folder "GroupsDeltaState.json"
+$deltaUri = "https://graph.microsoft.com/v1.0/groups/delta?`$select=$(($groupProperties + 'members') -join ',')"
+$delta = $null
+$previousCsv = $null
+
 $scriptStart = Get-Date
-Write-Host "[+] Retrieving all groups..."
+
+if ($Incremental) {
+    $state = if (Test-Path $deltaStatePath) { Get-Content $deltaStatePath -Raw | ConvertFrom-Json } else { $null }
+    if ($state -and $state.DeltaLink -and $state.Snapshot) {
+        $previousCsv = Join-Path $folder $state.Snapshot
+    }
+
+    if ($previousCsv -and (Test-Path $previousCsv)) {
+        try {
+            Write-Host "[+] Retrieving group changes since $($state.SavedOn)..."
+            $delta = Invoke-GraphDeltaQuery -Uri $state.DeltaLink
+        } catch {
+            Write-Host "[!] Delta link rejected ($($_.Exception.Message)), running a full export..."
+            $delta = $null
+        }
+    } else {
+        Write-Host "[!] No previous delta state found, running a full export..."
+    }
+}
+
 $timerGroups = [System.Diagnostics.Stopwatch]::StartNew()
-$groups = Get-MgGroup -All -Property "Id", "DisplayName", "GroupTypes", "Mail", "MailEnabled", "Visibility", "CreatedDateTime", "Description", "MembershipRule", "MembershipRuleProcessingState"
+if ($delta) {
+    $deltaLink = $delta.DeltaLink
+    Write-Host "[+] Changed groups: $($delta.Changed.Count) - Removed groups: $($delta.Removed.Count)"
+
+    # Fetch full properties for changed groups only ('id in' accepts 15 values per filter)
+    $changedIds = @($delta.Changed)
+    $groups = @(
+        for ($i = 0; $i -lt $changedIds.Count; $i += 15) {
+            $chunk = $changedIds[$i..([math]::Min($i + 14, $changedIds.Count - 1))]
+            $filter = "id in ('{0}')" -f ($chunk -join "','")
+            Get-MgGroup -All -Filter $filter -Property $groupProperties
+        }
+    )
+} else {
+    # Take a delta token before the full export so that changes made during the export
+    # are picked up by the next incremental run
+    $deltaLink = (Invoke-GraphDeltaQuery -Uri "$deltaUri&`$deltatoken=latest").DeltaLink
+
+    Write-Host "[+] Retrieving all groups..."
+    $groups = @(Get-MgGroup -All -Property $groupProperties)
+}
 $timerGroups.Stop()
 
 Write-Host "[+] Retrieving Teams-enabled groups..."
 $teamsGroupIds = (Get-MgGroup -All -Filter "resourceProvisioningOptions/Any(x:x eq 'Team')" -Property "Id").Id
+$teamsGroupSet = [System.Collections.Generic.HashSet[string]]::new([string[]]@($teamsGroupIds | Where-Object { $_ }))
 
 Write-Host "[+] Retrieving Conditional Access policies and role assignments..."
 $caPolicies = Get-MgIdentityConditionalAccessPolicy -All
 $roleAssignments = Get-MgRoleManagementDirectoryRoleAssignment -All
 $roleDefinitions = Get-MgRoleManagementDirectoryRoleDefinition -All
 
+# Index once: group id -> CA policies (include / exclude), principal id -> role names
+$caIncludeByGroup = @{}
+$caExcludeByGroup = @{}
+foreach ($policy in $caPolicies) {
+    foreach ($groupId in $policy.Conditions.Users.IncludeGroups) {
+        Add-IndexValue -index $caIncludeByGroup -key $groupId -value $policy.DisplayName
+    }
+    foreach ($groupId in $policy.Conditions.Users.ExcludeGroups) {
+        Add-IndexValue -index $caExcludeByGroup -key $groupId -value $policy.DisplayName
+    }
+}
+
+$roleNamesById = @{}
+foreach ($definition in $roleDefinitions) { $roleNamesById[$definition.Id] = $definition.DisplayName }
+
+$rolesByPrincipal = @{}
+foreach ($assignment in $roleAssignments) {
+    if ($assignment.PrincipalId) {
+        Add-IndexValue -index $rolesByPrincipal -key $assignment.PrincipalId -value $roleNamesById[$assignment.RoleDefinitionId]
+    }
+}
+
 Write-Host "[+] Building app role references..."
+$servicePrincipals = Get-MgServicePrincipal -All -Property "Id", "DisplayName"
+$spNamesById = @{}
+foreach ($sp in $servicePrincipals) { $spNamesById[$sp.Id] = $sp.DisplayName }
+
+$appRoleRequests = [System.Collections.Generic.List[object]]::new()
+foreach ($sp in $servicePrincipals) {
+    $appRoleRequests.Add(@{ id = $sp.Id; method = "GET"; url = "/servicePrincipals/$($sp.Id)/appRoleAssignedTo?`$top=999" })
+}
+# Throttled / 5xx sub-responses are retried; whatever still fails is reported, not silently dropped
+$appRoleResponses = if ($appRoleRequests.Count -gt 0) { Invoke-GraphBatch -Requests $appRoleRequests } else { @{} }
+
 $appRolesReferences = @{}
-foreach ($sp in Get-MgServicePrincipal -All) {
-    foreach ($assignment in (Get-MgServicePrincipalAppRoleAssignedTo -ServicePrincipalId $sp.Id -ErrorAction SilentlyContinue)) {
-        if ($assignment.PrincipalType -eq "Group" -and $assignment.PrincipalId) {
-            if ($appRolesReferences.ContainsKey($assignment.PrincipalId)) {
-                $appRolesReferences[$assignment.PrincipalId] += ", $($sp.DisplayName)"
-            } else {
-                $appRolesReferences[$assignment.PrincipalId] = $sp.DisplayName
-            }
+$appRoleFailures = [System.Collections.Generic.List[string]]::new()
+foreach ($request in $appRoleRequests) {
+    $response = $appRoleResponses[$request.id]
+    if (-not $response -or $response.status -ne 200) {
+        $status = if ($response) { $response.status } else { "no response" }
+        $appRoleFailures.Add("$($spNamesById[$request.id]) ($status)")
+        continue
+    }
+
+    # Follow paging for the few service principals with more than 999 assignments
+    $assignments = [System.Collections.Generic.List[object]]::new()
+    $page = $response.body
+    while ($page) {
+        foreach ($assignment in $page.value) { $assignments.Add($assignment) }
+        $page = if ($page.'@odata.nextLink') { Invoke-MgGraphRequest -Method GET -Uri $page.'@odata.nextLink' } else { $null }
+    }
+
+    foreach ($assignment in $assignments) {
+        if ($assignment.principalType -eq "Group" -and $assignment.principalId) {
+            Add-IndexValue -index $appRolesReferences -key $assignment.principalId -value $spNamesById[$request.id]
         }
     }
 }
+if ($appRoleFailures.Count -gt 0) {
+    Write-Warning ("App role assignments could not be read for {0} service principal(s), 'Referenced in App Roles' may be incomplete: {1}" -f `
+        $appRoleFailures.Count, ($appRoleFailures -join ", "))
+}
 
 Write-Host "[+] Creating Graph batch requests..."
 $timerBatch = [System.Diagnostics.Stopwatch]::StartNew()
 $requests = [System.Collections.Generic.List[object]]::new()
 foreach ($group in $groups) {
-    $requests.Add(@{ id = "$($group.Id):members"; method = "GET"; url = "/groups/$($group.Id)/members?`$count=true"; headers = @{ "ConsistencyLevel" = "eventual" } })
     $requests.Add(@{ id = "$($group.Id):owners"; method = "GET"; url = "/groups/$($group.Id)/owners" })
-    $requests.Add(@{ id = "$($group.Id):nested"; method = "GET"; url = "/groups/$($group.Id)/members" })
+    if (-not $ExportMembership) {
+        $requests.Add(@{ id = "$($group.Id):members"; method = "GET"; url = "/groups/$($group.Id)/members?`$count=true"; headers = @{ "ConsistencyLevel" = "eventual" } })
+        $requests.Add(@{ id = "$($group.Id):nested"; method = "GET"; url = "/groups/$($group.Id)/members" })
+    }
 }
-$responsesList = Send-MgGraphBatchRequests -requests $requests -Apiversion 'v1.0'
+$responsesList = if ($requests.Count -gt 0) { Send-MgGraphBatchRequests -requests $requests -Apiversion 'v1.0' } else { @() }
 $responses = $responsesList | Group-Object -Property requestid -AsHashTable
+if (-not $responses) { $responses = @{} }
+
+# Complete membership (all pages) when the edge file is requested
+$edgesByGroup = @{}
+$membershipEdges = @()
+if ($ExportMembership -and $groups.Count -gt 0) {
+    Write-Host "[+] Paging group memberships..."
+    $membershipEdges = Get-GroupMembershipEdges -groupIds @($groups.Id)
+    $edgesByGroup = $membershipEdges | Group-Object -Property GroupId -AsHashTable
+    if (-not $edgesByGroup) { $edgesByGroup = @{} }
+    Write-Host "    → $($membershipEdges.Count) membership edges"
+}
 $timerBatch.Stop()
 
 Write-Host "[+] Processing data and building report..."
@@ -100,7 +339,6 @@ foreach ($group in $groups) {
 
     $group | Add-Member -NotePropertyName "Group Email" -NotePropertyValue $group.Mail -Force
     $group | Add-Member -NotePropertyName "Mail Enabled" -NotePropertyValue $group.MailEnabled -Force
-    $group | Add-Member -NotePropertyName "Is Teams Team" -NotePropertyValue ($teamsGroupIds -contains $id) -Force
     $group | Add-Member -NotePropertyName "Membership Type" -NotePropertyValue ($group.MembershipRuleProcessingState -ne $null ? "Dynamic" : "Assigned") -Force
     $group | Add-Member -NotePropertyName "Dynamic Rule" -NotePropertyValue $group.MembershipRule -Force
     $group | Add-Member -NotePropertyName "Visibility" -NotePropertyValue $group.Visibility -Force
@@ -114,10 +352,18 @@ foreach ($group in $groups) {
         $nested = $groupResponses | Where-Object { $_.requesttype -eq "nested" }
 
         $ownersNames = ($owners.body.value | ForEach-Object { $_.displayName }) -join ", "
-        $nestedNames = ($nested.body.value | Where-Object { $_.'@odata.type' -eq '#microsoft.graph.group' } | ForEach-Object { $_.displayName }) -join ", "
+
+        if ($ExportMembership) {
+            $groupEdges = $edgesByGroup[$id]
+            $totalMembers = if ($groupEdges) { @($groupEdges).Count } else { 0 }
+            $nestedNames = ($groupEdges | Where-Object { $_.MemberType -eq 'group' } | ForEach-Object { $_.DisplayName }) -join ", "
+        } else {
+            $totalMembers = $members.body.'@odata.count'
+            $nestedNames = ($nested.body.value | Where-Object { $_.'@odata.type' -eq '#microsoft.graph.group' } | ForEach-Object { $_.displayName }) -join ", "
+        }
 
         $group | Add-Member -NotePropertyName "Assigned Owners" -NotePropertyValue $ownersNames -Force
-        $group | Add-Member -NotePropertyName "Total Members" -NotePropertyValue $members.body.'@odata.count' -Force
+        $group | Add-Member -NotePropertyName "Total Members" -NotePropertyValue $totalMembers -Force
         $group | Add-Member -NotePropertyName "Nested Groups" -NotePropertyValue $nestedNames -Force
     } else {
         $group | Add-Member -NotePropertyName "Assigned Owners" -NotePropertyValue "" -Force
@@ -125,28 +371,103 @@ foreach ($group in $groups) {
         $group | Add-Member -NotePropertyName "Nested Groups" -NotePropertyValue "" -Force
     }
 
-    $includedCAPolicies = ($caPolicies | Where-Object { $_.Conditions.Users.IncludeGroups -contains $id }).DisplayName -join ", "
-    $excludedCAPolicies = ($caPolicies | Where-Object { $_.Conditions.Users.ExcludeGroups -contains $id }).DisplayName -join ", "
-    $group | Add-Member -NotePropertyName "Referenced In CA Policy Include" -NotePropertyValue $includedCAPolicies -Force
-    $group | Add-Member -NotePropertyName "Referenced In CA Policy Exclude" -NotePropertyValue $excludedCAPolicies -Force
+    foreach ($column in (Get-GroupReferenceColumns -id $id).GetEnumerator()) {
+        $group | Add-Member -NotePropertyName $column.Key -NotePropertyValue $column.Value -Force
+    }
+}
+
+$rows = @($groups | Select-Object -Property $CSVProperties)
 
-    $assignedRoleIds = ($roleAssignments | Where-Object { $_.PrincipalId -eq $id }).RoleDefinitionId
-    $assignedRoles = ($roleDefinitions | Where-Object { $assignedRoleIds -contains $_.Id }).DisplayName -join ", "
-    $group | Add-Member -NotePropertyName "Assigned Roles" -NotePropertyValue $assignedRoles -Force
+if ($delta) {
+    # Merge changed rows into the previous snapshot, keeping its order; new groups go last.
+    # Unchanged rows are reused but their CA / role / app-role / Teams columns are refreshed.
+    Write-Host "[+] Merging changes into: $previousCsv"
+    $freshRows = @{}
+    foreach ($row in $rows) { $freshRows[$row.'Object ID'] = $row }
 
-    $group | Add-Member -NotePropertyName "Referenced in App Roles" -NotePropertyValue ($appRolesReferences[$id] -join ", ") -Force
+    $merged = [System.Collections.Generic.List[object]]::new()
+    foreach ($row in (Import-Csv -Path $previousCsv -Encoding UTF8)) {
+        $id = $row.'Object ID'
+        if ($delta.Removed.Contains($id)) { continue }
+        if ($freshRows.ContainsKey($id)) {
+            $merged.Add($freshRows[$id])
+            $freshRows.Remove($id)
+        } else {
+            foreach ($column in (Get-GroupReferenceColumns -id $id).GetEnumerator()) {
+                $row.($column.Key) = $column.Value
+            }
+            $merged.Add($row)
+        }
+    }
+    foreach ($row in $rows) {
+        if ($freshRows.ContainsKey($row.'Object ID')) { $merged.Add($row) }
+    }
+    $rows = $merged
 }
 $timerProcess.Stop()
 
+# The edge file must be complete (the app treats it as the full membership): an incremental run carries
+# unchanged groups over from the previous edge file, or pages them too when there is none
+$previousEdges = $null
+if ($delta -and $ExportMembership) {
+    $previousEdges = $previousCsv -replace '_EntraGroups\.csv$', '_EntraGroupMembers.csv'
+    if (-not (Test-Path $previousEdges)) {
+        $previousEdges = $null
+        $unchangedIds = @($rows | ForEach-Object { $_.'Object ID' } | Where-Object { -not $delta.Changed.Contains($_) })
+        Write-Host "[!] No previous edge file found, paging the members of the $($unchangedIds.Count) unchanged group(s) as well..."
+        if ($unchangedIds.Count -gt 0) {
+            $membershipEdges = @($membershipEdges) + @(Get-GroupMembershipEdges -groupIds $unchangedIds)
+        }
+    }
+}
+
 # Export to CSV
 Write-Host "[+] Writing output to CSV..."
 $timestamp = Get-Date -Format "yyyyMMdd-HHmmss"
-$folder = Join-Path (Split-Path -Parent $PSCommandPath) "..\Database_Groups"
-if (!(Test-Path $folder)) { New-Item -ItemType Directory -Path $folder | Out-Null }
-$outputPath = Join-Path $folder ("{0}_EntraGroups.csv" -f $timestamp)
+$fileName = "{0}_EntraGroups.csv" -f $timestamp
+$outputPath = Join-Path $folder $fileName
+
+$rows | Export-Csv -Path $outputPath -NoTypeInformation -Encoding UTF8
+
+if ($ExportMembership) {
+    # Compact edge file (GroupId,MemberId,MemberType) sharing the snapshot timestamp
+    $edgesPath = Join-Path $folder ("{0}_EntraGroupMembers.csv" -f $timestamp)
+    Write-Host "[+] Writing membership edges to: $edgesPath"
+
+    $writer = [System.IO.StreamWriter]::new($edgesPath, $false, [System.Text.UTF8Encoding]::new($false))
+    try {
+        $writer.WriteLine("GroupId,MemberId,MemberType")
+        foreach ($edge in $membershipEdges) {
+            $writer.WriteLine("$($edge.GroupId),$($edge.MemberId),$($edge.MemberType)")
+        }
 
-$groups | Select-Object -Property $CSVProperties |
-    Export-Csv -Path $outputPath -NoTypeInformation -Encoding UTF8
+        # Incremental run: carry over the edges of unchanged groups from the previous edge file
+        if ($previousEdges) {
+            $reader = [System.IO.StreamReader]::new($previousEdges)
+            try {
+                [void]$reader.ReadLine()  # header
+                while ($null -ne ($line = $reader.ReadLine())) {
+                    $groupId = $line.Split(",")[0]
+                    if ($delta.Changed.Contains($groupId) -or $delta.Removed.Contains($groupId)) { continue }
+                    $writer.WriteLine($line)
+                }
+            } finally {
+                $reader.Dispose()
+            }
+        }
+    } finally {
+        $writer.Dispose()
+    }
+}
+
+# Save the delta link next to the snapshot it applies to
+if ($deltaLink) {
+    [pscustomobject]@{
+        DeltaLink = $deltaLink
+        Snapshot  = $fileName
+        SavedOn   = (Get-Date).ToString("o")
+    } | ConvertTo-Json | Set-Content -Path $deltaStatePath -Encoding UTF8
+}
 
 $scriptEnd = Get-Date
 
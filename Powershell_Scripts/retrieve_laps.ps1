@@ -1,11 +1,13 @@
 <#
 .SYNOPSIS
   Retrieve LAPS (device local credentials) silently from Microsoft Graph
+  Device ids come from the app's devices snapshot; names it could not resolve are looked up
+  here. Credentials are read 20 devices per $batch and emitted as "##RESULT## {json}" lines.
 #>
 
 param(
-    [string]$DeviceId,
-    [string]$DeviceName
+    [string]$DeviceId,      # Entra (Azure AD) device id(s), comma-separated
+    [string]$DeviceName     # Device name(s) not found in the snapshot, comma-separated
 )
 
 # ✅ Force minimal clean stdout
@@ -21,81 +23,80 @@ $env:GRAPH_NO_WELCOME = "1"
 
 function Emit-Result {
     param($obj)
-    $json = $obj | ConvertTo-Json -Depth 8
-    Write-Host "###LAPS_JSON_START###"
-    Write-Host $json
-    Write-Host "###LAPS_JSON_END###"
+    Write-Host ("##RESULT## " + ($obj | ConvertTo-Json -Depth 8 -Compress))
 }
 
+$ids = @("$DeviceId".Split(',', [System.StringSplitOptions]::RemoveEmptyEntries) | ForEach-Object { $_.Trim() } | Where-Object { $_ })
+$names = @("$DeviceName".Split(',', [System.StringSplitOptions]::RemoveEmptyEntries) | ForEach-Object { $_.Trim() } | Where-Object { $_ })
+
 try {
     if (-not (Get-MgContext)) {
         Connect-MgGraph -Scopes "Device.Read.All,Directory.Read.All,DeviceLocalCredential.Read.All" -NoWelcome
     }
 } catch {
-    Emit-Result @{
-        Device = $DeviceName
-        Password = ""
-        BackupTime = ""
-        Status = "❌ Failed — Graph authentication failed"
+    foreach ($d in @($ids) + @($names)) {
+        Emit-Result @{ Device = $d; Password = ""; BackupTime = ""; Status = "❌ Failed — Graph authentication failed" }
     }
     exit 1
 }
 
-# ✅ Resolve DeviceId from name if needed
-if (-not $DeviceId -and $DeviceName) {
-    $lookupUri = 'https://graph.microsoft.com/v1.0/deviceManagement/managedDevices?$filter=deviceName eq ''' + $DeviceName + '''&$select=azureADDeviceId'
-    $lookup = Invoke-MgGraphRequest -Uri $lookupUri -Method GET
-    if ($lookup.value.Count -gt 0) {
-        $DeviceId = $lookup.value[0].azureADDeviceId
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
+
+# ✅ Resolve names missing from the snapshot (one $batch for all of them)
+if ($names.Count -gt 0) {
+    $lookup = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $names.Count; $i++) {
+        $filter = [uri]::EscapeDataString("displayName eq '$($names[$i].Replace("'", "''"))'")
+        @{ id = "$i"; method = "GET"; url = "/devices?`$filter=$filter&`$select=deviceId,displayName" }
+    })
+    for ($i = 0; $i -lt $names.Count; $i++) {
+        $found = @($lookup["$i"].body.value | Where-Object { $_.deviceId })
+        if ($found.Count -eq 0) {
+            Emit-Result @{ Device = $names[$i]; Password = ""; BackupTime = ""; Status = "❌ Failed — Device not found" }
+        }
+        $ids += @($found.deviceId)
     }
 }
 
-if (-not $DeviceId) {
-    Emit-Result @{
-        Device = $DeviceName
-        Password = ""
-        BackupTime = ""
-        Status = "❌ Failed — Missing DeviceId"
-    }
+$ids = @($ids | Select-Object -Unique)
+if ($ids.Count -eq 0) {
     exit 1
 }
 
-# ✅ Correct request format
-$uri = 'https://graph.microsoft.com/v1.0/directory/deviceLocalCredentials/' + $DeviceId + '?$select=credentials,deviceName,lastBackupDateTime'
+# ✅ Credentials through $batch
+$responses = Invoke-GraphBatch -Requests @(for ($i = 0; $i -lt $ids.Count; $i++) {
+    @{ id = "$i"; method = "GET"; url = "/directory/deviceLocalCredentials/$($ids[$i])?`$select=credentials,deviceName,lastBackupDateTime" }
+})
 
-try {
-    $resp = Invoke-MgGraphRequest -Uri $uri -Method GET
-} catch {
-    Emit-Result @{
-        Device = $DeviceId
-        Password = ""
-        BackupTime = ""
-        Status = "❌ Failed — Graph query error"
-    }
-    exit 1
-}
+for ($i = 0; $i -lt $ids.Count; $i++) {
+    $r = $responses["$i"]
 
-if (-not $resp.credentials) {
-    Emit-Result @{
-        Device = $resp.deviceName
-        Password = ""
-        BackupTime = $resp.lastBackupDateTime
-        Status = "❌ No LAPS credentials found"
+    if (-not $r -or $r.status -ne 200) {
+        $status = if ($r.status -eq 404) { "❌ No LAPS credentials found" } else { "❌ Failed — Graph query error (HTTP $($r.status))" }
+        Emit-Result @{ Device = $ids[$i]; DeviceId = $ids[$i]; Password = ""; BackupTime = ""; Status = $status }
+        continue
     }
-    exit 0
-}
 
-$cred = $resp.credentials[0]
-$pwdPlain = ""
+    $resp = $r.body
+    if (-not $resp.credentials) {
+        Emit-Result @{ Device = $resp.deviceName; DeviceId = $ids[$i]; Password = ""; BackupTime = $resp.lastBackupDateTime; Status = "❌ No LAPS credentials found" }
+        continue
+    }
 
-if ($cred.passwordBase64) {
-    $pwdPlain = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($cred.passwordBase64))
-}
+    # Most recent backup first
+    $cred = @($resp.credentials | Sort-Object { $_.backupDateTime } -Descending)[0]
+    $pwdPlain = ""
+    if ($cred.passwordBase64) {
+        $pwdPlain = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($cred.passwordBase64))
+    }
 
-Emit-Result @{
-    Device = $resp.deviceName
-    Password = $pwdPlain
-    BackupTime = $cred.backupDateTime
-    Status = "✅ Success"
+    Emit-Result @{
+        Device     = $resp.deviceName
+        DeviceId   = $ids[$i]
+        Account    = $cred.accountName
+        Password   = $pwdPlain
+        BackupTime = $cred.backupDateTime
+        Status     = "✅ Success"
+    }
 }
-exit 0
\ No newline at end of file
+exit 0
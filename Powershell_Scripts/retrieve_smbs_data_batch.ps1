@@ -3,7 +3,10 @@
 # =========================================================
 
 [CmdletBinding()]
-param()
+param(
+    [int]$ThrottleLimit = 4,             # Parallel Exchange Online runspaces (each holds its own connection)
+    [int]$ReadinessTimeoutSeconds = 300  # How long to poll Graph for Full Access to become effective
+)
 
 $ErrorActionPreference = 'Stop'
 
@@ -58,129 +61,254 @@ if (-not $TargetUserUPN) {
 $startTime = Get-Date
 
 # --- 3) Export list of shared mailboxes ---
-$SharedMailboxes = Get-Mailbox -RecipientTypeDetails SharedMailbox |
-    Select-Object DisplayName, PrimarySmtpAddress
+$SharedMailboxes = @(Get-EXOMailbox -RecipientTypeDetails SharedMailbox -ResultSize Unlimited |
+    Select-Object DisplayName, @{ Name = "PrimarySmtpAddress"; Expression = { [string]$_.PrimarySmtpAddress } })
 
 $SharedMailboxes | Export-Csv -Path $ExportListPath -NoTypeInformation -Encoding UTF8
-Write-Host "Exported mailbox list to: $ExportListPath" -ForegroundColor Cyan
+Write-Host "Exported mailbox list to: $ExportListPath ($($SharedMailboxes.Count) mailboxes)" -ForegroundColor Cyan
+
+# Split mailboxes into one chunk per runspace so every runspace connects to EXO only once
+function Split-IntoChunks {
+    param([object[]]$Items, [int]$Count)
+
+    $Count = [math]::Max(1, [math]::Min($Count, $Items.Count))
+    $chunks = [System.Collections.Generic.List[object]]::new()
+    for ($c = 0; $c -lt $Count; $c++) {
+        $chunks.Add(@(for ($i = $c; $i -lt $Items.Count; $i += $Count) { $Items[$i] }))
+    }
+    return ,$chunks
+}
+
+$chunks = if ($SharedMailboxes.Count -gt 0) { Split-IntoChunks -Items $SharedMailboxes -Count $ThrottleLimit } else { @() }
+
+# --- 4) Grant temporary Full Access + read existing permissions (parallel runspaces) ---
+$Permissions = [System.Collections.Concurrent.ConcurrentDictionary[string, object]]::new()
+
+# Runspaces do not share the main session: each one signs in to Exchange Online on its own
+# (same admin UPN, token cache reused) and disconnects when its chunk is done.
+$chunks | ForEach-Object -Parallel {
+    $ErrorActionPreference = 'Stop'
+    $Permissions   = $using:Permissions
+    $TargetUserUPN = $using:TargetUserUPN
+
+    Import-Module ExchangeOnlineManagement -ErrorAction Stop
+    Connect-ExchangeOnline -UserPrincipalName $TargetUserUPN -ShowBanner:$false -ErrorAction Stop
 
-# --- 4) Grant temporary Full Access to the running admin ---
-foreach ($Mailbox in $SharedMailboxes) {
     try {
-        Add-MailboxPermission -Identity $Mailbox.PrimarySmtpAddress `
-            -User $TargetUserUPN -AccessRights FullAccess `
-            -InheritanceType All -AutoMapping:$false
-        Write-Host "Granted Full Access to $($Mailbox.PrimarySmtpAddress)" -ForegroundColor Green
+        foreach ($Mailbox in $_) {
+            $Email = $Mailbox.PrimarySmtpAddress
+            $entry = @{ Granted = $false; FullAccess = "Error"; SendAs = "Error" }
+
+            try {
+                Add-MailboxPermission -Identity $Email -User $TargetUserUPN -AccessRights FullAccess `
+                    -InheritanceType All -AutoMapping:$false -ErrorAction Stop | Out-Null
+                $entry.Granted = $true
+            }
+            catch {
+                Write-Warning "Failed to grant access to $Email $_"
+            }
+
+            try {
+                # The temporary grant above is not part of the mailbox's real delegation
+                $entry.FullAccess = (Get-EXOMailboxPermission -Identity $Email |
+                    Where-Object { $_.AccessRights -contains "FullAccess" -and -not $_.IsInherited -and $_.User -ne $TargetUserUPN }).User -join "; "
+                $entry.SendAs = (Get-EXORecipientPermission -Identity $Email |
+                    Where-Object { $_.AccessRights -contains "SendAs" }).Trustee -join "; "
+            }
+            catch {
+                Write-Warning "Failed to read permissions of $Email $_"
+            }
+
+            [void]$Permissions.TryAdd($Email, $entry)
+        }
     }
-    catch {
-        Write-Warning "Failed to grant access to $($Mailbox.PrimarySmtpAddress): $_"
+    finally {
+        Disconnect-ExchangeOnline -Confirm:$false -ErrorAction SilentlyContinue
     }
-}
+} -ThrottleLimit $ThrottleLimit
 
-Write-Host "Waiting 60 seconds to ensure permission replication..." -ForegroundColor DarkCyan
-Start-Sleep -Seconds 60
+$grantedCount = @($Permissions.Values | Where-Object { $_.Granted }).Count
+Write-Host "Granted temporary Full Access on $grantedCount mailbox(es)." -ForegroundColor Green
 
-# --- 5) Build activity report using Graph for last sent/received messages ---
-$Results = @()
+# --- 5) Last sent / received through $batch, polling until Full Access is effective ---
+# Each mailbox needs two requests (SentItems + Inbox, top 1); 20 requests per $batch call.
+$Folders = @{
+    sent  = "SentItems/messages?`$orderby=sentDateTime desc&`$top=1&`$select=subject,sentDateTime,sender,toRecipients"
+    inbox = "Inbox/messages?`$orderby=receivedDateTime desc&`$top=1&`$select=subject,receivedDateTime,isRead"
+}
 
-foreach ($Mailbox in $SharedMailboxes) {
+$Answers = [System.Collections.Concurrent.ConcurrentDictionary[string, object]]::new()
+$pending = [System.Collections.Generic.List[string]]::new()
+$NoGrant = [bool[]]::new($SharedMailboxes.Count)   # grant failed: an access error is final, not worth polling
+for ($i = 0; $i -lt $SharedMailboxes.Count; $i++) {
+    $pending.Add("$i|sent")
+    $pending.Add("$i|inbox")
+    $perm = $null
+    $NoGrant[$i] = -not ($Permissions.TryGetValue($SharedMailboxes[$i].PrimarySmtpAddress, [ref]$perm) -and $perm.Granted)
+}
 
-    $Email = $Mailbox.PrimarySmtpAddress
-    Write-Host "Processing mailbox: $Email" -ForegroundColor Cyan
+function New-ReportRow {
+    param($Index, [string]$NotReady)
 
-    $SubjectSent     = "No sent emails found"
-    $SentDate        = "N/A"
-    $SentBy          = "N/A"
-    $Recipients      = "N/A"
-    $SubjectReceived = "No emails"
-    $ReceivedDate    = "N/A"
-    $IsRead          = "Unknown"
+    $Mailbox = $SharedMailboxes[$Index]
+    $Email   = $Mailbox.PrimarySmtpAddress
+    $perm    = $null
+    [void]$Permissions.TryGetValue($Email, [ref]$perm)
 
-    try {
-        $FullAccessUsers = (Get-MailboxPermission -Identity $Email |
-            Where-Object { $_.AccessRights -contains "FullAccess" -and -not $_.IsInherited }).User -join "; "
-        $SendAsUsers = (Get-RecipientPermission -Identity $Email |
-            Where-Object { $_.AccessRights -contains "SendAs" }).Trustee -join "; "
+    $row = [ordered]@{
+        "Shared Mailbox"           = $Mailbox.DisplayName
+        "Email Address"            = $Email
+        "Subject of Last Sent"     = "No sent emails found"
+        "Sent Date"                = "N/A"
+        "Sent By"                  = "N/A"
+        "Recipient"                = "N/A"
+        "Subject of Last Received" = "No emails"
+        "Last Received Date"       = "N/A"
+        "Is Last Received Read?"   = "Unknown"
+        "Full Access Users"        = if ($perm) { $perm.FullAccess } else { "Error" }
+        "SendAs Users"             = if ($perm) { $perm.SendAs } else { "Error" }
     }
-    catch {
-        $FullAccessUsers = "Error"
-        $SendAsUsers     = "Error"
+
+    $sent = $null
+    if ($Answers.TryGetValue("$Index|sent", [ref]$sent)) {
+        if ($sent.status -eq 200 -and $sent.body.value.Count -gt 0) {
+            $m = $sent.body.value[0]
+            $row."Subject of Last Sent" = $m.subject
+            $row."Sent Date"            = $m.sentDateTime
+            $row."Sent By"              = $m.sender.emailAddress.address
+            $row."Recipient"            = ($m.toRecipients | ForEach-Object { $_.emailAddress.address }) -join ", "
+        } elseif ($sent.status -ne 200) {
+            $row."Subject of Last Sent" = "Error (HTTP $($sent.status))"
+        }
+    } elseif ($NotReady) {
+        $row."Subject of Last Sent" = $NotReady
     }
 
-    try {
-        $EncodedEmail = [System.Web.HttpUtility]::UrlEncode($Email)
-
-        # Last sent
-        $uriSent = "https://graph.microsoft.com/v1.0/users/$EncodedEmail/mailFolders/SentItems/messages?`$orderby=sentDateTime desc&`$top=1"
-        $sentRes = Invoke-MgGraphRequest -Method GET -Uri $uriSent
-        if ($sentRes.value.Count -gt 0) {
-            $sentMail      = $sentRes.value[0]
-            $SubjectSent   = $sentMail.subject
-            $SentDate      = $sentMail.sentDateTime
-            $SentBy        = $sentMail.sender.emailAddress.address
-            $Recipients    = ($sentMail.toRecipients | ForEach-Object { $_.emailAddress.address }) -join ", "
+    $recv = $null
+    if ($Answers.TryGetValue("$Index|inbox", [ref]$recv)) {
+        if ($recv.status -eq 200 -and $recv.body.value.Count -gt 0) {
+            $m = $recv.body.value[0]
+            $row."Subject of Last Received" = $m.subject
+            $row."Last Received Date"       = $m.receivedDateTime
+            $row."Is Last Received Read?"   = $m.isRead
+        } elseif ($recv.status -ne 200) {
+            $row."Subject of Last Received" = "Error (HTTP $($recv.status))"
         }
+    } elseif ($NotReady) {
+        $row."Subject of Last Received" = $NotReady
     }
-    catch {
-        Write-Warning "Graph API error for sent email of $Email $_"
+
+    [PSCustomObject]$row
+}
+
+$deadline = (Get-Date).AddSeconds($ReadinessTimeoutSeconds)
+$emitted  = [System.Collections.Generic.HashSet[int]]::new()
+$round    = 0
+
+while ($pending.Count -gt 0) {
+    $round++
+
+    $batches = [System.Collections.Generic.List[object]]::new()
+    for ($i = 0; $i -lt $pending.Count; $i += 20) {
+        $end = [math]::Min($i + 19, $pending.Count - 1)
+        $batches.Add(@($pending[$i..$end]))
     }
 
-    try {
-        # Last received
-        $uriReceived = "https://graph.microsoft.com/v1.0/users/$EncodedEmail/mailFolders/Inbox/messages?`$orderby=receivedDateTime desc&`$top=1"
-        $recvRes = Invoke-MgGraphRequest -Method GET -Uri $uriReceived
-        if ($recvRes.value.Count -gt 0) {
-            $lastInbox      = $recvRes.value[0]
-            $SubjectReceived = $lastInbox.subject
-            $ReceivedDate    = $lastInbox.receivedDateTime
-            $IsRead          = $lastInbox.isRead
+    $retry = [System.Collections.Concurrent.ConcurrentBag[string]]::new()
+
+    $batches | ForEach-Object -Parallel {
+        $ErrorActionPreference = 'Stop'
+        $Answers = $using:Answers
+        $retry   = $using:retry
+        $Folders = $using:Folders
+        $boxes   = $using:SharedMailboxes
+        $noGrant = $using:NoGrant
+
+        $requests = @($_ | ForEach-Object {
+            $index, $kind = $_ -split '\|'
+            $email = [uri]::EscapeDataString($boxes[[int]$index].PrimarySmtpAddress)
+            @{ id = $_; method = "GET"; url = "/users/$email/mailFolders/$($Folders[$kind])" }
+        })
+
+        try {
+            $result = Invoke-MgGraphRequest -Method POST -Uri 'https://graph.microsoft.com/v1.0/$batch' `
+                -Body (@{ requests = $requests } | ConvertTo-Json -Depth 5) -ContentType 'application/json'
+        }
+        catch {
+            foreach ($r in $requests) { $retry.Add($r.id) }
+            return
+        }
+
+        foreach ($r in $result.responses) {
+            # 403/404 right after the grant means Full Access has not replicated yet
+            $waitForGrant = $r.status -in @(403, 404) -and -not $noGrant[[int]($r.id -split '\|')[0]]
+            if ($waitForGrant -or $r.status -eq 429 -or $r.status -ge 500) {
+                $retry.Add($r.id)
+            } else {
+                $Answers[$r.id] = [pscustomobject]@{ status = $r.status; body = $r.body }
+            }
         }
+    } -ThrottleLimit 5
+
+    $pending = [System.Collections.Generic.List[string]]::new([string[]]@($retry))
+    $waiting = [System.Collections.Generic.HashSet[int]]::new()
+    foreach ($id in $pending) { [void]$waiting.Add([int]($id -split '\|')[0]) }
+
+    # Stream every mailbox whose two answers are in
+    $rows = [System.Collections.Generic.List[object]]::new()
+    for ($i = 0; $i -lt $SharedMailboxes.Count; $i++) {
+        if (-not $waiting.Contains($i) -and $emitted.Add($i)) { $rows.Add((New-ReportRow -Index $i)) }
     }
-    catch {
-        Write-Warning "Graph API error for received email of $Email $_"
+    if ($rows.Count -gt 0) {
+        $rows | Export-Csv -Path $ReportPath -NoTypeInformation -Encoding UTF8 -Append
     }
+    Write-Host ("Round {0}: {1}/{2} mailboxes written, {3} waiting for access..." -f
+        $round, $emitted.Count, $SharedMailboxes.Count, $waiting.Count) -ForegroundColor DarkCyan
 
-    $Results += [PSCustomObject]@{
-        "Shared Mailbox"           = $Mailbox.DisplayName
-        "Email Address"            = $Email
-        "Subject of Last Sent"     = $SubjectSent
-        "Sent Date"                = $SentDate
-        "Sent By"                  = $SentBy
-        "Recipient"                = $Recipients
-        "Subject of Last Received" = $SubjectReceived
-        "Last Received Date"       = $ReceivedDate
-        "Is Last Received Read?"   = $IsRead
-        "Full Access Users"        = $FullAccessUsers
-        "SendAs Users"             = $SendAsUsers
+    if ($pending.Count -eq 0) { break }
+    if ((Get-Date) -ge $deadline) {
+        Write-Warning "$($waiting.Count) mailbox(es) still not readable after $ReadinessTimeoutSeconds s."
+        $rows = foreach ($i in $waiting) { New-ReportRow -Index $i -NotReady "Access not ready" }
+        $rows | Export-Csv -Path $ReportPath -NoTypeInformation -Encoding UTF8 -Append
+        break
     }
+    Start-Sleep -Seconds ([math]::Min(5 * $round, 30))
 }
 
-$Results | Export-Csv -Path $ReportPath -NoTypeInformation -Encoding UTF8
 Write-Host "[✓] Final report saved to: $ReportPath" -ForegroundColor Green
 
-# --- 6) Remove temporary Full Access ---
-foreach ($Mailbox in $SharedMailboxes) {
-    try {
-        $perm = Get-MailboxPermission -Identity $Mailbox.PrimarySmtpAddress |
-            Where-Object {
-                $_.User.ToString() -eq $TargetUserUPN -and
-                $_.AccessRights -contains "FullAccess" -and
-                -not $_.IsInherited
-            }
+# --- 6) Remove temporary Full Access (parallel runspaces) ---
+$granted = @($SharedMailboxes | Where-Object {
+    $perm = $null
+    $Permissions.TryGetValue($_.PrimarySmtpAddress, [ref]$perm) -and $perm.Granted
+})
+
+if ($granted.Count -gt 0) {
+    $removeChunks = Split-IntoChunks -Items $granted -Count $ThrottleLimit
+    $removeChunks | ForEach-Object -Parallel {
+        $ErrorActionPreference = 'Stop'
+        $TargetUserUPN = $using:TargetUserUPN
+
+        Import-Module ExchangeOnlineManagement -ErrorAction Stop
+        Connect-ExchangeOnline -UserPrincipalName $TargetUserUPN -ShowBanner:$false -ErrorAction Stop
 
-        if ($perm) {
-            Remove-MailboxPermission -Identity $Mailbox.PrimarySmtpAddress `
-                -User $TargetUserUPN -AccessRights FullAccess `
-                -InheritanceType All -Confirm:$false
-            Write-Host "Removed Full Access from $($Mailbox.PrimarySmtpAddress)" -ForegroundColor Yellow
+        try {
+            foreach ($Mailbox in $_) {
+                try {
+                    Remove-MailboxPermission -Identity $Mailbox.PrimarySmtpAddress `
+                        -User $TargetUserUPN -AccessRights FullAccess `
+                        -InheritanceType All -Confirm:$false -ErrorAction Stop
+                    Write-Host "Removed Full Access from $($Mailbox.PrimarySmtpAddress)" -ForegroundColor Yellow
+                }
+                catch {
+                    Write-Warning "Failed to remove access from $($Mailbox.PrimarySmtpAddress): $_"
+                }
+            }
         }
-        else {
-            Write-Host "No Full Access to remove from $($Mailbox.PrimarySmtpAddress)" -ForegroundColor DarkGray
+        finally {
+            Disconnect-ExchangeOnline -Confirm:$false -ErrorAction SilentlyContinue
         }
-    }
-    catch {
-        Write-Warning "Failed to remove access from $($Mailbox.PrimarySmtpAddress): $_"
-    }
+    } -ThrottleLimit $ThrottleLimit
 }
 
 $endTime  = Get-Date
@@ -1,3 +1,7 @@
+param(
+    [switch]$Incremental  # Use /users/delta and merge the changes into the previous snapshot
+)
+
 $properties = @(
     "Id",
     "DisplayName",
@@ -117,6 +121,51 @@ $CSVproperties = @(
     @{Name="Devices";Expression={[string]::join(" ; ", ($_.Devices))}}
     )
 
+# Properties tracked by /users/delta. SignInActivity, licenses details and authentication
+# methods are not tracked by delta queries: unchanged rows keep their previous values,
+# so run a full export from time to time to refresh them.
+$deltaProperties = @(
+    "id", "displayName", "givenName", "surname", "userPrincipalName", "userType",
+    "jobTitle", "companyName", "department", "employeeId", "employeeType", "employeeHireDate",
+    "streetAddress", "city", "state", "postalCode", "country", "businessPhones", "mobilePhone",
+    "mail", "otherMails", "proxyAddresses", "imAddresses", "mailNickname", "preferredLanguage",
+    "passwordPolicies", "accountEnabled", "usageLocation", "assignedLicenses",
+    "onPremisesSyncEnabled", "onPremisesImmutableId", "onPremisesSamAccountName",
+    "onPremisesUserPrincipalName", "onPremisesDomainName", "manager")
+
+# Follow a delta link (or initial delta request) until the final @odata.deltaLink
+function Invoke-GraphDeltaQuery {
+    param (
+        [Parameter(Mandatory)] [string] $Uri
+    )
+
+    $changed = [System.Collections.Generic.HashSet[string]]::new()
+    $removed = [System.Collections.Generic.HashSet[string]]::new()
+    $deltaLink = $null
+    $next = $Uri
+
+    while ($next) {
+        $page = Invoke-MgGraphRequest -Method GET -Uri $next
+        foreach ($item in $page.value) {
+            if ($item.ContainsKey('@removed')) {
+                [void]$changed.Remove($item.id)
+                [void]$removed.Add($item.id)
+            } else {
+                [void]$removed.Remove($item.id)
+                [void]$changed.Add($item.id)
+            }
+        }
+        $next = $page.'@odata.nextLink'
+        if ($page.'@odata.deltaLink') { $deltaLink = $page.'@odata.deltaLink' }
+    }
+
+    return [pscustomobject]@{
+        Changed   = $changed
+        Removed   = $removed
+        DeltaLink = $deltaLink
+    }
+}
+
 #Requires -Version 7
 Connect-MgGraph -Scopes `
 "User.Read.All", `
@@ -142,8 +191,63 @@ $tenantInfo = [PSCustomObject]@{
 $LogDate = Get-Date -f yyyyMMddhhmm
 $Csvfile = Join-Path -Path $PSScriptRoot -ChildPath "EntraIDUsers_$LogDate.csv"
 
-Write-Output "Retrieving all users..."
-$users = Get-MgUser -All -Property $properties
+# Go one level up from script folder (Powershell_Scripts → _APP_Toolbox)
+$rootDir = Split-Path -Parent $PSScriptRoot
+
+# Database_Identity folder at root level
+$identityFolder = Join-Path $rootDir "Database_Identity"
+
+# Ensure the folder exists
+if (-not (Test-Path $identityFolder)) {
+    New-Item -ItemType Directory -Path $identityFolder | Out-Null
+}
+
+# ==== Delta state (delta link + snapshot it applies to) ====
+$deltaStatePath = Join-Path $identityFolder "UsersDeltaState.json"
+$deltaUri = "https://graph.microsoft.com/v1.0/users/delta?`$select=$($deltaProperties -join ',')"
+$delta = $null
+$previousCsv = $null
+
+if ($Incremental) {
+    $state = if (Test-Path $deltaStatePath) { Get-Content $deltaStatePath -Raw | ConvertFrom-Json } else { $null }
+    if ($state -and $state.DeltaLink -and $state.Snapshot) {
+        $previousCsv = Join-Path $identityFolder $state.Snapshot
+    }
+
+    if ($previousCsv -and (Test-Path $previousCsv)) {
+        try {
+            Write-Output "Retrieving user changes since $($state.SavedOn)..."
+            $delta = Invoke-GraphDeltaQuery -Uri $state.DeltaLink
+        } catch {
+            Write-Output "Delta link rejected ($($_.Exception.Message)), running a full export..."
+            $delta = $null
+        }
+    } else {
+        Write-Output "No previous delta state found, running a full export..."
+    }
+}
+
+if ($delta) {
+    $deltaLink = $delta.DeltaLink
+    Write-Output "Changed users: $($delta.Changed.Count) - Removed users: $($delta.Removed.Count)"
+
+    # Fetch full properties for changed users only ('id in' accepts 15 values per filter)
+    $changedIds = @($delta.Changed)
+    $users = @(
+        for ($i = 0; $i -lt $changedIds.Count; $i += 15) {
+            $chunk = $changedIds[$i..([math]::Min($i + 14, $changedIds.Count - 1))]
+            $filter = "id in ('{0}')" -f ($chunk -join "','")
+            Get-MgUser -All -Filter $filter -Property $properties
+        }
+    )
+} else {
+    # Take a delta token before the full export so that changes made during the export
+    # are picked up by the next incremental run
+    $deltaLink = (Invoke-GraphDeltaQuery -Uri "$deltaUri&`$deltatoken=latest").DeltaLink
+
+    Write-Output "Retrieving all users..."
+    $users = @(Get-MgUser -All -Property $properties)
+}
 
 # Debug - Run only on first 50 users (comment above line if used)
 # $users = Get-MgUser -All -Property $properties | Select-Object -First 50
@@ -218,6 +322,7 @@ $batches | ForEach-Object -Parallel {
 }
 
 $usersDetails = $usersDetails | Group-Object -Property UserId -AsHashTable
+if (-not $usersDetails) { $usersDetails = @{} }
 
 Write-Output "Processing requests"
 
@@ -313,23 +418,45 @@ Disconnect-MgGraph
 $timestamp = Get-Date -Format "yyyyMMdd-HHmmss"
 $fileName  = "${timestamp}_EntraIdentities.csv"
 
-# Go one level up from script folder (Powershell_Scripts → _APP_Toolbox)
-$rootDir = Split-Path -Parent $PSScriptRoot
-
-# Database_Identity folder at root level
-$identityFolder = Join-Path $rootDir "Database_Identity"
-
-# Ensure the folder exists
-if (-not (Test-Path $identityFolder)) {
-    New-Item -ItemType Directory -Path $identityFolder | Out-Null
-}
-
 # Final CSV path
 $csvPath = Join-Path $identityFolder $fileName
 
+$rows = @($users | Select-Object -Property $CSVproperties)
+
+if ($delta) {
+    # Merge changed rows into the previous snapshot, keeping its order; new users go last
+    Write-Output "Merging changes into: $previousCsv"
+    $freshRows = @{}
+    foreach ($row in $rows) { $freshRows[$row.Id] = $row }
+
+    $merged = [System.Collections.Generic.List[object]]::new()
+    foreach ($row in (Import-Csv -Path $previousCsv -Delimiter ';' -Encoding UTF8)) {
+        if ($delta.Removed.Contains($row.Id)) { continue }
+        if ($freshRows.ContainsKey($row.Id)) {
+            $merged.Add($freshRows[$row.Id])
+            $freshRows.Remove($row.Id)
+        } else {
+            $merged.Add($row)
+        }
+    }
+    foreach ($row in $rows) {
+        if ($freshRows.ContainsKey($row.Id)) { $merged.Add($row) }
+    }
+    $rows = $merged
+}
+
 # Write CSV
 Write-Output "Writing CSV to: $csvPath"
-$users | Select-Object -Property $CSVproperties | Export-Csv -Path $csvPath -NoTypeInformation -Encoding UTF8 -Delimiter ';'
+$rows | Export-Csv -Path $csvPath -NoTypeInformation -Encoding UTF8 -Delimiter ';'
+
+# Save the delta link next to the snapshot it applies to
+if ($deltaLink) {
+    [pscustomobject]@{
+        DeltaLink = $deltaLink
+        Snapshot  = $fileName
+        SavedOn   = (Get-Date).ToString("o")
+    } | ConvertTo-Json | Set-Content -Path $deltaStatePath -Encoding UTF8
+}
 
 # Save tenant info JSON in the same Database_Identity folder as the CSV
 $tenantJsonPath = Join-Path $identityFolder "TenantInfo.json"
@@ -1,17 +1,22 @@
 <#
 .SYNOPSIS
     Revoke all active sessions for one or more Entra ID users (sign-out everywhere).
+    Requests go 20 per $batch, batches run in parallel runspaces; each user's result
+    is emitted as a "##RESULT## {json}" line as soon as its batch completes.
 #>
 
 param(
     [Parameter(Mandatory = $true)]
-    [string[]]$UserPrincipalName
+    [string[]]$UserPrincipalName,
+
+    [int]$ThrottleLimit = 4      # Parallel $batch runspaces
 )
 
 # Handle comma-separated input
 if ($UserPrincipalName.Count -eq 1 -and $UserPrincipalName[0] -like "*,*") {
     $UserPrincipalName = $UserPrincipalName[0] -split ","
 }
+$UserPrincipalName = @($UserPrincipalName | ForEach-Object { $_.Trim() } | Where-Object { $_ } | Select-Object -Unique)
 
 Write-Host "`n🚪 Revoking user sessions..." -ForegroundColor Cyan
 Write-Host "Connecting to Microsoft Graph..." -ForegroundColor Yellow
@@ -36,33 +41,57 @@ catch {
     [System.Environment]::Exit(1)
 }
 
-$results = @()
+# --- $batch helper (Invoke-GraphBatch) ---
+. (Join-Path $PSScriptRoot "GraphBatch.ps1")
 
-foreach ($upn in $UserPrincipalName) {
-    Write-Host "`n→ Processing user: $upn" -ForegroundColor Cyan
-    try {
-        $user = Get-MgUser -UserId $upn -ErrorAction Stop
-        Revoke-MgUserSignInSession -UserId $user.Id -ErrorAction Stop
+$chunks = [System.Collections.Generic.List[object]]::new()
+for ($i = 0; $i -lt $UserPrincipalName.Count; $i += 20) {
+    $end = [math]::Min($i + 19, $UserPrincipalName.Count - 1)
+    $chunks.Add(@($UserPrincipalName[$i..$end]))
+}
 
-        $results += [PSCustomObject]@{
-            UserUPN = $upn
-            Status  = "✅ Sessions revoked successfully"
-        }
+Write-Host "→ $($UserPrincipalName.Count) user(s), $($chunks.Count) batch(es), $ThrottleLimit in parallel`n" -ForegroundColor Cyan
+
+$succeeded = [System.Collections.Concurrent.ConcurrentBag[string]]::new()
+$invokeGraphBatch = ${function:Invoke-GraphBatch}.ToString()
+
+$chunks | ForEach-Object -Parallel {
+    $chunk = $_
+    $succeeded = $using:succeeded
+    ${function:Invoke-GraphBatch} = $using:invokeGraphBatch
 
-        Write-Host "   🔒 Active sessions revoked" -ForegroundColor Yellow
+    $requests = @(for ($i = 0; $i -lt $chunk.Count; $i++) {
+        @{ id = "$i"; method = "POST"; url = "/users/$([uri]::EscapeDataString($chunk[$i]))/revokeSignInSessions" }
+    })
+
+    try {
+        $responses = Invoke-GraphBatch -Requests $requests
+    } catch {
+        $responses = @{}
+        $batchError = $_.Exception.Message
     }
-    catch {
-        $results += [PSCustomObject]@{
-            UserUPN = $upn
-            Status  = "❌ Failed — $($_.Exception.Message)"
+
+    for ($i = 0; $i -lt $chunk.Count; $i++) {
+        $upn = $chunk[$i]
+        $r = $responses["$i"]
+
+        if ($r -and $r.status -ge 200 -and $r.status -lt 300) {
+            $result = [ordered]@{ UserUPN = $upn; Status = "✅ Sessions revoked successfully" }
+            $succeeded.Add($upn)
+            Write-Host "🔒 Active sessions revoked for $upn" -ForegroundColor Yellow
+        } else {
+            $msg = if ($r) { "HTTP $($r.status): $($r.body.error.message)" } else { $batchError }
+            $result = [ordered]@{ UserUPN = $upn; Status = "❌ Failed — $msg" }
+            Write-Host "❌ Failed for $upn — $msg" -ForegroundColor Red
         }
-        Write-Host "❌ Failed for $upn — $($_.Exception.Message)" -ForegroundColor Red
+
+        Write-Host ("##RESULT## " + ($result | ConvertTo-Json -Compress))
     }
-}
+} -ThrottleLimit $ThrottleLimit
 
 Write-Host "`n────────────── Summary ──────────────" -ForegroundColor Cyan
-Write-Host ($results | ConvertTo-Json -Depth 3)
+Write-Host "Sessions revoked: $($succeeded.Count) / $($UserPrincipalName.Count)"
 Write-Host "─────────────────────────────────────" -ForegroundColor Cyan
 
 Disconnect-MgGraph | Out-Null
-[System.Environment]::Exit(0)
\ No newline at end of file
+[System.Environment]::Exit(0)
@@ -1,4 +1,6 @@
-import os, glob, subprocess, sys, datetime, pandas as pd, json, string, random, csv, time, tempfile, base64
+from __future__ import annotations
+import os, glob, subprocess, sys, datetime, json, string, random, csv, time, tempfile, base64, hashlib, threading
+import collections, functools, importlib, io, logging, logging.handlers, math, re, sqlite3, traceback, zlib
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QVBoxLayout,
     QPushButton, QLabel, QStackedWidget, QTableWidget,
@@ -6,14 +8,292 @@ from PyQt6.QtWidgets import (
     QFrame, QGridLayout, QTabWidget, QMenu, QTextEdit, QGroupBox,
     QAbstractItemView, QHeaderView, QDateEdit, QCompleter, QSlider,
     QFileDialog, QScrollArea, QGraphicsDropShadowEffect, QInputDialog,
-    QFormLayout, QDialog, QListView, QCheckBox, QListWidget
+    QFormLayout, QDialog, QListView, QCheckBox, QListWidget, QSpinBox
 )
 from PyQt6.QtCore import QThread, pyqtSignal, Qt, QDate, QTimer
 from PyQt6.QtGui import (QAction, QIcon, QShortcut, QKeySequence, QColor, QBrush,
                          QPainter, QPen, QImage, QPixmap, QFont
                          )
 from PyQt6 import QtGui, QtCore
-from faker import Faker
+
+
+# --- Lazy Imports ---#
+class LazyModule:
+    """
+    Stand-in for a heavy module, imported on first attribute access. pandas and numpy stay off the startup
+    path (annotations are not evaluated, see `from __future__ import annotations`) and are warmed up on a
+    background thread once the window is shown. importlib's per-module lock makes concurrent first use safe.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+
+# --- Performance Spans ---#
+class PerfSpan:
+    """`with PerfMonitor.span("render.devices"):` — records the block's wall time, also when it raises."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        PerfMonitor.record(self.name, time.perf_counter() - self.started, self.started)
+        return False
+
+
+class PerfMonitor:
+    """
+    In-memory timing samples per operation (load, filter, render, dashboard, PowerShell, startup).
+    The last MAX_SAMPLES of each operation are kept; the Performance panel shows their p50/p95 and
+    can export them as JSON. Recording is thread-safe and costs a lock and a deque append.
+    """
+
+    MAX_SAMPLES = 500
+    EPOCH = time.time() - time.perf_counter()   # perf_counter -> wall clock, for exported timestamps
+    samples = {}   # operation -> deque[(perf_counter start, seconds, thread name)]
+    lock = threading.Lock()
+
+    @classmethod
+    def record(cls, name, seconds, started=None):
+        if started is None:
+            started = time.perf_counter() - seconds
+        with cls.lock:
+            bucket = cls.samples.get(name)
+            if bucket is None:
+                bucket = cls.samples[name] = collections.deque(maxlen=cls.MAX_SAMPLES)
+            bucket.append((started, seconds, threading.current_thread().name))
+
+    @staticmethod
+    def span(name):
+        return PerfSpan(name)
+
+    @staticmethod
+    def timed(name):
+        """Method decorator: time every call under `name` (or name(*args) when it is callable)."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with PerfSpan(name(*args, **kwargs) if callable(name) else name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    @staticmethod
+    def script_span(worker, *_):
+        """Span name of a PowerShell worker's run(): powershell.<script>.ps1"""
+        script = getattr(worker, "script_path", None) or next(
+            (str(a) for a in getattr(worker, "command", []) if str(a).endswith(".ps1")), "script"
+        )
+        return "powershell." + os.path.basename(script)
+
+    @staticmethod
+    def percentile(ordered, q):
+        """Nearest-rank percentile of an already sorted list."""
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+    @classmethod
+    def stats(cls):
+        """[{operation, count, p50, p95, max, last}] in milliseconds, slowest p95 first."""
+        with cls.lock:
+            snapshot = {name: list(bucket) for name, bucket in cls.samples.items()}
+        rows = []
+        for name, items in snapshot.items():
+            ordered = sorted(seconds for _, seconds, _ in items)
+            rows.append({
+                "operation": name,
+                "count": len(items),
+                "p50": cls.percentile(ordered, 50) * 1000,
+                "p95": cls.percentile(ordered, 95) * 1000,
+                "max": ordered[-1] * 1000,
+                "last": items[-1][1] * 1000,
+            })
+        return sorted(rows, key=lambda r: r["p95"], reverse=True)
+
+    @classmethod
+    def export(cls, path):
+        with cls.lock:
+            snapshot = {name: list(bucket) for name, bucket in cls.samples.items()}
+        data = {
+            "exported_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "summary": cls.stats(),
+            "samples": {
+                name: [
+                    {"start": datetime.datetime.fromtimestamp(cls.EPOCH + started).isoformat(timespec="milliseconds"),
+                     "ms": round(seconds * 1000, 3), "thread": thread}
+                    for started, seconds, thread in items
+                ]
+                for name, items in snapshot.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.samples.clear()
+
+
+# --- Stall Watchdog ---#
+class StallWatchdog:
+    """
+    Detects GUI event-loop stalls. A QTimer on the GUI thread beats every INTERVAL; a daemon thread
+    checks the last beat and, while it is older than THRESHOLD, samples the GUI thread's Python stack
+    (sys._current_frames). When the loop recovers, one report (duration, active page, identical stacks
+    grouped, most frequent first) is appended to a rotating log and the stall is recorded as "gui.stall".
+    """
+
+    THRESHOLD = 0.5          # seconds without a beat = stall
+    INTERVAL = 0.1           # beat / sampling period (seconds)
+    MAX_STACKS = 20          # distinct stacks kept per stall
+    MAX_BYTES = 1 << 20      # per report file
+    BACKUP_COUNT = 5
+
+    def __init__(self, report_path, page_name=None, parent=None):
+        self.report_path = report_path
+        self.page_name = page_name or (lambda: "")
+        self.gui_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.page = ""
+        self.stopped = threading.Event()
+
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        self.logger = logging.getLogger("id_toolbox.stalls")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if not self.logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                report_path, maxBytes=self.MAX_BYTES, backupCount=self.BACKUP_COUNT, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self.beat)
+        self.thread = threading.Thread(target=self.watch, name="StallWatchdog", daemon=True)
+
+    def start(self):
+        self.beat()
+        self.timer.start(int(self.INTERVAL * 1000))
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.timer.stop()
+
+    def beat(self):
+        # GUI thread: also note the page, Qt widgets must not be read from the watchdog thread
+        self.page = self.page_name()
+        self.last_beat = time.perf_counter()
+
+    def gui_stack(self):
+        frame = sys._current_frames().get(self.gui_thread_id)
+        return "".join(traceback.format_stack(frame)) if frame is not None else "<GUI thread not found>\n"
+
+    def watch(self):
+        stall_beat, stacks, samples, page = None, collections.Counter(), 0, ""
+        while not self.stopped.wait(self.INTERVAL):
+            beat = self.last_beat
+            if time.perf_counter() - beat > self.THRESHOLD:
+                if stall_beat is None:
+                    stall_beat, stacks, samples, page = beat, collections.Counter(), 0, self.page
+                stack = self.gui_stack()
+                if stack in stacks or len(stacks) < self.MAX_STACKS:
+                    stacks[stack] += 1
+                samples += 1
+            elif stall_beat is not None:
+                if beat != stall_beat:   # the loop is beating again
+                    self.report(beat - stall_beat - self.INTERVAL, page, stacks, samples)
+                    stall_beat = None
+
+    def report(self, duration, page, stacks, samples):
+        PerfMonitor.record("gui.stall", duration)
+        started = datetime.datetime.now() - datetime.timedelta(seconds=duration)
+        lines = [
+            f"=== GUI stall {duration:.2f} s at {started:%Y-%m-%d %H:%M:%S} — page: {page or 'unknown'} ===",
+            f"Stack samples: {samples} (every {int(self.INTERVAL * 1000)} ms)",
+        ]
+        for stack, count in stacks.most_common():
+            lines.append(f"--- {count} sample(s) ---")
+            lines.append(stack.rstrip())
+        # A failing write is reported by the handler itself (logging.Handler.handleError)
+        self.logger.info("\n".join(lines) + "\n")
+
+
+class PerformancePanelDialog(QDialog):
+    """p50/p95 per timed operation, refreshed every second; Export JSON writes every kept sample."""
+
+    COLUMNS = ["Operation", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)", "Last (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance")
+        self.resize(760, 520)
+
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(lambda: (PerfMonitor.reset(), self.refresh()))
+        export_btn = QPushButton("💾 Export JSON")
+        export_btn.clicked.connect(self.export_json)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(reset_btn)
+        buttons.addWidget(export_btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        rows = PerfMonitor.stats()
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            values = [row["operation"], str(row["count"])] + [
+                f"{row[k]:.1f}" for k in ("p50", "p95", "max", "last")
+            ]
+            for c, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if c:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(r, c, item)
+
+    def export_json(self):
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timings", f"{stamp}_Performance.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            PerfMonitor.export(path)
+            QMessageBox.information(self, "Export Timings", f"Timings exported to:\n{path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export timings:\n{e}")
 
 
 class UnifiedPowerShellWorker(QThread):
@@ -28,6 +308,7 @@ class UnifiedPowerShellWorker(QThread):
         self.args = args or []
         self.log_file = log_file
 
+    @PerfMonitor.timed(PerfMonitor.script_span)
     def run(self):
         try:
             # Build PowerShell command
@@ -74,6 +355,9 @@ class PowerShellWorker(QThread):
     output = pyqtSignal(str)
     finished = pyqtSignal(str, str)  # status, message
     error = pyqtSignal(str)
+    result = pyqtSignal(dict)  # per-item results, may carry secrets: never echoed to the console or log
+
+    RESULT_PREFIX = "##RESULT## "
 
     def __init__(self, pwsh_path, script_path, args, log_file=None):
         super().__init__()
@@ -82,6 +366,7 @@ class PowerShellWorker(QThread):
         self.args = args or []
         self.log_file = log_file
 
+    @PerfMonitor.timed(PerfMonitor.script_span)
     def run(self):
         try:
             ps_cmd = (
@@ -108,6 +393,12 @@ class PowerShellWorker(QThread):
 
             for line in process.stdout:
                 line = line.rstrip()
+                if line.startswith(self.RESULT_PREFIX):
+                    try:
+                        self.result.emit(json.loads(line[len(self.RESULT_PREFIX):]))
+                    except ValueError:
+                        pass
+                    continue
                 if line:
                     self.output.emit(line)
                     if f:
@@ -138,168 +429,1806 @@ class ClickableCard(QFrame):
         super().mousePressEvent(event)
 
 
-class CsvDropZone(QLabel):
-    def __init__(self, parent=None, on_csv_dropped=None):
-        super().__init__("Drop CSV file here", parent)
-        self.on_csv_dropped = on_csv_dropped
-        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setAcceptDrops(True)
-        self.setWordWrap(True)
-        self.setFixedHeight(100)
-        self.setMaximumWidth(200)  # Prevent window from stretching
-        self.update_default_style()
+# --- Dashboard Cards ---#
+class DashboardStyles:
+    """Dashboard card / Top-N table stylesheets, compiled once per theme (and card color) and reused."""
 
-    def update_default_style(self):
-        self.setStyleSheet("""
-            QLabel {
-                border: 2px dashed #888;
-                border-radius: 8px;
-                padding: 20px;
-                color: #aaa;
-                font-style: italic;
-                text-align: center;
-            }
-            QLabel:hover {
-                border-color: #00aaff;
-                color: #00aaff;
-            }
-        """)
-        self.setText("Drop CSV file here")
+    ICON = "font-size: 20px; margin-right: 8px; background: transparent;"
+    TITLE = "font-size: 14px; font-weight: bold; background: transparent;"
+    VALUE = "font-size: 28px; font-weight: bold; background: transparent;"
+    SUBTITLE = "font-size: 12px; color: #bdc3c7; background: transparent;"
 
-    def update_dropped_style(self, file_name):
-        self.setStyleSheet("""
-            QLabel {
-                border: 2px dashed #00BFFF;
-                border-radius: 8px;
-                padding: 20px;
-                color: #00BFFF;
-                font-weight: bold;
-                text-align: center;
-            }
-        """)
+    # Gradient end stops (normal, hover) per theme
+    STOPS = {"dark": ("#1a1a1a", "#333333"), "light": ("#3a3a3a", "#4d4d4d")}
 
-        max_len = 40
-        display_name = (file_name[:max_len] + "…") if len(file_name) > max_len else file_name
-        display_name = display_name.replace("_", "_<wbr>")  # allow breaks at underscores
+    _cache = {}
 
-        # HTML for multi-line display
-        self.setText(f"<div style='text-align:center;'>📄<br>{display_name}</div>")
+    @staticmethod
+    def theme_of(widget) -> str:
+        if widget is None:
+            return "dark"
+        return "dark" if widget.palette().color(widget.backgroundRole()).lightness() < 128 else "light"
+
+    @classmethod
+    def card(cls, color: str, theme: str) -> str:
+        key = ("card", theme, color)
+        if key not in cls._cache:
+            end, hover = cls.STOPS.get(theme, cls.STOPS["dark"])
+            cls._cache[key] = f"""
+                QFrame {{
+                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 {color}, stop:1 {end});
+                    border-radius: 12px;
+                    padding: 16px;
+                }}
+                QFrame:hover {{
+                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 {color}, stop:1 {hover});
+                }}
+                QLabel {{
+                    color: white;
+                    background: transparent;   /* prevent labels from drawing boxes */
+                }}
+            """
+        return cls._cache[key]
 
-    def dragEnterEvent(self, event):
-        if event.mimeData().hasUrls():
-            file = event.mimeData().urls()[0].toLocalFile()
-            if file.lower().endswith('.csv'):
-                event.acceptProposedAction()
+    @classmethod
+    def table(cls, theme: str) -> str:
+        key = ("table", theme)
+        if key not in cls._cache:
+            cls._cache[key] = """
+                QFrame { background-color: #2c3e50; border-radius: 12px; padding: 12px; }
+                QLabel { color: white; }
+                QTableWidget { background-color: #2c3e50; color: white; gridline-color: #555; }
+                QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
+            """
+        return cls._cache[key]
+
+
+class DashboardCard(ClickableCard):
+    """Stat card built once; refreshes only touch its value, subtitle and click target."""
+
+    def __init__(self, title, color="#2c3e50", icon=None, theme="dark"):
+        super().__init__()
+        self.color = color
+        self.theme = None
+        self.on_click = None
+        self.apply_theme(theme)
+
+        # Drop shadow (created once with the card)
+        shadow = QGraphicsDropShadowEffect(self)
+        shadow.setBlurRadius(25)
+        shadow.setOffset(0, 4)
+        shadow.setColor(QColor(0, 0, 0, 160))
+        self.setGraphicsEffect(shadow)
+
+        vbox = QVBoxLayout(self)
+
+        # Title row
+        title_row = QHBoxLayout()
+        if icon:
+            icon_lbl = QLabel(icon)
+            icon_lbl.setStyleSheet(DashboardStyles.ICON)
+            title_row.addWidget(icon_lbl)
+        title_lbl = QLabel(title)
+        title_lbl.setStyleSheet(DashboardStyles.TITLE)
+        title_row.addWidget(title_lbl)
+        title_row.addStretch()
+        vbox.addLayout(title_row)
+
+        self.value_lbl = QLabel()
+        self.value_lbl.setStyleSheet(DashboardStyles.VALUE)
+        vbox.addWidget(self.value_lbl)
+
+        self.sub_lbl = QLabel()
+        self.sub_lbl.setStyleSheet(DashboardStyles.SUBTITLE)
+        self.sub_lbl.hide()
+        vbox.addWidget(self.sub_lbl)
+
+        self.clicked.connect(self._on_clicked)
+
+    def apply_theme(self, theme):
+        if theme != self.theme:
+            self.theme = theme
+            self.setStyleSheet(DashboardStyles.card(self.color, theme))
+
+    def set_value(self, value, subtitle="", on_click=None):
+        self.value_lbl.setText(str(value))
+        self.sub_lbl.setText(subtitle or "")
+        self.sub_lbl.setVisible(bool(subtitle))
+
+        if bool(on_click) != bool(self.on_click):
+            if on_click:
+                self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
             else:
-                event.ignore()
+                self.unsetCursor()
+        self.on_click = on_click
 
-    def dropEvent(self, event):
-        if event.mimeData().hasUrls():
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if file_path.lower().endswith('.csv'):
-                    file_name = os.path.basename(file_path)
-                    self.update_dropped_style(file_name)
-                    if self.on_csv_dropped:
-                        self.on_csv_dropped(file_path)
-                    break
+    def _on_clicked(self):
+        if self.on_click:
+            self.on_click()
 
 
-class DataSyncDialog(QDialog):
+class DashboardTable(QFrame):
+    """Top-N value counts card; rows are rewritten in place on refresh."""
+
+    def __init__(self, title, theme="dark"):
+        super().__init__()
+        self.theme = None
+        self.apply_theme(theme)
+
+        v = QVBoxLayout(self)
+        t_lbl = QLabel(title)
+        t_lbl.setStyleSheet("font-size: 14px; font-weight: bold; color: white;")
+        v.addWidget(t_lbl)
+
+        self.table = QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(["Value", "Count"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+
+        # Allow horizontal scroll for long values
+        self.table.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.table.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # Value column
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)  # Count column
+
+        self.table.setFixedHeight(250)
+        v.addWidget(self.table)
+
+    def apply_theme(self, theme):
+        if theme != self.theme:
+            self.theme = theme
+            self.setStyleSheet(DashboardStyles.table(theme))
+
+    def set_counts(self, counts):
+        """counts: (value, count) pairs, already sorted (see DashboardMetrics.top_counts)."""
+        self.table.setRowCount(len(counts))
+        for i, (k, cnt) in enumerate(counts):
+            for c, text in enumerate((str(k), str(cnt))):
+                item = self.table.item(i, c)
+                if item is None:
+                    item = QTableWidgetItem()
+                    item.setForeground(Qt.GlobalColor.white)
+                    self.table.setItem(i, c, item)
+                item.setText(text)
+        self.table.resizeColumnsToContents()
+
+
+class DashboardGrid:
     """
-    Modern modal picker for running one or more 'retrieve/export' scripts sequentially.
-    Adds contextual descriptions for each dataset type.
+    Persistent card grid bound to a dashboard's QGridLayout. Cards and tables are created on first
+    use (keyed by title) and then only updated, so switching snapshots repaints without rebuilding.
     """
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Retrieve Tenant Data")
-        self.setMinimumSize(580, 420)
+    def __init__(self, layout, cols=3):
+        self.layout = layout
+        self.cols = cols
+        self.cards = {}      # title -> DashboardCard
+        self.tables = {}     # title -> DashboardTable
+        self.positions = {}  # widget -> (row, col)
+        self.message = None
+
+    def show_message(self, text):
+        for w in list(self.cards.values()) + list(self.tables.values()):
+            w.hide()
+        if self.message is None:
+            self.message = QLabel()
+            self.layout.addWidget(self.message, 0, 0, 1, self.cols)
+        self.message.setText(text)
+        self.message.show()
+
+    def update(self, cards, tables=()):
+        """
+        cards:  (title, value, color, icon, subtitle, on_click) tuples, placed row by row
+        tables: (title, counts) tuples, placed on the rows after the cards
+        """
+        host = self.layout.parentWidget()
+        theme = DashboardStyles.theme_of(host)
+        if host is not None:
+            host.setUpdatesEnabled(False)
+        try:
+            if self.message is not None:
+                self.message.hide()
+
+            placed = []
+            for title, value, color, icon, subtitle, on_click in cards:
+                card = self.cards.get(title)
+                if card is None:
+                    card = self.cards[title] = DashboardCard(title, color, icon, theme)
+                card.apply_theme(theme)
+                card.set_value(value, subtitle, on_click)
+                placed.append(card)
+
+            first_table_row = (len(placed) + self.cols - 1) // self.cols
+            positions = {w: divmod(i, self.cols) for i, w in enumerate(placed)}
+
+            for i, (title, counts) in enumerate(tables):
+                table = self.tables.get(title)
+                if table is None:
+                    table = self.tables[title] = DashboardTable(title, theme)
+                table.apply_theme(theme)
+                table.set_counts(counts)
+                r, c = divmod(i, self.cols)
+                positions[table] = (first_table_row + r, c)
+
+            # Hide what this snapshot does not show, (re)place what moved
+            for w in list(self.cards.values()) + list(self.tables.values()):
+                if w not in positions:
+                    w.hide()
+            for w, pos in positions.items():
+                if self.positions.get(w) != pos:
+                    self.layout.removeWidget(w)
+                    self.layout.addWidget(w, *pos)
+                    self.positions[w] = pos
+                w.show()
+        finally:
+            if host is not None:
+                host.setUpdatesEnabled(True)
 
-        # --- Main Layout ---
-        main_layout = QVBoxLayout(self)
 
-        title_lbl = QLabel("Select the datasets you want to retrieve:")
-        title_lbl.setStyleSheet("font-size:16px; font-weight:600; margin-bottom:6px;")
-        main_layout.addWidget(title_lbl)
+# --- Dashboard Metrics ---#
+class DashboardMetrics:
+    """
+    Pure pandas side of the dashboards: reads a snapshot and computes every card value and Top-N table
+    in one pass. No widgets are touched here, so it runs in DashboardMetricsWorker off the GUI thread.
 
-        subtitle_lbl = QLabel(
-            "Each report will be generated using PowerShell scripts and saved in its corresponding folder.\n"
-            "Scripts run sequentially with a 5-second delay between each."
-        )
-        subtitle_lbl.setWordWrap(True)
-        subtitle_lbl.setStyleSheet("color:#b0b0b0; font-size:12px;")
-        main_layout.addWidget(subtitle_lbl)
-        main_layout.addSpacing(10)
+    compute() returns {"cards": [(title, value, color, icon, subtitle, click_args)], "tables": [(title, counts)]}
+    where click_args are the arguments of the dashboard's filter handler and counts are (value, count) pairs.
+    """
 
-        # --- Sectioned Grid ---
-        grid = QGridLayout()
-        grid.setHorizontalSpacing(20)
-        grid.setVerticalSpacing(10)
-        main_layout.addLayout(grid)
+    @staticmethod
+    def content_hash(path, chunk_size=1 << 20) -> str:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                h.update(block)
+        return h.hexdigest()
 
-        def make_checkbox(label, desc):
-            box = QCheckBox(label)
-            box_desc = QLabel(desc)
-            box_desc.setStyleSheet("color:#aaa; font-size:11px; margin-left:24px;")
-            v = QVBoxLayout()
-            v.addWidget(box)
-            v.addWidget(box_desc)
-            w = QWidget()
-            w.setLayout(v)
-            return box, w
+    @staticmethod
+    def read_csv(path, sep=None) -> pd.DataFrame:
+        """Snapshot CSV (path or binary file object) as strings, delimiter sniffed when not given."""
+        if sep is None:
+            if hasattr(path, "read"):
+                sample = path.read(2048).decode("utf-8", errors="ignore")
+                path.seek(0)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    sample = f.read(2048)
+            try:
+                sep = csv.Sniffer().sniff(sample).delimiter
+            except Exception:
+                sep = ";" if ";" in sample else "," if "," in sample else "\t"
+        return pd.read_csv(path, dtype=str, sep=sep).fillna("")
 
-        # Checkboxes with descriptions
-        self.cb_id, w1 = make_checkbox("Identities",
-                                       "Exports all Entra ID users with full attributes and license details.")
-        self.cb_dev, w2 = make_checkbox("Devices",
-                                        "Retrieves all Intune-managed devices with OS, owner, and compliance data.")
-        self.cb_autopilot, w_ap = make_checkbox("Autopilot Devices",
-                                                "Retrieves Windows Autopilot devices with enrollment and user data.")
-        self.cb_grp, w3 = make_checkbox("Groups",
-                                        "Exports Entra ID groups with owners, members, nested groups, and role assignments.")
-        self.cb_exo, w4 = make_checkbox("Shared Mailboxes (Exchange)",
-                                        "Generates Exchange report for all shared mailboxes and recent activity.")
-        self.cb_app, w5 = make_checkbox("Detected Apps (Intune)",
-                                        "Retrieves installed app data across managed devices and aggregates usage.")
-        self.cb_ap, w6 = make_checkbox("Access Packages",
-                                       "Exports all Entra Entitlement Management Access Packages and assignments.")
+    @staticmethod
+    def top_counts(series: pd.Series, n=10):
+        """Value counts of a series (blanks ignored); n=None keeps every value."""
+        vc = series[series.str.strip().ne("")].value_counts()
+        if n:
+            vc = vc.head(n)
+        return [(str(k), int(v)) for k, v in vc.items()]
 
-        # Add to grid (left column)
-        grid.addWidget(w1, 0, 0)  # Identities
-        grid.addWidget(w2, 1, 0)  # Devices
-        grid.addWidget(w_ap, 2, 0)  # Autopilot Devices
-        grid.addWidget(w3, 3, 0)  # Groups
+    @staticmethod
+    def explode(series: pd.Series) -> pd.Series:
+        """Split a semicolon-separated multi-valued column into one value per row."""
+        return series.str.split(";").explode().astype(str).str.strip()
 
-        # Right column stays aligned
-        grid.addWidget(w4, 0, 1)  # Shared Mailboxes
-        grid.addWidget(w5, 1, 1)  # Apps
-        grid.addWidget(w6, 2, 1)  # Access Packages
+    @staticmethod
+    def exchange_masks(df: pd.DataFrame) -> dict:
+        """Row masks behind the Exchange cards (shared with show_filtered_exchange)."""
+        def s(col):
+            return df[col].astype(str) if col in df.columns else pd.Series([""] * len(df), index=df.index, dtype=str)
 
-        # --- Button Row ---
-        main_layout.addSpacing(15)
-        btns = QHBoxLayout()
-        btns.addStretch(1)
-        self.run_btn = QPushButton("Run")
-        self.run_btn.setStyleSheet("font-weight:600; padding:6px 18px;")
-        self.run_btn.clicked.connect(self.start_run)
-        btns.addWidget(self.run_btn)
+        now = pd.Timestamp.utcnow()
+        days_30 = pd.Timedelta(days=30)
+        sent_dt = pd.to_datetime(s("Last Sent Date"), errors="coerce", utc=True)
+        recv_dt = pd.to_datetime(s("Last Received Date"), errors="coerce", utc=True)
+        x400 = s("Has X400 Address").str.strip()
+
+        return {
+            "FULL_ACCESS": s("Full Access Users").str.strip() != "",
+            "SEND_AS": s("SendAs Users").str.strip() != "",
+            "RECENT_SENT": sent_dt.notna() & ((now - sent_dt) <= days_30),
+            "RECENT_RECV": recv_dt.notna() & ((now - recv_dt) <= days_30),
+            "UNREAD_LAST": s("Is Last Received Read?").str.strip().str.lower().isin(["false", "no", "0"]),
+            "HAS_X400": x400.str.lower().isin(["true", "yes", "1"]) | (x400 != ""),
+        }
 
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.clicked.connect(self.reject)
-        cancel_btn.setStyleSheet("padding:6px 18px;")
-        btns.addSpacing(10)
-        btns.addWidget(cancel_btn)
-        btns.addStretch(1)
-        main_layout.addLayout(btns)
+    @classmethod
+    def compute(cls, kind, df: pd.DataFrame) -> dict:
+        total = len(df)
 
-        # --- Runtime variables ---
-        self.tasks = []
-        self.task_index = -1
-        self.worker = None
+        def s(name: str) -> pd.Series:
+            """Return column as string series (safe)."""
+            if name in df.columns:
+                return df[name].astype(str).fillna("")
+            return pd.Series([""] * total, dtype=str)
 
-        # --- Apply Light/Dark Auto Theme ---
-        is_dark = False
+        def b(name: str) -> pd.Series:
+            """Return boolean series from 'True'/'False' strings."""
+            return s(name).str.lower().eq("true")
+
+        if kind == "identity":
+            enabled = int(b("AccountEnabled").sum())
+            guests = int(s("UserType").str.lower().str.contains("guest").sum())
+            synced = int(b("OnPremisesSyncEnabled").sum())
+            licensed = int(s("LicensesSkuType").str.strip().ne("").sum())
+
+            # MFA-capable if any auth method/value present
+            mfa_capable = int((
+                    s("AuthenticationMethod").str.strip().ne("") |
+                    b("WindowsHelloEnabled") |
+                    b("SoftwareOATHEnabled") |
+                    s("MicrosoftAuthenticatorDisplayName").str.strip().ne("") |
+                    s("FIDO2DisplayName").str.strip().ne("") |
+                    s("SMSPhoneNumber").str.strip().ne("") |
+                    s("EmailAuthAddress").str.strip().ne("")
+            ).sum())
+
+            # Last sign-in recency
+            lsi = pd.to_datetime(s("LastSignInDateTime"), dayfirst=True, errors="coerce", utc=True)
+            never_signed = int(lsi.isna().sum())
+            inactive_90 = int(((pd.Timestamp.utcnow() - lsi) > pd.Timedelta(days=90)).fillna(False).sum())
+
+            # Devices & manager
+            with_devices = int(s("Devices").str.strip().ne("").sum())
+            no_manager = int(s("ManagerDisplayName").str.strip().eq("").sum())
+
+            cards = [
+                ("Identity Total", total, "#34495e", "👥", "Total users"),
+                ("Enabled", enabled, "#27ae60", "✅", "Active accounts"),
+                ("Disabled", total - enabled, "#c0392b", "❌", "Inactive accounts"),
+
+                ("Guests", guests, "#8e44ad", "🌍", "External users"),
+                ("Cloud-only", total - synced, "#2980b9", "☁️", "Not synced"),
+                ("Synced", synced, "#16a085", "🔄", "Hybrid AD"),
+
+                ("Licensed", licensed, "#2c3e50", "🧾", "Users with licenses"),
+                ("MFA Capable", mfa_capable, "#f39c12", "🔐", f"{(mfa_capable / total) * 100:.1f}% of users"),
+                ("Stale > 90 days", inactive_90, "#d35400", "⏳", "No sign-in in 90+ days"),
+
+                ("Never signed in", never_signed, "#7f8c8d", "🚫", "No recorded sign-in"),
+                ("With devices", with_devices, "#2980b9", "💻", "Registered devices"),
+                ("No manager", no_manager, "#95a5a6", "🧭", "Manager not set"),
+            ]
+            # Identity cards filter by their own title
+            cards = [card + ((card[0],),) for card in cards]
+
+            # Small "Top ..." tables, n=None → all values; domain extracted from UPN
+            tables = [
+                ("Top Departments", cls.top_counts(s("Department"), None)),
+                ("Top Countries", cls.top_counts(s("Country"), None)),
+                ("Top Domains", cls.top_counts(s("UserPrincipalName").str.split("@").str[-1], None)),
+            ]
+
+        elif kind == "devices":
+            compliant = int((s("ComplianceState").str.lower() == "compliant").sum())
+            encrypted = int(b("IsEncrypted").sum())
+            os_name = s("OperatingSystem")
+            last_sync = pd.to_datetime(s("LastSyncDateTime"), errors="coerce", utc=True)
+            stale = int(((pd.Timestamp.utcnow() - last_sync) > pd.Timedelta(days=30)).fillna(False).sum())
+
+            cards = [
+                ("Devices Total", total, "#34495e", "💻", "All devices", ("Id", "")),  # show all
+                ("Compliant", compliant, "#27ae60", "✅", "ComplianceState = compliant",
+                 ("ComplianceState", "compliant")),
+                ("Non-Compliant", total - compliant, "#c0392b", "❌", "Other states",
+                 ("ComplianceState", "noncompliant")),
+                ("Encrypted", encrypted, "#16a085", "🔒", "BitLocker/FileVault on", ("IsEncrypted", "True")),
+                ("Unencrypted", total - encrypted, "#d35400", "🔓", "No encryption", ("IsEncrypted", "False")),
+                ("Autopilot Enrolled", int(b("AutopilotEnrolled").sum()), "#2980b9", "🚀", "Devices in Autopilot",
+                 ("AutopilotEnrolled", "True")),
+                ("Windows", int(os_name.str.contains("Windows", case=False).sum()), "#3498db", "🪟", "OS breakdown",
+                 ("OperatingSystem", "Windows")),
+                ("macOS", int(os_name.str.contains("Mac", case=False).sum()), "#9b59b6", "🍎", "OS breakdown",
+                 ("OperatingSystem", "Mac")),
+                ("iOS", int(os_name.str.contains("iOS", case=False).sum()), "#e67e22", "📱", "OS breakdown",
+                 ("OperatingSystem", "iOS")),
+                ("Android", int(os_name.str.contains("Android", case=False).sum()), "#27ae60", "🤖", "OS breakdown",
+                 ("OperatingSystem", "Android")),
+                ("Stale >30d", stale, "#7f8c8d", "⏳", "Last sync older than 30 days", ("LastSyncDateTime", "stale")),
+            ]
+
+            # Top summaries (auto-safe if columns exist)
+            tables = [
+                (title, cls.top_counts(s(col)))
+                for title, col in (
+                    ("Top Models", "Model"),
+                    ("Top Manufacturers", "Manufacturer"),
+                    ("Top Operating Systems", "OperatingSystem"),
+                    ("Top Compliance States", "ComplianceState"),
+                    ("Top Users", "UserPrincipalName"),
+                    ("Top Management States", "ManagementState"),
+                )
+                if col in df.columns
+            ]
+
+        elif kind == "apps":
+            def distinct(col):
+                return int(s(col).replace("", pd.NA).dropna().nunique())
+
+            platform = s("Platform").str.lower()
+            counts = {p: int((platform == p).sum()) for p in ("windows", "macos", "ios", "android")}
+
+            cards = [
+                ("Installations", total, "#34495e", "📦", "All rows", ("ALL",)),
+                ("Unique Apps", distinct("AppDisplayName"), "#2c3e50", "🧩", "Distinct AppDisplayName",
+                 ("DEDUP_APPS",)),
+                ("Unique Devices", distinct("DeviceName"), "#2980b9", "💻", "Distinct DeviceName",
+                 ("DEDUP_DEVICES",)),
+                ("Unique Users", distinct("UserPrincipalName"), "#16a085", "👤", "Distinct UserPrincipalName",
+                 ("DEDUP_USERS",)),
+
+                ("Windows", counts["windows"], "#3498db", "🪟", "Platform = Windows", ("PLATFORM", "windows")),
+                ("macOS", counts["macos"], "#9b59b6", "🍎", "Platform = macOS", ("PLATFORM", "macos")),
+                ("iOS", counts["ios"], "#e67e22", "📱", "Platform = iOS", ("PLATFORM", "ios")),
+                ("Android", counts["android"], "#27ae60", "🤖", "Platform = Android", ("PLATFORM", "android")),
+                ("Other", total - sum(counts.values()), "#7f8c8d", "❓", "Other platforms", ("PLATFORM", "")),
+
+                ("Publisher missing", int(s("Publisher").str.strip().eq("").sum()), "#d35400", "⚠️",
+                 "Publisher empty", ("PUBLISHER_EMPTY",)),
+            ]
+            tables = [
+                ("Top Apps", cls.top_counts(s("AppDisplayName"))),
+                ("Top Publishers", cls.top_counts(s("Publisher"))),
+                ("Top Platforms", cls.top_counts(s("Platform"))),
+            ]
+
+        elif kind == "groups":
+            def filled(col):
+                return int(s(col).replace("", pd.NA).dropna().count())
+
+            cards = [
+                ("Total Groups", total, "#34495e", "📦", "All groups", ("ALL",)),
+                ("Mail-enabled", int(b("Mail Enabled").sum()), "#2980b9", "📧", "", ("MAIL_ENABLED",)),
+                ("Teams-enabled", int(b("Is Teams Team").sum()), "#9b59b6", "💬", "", ("TEAMS_ENABLED",)),
+                ("Dynamic Groups", int(s("Membership Type").str.lower().str.contains("dynamic").sum()), "#16a085",
+                 "⚙️", "", ("DYNAMIC",)),
+                ("With Owners", filled("Assigned Owners"), "#27ae60", "👤", "", ("WITH_OWNERS",)),
+                ("Nested Groups", int((s("Nested Groups") != "0").sum()), "#d35400", "🧩", "", ("NESTED",)),
+                ("Role-assigned", filled("Assigned Roles"), "#8e44ad", "🔐", "", ("ROLE_ASSIGNED",)),
+                ("CA Include", filled("Referenced In CA Policy Include"), "#3498db", "🛡️", "", ("CA_INCLUDE",)),
+                ("CA Exclude", filled("Referenced In CA Policy Exclude"), "#e67e22", "🚫", "", ("CA_EXCLUDE",)),
+            ]
+            tables = [
+                ("Top Group Types", cls.top_counts(s("Group Type"))),
+                ("Top Roles Assigned", cls.top_counts(s("Assigned Roles"))),
+                ("Top Owners", cls.top_counts(s("Assigned Owners"))),
+            ]
+
+        elif kind == "exchange":
+            masks = cls.exchange_masks(df)
+
+            def n(key):
+                return int(masks[key].sum())
+
+            cards = [
+                ("Total Shared Mailboxes", total, "#34495e", "📬", "All shared mailboxes", ("ALL",)),
+                ("With Full Access", n("FULL_ACCESS"), "#2980b9", "🗝️", "", ("FULL_ACCESS",)),
+                ("With SendAs", n("SEND_AS"), "#9b59b6", "✉️", "", ("SEND_AS",)),
+                ("Active (Sent ≤30d)", n("RECENT_SENT"), "#16a085", "📤", "", ("RECENT_SENT",)),
+                ("Active (Recv ≤30d)", n("RECENT_RECV"), "#27ae60", "📥", "", ("RECENT_RECV",)),
+                ("Last Received Unread", n("UNREAD_LAST"), "#d35400", "🔔", "", ("UNREAD_LAST",)),
+                ("Has X400 Address", n("HAS_X400"), "#8e44ad", "🧬", "", ("HAS_X400",)),
+            ]
+            tables = [
+                ("Top 'Last Sent By'", cls.top_counts(s("Last Sent By"))),
+                ("Top Full Access Users", cls.top_counts(cls.explode(s("Full Access Users")))),
+                ("Top SendAs Users", cls.top_counts(cls.explode(s("SendAs Users")))),
+            ]
+
+        else:
+            raise ValueError(f"Unknown dashboard: {kind}")
+
+        return {"cards": cards, "tables": tables}
+
+
+class DashboardMetricsEngine:
+    """
+    Result cache for DashboardMetrics, keyed by (dashboard, snapshot content hash).
+    A (path, mtime, size) memo maps files to their hash, so revisiting a snapshot is a dict lookup.
+
+    Every computed result is also written next to its snapshot as a summary sidecar
+    (<snapshot>.summary.json). At startup the dashboards read those few KB instead of parsing the CSV.
+    """
+
+    SIDECAR_VERSION = 1
+
+    def __init__(self):
+        self.results = {}   # (kind, hash) -> result
+        self.hashes = {}    # path -> (mtime, size, hash)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def file_stamp(path):
+        st = os.stat(path)
+        return st.st_mtime, st.st_size
+
+    @staticmethod
+    def sidecar_path(path):
+        return os.path.splitext(path)[0] + ".summary.json"
+
+    def read_sidecar(self, kind, path):
+        """Summary sidecar of a snapshot (dict) or None when missing, unreadable or for another dashboard."""
+        try:
+            with open(self.sidecar_path(path), "r", encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if summary.get("version") != self.SIDECAR_VERSION or summary.get("kind") != kind:
+            return None
+        return summary
+
+    def write_sidecar(self, kind, path, digest, result):
+        mtime, size = self.file_stamp(path)
+        summary = {
+            "version": self.SIDECAR_VERSION,
+            "kind": kind,
+            "snapshot": os.path.basename(path),
+            "hash": digest,
+            "mtime": mtime,
+            "size": size,
+            "result": result,
+        }
+        target = self.sidecar_path(path)
+        try:
+            tmp = target + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False)
+            os.replace(tmp, target)
+        except OSError as e:
+            print(f"⚠️ Could not write dashboard summary {target}: {e}")
+
+    def hash_of(self, path, compute=False):
+        stamp = self.file_stamp(path)
+        with self.lock:
+            known = self.hashes.get(path)
+        if known and known[:2] == stamp:
+            return known[2]
+        if not compute:
+            return None
+        digest = DashboardMetrics.content_hash(path)
+        with self.lock:
+            self.hashes[path] = stamp + (digest,)
+        return digest
+
+    def lookup(self, kind, path):
+        """Cached result for a snapshot (memory, then an up-to-date sidecar), or None when it must be computed."""
+        try:
+            digest = self.hash_of(path)
+            stamp = self.file_stamp(path)
+        except OSError:
+            return None
+        if digest is not None:
+            with self.lock:
+                result = self.results.get((kind, digest))
+            if result is not None:
+                return result
+
+        summary = self.read_sidecar(kind, path)
+        if summary is None or (summary.get("mtime"), summary.get("size")) != stamp:
+            return None
+        with self.lock:
+            self.hashes[path] = stamp + (summary["hash"],)
+            self.results[(kind, summary["hash"])] = summary["result"]
+        return summary["result"]
+
+    def compute(self, kind, path):
+        with PerfMonitor.span("dashboard.hash"):
+            digest = self.hash_of(path, compute=True)
+        with self.lock:
+            result = self.results.get((kind, digest))
+        if result is None:
+            # A copied / touched snapshot keeps a valid sidecar as long as the content is the same
+            summary = self.read_sidecar(kind, path)
+            if summary and summary.get("hash") == digest:
+                result = summary["result"]
+            else:
+                with PerfMonitor.span(f"dashboard.parse.{kind}"):
+                    df = DashboardMetrics.read_csv(path, sep=";" if kind == "identity" else None)
+                if df.empty:
+                    result = {"message": "No data available in this CSV"}
+                else:
+                    # JSON round-trip so cached, sidecar and fresh results have the same shape
+                    with PerfMonitor.span(f"dashboard.compute.{kind}"):
+                        result = json.loads(json.dumps(DashboardMetrics.compute(kind, df)))
+            with self.lock:
+                self.results[(kind, digest)] = result
+
+        summary = self.read_sidecar(kind, path)
+        if summary is None or (summary.get("mtime"), summary.get("size")) != self.file_stamp(path):
+            self.write_sidecar(kind, path, digest, result)
+        return result
+
+
+class DashboardMetricsWorker(QThread):
+    """Compute (or fetch from the engine cache) one dashboard's metrics off the GUI thread."""
+    finished = pyqtSignal(str, str, object)   # kind, path, result
+    error = pyqtSignal(str, str, str)         # kind, path, message
+
+    def __init__(self, engine, kind, path):
+        super().__init__()
+        self.engine = engine
+        self.kind = kind
+        self.path = path
+
+    def run(self):
+        try:
+            self.finished.emit(self.kind, self.path, self.engine.compute(self.kind, self.path))
+        except Exception as e:
+            self.error.emit(self.kind, self.path, str(e))
+
+
+# --- Dashboard Facets ---#
+class FacetEngine:
+    """
+    value_counts for any column of a loaded snapshot, with multi-level drill-down.
+    Columns are factorized once (codes + labels); a drill path keeps the row positions it selected, so a
+    drill-down click only looks at its parent's rows and counts are a bincount over codes, never a rescan.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.codes = {}         # column -> (codes ndarray, labels Index)
+        self.rows = {(): None}  # drill path -> row positions (None = every row)
+        self.counts = {}        # (drill path, column) -> [(value, count)]
+
+    def factorized(self, column):
+        if column not in self.codes:
+            self.codes[column] = pd.factorize(self.df[column].astype(str).str.strip())
+        return self.codes[column]
+
+    def rows_for(self, path=()):
+        """Row positions matching a drill path ((column, value), ...), derived from the parent level."""
+        path = tuple(path)
+        if path not in self.rows:
+            parent = self.rows_for(path[:-1])
+            column, value = path[-1]
+            codes, labels = self.factorized(column)
+            code = labels.get_indexer([value])[0]
+            base = np.arange(len(codes)) if parent is None else parent
+            self.rows[path] = base[codes[base] == code] if code >= 0 else base[:0]
+        return self.rows[path]
+
+    def row_count(self, path=()):
+        rows = self.rows_for(path)
+        return len(self.df) if rows is None else len(rows)
+
+    def counts_for(self, column, path=()):
+        """(value, count) pairs of a column within a drill path, most frequent first (blanks ignored)."""
+        key = (tuple(path), column)
+        if key not in self.counts:
+            codes, labels = self.factorized(column)
+            rows = self.rows_for(path)
+            tally = np.bincount(codes if rows is None else codes[rows], minlength=len(labels))
+            order = np.argsort(-tally, kind="stable")
+            self.counts[key] = [(labels[i], int(tally[i])) for i in order if tally[i] and labels[i] != ""]
+        return self.counts[key]
+
+    def frame(self, path=()):
+        rows = self.rows_for(path)
+        return self.df if rows is None else self.df.iloc[rows]
+
+
+class FacetExplorerDialog(QDialog):
+    """Value counts for any column of a snapshot; double-click a value to drill into it."""
+
+    def __init__(self, engine, title, preset=(), show_rows=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Explore — {title}")
+        self.resize(620, 560)
+        self.engine = engine
+        self.preset = [c for c in preset if c in engine.df.columns]
+        self.show_rows = show_rows
+        self.path = []
+
+        layout = QVBoxLayout(self)
+
+        self.crumbs = QLabel()
+        self.crumbs.setWordWrap(True)
+        self.crumbs.setStyleSheet("color:#999; font-size:11px;")
+        layout.addWidget(self.crumbs)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Column:"))
+        self.column_combo = QComboBox()
+        self.column_combo.addItems(sorted(engine.df.columns, key=str.lower))
+        row.addWidget(self.column_combo, 1)
+        self.back_btn = QPushButton("⬅ Back")
+        self.back_btn.clicked.connect(self.drill_up)
+        row.addWidget(self.back_btn)
+        layout.addLayout(row)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Value", "Count", "%"])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.cellDoubleClicked.connect(self.drill_down)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        hint = QLabel("Double-click a value to drill down.")
+        hint.setStyleSheet("color:#999; font-size:11px;")
+        buttons.addWidget(hint)
+        buttons.addStretch()
+        if show_rows:
+            rows_btn = QPushButton("Show Rows")
+            rows_btn.clicked.connect(lambda: self.show_rows(self.engine.frame(self.path)))
+            buttons.addWidget(rows_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        if self.preset:
+            self.column_combo.setCurrentText(self.preset[0])
+        self.column_combo.currentTextChanged.connect(self.refresh)
+        self.refresh()
+
+    def next_column(self):
+        """Next preset level not used yet by the drill path (or keep the current column)."""
+        used = {c for c, _ in self.path}
+        for column in self.preset:
+            if column not in used:
+                return column
+        return self.column_combo.currentText()
+
+    def refresh(self):
+        column = self.column_combo.currentText()
+        total = self.engine.row_count(self.path)
+        trail = " › ".join(f"{c} = {v}" for c, v in self.path) or "All rows"
+        self.crumbs.setText(f"{trail} — {total} row(s)")
+        self.back_btn.setEnabled(bool(self.path))
+
+        counts = self.engine.counts_for(column, self.path) if column else []
+        self.table.setRowCount(len(counts))
+        for r, (value, count) in enumerate(counts):
+            pct = f"{(count / total) * 100:.1f}" if total else "0"
+            for c, text in enumerate((value, str(count), pct)):
+                self.table.setItem(r, c, QTableWidgetItem(text))
+        self.table.resizeColumnToContents(1)
+
+    def drill_down(self, row, _col):
+        item = self.table.item(row, 0)
+        if item is None:
+            return
+        self.path.append((self.column_combo.currentText(), item.text()))
+        self.set_column(self.next_column())
+
+    def drill_up(self):
+        if self.path:
+            column, _ = self.path.pop()
+            self.set_column(column)
+
+    def set_column(self, column):
+        if column == self.column_combo.currentText():
+            self.refresh()
+        else:
+            self.column_combo.setCurrentText(column)   # refreshes through currentTextChanged
+
+
+# --- Snapshot History ---#
+class SnapshotHistoryStore:
+    """
+    Local SQLite store of every ingested snapshot (Database_History/history.sqlite): one row per snapshot
+    file (dataset, content hash, export time), its dashboard card values as metrics, and the file itself as
+    content-addressed, zlib-compressed chunks of CSV lines. Rows a later export repeats are stored once, any
+    stored snapshot can be rebuilt byte for byte, and trends are read from here instead of old exports.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id          INTEGER PRIMARY KEY,
+            kind        TEXT NOT NULL,
+            name        TEXT NOT NULL,
+            path        TEXT NOT NULL,
+            hash        TEXT NOT NULL,
+            mtime       REAL NOT NULL,
+            size        INTEGER NOT NULL,
+            taken_at    TEXT NOT NULL,
+            row_count   INTEGER NOT NULL,
+            ingested_at TEXT NOT NULL,
+            pruned      INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (kind, name)
+        );
+        CREATE TABLE IF NOT EXISTS metrics (
+            snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+            name        TEXT NOT NULL,
+            value       REAL NOT NULL,
+            PRIMARY KEY (snapshot_id, name)
+        );
+        CREATE TABLE IF NOT EXISTS chunks (
+            hash     TEXT PRIMARY KEY,
+            data     BLOB NOT NULL,
+            raw_size INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_chunks (
+            snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+            seq         INTEGER NOT NULL,
+            chunk_hash  TEXT NOT NULL REFERENCES chunks(hash),
+            PRIMARY KEY (snapshot_id, seq)
+        );
+        CREATE INDEX IF NOT EXISTS ix_snapshots_kind_taken ON snapshots(kind, taken_at);
+        CREATE INDEX IF NOT EXISTS ix_snapshot_chunks_hash ON snapshot_chunks(chunk_hash);
+    """
+
+    # Content-defined chunking: a chunk ends after a line whose CRC32 is a multiple of CHUNK_LINES
+    # (~64 lines on average, capped), so an added or edited row only changes the chunk it falls in.
+    CHUNK_LINES = 64
+    MAX_CHUNK_LINES = 256
+
+    # Trend label -> (dataset, metric name = dashboard card title)
+    TRENDS = {
+        "Enabled users": ("identity", "Enabled"),
+        "Guests": ("identity", "Guests"),
+        "Stale devices (>30d)": ("devices", "Stale >30d"),
+        "Non-compliant devices": ("devices", "Non-Compliant"),
+        "Unencrypted devices": ("devices", "Unencrypted"),
+        "Unread shared mailboxes": ("exchange", "Last Received Unread"),
+        "Groups": ("groups", "Total Groups"),
+        "App installations": ("apps", "Installations"),
+    }
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self.connect() as con:
+            con.executescript(self.SCHEMA)
+
+    def connect(self):
+        # One short-lived connection per call keeps the store usable from worker threads
+        con = sqlite3.connect(self.db_path, timeout=30)
+        con.execute("PRAGMA foreign_keys = ON")
+        return con
+
+    @staticmethod
+    def taken_at(path):
+        """Export time from the <yyyyMMdd-HHmmss>_... file name, else the file's mtime (ISO, local time)."""
+        m = re.match(r"(\d{8})[-_](\d{4})(\d{2})?", os.path.basename(path))
+        if m:
+            stamp = datetime.datetime.strptime(m.group(1) + m.group(2) + (m.group(3) or "00"), "%Y%m%d%H%M%S")
+        else:
+            stamp = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+        return stamp.isoformat(timespec="seconds")
+
+    @classmethod
+    def split_chunks(cls, raw):
+        """Header line + content-defined chunks of the remaining lines (b"".join() gives raw back)."""
+        lines = raw.splitlines(keepends=True)
+        if not lines:
+            return []
+        chunks = [lines[0]]
+        start = 1
+        for i in range(1, len(lines)):
+            if zlib.crc32(lines[i]) % cls.CHUNK_LINES == 0 or i + 1 - start >= cls.MAX_CHUNK_LINES:
+                chunks.append(b"".join(lines[start:i + 1]))
+                start = i + 1
+        if start < len(lines):
+            chunks.append(b"".join(lines[start:]))
+        return chunks
+
+    def is_ingested(self, kind, path):
+        st = os.stat(path)
+        with self.connect() as con:
+            row = con.execute(
+                "SELECT mtime, size FROM snapshots WHERE kind = ? AND name = ?", (kind, os.path.basename(path))
+            ).fetchone()
+        return row is not None and row[0] == st.st_mtime and row[1] == st.st_size
+
+    def ingest(self, kind, path, metrics_engine=None):
+        """Store one snapshot (metrics + deduplicated chunks). Returns False when it is already up to date."""
+        if self.is_ingested(kind, path):
+            return False
+
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        df = DashboardMetrics.read_csv(io.BytesIO(raw), sep=";" if kind == "identity" else None)
+
+        metrics = {"Rows": len(df)}
+        if kind in OffboardManager.DASHBOARDS and not df.empty:
+            result = metrics_engine.lookup(kind, path) if metrics_engine else None
+            if result is None:
+                result = DashboardMetrics.compute(kind, df)
+            for title, value, *_ in result.get("cards", []):
+                if isinstance(value, (int, float, np.number)):
+                    metrics[title] = float(value)
+
+        chunks = [(hashlib.sha1(c).hexdigest(), c) for c in self.split_chunks(raw)]
+
+        with self.connect() as con:
+            known = set()
+            hashes = [h for h, _ in chunks]
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                known.update(r[0] for r in con.execute(
+                    f"SELECT hash FROM chunks WHERE hash IN ({','.join('?' * len(part))})", part
+                ))
+            con.executemany(
+                "INSERT OR IGNORE INTO chunks (hash, data, raw_size) VALUES (?, ?, ?)",
+                [(h, zlib.compress(c, 6), len(c)) for h, c in dict(chunks).items() if h not in known],
+            )
+
+            con.execute("DELETE FROM snapshots WHERE kind = ? AND name = ?", (kind, os.path.basename(path)))
+            cur = con.execute(
+                "INSERT INTO snapshots (kind, name, path, hash, mtime, size, taken_at, row_count, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, os.path.basename(path), path, hashlib.sha1(raw).hexdigest(), st.st_mtime, st.st_size,
+                 self.taken_at(path), len(df), datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+            snapshot_id = cur.lastrowid
+            con.executemany(
+                "INSERT INTO metrics (snapshot_id, name, value) VALUES (?, ?, ?)",
+                [(snapshot_id, name, value) for name, value in metrics.items()],
+            )
+            con.executemany(
+                "INSERT INTO snapshot_chunks (snapshot_id, seq, chunk_hash) VALUES (?, ?, ?)",
+                [(snapshot_id, seq, h) for seq, (h, _) in enumerate(chunks)],
+            )
+        return True
+
+    def trend(self, kind, metric):
+        """[(taken_at, value)] for one metric of a dataset, oldest first (pruned snapshots included)."""
+        with self.connect() as con:
+            return con.execute(
+                "SELECT s.taken_at, m.value FROM metrics m JOIN snapshots s ON s.id = m.snapshot_id "
+                "WHERE s.kind = ? AND m.name = ? ORDER BY s.taken_at",
+                (kind, metric),
+            ).fetchall()
+
+    def snapshots(self, kind=None):
+        """[(id, kind, name, path, hash, taken_at, row_count, size, pruned)] newest first."""
+        sql = "SELECT id, kind, name, path, hash, taken_at, row_count, size, pruned FROM snapshots"
+        args = ()
+        if kind:
+            sql += " WHERE kind = ?"
+            args = (kind,)
+        with self.connect() as con:
+            return con.execute(sql + " ORDER BY taken_at DESC", args).fetchall()
+
+    def rebuild(self, snapshot_id) -> bytes:
+        """The original CSV bytes of a stored snapshot (None once its rows were pruned)."""
+        with self.connect() as con:
+            rows = con.execute(
+                "SELECT c.data FROM snapshot_chunks sc JOIN chunks c ON c.hash = sc.chunk_hash "
+                "WHERE sc.snapshot_id = ? ORDER BY sc.seq",
+                (snapshot_id,),
+            ).fetchall()
+            pruned = con.execute("SELECT pruned FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        if not pruned or pruned[0]:
+            return None
+        return b"".join(zlib.decompress(r[0]) for r in rows)
+
+    def load_rows(self, snapshot_id) -> pd.DataFrame:
+        """Rebuild a stored snapshot as a DataFrame (no CSV file needed)."""
+        raw = self.rebuild(snapshot_id)
+        if raw is None:
+            return pd.DataFrame()
+        with self.connect() as con:
+            kind = con.execute("SELECT kind FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()[0]
+        return DashboardMetrics.read_csv(io.BytesIO(raw), sep=";" if kind == "identity" else None)
+
+    def restore(self, snapshot_id, folder):
+        """Write a stored snapshot back into its dataset folder (original name and mtime). Returns the path."""
+        raw = self.rebuild(snapshot_id)
+        if raw is None:
+            raise ValueError("This snapshot's rows were pruned by the retention policy; only its metrics remain.")
+        with self.connect() as con:
+            name, mtime, digest = con.execute(
+                "SELECT name, mtime, hash FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+        if hashlib.sha1(raw).hexdigest() != digest:
+            raise ValueError(f"Stored chunks of {name} do not match its content hash.")
+        path = os.path.join(folder, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, path)
+        os.utime(path, (mtime, mtime))   # keeps is_ingested() true, no re-ingest
+        return path
+
+    def prune(self, snapshot_ids):
+        """Drop the row data of snapshots (metrics stay for trends) and delete chunks nothing refers to."""
+        ids = list(snapshot_ids)
+        if not ids:
+            return 0
+        with self.connect() as con:
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                marks = ",".join("?" * len(part))
+                con.execute(f"DELETE FROM snapshot_chunks WHERE snapshot_id IN ({marks})", part)
+                con.execute(f"UPDATE snapshots SET pruned = 1 WHERE id IN ({marks})", part)
+            con.execute("DELETE FROM chunks WHERE hash NOT IN (SELECT DISTINCT chunk_hash FROM snapshot_chunks)")
+        with self.connect() as con:
+            con.execute("VACUUM")
+        return len(ids)
+
+    def stats(self):
+        """{snapshots, stored, pruned, raw_bytes (files as exported), chunk_bytes (compressed, deduplicated)}"""
+        with self.connect() as con:
+            total, pruned, raw_bytes = con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(pruned), 0), "
+                "COALESCE(SUM(CASE WHEN pruned = 0 THEN size ELSE 0 END), 0) FROM snapshots"
+            ).fetchone()
+            chunk_bytes = con.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM chunks").fetchone()[0]
+        return {"snapshots": total, "stored": total - pruned, "pruned": pruned,
+                "raw_bytes": raw_bytes, "chunk_bytes": chunk_bytes}
+
+
+class HistoryIngestWorker(QThread):
+    """Ingest snapshot files into the SnapshotHistoryStore in the background."""
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(int)   # snapshots ingested
+
+    def __init__(self, store, items, metrics_engine=None):
+        super().__init__()
+        self.store = store
+        self.items = list(items)   # (kind, path)
+        self.metrics_engine = metrics_engine
+
+    def run(self):
+        ingested = 0
+        for kind, path in self.items:
+            try:
+                started = time.perf_counter()
+                if self.store.ingest(kind, path, self.metrics_engine):
+                    PerfMonitor.record(f"history.ingest.{kind}", time.perf_counter() - started, started)
+                    ingested += 1
+                    self.progress.emit(f"📚 History: stored {os.path.basename(path)}")
+            except Exception as e:
+                self.progress.emit(f"⚠️ History: could not store {os.path.basename(path)}: {e}")
+        self.finished.emit(ingested)
+
+
+class SnapshotRetention:
+    """
+    Retention policy for exported snapshots, kept in Database_History/retention.json.
+    Every snapshot younger than keep_all_days is kept, then the last one per day (daily_days), per ISO week
+    (weekly_days) and per month (monthly_days, 0 = none). Older snapshots lose their stored rows but keep
+    their metrics. CSV files older than keep_files_days are removed from the Database_* folders once the
+    history store can rebuild them (or the policy dropped them); the newest export of each dataset stays.
+    """
+
+    DEFAULTS = {
+        "keep_all_days": 7,
+        "daily_days": 30,
+        "weekly_days": 365,
+        "monthly_days": 0,
+        "keep_files_days": 7,
+        "auto_apply": False,
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.settings = dict(self.DEFAULTS)
+        self.load_error = None   # shown by SnapshotRetentionDialog; the defaults apply meanwhile
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.settings.update(json.load(f))
+            except (OSError, ValueError) as e:
+                self.load_error = str(e)
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.settings, f, indent=4)
+        self.load_error = None
+
+    def kept(self, snapshots, now):
+        """Ids to keep out of [(id, taken_at datetime)] of one dataset."""
+        s = self.settings
+        tiers = [
+            (s["daily_days"], lambda t: t.date()),
+            (s["weekly_days"], lambda t: t.isocalendar()[:2]),
+            (s["monthly_days"], lambda t: (t.year, t.month)),
+        ]
+        keep, seen = set(), set()
+        for snapshot_id, taken in sorted(snapshots, key=lambda x: x[1], reverse=True):
+            age = (now - taken).days
+            # A kept snapshot stands for its day, week and month alike: older ones in those buckets go
+            buckets = {(level, bucket(taken)) for level, (days, bucket) in enumerate(tiers) if age <= days}
+            if age <= s["keep_all_days"] or not buckets <= seen:
+                keep.add(snapshot_id)
+                seen |= buckets
+        return keep
+
+    def apply(self, store, sources, now=None):
+        """Prune the store and compact the Database_* folders. Returns a report dict."""
+        now = now or datetime.datetime.now()
+        report = {"pruned": 0, "files_removed": 0, "bytes_freed": 0}
+
+        for kind, (folder, pattern) in sources.items():
+            stored = store.snapshots(kind)
+            keep = self.kept(
+                [(r[0], datetime.datetime.fromisoformat(r[5])) for r in stored if not r[8]], now
+            )
+            report["pruned"] += store.prune(r[0] for r in stored if not r[8] and r[0] not in keep)
+
+            by_name = {r[2]: r for r in store.snapshots(kind)}
+            files = sorted(glob.glob(os.path.join(folder, pattern)), reverse=True)
+            for path in files[1:]:   # newest export stays on disk
+                snapshot = by_name.get(os.path.basename(path))
+                if snapshot is None:
+                    continue   # not ingested yet
+                taken = datetime.datetime.fromisoformat(snapshot[5])
+                if (now - taken).days < self.settings["keep_files_days"]:
+                    continue
+                if not snapshot[8] and DashboardMetrics.content_hash(path) != snapshot[4]:
+                    continue   # file changed since it was stored
+                size = os.path.getsize(path)
+                os.remove(path)
+                sidecar = DashboardMetricsEngine.sidecar_path(path)
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+                report["files_removed"] += 1
+                report["bytes_freed"] += size
+        return report
+
+
+class SnapshotRetentionWorker(QThread):
+    finished = pyqtSignal(object)   # SnapshotRetention.apply() report
+    error = pyqtSignal(str)
+
+    def __init__(self, retention, store, sources):
+        super().__init__()
+        self.retention = retention
+        self.store = store
+        self.sources = sources
+
+    def run(self):
+        try:
+            self.finished.emit(self.retention.apply(self.store, self.sources))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class SnapshotRetentionDialog(QDialog):
+    """Retention settings, store usage, and restore of stored snapshots into their Database_* folder."""
+
+    FIELDS = [
+        ("keep_all_days", "Keep every snapshot for (days):"),
+        ("daily_days", "Keep one per day for (days):"),
+        ("weekly_days", "Keep one per week for (days):"),
+        ("monthly_days", "Keep one per month for (days, 0 = none):"),
+        ("keep_files_days", "Keep CSV files on disk for (days):"),
+    ]
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Snapshot Retention")
+        self.resize(900, 600)
+        self.manager = manager
+        self.store = manager.get_history_store()
+        self.retention = manager.get_snapshot_retention()
+
+        layout = QVBoxLayout(self)
+
+        if self.retention.load_error:
+            warning = QLabel(
+                f"⚠️ Could not read {self.retention.path} ({self.retention.load_error}).\n"
+                "The default policy is shown and applied; Save Policy replaces the file."
+            )
+            warning.setStyleSheet("color:#d9822b;")
+            warning.setWordWrap(True)
+            layout.addWidget(warning)
+
+        form = QFormLayout()
+        self.spins = {}
+        for key, label in self.FIELDS:
+            spin = QSpinBox()
+            spin.setRange(0, 3650)
+            spin.setValue(int(self.retention.settings[key]))
+            self.spins[key] = spin
+            form.addRow(label, spin)
+        self.auto_apply = QCheckBox("Apply automatically after the startup backfill")
+        self.auto_apply.setChecked(bool(self.retention.settings["auto_apply"]))
+        form.addRow(self.auto_apply)
+        layout.addLayout(form)
+
+        self.stats_label = QLabel()
+        layout.addWidget(self.stats_label)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Dataset", "Snapshot", "Taken", "Rows", "Stored", "On disk"])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        save_btn = QPushButton("💾 Save Policy")
+        save_btn.clicked.connect(self.save_policy)
+        self.apply_btn = QPushButton("🧹 Apply Now")
+        self.apply_btn.clicked.connect(self.apply_now)
+        restore_btn = QPushButton("♻️ Restore Selected")
+        restore_btn.clicked.connect(self.restore_selected)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        for b in (save_btn, self.apply_btn, restore_btn):
+            buttons.addWidget(b)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        stats = self.store.stats()
+        ratio = stats["raw_bytes"] / stats["chunk_bytes"] if stats["chunk_bytes"] else 0
+        self.stats_label.setText(
+            f"{stats['snapshots']} snapshot(s): {stats['stored']} stored, {stats['pruned']} metrics only — "
+            f"{stats['raw_bytes'] / 1e6:.1f} MB of CSV kept in {stats['chunk_bytes'] / 1e6:.1f} MB"
+            + (f" ({ratio:.0f}× smaller)" if ratio else "")
+        )
+
+        sources = self.manager.snapshot_sources()
+        self.snapshot_rows = self.store.snapshots()
+        self.table.setRowCount(len(self.snapshot_rows))
+        for r, (sid, kind, name, _path, _hash, taken_at, rows, size, pruned) in enumerate(self.snapshot_rows):
+            on_disk = os.path.exists(os.path.join(sources[kind][0], name)) if kind in sources else False
+            values = [kind, name, taken_at.replace("T", " "), str(rows),
+                      "Metrics only" if pruned else f"{size / 1e6:.1f} MB", "Yes" if on_disk else "No"]
+            for c, value in enumerate(values):
+                self.table.setItem(r, c, QTableWidgetItem(value))
+
+    def save_policy(self):
+        for key, spin in self.spins.items():
+            self.retention.settings[key] = spin.value()
+        self.retention.settings["auto_apply"] = self.auto_apply.isChecked()
+        self.retention.save()
+
+    def apply_now(self):
+        self.save_policy()
+        reply = QMessageBox.question(
+            self, "Apply Retention",
+            "Snapshots outside the policy keep only their metrics, and CSV files older than "
+            f"{self.retention.settings['keep_files_days']} day(s) are removed from the Database_* folders "
+            "(restorable while their rows are stored). Continue?",
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.apply_btn.setEnabled(False)
+        self.manager.apply_snapshot_retention(on_done=self.on_applied)
+
+    def on_applied(self, report):
+        self.apply_btn.setEnabled(True)
+        self.refresh()
+
+    def restore_selected(self):
+        sources = self.manager.snapshot_sources()
+        restored = []
+        for index in self.table.selectionModel().selectedRows():
+            sid, kind, name = self.snapshot_rows[index.row()][:3]
+            try:
+                restored.append(self.store.restore(sid, sources[kind][0]))
+            except Exception as e:
+                QMessageBox.warning(self, "Restore", f"{name}: {e}")
+        if restored:
+            self.manager.reload_snapshot_lists()
+            self.refresh()
+            QMessageBox.information(self, "Restore", "Restored:\n" + "\n".join(restored))
+
+
+class TrendChart(QWidget):
+    """Minimal line chart (QPainter) of (ISO timestamp, value) points."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points = []
+        self.setMinimumHeight(260)
+
+    def set_points(self, points):
+        self.points = list(points)
+        self.update()
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.fillRect(self.rect(), QColor("#2c3e50"))
+        p.setPen(QColor("white"))
+
+        if not self.points:
+            p.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No history for this metric yet")
+            return
+
+        left, top, right, bottom = 60, 20, self.width() - 20, self.height() - 40
+        values = [v for _, v in self.points]
+        lo, hi = min(values), max(values)
+        if hi == lo:
+            lo, hi = lo - 1, hi + 1
+
+        def xy(i, v):
+            x = left if len(self.points) == 1 else left + (right - left) * i / (len(self.points) - 1)
+            return QtCore.QPointF(x, bottom - (bottom - top) * (v - lo) / (hi - lo))
+
+        # Axes + min/max labels
+        p.setPen(QPen(QColor("#7f8c8d"), 1))
+        p.drawLine(left, bottom, right, bottom)
+        p.drawLine(left, top, left, bottom)
+        p.setPen(QColor("#bdc3c7"))
+        p.drawText(5, top + 5, f"{hi:g}")
+        p.drawText(5, bottom, f"{lo:g}")
+        p.drawText(left, self.height() - 15, self.points[0][0][:10])
+        p.drawText(right - 70, self.height() - 15, self.points[-1][0][:10])
+
+        # Line + points
+        p.setPen(QPen(QColor("#3498db"), 2))
+        pts = [xy(i, v) for i, (_, v) in enumerate(self.points)]
+        for a, b in zip(pts, pts[1:]):
+            p.drawLine(a, b)
+        p.setBrush(QColor("#3498db"))
+        for pt in pts:
+            p.drawEllipse(pt, 3, 3)
+
+
+class SnapshotTrendsDialog(QDialog):
+    """Metric trends across every stored snapshot, read from the history store."""
+
+    def __init__(self, store, trend=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Snapshot Trends")
+        self.resize(760, 520)
+        self.store = store
+
+        layout = QVBoxLayout(self)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Metric:"))
+        self.metric_combo = QComboBox()
+        self.metric_combo.addItems(list(SnapshotHistoryStore.TRENDS))
+        row.addWidget(self.metric_combo, 1)
+        layout.addLayout(row)
+
+        self.chart = TrendChart()
+        layout.addWidget(self.chart)
+
+        self.table = QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(["Snapshot", "Value"])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn, alignment=Qt.AlignmentFlag.AlignRight)
+
+        if trend:
+            self.metric_combo.setCurrentText(trend)
+        self.metric_combo.currentTextChanged.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        kind, metric = SnapshotHistoryStore.TRENDS[self.metric_combo.currentText()]
+        points = self.store.trend(kind, metric)
+        self.chart.set_points(points)
+
+        self.table.setRowCount(len(points))
+        for r, (taken_at, value) in enumerate(reversed(points)):
+            self.table.setItem(r, 0, QTableWidgetItem(taken_at.replace("T", " ")))
+            self.table.setItem(r, 1, QTableWidgetItem(f"{value:g}"))
+
+
+# --- Snapshot Diff ---#
+class SnapshotDiff:
+    """
+    Added / removed / changed objects between two snapshots of one dataset. Rows are matched on the dataset's
+    key column(s) and compared through one 64-bit hash per row (pd.util.hash_pandas_object), so only rows whose
+    hash differs are compared column by column.
+    """
+
+    # Dataset -> key column(s); apps exports are aggregated per app, so that triple is the key
+    KEYS = {
+        "identity": ["Id"],
+        "devices": ["Id"],
+        "autopilot": ["SerialNumber"],
+        "apps": ["AppDisplayName", "Version", "Publisher"],
+        "groups": ["Object ID"],
+        "exchange": ["Email Address"],
+    }
+    FALLBACK_KEYS = ["Id", "Object ID", "SerialNumber"]
+
+    @classmethod
+    def key_columns(cls, kind, df):
+        keys = cls.KEYS.get(kind, [])
+        if keys and all(c in df.columns for c in keys):
+            return keys
+        for c in cls.FALLBACK_KEYS:
+            if c in df.columns:
+                return [c]
+        raise ValueError(f"No key column ({', '.join(keys or cls.FALLBACK_KEYS)}) in this snapshot")
+
+    @staticmethod
+    def keyed(df, keys) -> pd.DataFrame:
+        """df indexed by its key (multi-column keys joined with ' | '); blank and duplicate keys dropped."""
+        key = df[keys[0]].astype(str)
+        for c in keys[1:]:
+            key = key.str.cat(df[c].astype(str), sep=" | ")
+        df = df.set_axis(pd.Index(key.str.strip().to_numpy()), axis=0)
+        df = df[df.index != ""]
+        return df[~df.index.duplicated(keep="last")]
+
+    @classmethod
+    def compute(cls, kind, old_df, new_df):
+        keys = cls.key_columns(kind, new_df)
+        old = cls.keyed(old_df, keys)
+        new = cls.keyed(new_df, keys)
+
+        added_keys = new.index.difference(old.index, sort=False)
+        removed_keys = old.index.difference(new.index, sort=False)
+        common = new.index.intersection(old.index, sort=False)
+
+        # Compare only the columns both exports have
+        columns = [c for c in new.columns if c in old.columns]
+        old_common = old.loc[common, columns]
+        new_common = new.loc[common, columns]
+        old_hash = pd.util.hash_pandas_object(old_common, index=False).to_numpy()
+        new_hash = pd.util.hash_pandas_object(new_common, index=False).to_numpy()
+        differs = old_hash != new_hash
+
+        # Per-column changes of the rows whose hash differs, in long form (Key, Column, Old, New)
+        before = old_common[differs].to_numpy(dtype=str)
+        after = new_common[differs].to_numpy(dtype=str)
+        rows, cols = np.nonzero(before != after)
+        changed_keys = common[differs]
+        changes = pd.DataFrame({
+            "Key": changed_keys.to_numpy()[rows],
+            "Column": np.asarray(columns, dtype=object)[cols],
+            "Old": before[rows, cols],
+            "New": after[rows, cols],
+        })
+
+        return {
+            "key": " + ".join(keys),
+            "added": new.loc[added_keys].reset_index(drop=True),
+            "removed": old.loc[removed_keys].reset_index(drop=True),
+            "changed": changes,
+            "changed_count": len(changed_keys),
+            "unchanged_count": len(common) - len(changed_keys),
+            "columns_added": [c for c in new.columns if c not in old.columns],
+            "columns_removed": [c for c in old.columns if c not in new.columns],
+        }
+
+
+class SnapshotDiffWorker(QThread):
+    finished = pyqtSignal(object)   # SnapshotDiff.compute() result
+    error = pyqtSignal(str)
+
+    def __init__(self, kind, old_path, new_path):
+        super().__init__()
+        self.kind = kind
+        self.old_path = old_path
+        self.new_path = new_path
+
+    def run(self):
+        try:
+            sep = ";" if self.kind == "identity" else None
+            old_df = DashboardMetrics.read_csv(self.old_path, sep=sep)
+            new_df = DashboardMetrics.read_csv(self.new_path, sep=sep)
+            with PerfMonitor.span(f"diff.{self.kind}"):
+                result = SnapshotDiff.compute(self.kind, old_df, new_df)
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class SnapshotDiffDialog(QDialog):
+    """Pick two snapshots of a dataset and list what was added, removed and changed between them."""
+
+    MAX_ROWS = 5000   # rows shown per tab; Export writes everything
+
+    def __init__(self, kind, files, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Compare Snapshots — {kind.capitalize()}")
+        self.resize(1000, 650)
+        self.kind = kind
+        self.result = None
+        self.worker = None
+
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self.old_combo = QComboBox()
+        self.new_combo = QComboBox()
+        for combo in (self.old_combo, self.new_combo):
+            for path in files:
+                combo.addItem(os.path.basename(path), path)
+        # files are newest first: compare the previous export with the latest one
+        self.new_combo.setCurrentIndex(0)
+        self.old_combo.setCurrentIndex(min(1, len(files) - 1))
+        form.addRow("Older:", self.old_combo)
+        form.addRow("Newer:", self.new_combo)
+        layout.addLayout(form)
+
+        buttons = QHBoxLayout()
+        self.compare_btn = QPushButton("🆚 Compare")
+        self.compare_btn.clicked.connect(self.run_diff)
+        self.export_btn = QPushButton("💾 Export Diff")
+        self.export_btn.setEnabled(False)
+        self.export_btn.clicked.connect(self.export_diff)
+        buttons.addWidget(self.compare_btn)
+        buttons.addWidget(self.export_btn)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.summary = QLabel("Pick two snapshots and press Compare.")
+        self.summary.setWordWrap(True)
+        layout.addWidget(self.summary)
+
+        self.tabs = QTabWidget()
+        self.tables = {}
+        for name in ("added", "removed", "changed"):
+            table = QTableWidget()
+            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            table.setSortingEnabled(True)
+            table.horizontalHeader().setStretchLastSection(True)
+            self.tables[name] = table
+            self.tabs.addTab(table, name.capitalize())
+        layout.addWidget(self.tabs)
+
+    def run_diff(self):
+        old_path, new_path = self.old_combo.currentData(), self.new_combo.currentData()
+        if old_path == new_path:
+            QMessageBox.information(self, "Same Snapshot", "Pick two different snapshots.")
+            return
+        self.compare_btn.setEnabled(False)
+        self.summary.setText("⏳ Comparing…")
+        self.worker = SnapshotDiffWorker(self.kind, old_path, new_path)
+        self.worker.finished.connect(self.show_result)
+        self.worker.error.connect(self.show_error)
+        self.worker.start()
+
+    def finish_worker(self):
+        self.worker.wait()
+        self.worker = None
+        self.compare_btn.setEnabled(True)
+
+    def show_error(self, message):
+        self.finish_worker()
+        self.summary.setText(f"❌ {message}")
+
+    def show_result(self, result):
+        self.finish_worker()
+        self.result = result
+
+        text = (f"Key: {result['key']} — ➕ {len(result['added'])} added, ➖ {len(result['removed'])} removed, "
+                f"✏️ {result['changed_count']} changed ({len(result['changed'])} values), "
+                f"{result['unchanged_count']} unchanged.")
+        if result["columns_added"] or result["columns_removed"]:
+            text += (f"\nColumns added: {', '.join(result['columns_added']) or '—'}; "
+                     f"removed: {', '.join(result['columns_removed']) or '—'}.")
+        self.summary.setText(text)
+
+        for name, table in self.tables.items():
+            df = result[name]
+            self.fill_table(table, df)
+            self.tabs.setTabText(list(self.tables).index(name), f"{name.capitalize()} ({len(df)})")
+        self.export_btn.setEnabled(True)
+
+    def fill_table(self, table, df):
+        shown = df.head(self.MAX_ROWS)
+        table.setSortingEnabled(False)
+        table.setUpdatesEnabled(False)
+        table.clear()
+        table.setRowCount(len(shown))
+        table.setColumnCount(len(shown.columns))
+        table.setHorizontalHeaderLabels([str(c) for c in shown.columns])
+        for r, row in enumerate(shown.itertuples(index=False)):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+        table.setUpdatesEnabled(True)
+        table.setSortingEnabled(True)
+
+    def export_diff(self):
+        if self.result is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Diff", f"{self.kind}_snapshot_diff.csv", "CSV Files (*.csv)"
+        )
+        if not path:
+            return
+        key = self.result["key"]
+        frames = [
+            self.result["added"].assign(Change="Added"),
+            self.result["removed"].assign(Change="Removed"),
+            self.result["changed"].rename(columns={"Key": key}).assign(Change="Changed"),
+        ]
+        out = pd.concat(frames, ignore_index=True).fillna("")
+        out = out[["Change"] + [c for c in out.columns if c != "Change"]]
+        out.to_csv(path, index=False, encoding="utf-8-sig")
+        QMessageBox.information(self, "Export Diff", f"Diff exported to:\n{path}")
+
+
+# --- Snapshot Prefetch ---#
+class SnapshotPrefetchWorker(QThread):
+    """Parse the table pages' selected snapshots in the background so opening a page only renders it."""
+    loaded = pyqtSignal(str, str, object)   # name, path, DataFrame
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = list(items)   # (name, path)
+
+    def run(self):
+        # Importing pandas here also takes it off the GUI thread
+        for name, path in self.items:
+            try:
+                with PerfMonitor.span(f"prefetch.parse.{name}"):
+                    df = DashboardMetrics.read_csv(path, sep=";" if name == "identity" else None)
+            except Exception:
+                continue   # the page's own load reports the error
+            self.loaded.emit(name, path, df)
+
+
+class CsvDropZone(QLabel):
+    def __init__(self, parent=None, on_csv_dropped=None):
+        super().__init__("Drop CSV file here", parent)
+        self.on_csv_dropped = on_csv_dropped
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setAcceptDrops(True)
+        self.setWordWrap(True)
+        self.setFixedHeight(100)
+        self.setMaximumWidth(200)  # Prevent window from stretching
+        self.update_default_style()
+
+    def update_default_style(self):
+        self.setStyleSheet("""
+            QLabel {
+                border: 2px dashed #888;
+                border-radius: 8px;
+                padding: 20px;
+                color: #aaa;
+                font-style: italic;
+                text-align: center;
+            }
+            QLabel:hover {
+                border-color: #00aaff;
+                color: #00aaff;
+            }
+        """)
+        self.setText("Drop CSV file here")
+
+    def update_dropped_style(self, file_name):
+        self.setStyleSheet("""
+            QLabel {
+                border: 2px dashed #00BFFF;
+                border-radius: 8px;
+                padding: 20px;
+                color: #00BFFF;
+                font-weight: bold;
+                text-align: center;
+            }
+        """)
+
+        max_len = 40
+        display_name = (file_name[:max_len] + "…") if len(file_name) > max_len else file_name
+        display_name = display_name.replace("_", "_<wbr>")  # allow breaks at underscores
+
+        # HTML for multi-line display
+        self.setText(f"<div style='text-align:center;'>📄<br>{display_name}</div>")
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            file = event.mimeData().urls()[0].toLocalFile()
+            if file.lower().endswith('.csv'):
+                event.acceptProposedAction()
+            else:
+                event.ignore()
+
+    def dropEvent(self, event):
+        if event.mimeData().hasUrls():
+            for url in event.mimeData().urls():
+                file_path = url.toLocalFile()
+                if file_path.lower().endswith('.csv'):
+                    file_name = os.path.basename(file_path)
+                    self.update_dropped_style(file_name)
+                    if self.on_csv_dropped:
+                        self.on_csv_dropped(file_path)
+                    break
+
+
+class DataSyncDialog(QDialog):
+    """
+    Modern modal picker for running one or more 'retrieve/export' scripts sequentially.
+    Adds contextual descriptions for each dataset type.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Retrieve Tenant Data")
+        self.setMinimumSize(580, 420)
+
+        # --- Main Layout ---
+        main_layout = QVBoxLayout(self)
+
+        title_lbl = QLabel("Select the datasets you want to retrieve:")
+        title_lbl.setStyleSheet("font-size:16px; font-weight:600; margin-bottom:6px;")
+        main_layout.addWidget(title_lbl)
+
+        subtitle_lbl = QLabel(
+            "Each report will be generated using PowerShell scripts and saved in its corresponding folder.\n"
+            "Scripts run sequentially with a 5-second delay between each."
+        )
+        subtitle_lbl.setWordWrap(True)
+        subtitle_lbl.setStyleSheet("color:#b0b0b0; font-size:12px;")
+        main_layout.addWidget(subtitle_lbl)
+        main_layout.addSpacing(10)
+
+        # --- Sectioned Grid ---
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(20)
+        grid.setVerticalSpacing(10)
+        main_layout.addLayout(grid)
+
+        def make_checkbox(label, desc):
+            box = QCheckBox(label)
+            box_desc = QLabel(desc)
+            box_desc.setStyleSheet("color:#aaa; font-size:11px; margin-left:24px;")
+            v = QVBoxLayout()
+            v.addWidget(box)
+            v.addWidget(box_desc)
+            w = QWidget()
+            w.setLayout(v)
+            return box, w
+
+        # Checkboxes with descriptions
+        self.cb_id, w1 = make_checkbox("Identities",
+                                       "Exports all Entra ID users with full attributes and license details.")
+        self.cb_dev, w2 = make_checkbox("Devices",
+                                        "Retrieves all Intune-managed devices with OS, owner, and compliance data.")
+        self.cb_autopilot, w_ap = make_checkbox("Autopilot Devices",
+                                                "Retrieves Windows Autopilot devices with enrollment and user data.")
+        self.cb_grp, w3 = make_checkbox("Groups",
+                                        "Exports Entra ID groups with owners, members, nested groups, and role assignments.")
+        self.cb_exo, w4 = make_checkbox("Shared Mailboxes (Exchange)",
+                                        "Generates Exchange report for all shared mailboxes and recent activity.")
+        self.cb_app, w5 = make_checkbox("Detected Apps (Intune)",
+                                        "Retrieves installed app data across managed devices and aggregates usage.")
+        self.cb_ap, w6 = make_checkbox("Access Packages",
+                                       "Exports all Entra Entitlement Management Access Packages and assignments.")
+        self.cb_delta, w7 = make_checkbox("Incremental sync (delta)",
+                                          "Only fetch changes since the last export (Identities, Groups, Devices, Apps).")
+
+        # Add to grid (left column)
+        grid.addWidget(w1, 0, 0)  # Identities
+        grid.addWidget(w2, 1, 0)  # Devices
+        grid.addWidget(w_ap, 2, 0)  # Autopilot Devices
+        grid.addWidget(w3, 3, 0)  # Groups
+
+        # Right column stays aligned
+        grid.addWidget(w4, 0, 1)  # Shared Mailboxes
+        grid.addWidget(w5, 1, 1)  # Apps
+        grid.addWidget(w6, 2, 1)  # Access Packages
+        grid.addWidget(w7, 3, 1)  # Incremental sync
+
+        # --- Button Row ---
+        main_layout.addSpacing(15)
+        btns = QHBoxLayout()
+        btns.addStretch(1)
+        self.run_btn = QPushButton("Run")
+        self.run_btn.setStyleSheet("font-weight:600; padding:6px 18px;")
+        self.run_btn.clicked.connect(self.start_run)
+        btns.addWidget(self.run_btn)
+
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        cancel_btn.setStyleSheet("padding:6px 18px;")
+        btns.addSpacing(10)
+        btns.addWidget(cancel_btn)
+        btns.addStretch(1)
+        main_layout.addLayout(btns)
+
+        # --- Runtime variables ---
+        self.tasks = []
+        self.task_index = -1
+        self.worker = None
+
+        # --- Apply Light/Dark Auto Theme ---
+        is_dark = False
         try:
             import subprocess, platform
             if platform.system() == "Darwin":  # macOS
@@ -404,13 +2333,16 @@ class DataSyncDialog(QDialog):
                 "on_finish": on_finish
             }
 
+        # Delta-capable scripts fall back to a full export when no previous state exists
+        delta_args = ["-Incremental"] if self.cb_delta.isChecked() else []
+
         self.tasks = []
         # Identities
         if self.cb_id.isChecked():
             self.tasks.append(task(
                 "Identities",
                 "retrieve_users_data_batch.ps1",
-                [],
+                delta_args,
                 lambda: self.safe_call(parent, "try_populate_identity_csv")
             ))
         # Devices
@@ -418,7 +2350,7 @@ class DataSyncDialog(QDialog):
             self.tasks.append(task(
                 "Devices",
                 "retrieve_devices_data_batch.ps1",
-                [],
+                delta_args,
                 lambda: self.safe_call(parent, "try_populate_devices_csv")
             ))
         # Autopilot Devices (NEW)
@@ -434,7 +2366,7 @@ class DataSyncDialog(QDialog):
             self.tasks.append(task(
                 "Groups",
                 "retrieve_grps_data_batch.ps1",
-                [],
+                delta_args + ["-ExportMembership"],
                 lambda: self.safe_call(parent, "try_populate_groups_csv")
             ))
         # Shared Mailboxes
@@ -450,7 +2382,7 @@ class DataSyncDialog(QDialog):
             self.tasks.append(task(
                 "Detected Apps (Intune)",
                 "retrieve_apps_data_batch.ps1",
-                [],
+                delta_args,
                 lambda: self.safe_call(parent, "try_populate_apps_csv")
             ))
         # Access Packages (outputs a JSON)
@@ -548,6 +2480,318 @@ class DataSyncDialog(QDialog):
                 pass
 
 
+# --- Group Membership Index ---#
+class GroupMembershipIndex:
+    """
+    In-memory index over a *_EntraGroupMembers.csv edge file (GroupId, MemberId, MemberType).
+    Answers "who is in this group" and "which groups is this member in" without Graph calls.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.members = {}       # group id  -> set(member ids)
+        self.groups = {}        # member id -> set(group ids)
+        self.member_types = {}  # member id -> "user" / "group" / "device" / ...
+        self.version = 0        # bumped whenever results are folded in (invalidates derived engines)
+        if path:
+            self.load(path)
+
+    @staticmethod
+    def edges_path_for(groups_csv: str) -> str:
+        """Edge file written next to a *_EntraGroups.csv snapshot (same timestamp)."""
+        return groups_csv.replace("_EntraGroups.csv", "_EntraGroupMembers.csv")
+
+    @classmethod
+    def has_edges(cls, groups_csv: str) -> bool:
+        """True when the snapshot has an edge file (a stat call, nothing is read)."""
+        path = cls.edges_path_for(groups_csv or "")
+        return path.endswith("_EntraGroupMembers.csv") and os.path.exists(path)
+
+    @classmethod
+    def for_groups_csv(cls, groups_csv: str):
+        """Return an index for the snapshot's edge file, or None if the snapshot has none."""
+        if not cls.has_edges(groups_csv):
+            return None
+        return cls(cls.edges_path_for(groups_csv))
+
+    def load(self, path):
+        df = pd.read_csv(path, dtype=str).fillna("")
+        df = df[(df["GroupId"] != "") & (df["MemberId"] != "")]
+
+        self.path = path
+        self.members = {g: set(ids) for g, ids in df.groupby("GroupId", sort=False)["MemberId"]}
+        self.groups = {m: set(ids) for m, ids in df.groupby("MemberId", sort=False)["GroupId"]}
+        self.member_types = dict(zip(df["MemberId"], df["MemberType"]))
+
+    def members_of(self, group_id: str) -> set:
+        return self.members.get(group_id, set())
+
+    def groups_of(self, member_id: str) -> set:
+        return self.groups.get(member_id, set())
+
+    def is_member(self, member_id: str, group_id: str) -> bool:
+        return member_id in self.members.get(group_id, ())
+
+    def member_type(self, member_id: str) -> str:
+        return self.member_types.get(member_id, "")
+
+    def apply_results(self, rows):
+        """Fold per-pair results of the assign/remove scripts in, so a re-run sees what already changed."""
+        changed = False
+        for r in rows or []:
+            uid, gid, result = r.get("UserId"), r.get("GroupId"), r.get("Result")
+            if not uid or not gid:
+                continue
+            if result in ("added", "already"):
+                self.members.setdefault(gid, set()).add(uid)
+                self.groups.setdefault(uid, set()).add(gid)
+                self.member_types.setdefault(uid, "user")
+                changed = True
+            elif result in ("removed", "notmember"):
+                self.members.get(gid, set()).discard(uid)
+                self.groups.get(uid, set()).discard(gid)
+                changed = True
+        if changed:
+            self.version += 1
+
+
+class MembershipChangePlan:
+    """
+    Pre-flight diff of requested (user, group) writes against the cached membership snapshot.
+    Pairs the snapshot shows are no-ops (already a member, already absent, dynamic group) are skipped.
+    """
+
+    def __init__(self, index=None, user_ids=None, dynamic_groups=()):
+        self.index = index
+        self.user_ids = user_ids or {}              # lower-case UPN -> object id
+        self.dynamic_groups = set(dynamic_groups)
+        self.adds = []                              # (upn, group id)
+        self.removes = []                           # (upn, group id)
+        self.skips = []                             # (upn, group id, phase, reason)
+        self.unverified = 0                         # pairs kept because the snapshot cannot tell
+
+    def plan(self, upns, assign_ids=(), remove_ids=()):
+        assign_ids = list(dict.fromkeys(assign_ids))
+        for upn in upns:
+            uid = self.user_ids.get(upn.strip().lower())
+            known = self.index is not None and uid is not None
+
+            for gid in assign_ids:
+                if gid in self.dynamic_groups:
+                    self.skips.append((upn, gid, "Assign", "Dynamic group"))
+                elif known and self.index.is_member(uid, gid):
+                    self.skips.append((upn, gid, "Assign", "Already a member"))
+                else:
+                    self.adds.append((upn, gid))
+                    self.unverified += not known
+
+            for gid in dict.fromkeys(remove_ids):
+                if gid in self.dynamic_groups:
+                    self.skips.append((upn, gid, "Remove", "Dynamic group"))
+                elif gid in assign_ids:
+                    # Assigned first in the same run, so the removal is real
+                    self.removes.append((upn, gid))
+                elif known and not self.index.is_member(uid, gid):
+                    self.skips.append((upn, gid, "Remove", "Not a member"))
+                else:
+                    self.removes.append((upn, gid))
+                    self.unverified += not known
+        return self
+
+    @staticmethod
+    def as_pairs(pairs):
+        return [{"UserUPN": upn, "GroupId": gid} for upn, gid in pairs]
+
+    def skipped_rows(self, group_names=None):
+        """Skipped pairs in the same shape as the scripts' JSON rows."""
+        names = group_names or {}
+        return [
+            {"Phase": phase, "UserUPN": upn, "GroupId": gid, "GroupName": names.get(gid, gid),
+             "Result": "skipped", "Status": f"⏭️ Skipped ({reason})"}
+            for upn, gid, phase, reason in self.skips
+        ]
+
+    def summary(self):
+        reasons = {}
+        for *_, reason in self.skips:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        lines = [
+            f"Adds: {len(self.adds)}",
+            f"Removals: {len(self.removes)}",
+            f"Skipped: {len(self.skips)}" + (
+                " (" + ", ".join(f"{n} {r.lower()}" for r, n in sorted(reasons.items())) + ")" if reasons else ""
+            ),
+        ]
+        if self.unverified:
+            lines.append(f"{self.unverified} pair(s) could not be checked against the snapshot and will be sent.")
+        return "\n".join(lines)
+
+    def confirm(self, parent, group_names=None):
+        """Show the plan; True if there is something to submit and the user accepted it."""
+        names = group_names or {}
+        box = QMessageBox(parent)
+        box.setWindowTitle("Pre-flight Check")
+        box.setIcon(QMessageBox.Icon.Question)
+        if self.skips:
+            box.setDetailedText("\n".join(
+                f"{phase}: {upn} → {names.get(gid, gid)} — {reason}" for upn, gid, phase, reason in self.skips
+            ))
+
+        if not self.adds and not self.removes:
+            box.setIcon(QMessageBox.Icon.Information)
+            box.setText("Nothing to change — every selected pair is already in the requested state.\n\n" + self.summary())
+            box.exec()
+            return False
+
+        box.setText(self.summary() + "\n\nSubmit only these changes?")
+        box.setStandardButtons(QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel)
+        box.setDefaultButton(QMessageBox.StandardButton.Ok)
+        return box.exec() == QMessageBox.StandardButton.Ok
+
+
+class TransitiveMembershipEngine:
+    """
+    Transitive (nested) membership over a GroupMembershipIndex.
+    Group -> group edges are walked once per strongly connected component and the
+    closures are memoized, so nesting cycles are detected and resolved instead of looping.
+    """
+
+    def __init__(self, index: GroupMembershipIndex):
+        self.index = index
+        self.version = index.version
+        self.parents = {}   # child group id  -> set(parent group ids)
+        self.children = {}  # parent group id -> set(nested group ids)
+        self.cycles = set() # frozenset(group ids) per nesting cycle
+        self._up = {}       # group id -> frozenset(ancestor group ids)
+        self._down = {}     # group id -> frozenset(descendant group ids)
+
+        for group_id, member_ids in index.members.items():
+            for member_id in member_ids:
+                if index.member_type(member_id) == "group" or member_id in index.members:
+                    self.parents.setdefault(member_id, set()).add(group_id)
+                    self.children.setdefault(group_id, set()).add(member_id)
+
+    def _closure(self, start, edges, memo):
+        """Reachable nodes from start (start excluded unless it sits on a cycle)."""
+        if start in memo:
+            return memo[start]
+
+        # Iterative Tarjan: every SCC is finished after all SCCs it points to
+        order, low, on_stack, stack = {}, {}, set(), []
+        work = [(start, iter(edges.get(start, ())))]
+        order[start] = low[start] = 0
+        stack.append(start)
+        on_stack.add(start)
+
+        while work:
+            node, it = work[-1]
+            advanced = False
+            for nxt in it:
+                if nxt in memo:
+                    continue
+                if nxt not in order:
+                    order[nxt] = low[nxt] = len(order)
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(edges.get(nxt, ()))))
+                    advanced = True
+                    break
+                if nxt in on_stack:
+                    low[node] = min(low[node], order[nxt])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] != order[node]:
+                continue
+
+            component = set()
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.add(member)
+                if member == node:
+                    break
+
+            reach = set()
+            cyclic = len(component) > 1 or node in edges.get(node, ())
+            for member in component:
+                for nxt in edges.get(member, ()):
+                    reach.add(nxt)
+                    if nxt not in component:
+                        reach |= memo[nxt]
+            if cyclic:
+                self.cycles.add(frozenset(component))
+            else:
+                reach.discard(node)
+
+            reach = frozenset(reach)
+            for member in component:
+                memo[member] = reach
+
+        return memo[start]
+
+    def ancestor_groups(self, group_id: str) -> frozenset:
+        return self._closure(group_id, self.parents, self._up)
+
+    def descendant_groups(self, group_id: str) -> frozenset:
+        return self._closure(group_id, self.children, self._down)
+
+    def effective_groups(self, member_id: str) -> set:
+        """Direct groups of a user/device/group plus every group they are nested in."""
+        result = set()
+        for group_id in self.index.groups_of(member_id):
+            result.add(group_id)
+            result |= self.ancestor_groups(group_id)
+        result.discard(member_id)
+        return result
+
+    def effective_members(self, group_id: str, include_groups: bool = False) -> set:
+        """Every member reached through the group and its nested groups."""
+        result = set(self.index.members_of(group_id))
+        for nested in self.descendant_groups(group_id):
+            result |= self.index.members_of(nested)
+        result.discard(group_id)
+        if not include_groups:
+            result = {m for m in result if m not in self.parents}
+        return result
+
+
+class MembershipViewDialog(QDialog):
+    """Read-only table of cached memberships (members of groups / groups of users)."""
+
+    def __init__(self, title, headers, rows, parent=None, info=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(760, 480)
+
+        layout = QVBoxLayout(self)
+
+        info = QLabel(info or f"{len(rows)} result(s) — from the local membership snapshot, no Graph call.")
+        info.setStyleSheet("color:#999; font-size:11px;")
+        layout.addWidget(info)
+
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+        table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(table)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn, alignment=Qt.AlignmentFlag.AlignRight)
+
+
 # --- Groups Comparison---#
 class CompareGroupsWorker(QThread):
     finished = pyqtSignal(dict)
@@ -559,6 +2803,7 @@ class CompareGroupsWorker(QThread):
         self.user2 = user2
         self.script_path = script_path
 
+    @PerfMonitor.timed(PerfMonitor.script_span)
     def run(self):
         try:
             pwsh = self.parent().get_pwsh_path() if hasattr(self.parent(), "get_pwsh_path") else None
@@ -617,6 +2862,26 @@ class GroupsComparisonDialog(QDialog):
         self.compare_button.clicked.connect(self.compare_groups)
         layout.addWidget(self.compare_button)
 
+        # --- Team comparison (many users, matrix view) ---
+        team_layout = QHBoxLayout()
+        team_layout.addWidget(QLabel("Team:"))
+        self.team_field_combo = QComboBox()
+        self.team_value_combo = QComboBox()
+        self.team_value_combo.setMinimumWidth(260)
+        df = parent.loaded_dataset("identity") if hasattr(parent, "loaded_dataset") else None
+        team_fields = ["Department", "JobTitle", "CompanyName", "ManagerUPN", "City", "Country", "Domain name"]
+        if df is not None:
+            self.team_field_combo.addItems([f for f in team_fields if f in df.columns])
+        self.team_field_combo.currentTextChanged.connect(self._populate_team_values)
+        team_layout.addWidget(self.team_field_combo)
+        team_layout.addWidget(self.team_value_combo, 1)
+        self.team_button = QPushButton("Compare Team (Matrix)")
+        self.team_button.clicked.connect(self.open_team_matrix)
+        self.team_button.setEnabled(self.team_field_combo.count() > 0)
+        team_layout.addWidget(self.team_button)
+        layout.addLayout(team_layout)
+        self._populate_team_values(self.team_field_combo.currentText())
+
         # --- Results table ---
         self.table = QTableWidget(0, 4)
         self.table.setHorizontalHeaderLabels([
@@ -643,6 +2908,29 @@ class GroupsComparisonDialog(QDialog):
         combo.setCompleter(completer)
         combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
 
+    def _populate_team_values(self, field):
+        self.team_value_combo.clear()
+        df = getattr(self.parent(), "current_df", None)
+        if df is None or field not in df.columns:
+            return
+        counts = df.loc[df[field].astype(str).str.strip() != "", field].value_counts()
+        for value, count in sorted(counts.items(), key=lambda kv: str(kv[0]).lower()):
+            self.team_value_combo.addItem(f"{value} ({count})", value)
+
+    def open_team_matrix(self):
+        field = self.team_field_combo.currentText()
+        value = self.team_value_combo.currentData()
+        df = getattr(self.parent(), "current_df", None)
+        if df is None or value is None:
+            return
+
+        upns = sorted(df.loc[df[field] == value, "UserPrincipalName"].dropna().unique().tolist())
+        if len(upns) < 2:
+            QMessageBox.information(self, "Team too small", "Select a team with at least two users.")
+            return
+
+        GroupMatrixDialog(self.parent(), upns, title=f"{field} = {value}", parent=self).exec()
+
     # --- run PowerShell in background thread ---
     def compare_groups(self):
         user1 = self.user1_combo.currentText().strip()
@@ -651,6 +2939,12 @@ class GroupsComparisonDialog(QDialog):
             QMessageBox.warning(self, "Missing input", "Please select both User 1 and User 2 before comparing.")
             return
 
+        # Resolve both users from the local membership snapshot when available (no Graph round-trip)
+        data = self.compare_groups_locally(user1, user2)
+        if data is not None:
+            self.on_compare_finished(data)
+            return
+
         script_path = os.path.join(os.path.dirname(__file__), "Powershell_Scripts", "compare_user_groups.ps1")
 
         # Disable button and show busy text
@@ -663,6 +2957,27 @@ class GroupsComparisonDialog(QDialog):
         self.worker.error.connect(self.on_compare_error)
         self.worker.start()
 
+    def compare_groups_locally(self, user1, user2):
+        """Same payload as compare_user_groups.ps1, computed from the cached edges; None if unavailable."""
+        parent = self.parent()
+        if not hasattr(parent, "effective_group_names_for_upn"):
+            return None
+
+        groups1 = parent.effective_group_names_for_upn(user1)
+        groups2 = parent.effective_group_names_for_upn(user2)
+        if groups1 is None or groups2 is None:
+            return None
+
+        set1, set2 = set(groups1), set(groups2)
+        return {
+            "User1": user1,
+            "User2": user2,
+            "User1Groups": groups1,
+            "User2Groups": groups2,
+            "MissingInUser1": sorted(set2 - set1, key=str.lower),
+            "MissingInUser2": sorted(set1 - set2, key=str.lower),
+        }
+
     # --- handle results ---
     def on_compare_finished(self, data):
         self.compare_button.setEnabled(True)
@@ -825,6 +3140,263 @@ class GroupsComparisonDialog(QDialog):
         self.table.resizeRowsToContents()
 
 
+class GroupMatrixWorker(QThread):
+    """Fetch the transitive groups of many users in one compare_user_groups.ps1 -Users run."""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, pwsh, upns, script_path):
+        super().__init__()
+        self.pwsh = pwsh
+        self.upns = upns
+        self.script_path = script_path
+
+    @PerfMonitor.timed(PerfMonitor.script_span)
+    def run(self):
+        try:
+            cmd = [
+                self.pwsh,
+                "-NoProfile",
+                "-ExecutionPolicy", "Bypass",
+                "-File", self.script_path,
+                "-Users", ",".join(self.upns)
+            ]
+
+            result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8")
+            output = result.stdout.strip()
+
+            if not output:
+                raise ValueError(f"No output returned. Stderr: {result.stderr.strip()}")
+
+            self.finished.emit(json.loads(output))
+
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class GroupMatrixDialog(QDialog):
+    """
+    User × group membership matrix for many users at once.
+    Memberships come from the local snapshot; users it cannot resolve are fetched in one batched Graph run.
+    """
+
+    def __init__(self, manager, upns, title="Team", parent=None):
+        super().__init__(parent or manager)
+        self.manager = manager
+        self.upns = list(dict.fromkeys(u.strip() for u in upns if u and u.strip()))
+        self.memberships = {}   # UPN -> {group id: display name}
+        self.group_names = {}   # group id -> display name
+        self.matrix = None      # DataFrame: group id rows × UPN columns (bool)
+        self.worker = None
+
+        self.setWindowTitle(f"Groups Matrix — {title}")
+        self.resize(1100, 700)
+
+        layout = QVBoxLayout(self)
+
+        self.info_label = QLabel("")
+        self.info_label.setStyleSheet("color:#999; font-size:11px;")
+        layout.addWidget(self.info_label)
+
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(QLabel("Show groups held by at least"))
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(1, max(1, len(self.upns)))
+        self.threshold_spin.valueChanged.connect(self.refresh_table)
+        filter_row.addWidget(self.threshold_spin)
+        filter_row.addWidget(QLabel("user(s)"))
+        self.only_partial_cb = QCheckBox("Only groups missing for someone")
+        self.only_partial_cb.setChecked(True)
+        self.only_partial_cb.toggled.connect(self.refresh_table)
+        filter_row.addWidget(self.only_partial_cb)
+        filter_row.addStretch(1)
+        layout.addLayout(filter_row)
+
+        self.table = QTableWidget(0, 0)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.assign_btn = QPushButton("Assign Missing Groups to All")
+        self.assign_btn.setStyleSheet("font-weight: bold; padding: 6px;")
+        self.assign_btn.setEnabled(False)
+        self.assign_btn.clicked.connect(self.assign_missing_to_all)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.reject)
+        btn_layout.addStretch(1)
+        btn_layout.addWidget(self.assign_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.load_memberships()
+
+    # --- memberships: local first, one batched Graph run for the rest ---
+    def load_memberships(self):
+        if hasattr(self.manager, "effective_group_map_for_upns"):
+            resolved, unresolved = self.manager.effective_group_map_for_upns(self.upns)
+        else:
+            resolved, unresolved = {}, list(self.upns)
+        self.memberships.update(resolved)
+
+        if not unresolved:
+            self.build_matrix()
+            return
+
+        self.info_label.setText(f"⏳ Fetching memberships of {len(unresolved)} user(s) from Microsoft Graph…")
+        pwsh = self.manager.get_pwsh_path() if hasattr(self.manager, "get_pwsh_path") else "pwsh"
+        script_path = os.path.join(os.path.dirname(__file__), "Powershell_Scripts", "compare_user_groups.ps1")
+
+        self.worker = GroupMatrixWorker(pwsh or "pwsh", unresolved, script_path)
+        self.worker.finished.connect(self.on_fetch_finished)
+        self.worker.error.connect(self.on_fetch_error)
+        self.worker.start()
+
+    def on_fetch_finished(self, data):
+        for upn, groups in (data.get("Memberships") or {}).items():
+            if isinstance(groups, dict):
+                groups = [groups]
+            self.memberships[upn] = {g.get("Id"): g.get("DisplayName") or g.get("Id") for g in groups or []}
+        self.build_matrix()
+
+    def on_fetch_error(self, message):
+        QMessageBox.critical(self, "Error", f"Could not fetch group memberships:\n\n{message}")
+        self.build_matrix()
+
+    def build_matrix(self):
+        for groups in self.memberships.values():
+            self.group_names.update(groups)
+
+        pairs = pd.DataFrame(
+            [(gid, upn) for upn, groups in self.memberships.items() for gid in groups],
+            columns=["GroupId", "User"]
+        )
+        if pairs.empty:
+            self.matrix = pd.DataFrame(False, index=pd.Index([], name="GroupId"), columns=self.upns)
+        else:
+            self.matrix = pd.crosstab(pairs["GroupId"], pairs["User"]).reindex(
+                columns=self.upns, fill_value=0
+            ).gt(0)
+
+        self.info_label.setText(
+            f"{len(self.upns)} user(s), {len(self.matrix)} group(s) — "
+            f"{len(self.memberships)} user(s) with membership data."
+        )
+        self.refresh_table()
+
+    def refresh_table(self):
+        if self.matrix is None:
+            return
+
+        counts = self.matrix.sum(axis=1)
+        mask = counts >= self.threshold_spin.value()
+        if self.only_partial_cb.isChecked():
+            mask &= counts < len(self.upns)
+        view = self.matrix[mask]
+        names = view.index.map(lambda g: str(self.group_names.get(g, g)))
+        order = sorted(range(len(view)), key=lambda i: (-counts[view.index[i]], names[i].lower()))
+
+        headers = ["Assign", "Group", "Coverage"] + [u.split("@")[0] for u in self.upns]
+        self.table.setSortingEnabled(False)
+        self.table.setUpdatesEnabled(False)
+        try:
+            self.table.clear()
+            self.table.setColumnCount(len(headers))
+            self.table.setHorizontalHeaderLabels(headers)
+            for c, upn in enumerate(self.upns, start=3):
+                self.table.horizontalHeaderItem(c).setToolTip(upn)
+            self.table.setRowCount(len(view))
+
+            values = view.to_numpy()
+            for r, i in enumerate(order):
+                gid = view.index[i]
+                chk = QTableWidgetItem()
+                chk.setFlags(chk.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                chk.setCheckState(Qt.CheckState.Unchecked)
+                chk.setData(Qt.ItemDataRole.UserRole, gid)
+                self.table.setItem(r, 0, chk)
+                self.table.setItem(r, 1, QTableWidgetItem(names[i]))
+                self.table.setItem(r, 2, QTableWidgetItem(f"{int(counts[gid])}/{len(self.upns)}"))
+                for c, member in enumerate(values[i], start=3):
+                    cell = QTableWidgetItem("✔" if member else "")
+                    cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                    if not member:
+                        cell.setBackground(QColor(220, 80, 80, 60))
+                    self.table.setItem(r, c, cell)
+        finally:
+            self.table.setUpdatesEnabled(True)
+
+        self.table.resizeColumnsToContents()
+        self.assign_btn.setEnabled(len(view) > 0)
+
+    # --- bulk job: every checked group to every user missing it ---
+    def assign_missing_to_all(self):
+        checked = [
+            self.table.item(r, 0).data(Qt.ItemDataRole.UserRole)
+            for r in range(self.table.rowCount())
+            if self.table.item(r, 0).checkState() == Qt.CheckState.Checked
+        ]
+        if not checked:
+            QMessageBox.warning(self, "No Groups Selected", "Please check at least one group to assign.")
+            return
+
+        missing = ~self.matrix.loc[checked]
+        stacked = missing.stack()
+        pairs = [{"UserUPN": upn, "GroupId": gid} for gid, upn in stacked[stacked].index]
+        if not pairs:
+            QMessageBox.information(self, "Nothing to do", "Every user already has the checked groups.")
+            return
+
+        reply = QMessageBox.question(
+            self,
+            "Confirm Assignment",
+            f"Add {len(pairs)} membership(s) across {len(checked)} group(s) "
+            f"and {len({p['UserUPN'] for p in pairs})} user(s)?",
+            QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel,
+            QMessageBox.StandardButton.Cancel
+        )
+        if reply != QMessageBox.StandardButton.Ok:
+            return
+
+        script_path = os.path.join(os.path.dirname(__file__), "Powershell_Scripts", "assign_users_to_groups.ps1")
+        command = [
+            "pwsh", "-NoProfile", "-ExecutionPolicy", "Bypass",
+            "-File", script_path,
+            *AssignGroupsWorker.pairs_args(pairs)
+        ]
+
+        self.assign_btn.setEnabled(False)
+        self.assign_btn.setText("⏳ Assigning...")
+
+        self.assign_worker = AssignGroupsWorker(command)
+        self.assign_worker.finished.connect(self.on_assign_finished)
+        self.assign_worker.error.connect(self.on_assign_error)
+        self.assign_worker.start()
+
+    def on_assign_finished(self, stdout, stderr=""):
+        self.assign_btn.setEnabled(True)
+        self.assign_btn.setText("Assign Missing Groups to All")
+
+        try:
+            results = json.loads(stdout)
+        except Exception:
+            QMessageBox.warning(self, "Invalid Output", stdout or stderr)
+            return
+        if isinstance(results, dict):
+            results = [results]
+        if hasattr(self.manager, "apply_membership_results"):
+            self.manager.apply_membership_results(results)
+
+        rows = [(r.get("UserUPN", ""), r.get("GroupName", ""), r.get("Status", "")) for r in results]
+        MembershipViewDialog("Assignment Results", ["User", "Group", "Status"], rows, self,
+                             info=f"{len(rows)} result(s).").exec()
+
+    def on_assign_error(self, message):
+        self.assign_btn.setEnabled(True)
+        self.assign_btn.setText("Assign Missing Groups to All")
+        QMessageBox.critical(self, "Error", f"Assignment failed:\n\n{message}")
+
+
 # --- Groups Management---#
 class GroupManagementDialog(QDialog):
     """
@@ -843,6 +3415,7 @@ class GroupManagementDialog(QDialog):
         self._all_groups = []
         self._results_assign = []
         self._results_remove = []
+        self._results_skipped = []
 
         self.assign_toggle_state = {"checked": False}
         self.remove_toggle_state = {"checked": False}
@@ -942,7 +3515,8 @@ class GroupManagementDialog(QDialog):
             return
 
         self._all_groups = [
-            {"DisplayName": row[namecol], "ObjectId": row[idcol]}
+            {"DisplayName": row[namecol], "ObjectId": row[idcol],
+             "Dynamic": row.get("membership type", "").lower() == "dynamic"}
             for _, row in df.iterrows()
         ]
 
@@ -1019,46 +3593,61 @@ class GroupManagementDialog(QDialog):
             QMessageBox.warning(self, "Nothing Selected", "Choose at least 1 group.")
             return
 
-        mapID = {g["DisplayName"]: g["ObjectId"] for g in self._all_groups}
+        mapID = {g["DisplayName"]: g["ObjectId"] for g in self._all_groups}
+
+        self.assign_ids = [mapID[n] for n in assign if n in mapID]
+        self.remove_ids = [mapID[n] for n in remove if n in mapID]
+
+        # Pre-flight: diff against the cached membership, submit only real changes
+        dynamic = {g["ObjectId"] for g in self._all_groups if g.get("Dynamic")}
+        names = {g["ObjectId"]: g["DisplayName"] for g in self._all_groups}
+        if hasattr(self.parent(), "plan_membership_changes"):
+            plan = self.parent().plan_membership_changes(self.user_upns, self.assign_ids, self.remove_ids, dynamic)
+        else:
+            plan = MembershipChangePlan(dynamic_groups=dynamic).plan(self.user_upns, self.assign_ids, self.remove_ids)
+
+        if not plan.confirm(self, names):
+            return
 
-        self.assign_ids = [mapID[n] for n in assign if n in mapID]
-        self.remove_ids = [mapID[n] for n in remove if n in mapID]
+        self.assign_pairs = MembershipChangePlan.as_pairs(plan.adds)
+        self.remove_pairs = MembershipChangePlan.as_pairs(plan.removes)
+        self._results_skipped = plan.skipped_rows(names)
 
         self.run_btn.setEnabled(False)
 
         # Case 1: Assign AND Remove
-        if self.assign_ids and self.remove_ids:
+        if self.assign_pairs and self.remove_pairs:
             self.run_btn.setText("⏳ Assigning…")
             self._run_ps(
                 "assign_users_to_groups.ps1",
-                self.assign_ids,
+                self.assign_pairs,
                 lambda: self._after_assign(do_remove=True)
             )
             return
 
         # Assign only
-        if self.assign_ids:
+        if self.assign_pairs:
             self.run_btn.setText("⏳ Assigning…")
             self._run_ps(
                 "assign_users_to_groups.ps1",
-                self.assign_ids,
+                self.assign_pairs,
                 lambda: self._after_assign(do_remove=False)
             )
             return
 
         # Remove only
-        if self.remove_ids:
+        if self.remove_pairs:
             self.run_btn.setText("⏳ Removing…")
             self._run_ps(
                 "remove_users_from_groups.ps1",
-                self.remove_ids,
+                self.remove_pairs,
                 self._after_remove
             )
 
     # --------------------------------------------------------------
     # PowerShell Execution
     # --------------------------------------------------------------
-    def _run_ps(self, script_name, group_ids, callback):
+    def _run_ps(self, script_name, pairs, callback):
         import datetime, os
 
         script_path = os.path.join(os.path.dirname(__file__), "Powershell_Scripts", script_name)
@@ -1067,10 +3656,7 @@ class GroupManagementDialog(QDialog):
         logs_dir = getattr(self.parent(), "logs_dir", os.getcwd())
         self.current_log = os.path.join(logs_dir, f"{timestamp}_{script_name}.log")
 
-        args = [
-            "-UserUPNs", ",".join(self.user_upns),
-            "-GroupIDs", ",".join(group_ids)
-        ]
+        args = AssignGroupsWorker.pairs_args(pairs)
 
         pwsh = self.parent().get_pwsh_path()
 
@@ -1104,6 +3690,8 @@ class GroupManagementDialog(QDialog):
     # --------------------------------------------------------------
     def _after_assign(self, do_remove=False):
         self._results_assign = self._parse_json(self.current_log)
+        if hasattr(self.parent(), "apply_membership_results"):
+            self.parent().apply_membership_results(self._results_assign)
 
         if not do_remove:
             self._show_results()
@@ -1113,7 +3701,7 @@ class GroupManagementDialog(QDialog):
         QTimer.singleShot(3000, self._start_remove_phase)
 
     def _start_remove_phase(self):
-        if not self.remove_ids:
+        if not self.remove_pairs:
             self._show_results()
             return
 
@@ -1121,12 +3709,14 @@ class GroupManagementDialog(QDialog):
 
         self._run_ps(
             "remove_users_from_groups.ps1",
-            self.remove_ids,
+            self.remove_pairs,
             self._after_remove
         )
 
     def _after_remove(self):
         self._results_remove = self._parse_json(self.current_log)
+        if hasattr(self.parent(), "apply_membership_results"):
+            self.parent().apply_membership_results(self._results_remove)
         self._show_results()
 
     # --------------------------------------------------------------
@@ -1152,7 +3742,7 @@ class GroupManagementDialog(QDialog):
     # Show Results
     # --------------------------------------------------------------
     def _show_results(self):
-        all_rows = (self._results_assign or []) + (self._results_remove or [])
+        all_rows = (self._results_assign or []) + (self._results_remove or []) + (self._results_skipped or [])
 
         dlg = QDialog(self)
         dlg.setWindowTitle("Group(s) Management — Results")
@@ -1205,6 +3795,26 @@ class AssignGroupsWorker(QThread):
         super().__init__()
         self.command = command
 
+    @staticmethod
+    def user_args(upns):
+        """-UserUPNs for small selections, a UPN file when the list would exceed the command-line limit."""
+        joined = ",".join(upns)
+        if len(joined) < 8000:
+            return ["-UserUPNs", joined]
+        path = os.path.join(tempfile.gettempdir(), f"group_users_{os.getpid()}_{int(time.time())}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(upns))
+        return ["-UserUPNsFile", path]
+
+    @staticmethod
+    def pairs_args(pairs):
+        """-PairsFile argument for explicit [{"UserUPN", "GroupId"}] pairs."""
+        path = os.path.join(tempfile.gettempdir(), f"group_pairs_{os.getpid()}_{int(time.time() * 1000)}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(pairs, f)
+        return ["-PairsFile", path]
+
+    @PerfMonitor.timed(PerfMonitor.script_span)
     def run(self):
         import subprocess
         try:
@@ -1272,7 +3882,12 @@ class AssignGroupsDialog(QDialog):
             self.close()
             return
 
-        self.groups = [{"DisplayName": row[name_col], "ObjectId": row[id_col]} for _, row in df.iterrows()]
+        self.groups = [
+            {"DisplayName": row[name_col], "ObjectId": row[id_col],
+             "Dynamic": row.get("membership type", "").lower() == "dynamic"}
+            for _, row in df.iterrows()
+        ]
+        self.skipped_results = []
 
         # Search bar
         self.search_box = QLineEdit()
@@ -1343,17 +3958,30 @@ class AssignGroupsDialog(QDialog):
             "assign_users_to_groups.ps1"
         )
 
+        group_ids = [
+            grp["ObjectId"] for i, grp in enumerate(self.groups)
+            if self.table.item(i, 0).checkState() == Qt.CheckState.Checked
+        ]
+
+        # Pre-flight: skip pairs the cached membership already satisfies
+        dynamic = {g["ObjectId"] for g in self.groups if g.get("Dynamic")}
+        names = {g["ObjectId"]: g["DisplayName"] for g in self.groups}
+        if hasattr(self.parent(), "plan_membership_changes"):
+            plan = self.parent().plan_membership_changes(self.user_upns, group_ids, (), dynamic)
+        else:
+            plan = MembershipChangePlan(dynamic_groups=dynamic).plan(self.user_upns, group_ids)
+
+        if not plan.confirm(self, names):
+            return
+        self.skipped_results = plan.skipped_rows(names)
+
         self.ok_button.setEnabled(False)
         self.ok_button.setText("⏳ Assigning...")
 
         command = [
             "pwsh", "-NoProfile", "-ExecutionPolicy", "Bypass",
             "-File", script_path,
-            "-UserUPNs", ",".join(self.user_upns),
-            "-GroupIDs", ",".join([
-                grp["ObjectId"] for i, grp in enumerate(self.groups)
-                if self.table.item(i, 0).checkState() == Qt.CheckState.Checked
-            ])
+            *AssignGroupsWorker.pairs_args(MembershipChangePlan.as_pairs(plan.adds))
         ]
 
         self.worker = AssignGroupsWorker(command)
@@ -1402,6 +4030,9 @@ class AssignGroupsDialog(QDialog):
                 "GroupName": "N/A",
                 "Status": (stdout or "").strip()
             }]
+        elif hasattr(self.parent(), "apply_membership_results"):
+            self.parent().apply_membership_results(results)
+        results = results + self.skipped_results
 
         # --- HTML results view with automatic dark mode detection ---
 
@@ -1508,6 +4139,7 @@ class AssignAccessPackagesWorker(QThread):
         super().__init__()
         self.command = command
 
+    @PerfMonitor.timed(PerfMonitor.script_span)
     def run(self):
         import subprocess, os, tempfile, datetime, shlex
         try:
@@ -1923,6 +4555,173 @@ class AssignMissingGroupsDialog(QDialog):
         QMessageBox.critical(self, "PowerShell Error", err)
 
 
+# --- Bulk Credential Results ---#
+class BulkResultsDialog(QDialog):
+    """Per-user results streamed from a bulk script (TAP, password reset, revoke).
+
+    Rows are pre-filled as pending and updated as each ``##RESULT##`` line arrives.
+    Secrets stay masked until revealed and are dropped when the window closes.
+    """
+
+    MASK = "••••••••"
+
+    def __init__(self, title, upns, columns, secret_column=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(820, 480)
+
+        self.columns = ["UserUPN"] + [c for c in columns if c != "UserUPN"] + ["Status"]
+        self.secret_column = secret_column
+        self.secrets = {}
+        self.succeeded = 0
+        self.failed = 0
+        self.rows = {}
+        self.worker = None
+
+        layout = QVBoxLayout(self)
+
+        self.progress_label = QLabel()
+        self.progress_label.setStyleSheet("font-weight: 600;")
+        layout.addWidget(self.progress_label)
+
+        self.table = QTableWidget(len(upns), len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        for r, upn in enumerate(upns):
+            self.rows[upn.lower()] = r
+            self.table.setItem(r, 0, QTableWidgetItem(upn))
+            for c in range(1, len(self.columns)):
+                self.table.setItem(r, c, QTableWidgetItem(""))
+            self.table.item(r, len(self.columns) - 1).setText("⏳ Pending")
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.resizeColumnsToContents()
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.reveal_check = QCheckBox(f"Show {secret_column}")
+        self.reveal_check.toggled.connect(self.refresh_secrets)
+        self.reveal_check.setVisible(bool(secret_column))
+        buttons.addWidget(self.reveal_check)
+        buttons.addStretch(1)
+
+        copy_btn = QPushButton("Copy Selected")
+        copy_btn.clicked.connect(self.copy_selected)
+        export_btn = QPushButton("Export CSV…")
+        export_btn.clicked.connect(self.export_csv)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        for btn in (copy_btn, export_btn, close_btn):
+            buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+        self.update_progress()
+
+    def watch(self, worker):
+        """Follow a PowerShellWorker's results until it finishes or this window is closed."""
+        self.worker = worker
+        worker.result.connect(self.add_result)
+        worker.finished.connect(self.on_finished)
+
+    def unwatch(self):
+        if self.worker is None:
+            return
+        for signal, slot in ((self.worker.result, self.add_result), (self.worker.finished, self.on_finished)):
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+        self.worker = None
+
+    def on_finished(self, status, message):
+        self.worker = None
+        self.update_progress()
+
+    def set_cell(self, row, col, text):
+        item = self.table.item(row, col)
+        if item is None:
+            item = QTableWidgetItem()
+            self.table.setItem(row, col, item)
+        item.setText(text)
+
+    def add_result(self, result: dict):
+        upn = str(result.get("UserUPN", ""))
+        row = self.rows.get(upn.lower())
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self.rows[upn.lower()] = row
+            for c in range(len(self.columns)):
+                self.table.setItem(row, c, QTableWidgetItem(""))
+
+        for c, column in enumerate(self.columns):
+            value = result.get(column, "")
+            if column == self.secret_column:
+                self.secrets[row] = str(value or "")
+                value = self.MASK if value and not self.reveal_check.isChecked() else value
+            self.set_cell(row, c, "" if value is None else str(value))
+
+        if str(result.get("Status", "")).startswith("✅"):
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.update_progress()
+
+    def update_progress(self):
+        done = self.succeeded + self.failed
+        self.progress_label.setText(
+            f"{done} / {self.table.rowCount()} completed — ✅ {self.succeeded} succeeded, ❌ {self.failed} failed"
+        )
+
+    def refresh_secrets(self, reveal):
+        col = self.columns.index(self.secret_column)
+        for row, secret in self.secrets.items():
+            self.set_cell(row, col, secret if reveal or not secret else self.MASK)
+
+    def row_values(self, row):
+        values = []
+        for c, column in enumerate(self.columns):
+            item = self.table.item(row, c)
+            values.append(self.secrets.get(row, "") if column == self.secret_column else item.text() if item else "")
+        return values
+
+    def copy_selected(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        if not rows:
+            return
+        lines = ["\t".join(self.row_values(r)) for r in rows]
+        QApplication.clipboard().setText("\n".join(lines))
+
+    def export_csv(self):
+        if self.secret_column:
+            reply = QMessageBox.warning(
+                self, "Export Secrets",
+                f"The export contains every {self.secret_column} in clear text.\nContinue?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path, _ = QFileDialog.getSaveFileName(self, "Export Results", f"Results_{ts}.csv", "CSV Files (*.csv)")
+        if not path:
+            return
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for r in range(self.table.rowCount()):
+                writer.writerow(self.row_values(r))
+
+    def closeEvent(self, event):
+        # Results still arriving after this would land in a cleared table
+        self.unwatch()
+        # Secrets only live in this window
+        self.secrets.clear()
+        self.table.clearContents()
+        super().closeEvent(event)
+
+
 # --- Generate Temporary Access Pass Worker ---
 class GenerateTAPDialog(QDialog):
     def __init__(self, parent=None, user_upns=None, console=None):
@@ -2059,6 +4858,15 @@ class GenerateTAPDialog(QDialog):
                 self.console.moveCursor(QtGui.QTextCursor.MoveOperation.End)
             ))
 
+        # Per-user results table (the TAPs never reach the console or the log)
+        self.results_dialog = BulkResultsDialog(
+            "Temporary Access Pass Results", self.user_upns,
+            ["TemporaryAccessPass", "ExpirationDateTime", "OneTimeUse"],
+            secret_column="TemporaryAccessPass", parent=self.parent()
+        )
+        self.results_dialog.watch(self.worker)
+        self.results_dialog.show()
+
         # Error
         self.worker.error.connect(self.on_tap_error)
 
@@ -2086,7 +4894,8 @@ class GenerateTAPDialog(QDialog):
         QMessageBox.information(
             self,
             "TAP Generation Complete",
-            f"✅ Temporary Access Pass(es) generated successfully.\n\n"
+            f"✅ {self.results_dialog.succeeded} Temporary Access Pass(es) generated, "
+            f"❌ {self.results_dialog.failed} failed.\n\n"
             f"Duration: {self.duration_slider.value()} minutes\n"
             f"One-time use: {'Yes' if self.one_time_check.isChecked() else 'No'}"
         )
@@ -2243,6 +5052,14 @@ class GenerateResetPasswordDialog(QDialog):
                 self.console.moveCursor(QTextCursor.MoveOperation.End)
             ))
 
+        # --- Per-user results table (the password never reaches the console or the log) ---
+        self.results_dialog = BulkResultsDialog(
+            "Password Reset Results", self.user_upns, ["NewPassword", "ForceChange"],
+            secret_column="NewPassword", parent=self.parent()
+        )
+        self.results_dialog.watch(self.worker)
+        self.results_dialog.show()
+
         # --- Error handling ---
         self.worker.error.connect(self.on_password_error)
 
@@ -2271,8 +5088,8 @@ class GenerateResetPasswordDialog(QDialog):
         QMessageBox.information(
             self,
             "Password Reset Complete",
-            f"✅ Password(s) reset successfully.\n\n"
-            f"Force change at next sign-in is enabled."
+            f"✅ {self.results_dialog.succeeded} password(s) reset, ❌ {self.results_dialog.failed} failed.\n\n"
+            f"Force change at next sign-in: {'Yes' if self.force_change_check.isChecked() else 'No'}"
         )
 
         self.accept()
@@ -2368,11 +5185,15 @@ class RevokeSessionsDialog(QDialog):
         )
 
         if self.console:
-            self.worker.finished.connect(lambda status, out: (
-                self.console.append(out),
+            self.worker.output.connect(lambda line: (
+                self.console.append(line),
                 self.console.moveCursor(QTextCursor.MoveOperation.End)
             ))
 
+        self.results_dialog = BulkResultsDialog("Revoke Sessions Results", self.user_upns, [], parent=self.parent())
+        self.results_dialog.watch(self.worker)
+        self.results_dialog.show()
+
         self.worker.error.connect(self.on_revoke_error)
         self.worker.finished.connect(self.on_revoke_done)
 
@@ -2394,7 +5215,8 @@ class RevokeSessionsDialog(QDialog):
         QMessageBox.information(
             self,
             "Revoke Complete",
-            "✅ User session(s) successfully revoked.\nUsers will be signed out within minutes."
+            f"✅ {self.results_dialog.succeeded} user session(s) revoked, ❌ {self.results_dialog.failed} failed.\n"
+            "Users will be signed out within minutes."
         )
         self.accept()
 
@@ -2405,12 +5227,60 @@ class RevokeSessionsDialog(QDialog):
         self.ok_button.setText("Revoke Sessions")
 
 
+# --- Device Index ---#
+class DeviceIndex:
+    """
+    DeviceName → (Id, AzureADDeviceId) over the loaded devices snapshot, so LAPS / BitLocker
+    lookups send Entra device ids instead of making the scripts resolve every name against Graph.
+    """
+
+    def __init__(self, df=None):
+        self.df = df
+        self.by_name = {}  # lower-case name -> [{"DeviceName", "Id", "AzureADDeviceId"}, ...]
+        if df is not None:
+            self.load(df)
+
+    def load(self, df):
+        cols = [c for c in ("DeviceName", "Id", "AzureADDeviceId") if c in df.columns]
+        if "DeviceName" not in cols:
+            return
+        records = df[cols].fillna("").astype(str)
+        records = records[records["DeviceName"] != ""]
+
+        self.df = df
+        self.by_name = {}
+        for rec in records.to_dict("records"):
+            entries = self.by_name.setdefault(rec["DeviceName"].lower(), [])
+            if rec not in entries:
+                entries.append(rec)
+
+    def lookup(self, name: str) -> list:
+        return self.by_name.get(str(name).strip().lower(), [])
+
+    def resolve(self, names):
+        """
+        Return ({AzureADDeviceId: DeviceName}, [names without an Entra device id in the snapshot]).
+        A name shared by several records resolves to all of their ids.
+        """
+        ids, unresolved = {}, []
+        for name in names:
+            found = [e for e in self.lookup(name) if e.get("AzureADDeviceId")]
+            if not found:
+                unresolved.append(name)
+            for e in found:
+                ids.setdefault(e["AzureADDeviceId"], e["DeviceName"])
+        return ids, unresolved
+
+
 # --- Get LAPS ---
 class RetrieveLAPSDialog(QDialog):
-    def __init__(self, parent=None, device_names=None, console=None):
+    def __init__(self, parent=None, device_names=None, console=None, device_ids=None, unresolved=None):
         super().__init__(parent)
         self.device_names = device_names or []
         self.console = console
+        self.device_ids = device_ids or {}    # Entra device id -> name, from the devices snapshot
+        self.unresolved = unresolved or []    # names the snapshot had no id for (looked up by the script)
+        self.results = []
 
         self.setWindowTitle("Retrieve LAPS Password(s)")
         self.setMinimumWidth(600)
@@ -2468,7 +5338,7 @@ class RetrieveLAPSDialog(QDialog):
         from PyQt6 import QtGui
 
         # --- Validation ---
-        if not getattr(self, "device_ids", []):
+        if not self.device_ids and not self.unresolved:
             QMessageBox.warning(self, "No Devices", "Please select at least one device.")
             return
 
@@ -2486,34 +5356,39 @@ class RetrieveLAPSDialog(QDialog):
             f"{timestamp}_Retrieve-LAPS.log"
         )
 
-        # --- Build PowerShell arguments ---
-        args = [
-            "-ExecutionPolicy", "Bypass",
-            "-File", script_path,
-            "-DeviceId", ",".join(self.device_ids)
-        ]
+        # --- Build PowerShell arguments (ids from the snapshot, names only when unresolved) ---
+        args = []
+        if self.device_ids:
+            args.extend(["-DeviceId", ",".join(self.device_ids)])
+        if self.unresolved:
+            args.extend(["-DeviceName", ",".join(self.unresolved)])
 
         # --- Initial console output ---
         if self.console:
             self.console.clear()
             self.console.append(
-                f"🔑 Retrieving LAPS password for {len(self.device_ids)} device(s)...\n"
+                f"🔑 Retrieving LAPS password for {len(self.device_ids) + len(self.unresolved)} device(s)...\n"
             )
 
         # --- Start worker ---
         pwsh = self.parent().get_pwsh_path()
 
+        self.results = []
+        self.output_field.clear()
         self.worker = PowerShellWorker(
             pwsh_path=pwsh,
-            command=args
+            script_path=script_path,
+            args=args,
+            log_file=log_file
         )
 
-        # Live output
+        # Live output (passwords come through `result`, never the console or the log)
         if self.console:
-            self.worker.finished.connect(lambda status, out: (
-                self.console.append(out),
+            self.worker.output.connect(lambda line: (
+                self.console.append(line),
                 self.console.moveCursor(QtGui.QTextCursor.MoveOperation.End)
             ))
+        self.worker.result.connect(self.add_result)
 
         # Error handling
         self.worker.error.connect(self.on_laps_error)
@@ -2534,51 +5409,36 @@ class RetrieveLAPSDialog(QDialog):
         self.ok_button.setText("⏳ Retrieving...")
 
     # ----------------------------------------------------------------------
-    def on_laps_done(self, stdout: str = "", stderr: str = ""):
-        import json, re, os
+    def add_result(self, data: dict):
+        device = data.get("Device", "")
+        if device in self.device_ids:
+            device = self.device_ids[device]
+        data["Device"] = device
+        self.results.append(data)
+
+        account = f"Account: {data['Account']}\n" if data.get("Account") else ""
+        self.output_field.append(
+            f"Device: {device}\n"
+            f"{account}"
+            f"Password: {data.get('Password', '')}\n"
+            f"Last Backup: {data.get('BackupTime', '')}\n"
+            f"Status: {data.get('Status', '')}\n"
+        )
 
+    def on_laps_done(self, status: str = "", message: str = ""):
         self.ok_button.setEnabled(True)
         self.ok_button.setText("Retrieve LAPS Password(s)")
 
-        # Locate latest log file (the one created for LAPS script)
-        logs_dir = getattr(self.parent(), "logs_dir", os.getcwd())
-        latest_log = sorted(
-            [os.path.join(logs_dir, f) for f in os.listdir(logs_dir) if "Retrieve-LAPS" in f]
-        )[-1]
-
-        # Read log content instead of stdout
-        with open(latest_log, "r", encoding="utf-8") as f:
-            raw = f.read()
-
-        # Extract JSON
-        match = re.search(
-            r"###LAPS_JSON_START###\s*(\{[\s\S]*?\})\s*###LAPS_JSON_END###",
-            raw
-        )
-
-        if not match:
+        if not self.results:
             self.output_field.setPlainText("No LAPS credentials found.")
             return
 
-        json_text = match.group(1)
-
-        try:
-            data = json.loads(json_text)
-        except:
-            self.output_field.setPlainText("Failed to parse JSON output.")
-            return
-
-        pwd = data.get("Password", "")
-        device = data.get("Device", "")
-        backup = data.get("BackupTime", "")
-        status = data.get("Status", "")
-
-        self.output_field.setPlainText(
-            f"Password: {pwd}\n"
-            f"Device: {device}\n"
-            f"Last Backup: {backup}\n"
-            f"Status: {status}"
-        )
+        # One device: copy the password; several: one "device<TAB>password" line each
+        found = [r for r in self.results if r.get("Password")]
+        if len(self.results) == 1:
+            clip = found[0]["Password"] if found else ""
+        else:
+            clip = "\n".join(f"{r['Device']}\t{r['Password']}" for r in found)
 
         # Button Copy + Close
         self.ok_button.setText("Copy & Close")
@@ -2587,7 +5447,7 @@ class RetrieveLAPSDialog(QDialog):
         # Define action for the button
         def copy_and_close():
             clipboard = QApplication.clipboard()
-            clipboard.setText(pwd if pwd else "")
+            clipboard.setText(clip)
             self.close()  # better than accept(), triggers cleanup
 
         self.ok_button.clicked.connect(copy_and_close)
@@ -2608,6 +5468,7 @@ class AssignExchangeWorker(QThread):
         super().__init__()
         self.command = command
 
+    @PerfMonitor.timed(PerfMonitor.script_span)
     def run(self):
         try:
             result = subprocess.run(
@@ -3044,11 +5905,13 @@ class AdvancedIdentitySearchDialog(QDialog):
 
 # --- BitLocker PART ---
 class BitlockerKeysDialog(QDialog):
-    def __init__(self, device_names, parent=None):
+    def __init__(self, device_names, parent=None, device_ids=None, unresolved=None):
         super().__init__(parent)
 
-        # Store device names only
+        # Names for display; Entra device ids from the devices snapshot, names without one looked up by the script
         self.device_names = device_names
+        self.device_ids = device_ids if device_ids is not None else {}
+        self.unresolved = unresolved if unresolved is not None else list(device_names)
 
         self.setWindowTitle("BitLocker Recovery Keys")
         self.resize(900, 520)
@@ -3087,70 +5950,60 @@ class BitlockerKeysDialog(QDialog):
             os.path.dirname(__file__), "Powershell_Scripts", "retrieve_bitlocker_keys.ps1"
         )
 
-        device_names_str = ",".join(self.device_names)
         pwsh = self.parent().get_pwsh_path()
 
-        command = [
-            "-NoProfile", "-ExecutionPolicy", "Bypass",
-            "-File", script_path,
-            "-DeviceNames", device_names_str
-        ]
+        args = []
+        if self.device_ids:
+            args.extend(["-DeviceIds", ",".join(self.device_ids)])
+        if self.unresolved:
+            args.extend(["-DeviceNames", ",".join(self.unresolved)])
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        log_file = os.path.join(
+            getattr(self.parent(), "logs_dir", os.getcwd()),
+            f"{timestamp}_Retrieve-BitLocker.log"
+        )
 
         self.refresh_btn.setEnabled(False)
-        self.console.append("⏳ Fetching BitLocker recovery keys...")
+        self.table.setRowCount(0)
+        self.console.append(
+            f"⏳ Fetching BitLocker recovery keys for {len(self.device_ids) + len(self.unresolved)} device(s)"
+            f" ({len(self.device_ids)} resolved from the devices snapshot)..."
+        )
 
-        # Use PowerShellWorker (NOT AssignExchangeWorker)
         self.worker = PowerShellWorker(
             pwsh_path=pwsh,
-            command=command
+            script_path=script_path,
+            args=args,
+            log_file=log_file
         )
 
-        # Hooks
+        # Hooks (keys arrive through `result`, never the console or the log)
         self.worker.output.connect(lambda line: self.console.append(line))
+        self.worker.result.connect(self.add_result)
         self.worker.error.connect(self.on_error)
         self.worker.finished.connect(self.on_done)
 
         self.worker.start()
 
-    def on_done(self, stdout, stderr):
-        self.refresh_btn.setEnabled(True)
-        self.console.append("✅ PowerShell complete, parsing output...")
-
-        import re, json
+    def add_result(self, item: dict):
+        if not item.get("DeviceName"):
+            item["DeviceName"] = self.device_ids.get(item.get("DeviceId", ""), "")
 
-        # Extract JSON block
-        m = re.search(r"###JSON_START###(.*?)###JSON_END###", stdout, re.DOTALL)
-        if not m:
-            self.console.append("❌ No JSON block returned. Check permissions or script.")
-            QMessageBox.warning(self, "No Data", "No BitLocker keys returned.")
-            return
+        r = self.table.rowCount()
+        self.table.insertRow(r)
+        for c, key in enumerate(("KeyId", "DeviceId", "DeviceName", "CreatedDateTime", "CreatedBy", "RecoveryKey")):
+            self.table.setItem(r, c, QTableWidgetItem(str(item.get(key) or "")))
 
-        raw = m.group(1).strip()
+    def on_done(self, status, message):
+        self.refresh_btn.setEnabled(True)
 
-        try:
-            data = json.loads(raw)
-        except Exception as e:
-            self.console.append(f"❌ JSON parse error: {e}")
-            self.console.append(raw)
-            QMessageBox.critical(self, "Parse Error", str(e))
+        if self.table.rowCount() == 0:
+            self.console.append("❌ No keys returned. Check permissions or script.")
+            QMessageBox.warning(self, "No Data", "No BitLocker keys returned.")
             return
 
-        # Normalize to list
-        if isinstance(data, dict):
-            data = [data]
-
-        self.console.append(f"✅ Parsed {len(data)} record(s)")
-
-        # Populate table
-        self.table.setRowCount(len(data))
-        for r, item in enumerate(data):
-            self.table.setItem(r, 0, QTableWidgetItem(item.get("KeyId", "")))
-            self.table.setItem(r, 1, QTableWidgetItem(item.get("DeviceId", "")))
-            self.table.setItem(r, 2, QTableWidgetItem(item.get("DeviceName", "")))
-            self.table.setItem(r, 3, QTableWidgetItem(item.get("CreatedDateTime", "")))
-            self.table.setItem(r, 4, QTableWidgetItem(item.get("CreatedBy", "")))
-            self.table.setItem(r, 5, QTableWidgetItem(item.get("RecoveryKey", "")))
-
+        self.console.append(f"✅ Parsed {self.table.rowCount()} record(s)")
         self.table.setColumnHidden(5, True)  # Hide recovery key by default
         self.console.append("✅ Keys loaded (hidden by default)")
 
@@ -4254,6 +7107,34 @@ class SupplyWizard(QDialog):
 
 # --- Application ---#
 class OffboardManager(QWidget):
+    # Dashboard name -> (snapshot selector, card grid layout)
+    DASHBOARDS = {
+        "identity": ("identity_dash_selector", "identity_dash_cards"),
+        "devices": ("devices_dash_selector", "devices_dash_cards"),
+        "apps": ("apps_dash_selector", "apps_dash_cards"),
+        "groups": ("groups_dash_selector", "groups_dash_cards"),
+        "exchange": ("exchange_dash_selector", "exchange_dash_cards"),
+    }
+
+    # Table page -> (snapshot selector, loader, DataFrame attribute); full loads wait until the page is opened
+    TABLE_PAGES = {
+        "identity": ("csv_selector", "load_selected_csv", "current_df"),
+        "devices": ("devices_csv_selector", "load_selected_devices_csv", "current_devices_df"),
+        "autopilot": ("autopilot_csv_selector", "load_selected_autopilot_csv", "current_autopilot_df"),
+        "apps": ("apps_csv_selector", "load_selected_apps_csv", "current_apps_df"),
+        "groups": ("groups_csv_selector", "load_selected_groups_csv", "current_groups_df"),
+        "exchange": ("exchange_csv_selector", "load_selected_exchange_csv", "current_exchange_df"),
+    }
+
+    # Default drill-down levels of the "Explore" dialog per dataset (any other column can be picked too)
+    FACET_PATHS = {
+        "identity": ["Country", "City", "Department"],
+        "devices": ["OperatingSystem", "Model", "ComplianceState"],
+        "apps": ["Platform", "Publisher", "AppDisplayName"],
+        "groups": ["Group Type", "Membership Type"],
+        "exchange": ["Last Sent By"],
+    }
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Identity Toolbox")
@@ -4458,6 +7339,36 @@ class OffboardManager(QWidget):
         """)
         user_layout.addWidget(self.btn_dropped_csv)
 
+        # Snapshot Retention button
+        self.btn_snapshot_retention = QPushButton("Snapshot Retention")
+        self.btn_snapshot_retention.setFixedHeight(40)
+        self.btn_snapshot_retention.setStyleSheet("""
+            QPushButton {
+                border: 1px solid #bbb;
+                border-radius: 6px;
+                padding: 6px;
+            }
+            QPushButton:hover {
+                background-color: #dcdcdc;
+            }
+        """)
+        user_layout.addWidget(self.btn_snapshot_retention)
+
+        # Performance panel button
+        self.btn_performance = QPushButton("Performance")
+        self.btn_performance.setFixedHeight(40)
+        self.btn_performance.setStyleSheet("""
+            QPushButton {
+                border: 1px solid #bbb;
+                border-radius: 6px;
+                padding: 6px;
+            }
+            QPushButton:hover {
+                background-color: #dcdcdc;
+            }
+        """)
+        user_layout.addWidget(self.btn_performance)
+
         left_panel.addWidget(frame_user)
 
         left_panel.addStretch()
@@ -4483,6 +7394,14 @@ class OffboardManager(QWidget):
         # === Page Map for Navigation ===
         self.page_map = {}
 
+        # Table page -> snapshot path whose data is in memory / shown in the table widget
+        # (full loads are deferred, see table_load_due)
+        self.loaded_tables = {}
+        self.shown_tables = {}
+        self.prefetched = {}   # path -> ((mtime, size), DataFrame) parsed by SnapshotPrefetchWorker
+        self.forced_table_load = None   # page whose data is being read without filling its table
+        self.forced_table_show = None   # page whose table is being filled before it is on screen
+
         # --- Dashboard page with tabs ---
         self.dashboard_tabs = QTabWidget()
 
@@ -4506,6 +7425,16 @@ class OffboardManager(QWidget):
         )
         self.identity_dash_layout.addWidget(self.identity_dash_selector)
 
+        identity_explore_btn = QPushButton("🔎 Explore Columns")
+        identity_explore_btn.clicked.connect(lambda: self.open_facet_explorer("identity"))
+        identity_trends_btn = QPushButton("📈 Trends")
+        identity_trends_btn.clicked.connect(lambda: self.open_snapshot_trends("Enabled users"))
+        identity_tools_row = QHBoxLayout()
+        identity_tools_row.addWidget(identity_explore_btn)
+        identity_tools_row.addWidget(identity_trends_btn)
+        identity_tools_row.addStretch()
+        self.identity_dash_layout.addLayout(identity_tools_row)
+
         self.identity_dash_cards = QGridLayout()
         self.identity_dash_layout.addLayout(self.identity_dash_cards)
 
@@ -4534,6 +7463,16 @@ class OffboardManager(QWidget):
         )
         self.devices_dash_layout.addWidget(self.devices_dash_selector)
 
+        devices_explore_btn = QPushButton("🔎 Explore Columns")
+        devices_explore_btn.clicked.connect(lambda: self.open_facet_explorer("devices"))
+        devices_trends_btn = QPushButton("📈 Trends")
+        devices_trends_btn.clicked.connect(lambda: self.open_snapshot_trends("Non-compliant devices"))
+        devices_tools_row = QHBoxLayout()
+        devices_tools_row.addWidget(devices_explore_btn)
+        devices_tools_row.addWidget(devices_trends_btn)
+        devices_tools_row.addStretch()
+        self.devices_dash_layout.addLayout(devices_tools_row)
+
         self.devices_dash_cards = QGridLayout()
         self.devices_dash_layout.addLayout(self.devices_dash_cards)
 
@@ -4562,6 +7501,16 @@ class OffboardManager(QWidget):
         )
         self.apps_dash_layout.addWidget(self.apps_dash_selector)
 
+        apps_explore_btn = QPushButton("🔎 Explore Columns")
+        apps_explore_btn.clicked.connect(lambda: self.open_facet_explorer("apps"))
+        apps_trends_btn = QPushButton("📈 Trends")
+        apps_trends_btn.clicked.connect(lambda: self.open_snapshot_trends("App installations"))
+        apps_tools_row = QHBoxLayout()
+        apps_tools_row.addWidget(apps_explore_btn)
+        apps_tools_row.addWidget(apps_trends_btn)
+        apps_tools_row.addStretch()
+        self.apps_dash_layout.addLayout(apps_tools_row)
+
         self.apps_dash_cards = QGridLayout()
         self.apps_dash_layout.addLayout(self.apps_dash_cards)
 
@@ -4590,6 +7539,16 @@ class OffboardManager(QWidget):
         )
         self.groups_dash_layout.addWidget(self.groups_dash_selector)
 
+        groups_explore_btn = QPushButton("🔎 Explore Columns")
+        groups_explore_btn.clicked.connect(lambda: self.open_facet_explorer("groups"))
+        groups_trends_btn = QPushButton("📈 Trends")
+        groups_trends_btn.clicked.connect(lambda: self.open_snapshot_trends("Groups"))
+        groups_tools_row = QHBoxLayout()
+        groups_tools_row.addWidget(groups_explore_btn)
+        groups_tools_row.addWidget(groups_trends_btn)
+        groups_tools_row.addStretch()
+        self.groups_dash_layout.addLayout(groups_tools_row)
+
         self.groups_dash_cards = QGridLayout()
         self.groups_dash_layout.addLayout(self.groups_dash_cards)
 
@@ -4618,6 +7577,16 @@ class OffboardManager(QWidget):
         )
         self.exchange_dash_layout.addWidget(self.exchange_dash_selector)
 
+        exchange_explore_btn = QPushButton("🔎 Explore Columns")
+        exchange_explore_btn.clicked.connect(lambda: self.open_facet_explorer("exchange"))
+        exchange_trends_btn = QPushButton("📈 Trends")
+        exchange_trends_btn.clicked.connect(lambda: self.open_snapshot_trends("Unread shared mailboxes"))
+        exchange_tools_row = QHBoxLayout()
+        exchange_tools_row.addWidget(exchange_explore_btn)
+        exchange_tools_row.addWidget(exchange_trends_btn)
+        exchange_tools_row.addStretch()
+        self.exchange_dash_layout.addLayout(exchange_tools_row)
+
         self.exchange_dash_cards = QGridLayout()
         self.exchange_dash_layout.addLayout(self.exchange_dash_cards)
 
@@ -4667,7 +7636,7 @@ class OffboardManager(QWidget):
 
         self.csv_selector = QComboBox()
         self.csv_selector.currentIndexChanged.connect(self.load_selected_csv)
-        id_layout.addWidget(self.csv_selector)
+        id_layout.addLayout(self.snapshot_selector_row(self.csv_selector, "identity"))
 
         self.search_field = QLineEdit()
         self.search_field.setPlaceholderText("Search users (DisplayName)...")
@@ -4687,7 +7656,6 @@ class OffboardManager(QWidget):
 
         self.stacked.addWidget(self.identity_page)
         self.page_map["identity"] = self.identity_page
-        self.try_populate_comboboxes()
 
         # --- Devices page (table view) ---
         self.devices_page = QWidget()
@@ -4696,7 +7664,7 @@ class OffboardManager(QWidget):
         # CSV selector for devices
         self.devices_csv_selector = QComboBox()
         self.devices_csv_selector.currentIndexChanged.connect(self.load_selected_devices_csv)
-        dev_layout.addWidget(self.devices_csv_selector)
+        dev_layout.addLayout(self.snapshot_selector_row(self.devices_csv_selector, "devices"))
 
         # Search field
         self.devices_search = QLineEdit()
@@ -4730,7 +7698,7 @@ class OffboardManager(QWidget):
         # CSV selector for Autopilot reports
         self.autopilot_csv_selector = QComboBox()
         self.autopilot_csv_selector.currentIndexChanged.connect(self.load_selected_autopilot_csv)
-        autopilot_layout.addWidget(self.autopilot_csv_selector)
+        autopilot_layout.addLayout(self.snapshot_selector_row(self.autopilot_csv_selector, "autopilot"))
 
         # Search field
         self.autopilot_search = QLineEdit()
@@ -4763,7 +7731,7 @@ class OffboardManager(QWidget):
         # CSV selector for apps
         self.apps_csv_selector = QComboBox()
         self.apps_csv_selector.currentIndexChanged.connect(self.load_selected_apps_csv)
-        apps_layout.addWidget(self.apps_csv_selector)
+        apps_layout.addLayout(self.snapshot_selector_row(self.apps_csv_selector, "apps"))
 
         # Search field (App or User)
         self.apps_search = QLineEdit()
@@ -4794,7 +7762,7 @@ class OffboardManager(QWidget):
         # CSV selector for groups
         self.groups_csv_selector = QComboBox()
         self.groups_csv_selector.currentIndexChanged.connect(self.load_selected_groups_csv)
-        groups_layout.addWidget(self.groups_csv_selector)
+        groups_layout.addLayout(self.snapshot_selector_row(self.groups_csv_selector, "groups"))
 
         # Search field (App or User)
         self.groups_search = QLineEdit()
@@ -4811,6 +7779,8 @@ class OffboardManager(QWidget):
         self.groups_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.groups_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.groups_table.setSortingEnabled(True)
+        self.groups_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.groups_table.customContextMenuRequested.connect(self.open_groups_context_menu)
         groups_layout.addWidget(self.groups_table)
 
         # Add to stacked widget
@@ -4818,60 +7788,155 @@ class OffboardManager(QWidget):
         self.page_map["groups"] = self.groups_page
         self.try_populate_groups_csv()
 
-        # --- Exchange page (Shared Mailboxes view) ---
-        self.exchange_page = QWidget()
-        exchange_layout = QVBoxLayout(self.exchange_page)
+        # --- Exchange page (Shared Mailboxes view) ---
+        self.exchange_page = QWidget()
+        exchange_layout = QVBoxLayout(self.exchange_page)
+
+        # CSV selector for Exchange
+        self.exchange_csv_selector = QComboBox()
+        self.exchange_csv_selector.currentIndexChanged.connect(self.load_selected_exchange_csv)
+        exchange_layout.addLayout(self.snapshot_selector_row(self.exchange_csv_selector, "exchange"))
+
+        # Search field (by Mailbox name or Email)
+        self.exchange_search = QLineEdit()
+        self.exchange_search.setPlaceholderText(
+            "Search mailboxes by Shared Mailbox Name or Email (multiple terms)..."
+        )
+        exchange_layout.addWidget(self.exchange_search)
+        self.exchange_search.textChanged.connect(self.filter_exchange_fast)
+
+        # Exchange table (Shared Mailboxes list)
+        self.exchange_table = QTableWidget()
+        self.exchange_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.exchange_table.horizontalHeader().setStretchLastSection(True)
+        self.exchange_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.exchange_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.exchange_table.setSortingEnabled(True)
+        exchange_layout.addWidget(self.exchange_table)
+
+        # Add to stacked widget
+        self.stacked.addWidget(self.exchange_page)
+        self.page_map["exchange"] = self.exchange_page
+        self.try_populate_exchange_csv()
+
+        # --- Console page ---
+        self.console_page = QWidget()
+        console_layout = QVBoxLayout(self.console_page)
+        # (you will add widgets here later)
+        self.stacked.addWidget(self.console_page)
+        self.page_map["console"] = self.console_page
+
+        # --- Create User page (widgets built by build_create_user_page when first shown) ---
+        self.create_user_page = QWidget()
+        QHBoxLayout(self.create_user_page)
+        self.stacked.addWidget(self.create_user_page)
+        self.page_map["create_user"] = self.create_user_page
+        self.page_builders = {"create_user": self.build_create_user_page}
+
+        # --- Dropped CSV Page ---
+        self.page_dropped_csv = QWidget()
+        dropped_layout = QVBoxLayout(self.page_dropped_csv)
+
+        self.table_dropped_csv = QTableWidget()
+        dropped_layout.addWidget(self.table_dropped_csv)
+
+        self.stacked.addWidget(self.page_dropped_csv)
+        self.page_map["dropped_csv"] = self.page_dropped_csv
+
+        # Log selector
+        self.log_selector = QComboBox()
+        self.log_selector.setMaxVisibleItems(12)
+        self.log_selector.setMinimumWidth(600)
+        self.log_selector.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+
+        # 👇 Force Qt popup (not macOS native one)
+        self.log_selector.setStyleSheet("QComboBox { combobox-popup: 0; }")
+
+        # Custom view ensures scroll works
+        view = QListView()
+        view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        view.setUniformItemSizes(True)
+        self.log_selector.setView(view)
+
+        # Optional styling for dark mode
+        self.log_selector.setStyleSheet(self.log_selector.styleSheet() + """
+            QComboBox QAbstractItemView {
+                min-width: 600px;
+                background-color: #2c2c2c;
+                color: white;
+                selection-background-color: #0078d7;
+                border: 1px solid #444;
+            }
+        """)
+
+        self.log_selector.currentIndexChanged.connect(self.load_selected_log)
+        console_layout.addWidget(self.log_selector)
+
+        # Search field
+        self.log_search = QLineEdit()
+        self.log_search.setPlaceholderText("Search logs (press Enter)...")
+        self.log_search.returnPressed.connect(self.search_logs)
+        console_layout.addWidget(self.log_search)
+
+        # Console output
+        self.console_output = QTextEdit()
+        self.console_output.setReadOnly(True)
+        self.console_output.setStyleSheet(
+            "background-color: black; color: white; font-family: 'Courier New', Courier, monospace;")
+        console_layout.addWidget(self.console_output)
+
+        # Populate logs at startup
+        self.refresh_log_list()
 
-        # CSV selector for Exchange
-        self.exchange_csv_selector = QComboBox()
-        self.exchange_csv_selector.currentIndexChanged.connect(self.load_selected_exchange_csv)
-        exchange_layout.addWidget(self.exchange_csv_selector)
+        # Add layouts
+        main_layout.addLayout(left_panel, 2)
+        main_layout.addWidget(self.stacked, 8)
+        self.setLayout(main_layout)
 
-        # Search field (by Mailbox name or Email)
-        self.exchange_search = QLineEdit()
-        self.exchange_search.setPlaceholderText(
-            "Search mailboxes by Shared Mailbox Name or Email (multiple terms)..."
-        )
-        exchange_layout.addWidget(self.exchange_search)
-        self.exchange_search.textChanged.connect(self.filter_exchange_fast)
+        # Button actions → now they match the page order
+        self.btn_dashboard.clicked.connect(lambda: self.show_named_page("dashboard"))
+        self.btn_identity.clicked.connect(lambda: self.show_named_page("identity"))
+        self.btn_devices.clicked.connect(lambda: self.show_named_page("devices"))
+        self.btn_autopilot_devices.clicked.connect(lambda: self.show_named_page("autopilot"))
+        self.btn_apps.clicked.connect(lambda: self.show_named_page("apps"))
+        self.btn_groups.clicked.connect(lambda: self.show_named_page("groups"))
+        self.btn_exchange.clicked.connect(lambda: self.show_named_page("exchange"))
+        self.btn_console.clicked.connect(lambda: self.show_named_page("console"))
+        self.btn_create_user.clicked.connect(
+            lambda: (self.show_named_page("create_user"), self.load_access_packages_to_combobox()))
+        self.btn_user_groups_comparison.clicked.connect(self.open_groups_comparison_window)
+        self.btn_dropped_csv.clicked.connect(lambda: self.show_named_page("dropped_csv"))
+        self.btn_snapshot_retention.clicked.connect(self.open_snapshot_retention)
+        self.btn_performance.clicked.connect(self.open_performance_panel)
 
-        # Exchange table (Shared Mailboxes list)
-        self.exchange_table = QTableWidget()
-        self.exchange_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
-        self.exchange_table.horizontalHeader().setStretchLastSection(True)
-        self.exchange_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.exchange_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
-        self.exchange_table.setSortingEnabled(True)
-        exchange_layout.addWidget(self.exchange_table)
+        # Populate CSV lists (dashboards render from summary sidecars; full loads wait for their page,
+        # the Create User comboboxes are filled when that page is opened)
+        self.refresh_csv_lists()
 
-        # Add to stacked widget
-        self.stacked.addWidget(self.exchange_page)
-        self.page_map["exchange"] = self.exchange_page
-        self.try_populate_exchange_csv()
+        # Once the window is up: parse the selected snapshots in the background (this also imports pandas),
+        # then store every snapshot not yet in the history database
+        QTimer.singleShot(0, self.prefetch_snapshots)
+        QTimer.singleShot(0, self.start_stall_watchdog)
+        QTimer.singleShot(2000, self.backfill_snapshot_history)
 
-        # --- Console page ---
-        self.console_page = QWidget()
-        console_layout = QVBoxLayout(self.console_page)
-        # (you will add widgets here later)
-        self.stacked.addWidget(self.console_page)
-        self.page_map["console"] = self.console_page
+        # Shortcut: Ctrl+R reloads app
+        shortcut_reload = QShortcut(QKeySequence("Ctrl+R"), self)
+        shortcut_reload.activated.connect(self.reload_app)
 
-        # --- Create User page ---
-        self.create_user_page = QWidget()
-        cu_layout = QHBoxLayout(self.create_user_page)
-        # (your Create User layout is defined elsewhere)
-        self.stacked.addWidget(self.create_user_page)
-        self.page_map["create_user"] = self.create_user_page
+        # Global Advanced Search shortcut
+        shortcut = QShortcut(QKeySequence("Ctrl+F"), self)
+        shortcut.activated.connect(self.open_advanced_search)
 
-        # --- Dropped CSV Page ---
-        self.page_dropped_csv = QWidget()
-        dropped_layout = QVBoxLayout(self.page_dropped_csv)
+        # macOS support
+        shortcut_mac = QShortcut(QKeySequence("Meta+F"), self)  # Meta = CMD key
+        shortcut_mac.activated.connect(self.open_advanced_search)
 
-        self.table_dropped_csv = QTableWidget()
-        dropped_layout.addWidget(self.table_dropped_csv)
+        self.ps_scripts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Powershell_Scripts")
 
-        self.stacked.addWidget(self.page_dropped_csv)
-        self.page_map["dropped_csv"] = self.page_dropped_csv
+    @PerfMonitor.timed("page.build.create_user")
+    def build_create_user_page(self):
+        """Create User form and controls (built on first visit, see show_named_page)."""
+        cu_layout = self.create_user_page.layout()
 
         # === User Information Frame ===
         frame_fields = QGroupBox("User Information")
@@ -5212,89 +8277,6 @@ class OffboardManager(QWidget):
         cu_layout.addWidget(frame_fields, 3)  # Left side (user info)
         cu_layout.addWidget(frame_right, 1)  # Right side (controls)
 
-        # Log selector
-        self.log_selector = QComboBox()
-        self.log_selector.setMaxVisibleItems(12)
-        self.log_selector.setMinimumWidth(600)
-        self.log_selector.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
-
-        # 👇 Force Qt popup (not macOS native one)
-        self.log_selector.setStyleSheet("QComboBox { combobox-popup: 0; }")
-
-        # Custom view ensures scroll works
-        view = QListView()
-        view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        view.setUniformItemSizes(True)
-        self.log_selector.setView(view)
-
-        # Optional styling for dark mode
-        self.log_selector.setStyleSheet(self.log_selector.styleSheet() + """
-            QComboBox QAbstractItemView {
-                min-width: 600px;
-                background-color: #2c2c2c;
-                color: white;
-                selection-background-color: #0078d7;
-                border: 1px solid #444;
-            }
-        """)
-
-        self.log_selector.currentIndexChanged.connect(self.load_selected_log)
-        console_layout.addWidget(self.log_selector)
-
-        # Search field
-        self.log_search = QLineEdit()
-        self.log_search.setPlaceholderText("Search logs (press Enter)...")
-        self.log_search.returnPressed.connect(self.search_logs)
-        console_layout.addWidget(self.log_search)
-
-        # Console output
-        self.console_output = QTextEdit()
-        self.console_output.setReadOnly(True)
-        self.console_output.setStyleSheet(
-            "background-color: black; color: white; font-family: 'Courier New', Courier, monospace;")
-        console_layout.addWidget(self.console_output)
-
-        # Populate logs at startup
-        self.refresh_log_list()
-
-        # Add layouts
-        main_layout.addLayout(left_panel, 2)
-        main_layout.addWidget(self.stacked, 8)
-        self.setLayout(main_layout)
-
-        # Button actions → now they match the page order
-        self.btn_dashboard.clicked.connect(lambda: self.show_named_page("dashboard"))
-        self.btn_identity.clicked.connect(lambda: self.show_named_page("identity"))
-        self.btn_devices.clicked.connect(lambda: self.show_named_page("devices"))
-        self.btn_autopilot_devices.clicked.connect(lambda: self.show_named_page("autopilot"))
-        self.btn_apps.clicked.connect(lambda: self.show_named_page("apps"))
-        self.btn_groups.clicked.connect(lambda: self.show_named_page("groups"))
-        self.btn_exchange.clicked.connect(lambda: self.show_named_page("exchange"))
-        self.btn_console.clicked.connect(lambda: self.show_named_page("console"))
-        self.btn_create_user.clicked.connect(
-            lambda: (self.show_named_page("create_user"), self.load_access_packages_to_combobox()))
-        self.btn_user_groups_comparison.clicked.connect(self.open_groups_comparison_window)
-        self.btn_dropped_csv.clicked.connect(lambda: self.show_named_page("dropped_csv"))
-
-        # Populate CSV lists
-        self.refresh_csv_lists()
-
-        QTimer.singleShot(0, self.try_populate_comboboxes)
-
-        # Shortcut: Ctrl+R reloads app
-        shortcut_reload = QShortcut(QKeySequence("Ctrl+R"), self)
-        shortcut_reload.activated.connect(self.reload_app)
-
-        # Global Advanced Search shortcut
-        shortcut = QShortcut(QKeySequence("Ctrl+F"), self)
-        shortcut.activated.connect(self.open_advanced_search)
-
-        # macOS support
-        shortcut_mac = QShortcut(QKeySequence("Meta+F"), self)  # Meta = CMD key
-        shortcut_mac.activated.connect(self.open_advanced_search)
-
-        self.ps_scripts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Powershell_Scripts")
-
     def get_pwsh_path(self):
         """
         Returns the path to the portable PowerShell executable.
@@ -5523,8 +8505,17 @@ class OffboardManager(QWidget):
             widget = self.page_map[name]
             index = self.stacked.indexOf(widget)
             if index != -1:
+                # Build the page's widgets on its first visit
+                builder = self.page_builders.pop(name, None)
+                if builder is not None:
+                    builder()
+
                 self.stacked.setCurrentIndex(index)
 
+                # Load the page's snapshot now if it was deferred
+                if name in self.TABLE_PAGES:
+                    self.ensure_table_loaded(name, show=True)
+
                 # Refresh comboboxes when entering Create User page
                 if name == "create_user":
                     self.try_populate_comboboxes()
@@ -5607,7 +8598,7 @@ class OffboardManager(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             self.run_access_package_script()
 
-    def run_powershell_with_output(self, script_path, params: dict):
+    def run_powershell_with_output(self, script_path, params: dict, temp_files=()):
         from PyQt6.QtWidgets import QMessageBox
 
         self.console_output.clear()
@@ -5629,20 +8620,33 @@ class OffboardManager(QWidget):
         )
         self.current_log_file = log_file
 
-        # --- Build full PowerShell command (NO pwsh prefix here) ---
-        full_cmd = [
-                       "-ExecutionPolicy", "Bypass",
-                       "-File", script_path,
-                   ] + args
-
         pwsh = self.get_pwsh_path()
 
-        # --- Use ONLY the unified worker ---
-        self.worker = PowerShellWorker(pwsh, full_cmd)
+        # --- Use ONLY the unified worker (script parameters only, pwsh flags are its job) ---
+        self.worker = PowerShellWorker(
+            pwsh_path=pwsh,
+            script_path=script_path,
+            args=args,
+            log_file=log_file
+        )
 
         # --- Connect signals ---
+        self.worker.output.connect(self.console_output.append)
+        self.worker.error.connect(self.console_output.append)
         self.worker.finished.connect(self.refresh_log_list)
 
+        # temp files handed to the script (e.g. UPN lists) go once it is done
+        def remove_temp_files(*_):
+            for path in temp_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        if temp_files:
+            self.worker.finished.connect(remove_temp_files)
+            self.worker.error.connect(remove_temp_files)
+
         # stdout or stderr → console
         self.worker.finished.connect(
             lambda status, msg: self.console_output.append(msg)
@@ -5694,6 +8698,16 @@ class OffboardManager(QWidget):
         grp_mgmt_action.triggered.connect(self.open_group_management)
         menu.addAction(grp_mgmt_action)
 
+        memberships_action = QAction("Show Group Memberships (cached)", self)
+        memberships_action.triggered.connect(self.show_cached_user_memberships)
+        memberships_action.setEnabled(self.group_edges_available())
+        menu.addAction(memberships_action)
+
+        matrix_action = QAction("Compare Groups of Selected Users", self)
+        matrix_action.triggered.connect(self.open_groups_matrix_for_selection)
+        matrix_action.setEnabled(len(self.identity_table.selectionModel().selectedRows()) > 1)
+        menu.addAction(matrix_action)
+
         assign_group_action = QAction("Assign Group(s)", self)
         assign_group_action.triggered.connect(self.confirm_assign_groups)
         menu.addAction(assign_group_action)
@@ -5790,10 +8804,169 @@ class OffboardManager(QWidget):
 
         menu.exec(self.devices_table.viewport().mapToGlobal(pos))
 
+    def open_groups_context_menu(self, pos):
+        index = self.groups_table.indexAt(pos)
+        if not index.isValid():
+            return
+
+        if not self.groups_table.selectionModel().isSelected(index):
+            self.groups_table.selectRow(index.row())
+
+        menu = QMenu(self.groups_table)
+
+        members_action = QAction("Show Members (cached)", self)
+        members_action.triggered.connect(self.show_cached_group_members)
+        members_action.setEnabled(self.group_edges_available())
+        menu.addAction(members_action)
+
+        menu.exec(self.groups_table.viewport().mapToGlobal(pos))
+
+    def _selected_column_values(self, table, column):
+        """Values of `column` for the selected rows of a QTableWidget."""
+        headers = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount())]
+        if column not in headers:
+            return []
+        col = headers.index(column)
+        values = []
+        for s in table.selectionModel().selectedRows():
+            item = table.item(s.row(), col)
+            if item and item.text().strip():
+                values.append(item.text().strip())
+        return values
+
+    def _membership_lookups(self):
+        """Id → (name, UPN) and group id → display name maps from the loaded snapshots."""
+        users = {}
+        df = self.loaded_dataset("identity")
+        if df is not None and "Id" in df.columns:
+            names = df["DisplayName"] if "DisplayName" in df.columns else df["Id"]
+            upns = df["UserPrincipalName"] if "UserPrincipalName" in df.columns else df["Id"]
+            users = dict(zip(df["Id"], zip(names, upns)))
+
+        groups = {}
+        gdf = self.loaded_dataset("groups")
+        if gdf is not None and "Object ID" in gdf.columns and "Display Name" in gdf.columns:
+            groups = dict(zip(gdf["Object ID"], gdf["Display Name"]))
+        return users, groups
+
+    def show_cached_group_members(self):
+        index = self.get_group_index()
+        if index is None:
+            QMessageBox.information(self, "No membership data",
+                                    "This Groups snapshot has no membership edge file.\n"
+                                    "Retrieve the Groups dataset again to create it.")
+            return
+
+        group_ids = self._selected_column_values(self.groups_table, "Object ID")
+        users, groups = self._membership_lookups()
+
+        rows = []
+        for gid in group_ids:
+            for mid in sorted(index.members_of(gid)):
+                mtype = index.member_type(mid)
+                name, upn = users.get(mid, (groups.get(mid, ""), ""))
+                rows.append((groups.get(gid, gid), mtype, name, upn, mid))
+
+        MembershipViewDialog("Group Members", ["Group", "Type", "Name", "UPN", "Member Id"], rows, self).exec()
+
+    def group_edges_available(self):
+        """Whether the selected Groups snapshot has membership edges, without loading it (context menus)."""
+        selector = getattr(self, "groups_csv_selector", None)
+        return selector is not None and GroupMembershipIndex.has_edges(selector.currentText())
+
+    def get_group_index(self):
+        """Membership edges of the selected Groups snapshot (loads the deferred Groups data on first use)."""
+        if not self.ensure_table_loaded("groups"):
+            return None
+        return getattr(self, "group_index", None)
+
+    def get_membership_engine(self):
+        """Transitive membership engine for the loaded Groups snapshot (built on first use)."""
+        index = self.get_group_index()
+        if index is None:
+            return None
+        engine = getattr(self, "membership_engine", None)
+        if engine is None or engine.index is not index or engine.version != index.version:
+            engine = TransitiveMembershipEngine(index)
+            self.membership_engine = engine
+        return engine
+
+    def _user_ids_by_upn(self):
+        """Lower-case UPN → object id from the loaded Identities snapshot."""
+        df = self.loaded_dataset("identity")
+        if df is None or "Id" not in df.columns or "UserPrincipalName" not in df.columns:
+            return {}
+        return dict(zip(df["UserPrincipalName"].str.lower(), df["Id"]))
+
+    def plan_membership_changes(self, upns, assign_ids=(), remove_ids=(), dynamic_groups=()):
+        """Pre-flight plan of group writes against the cached membership of the loaded Groups snapshot."""
+        plan = MembershipChangePlan(self.get_group_index(), self._user_ids_by_upn(), dynamic_groups)
+        return plan.plan(upns, assign_ids, remove_ids)
+
+    def apply_membership_results(self, rows):
+        """Keep the cached membership in step with what the assign/remove scripts reported."""
+        index = self.get_group_index()
+        if index is not None:
+            index.apply_results(rows)
+
+    def effective_group_map_for_upns(self, upns):
+        """({UPN: {group id: name}} for UPNs resolved locally, [UPNs that need a Graph lookup])."""
+        engine = self.get_membership_engine()
+        df = self.loaded_dataset("identity")
+        if engine is None or df is None or "Id" not in df.columns or "UserPrincipalName" not in df.columns:
+            return {}, list(upns)
+
+        ids = self._user_ids_by_upn()
+        _, groups = self._membership_lookups()
+
+        resolved, unresolved = {}, []
+        for upn in upns:
+            uid = ids.get(upn.strip().lower())
+            if not uid:
+                unresolved.append(upn)
+                continue
+            resolved[upn] = {gid: groups.get(gid, gid) for gid in engine.effective_groups(uid)}
+        return resolved, unresolved
+
+    def effective_group_names_for_upn(self, upn):
+        """Sorted display names of every (nested) group of a UPN, or None if it cannot be resolved locally."""
+        resolved, _ = self.effective_group_map_for_upns([upn])
+        if upn not in resolved:
+            return None
+        return sorted(set(resolved[upn].values()), key=str.lower)
+
+    def show_cached_user_memberships(self):
+        index = self.get_group_index()
+        if index is None:
+            QMessageBox.information(self, "No membership data",
+                                    "The loaded Groups snapshot has no membership edge file.")
+            return
+
+        engine = self.get_membership_engine()
+        user_ids = self._selected_column_values(self.identity_table, "Id")
+        users, groups = self._membership_lookups()
+
+        rows = []
+        for uid in user_ids:
+            upn = users.get(uid, ("", uid))[1]
+            direct = index.groups_of(uid)
+            for gid in sorted(engine.effective_groups(uid), key=lambda g: groups.get(g, g).lower()):
+                rows.append((upn, groups.get(gid, gid), "Direct" if gid in direct else "Nested", gid))
+
+        MembershipViewDialog("Group Memberships", ["User", "Group", "Membership", "Group Id"], rows, self).exec()
+
+    def open_groups_matrix_for_selection(self):
+        upns = self._selected_column_values(self.identity_table, "UserPrincipalName")
+        if len(upns) < 2:
+            QMessageBox.information(self, "Select users", "Select at least two users to compare.")
+            return
+        GroupMatrixDialog(self, upns, title=f"{len(upns)} selected user(s)").exec()
+
     def open_groups_comparison_window(self):
         upn_list = []
-        if hasattr(self, "current_df") and "UserPrincipalName" in self.current_df.columns:
-            upn_list = sorted(self.current_df["UserPrincipalName"].dropna().unique().tolist())
+        df = self.loaded_dataset("identity")
+        if df is not None and "UserPrincipalName" in df.columns:
+            upn_list = sorted(df["UserPrincipalName"].dropna().unique().tolist())
 
         dlg = GroupsComparisonDialog(self, upn_list)
         dlg.exec()
@@ -5803,9 +8976,17 @@ class OffboardManager(QWidget):
 
         # Here’s the fix: wrap list in dict with the parameter name your PS script expects
         params = {"upn": upns}
+        temp_files = []
+        if len(",".join(upns)) >= 8000:
+            # Large selections exceed the command-line limit: hand the UPNs over in a file
+            upn_file = os.path.join(self.logs_dir, f"{datetime.datetime.now():%Y%m%d-%H%M%S}_disable_upns.txt")
+            with open(upn_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(upns))
+            params = {"UpnFile": upn_file}
+            temp_files.append(upn_file)
 
         self.show_named_page("console")
-        self.run_powershell_with_output(script_path, params)
+        self.run_powershell_with_output(script_path, params, temp_files=temp_files)
 
     def assign_users_to_groups(self, upns, group_ids):
         """Run the PowerShell script in a background thread (non-blocking)."""
@@ -5815,7 +8996,7 @@ class OffboardManager(QWidget):
             command = [
                 "pwsh", "-NoProfile", "-ExecutionPolicy", "Bypass",
                 "-File", ps_script,
-                "-UserUPNs", ",".join(upns),
+                *AssignGroupsWorker.user_args(upns),
                 "-GroupIDs", ",".join(group_ids)
             ]
 
@@ -5899,11 +9080,17 @@ class OffboardManager(QWidget):
             QMessageBox.warning(self, "No UPNs", "Could not find UPNs in the selection.")
             return
 
+        # Effective group memberships that disabling will clean up (local snapshot only)
+        lines = []
+        for upn in upns:
+            names = self.effective_group_names_for_upn(upn)
+            lines.append(upn if names is None else f"{upn}  ({len(names)} effective group(s))")
+
         # Show confirmation
         reply = QMessageBox.question(
             self,
             "Confirm Disable",
-            f"Are you sure you want to disable the following user(s)?\n\n" + "\n".join(upns),
+            f"Are you sure you want to disable the following user(s)?\n\n" + "\n".join(lines),
             QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel,
             QMessageBox.StandardButton.Cancel
         )
@@ -5931,7 +9118,7 @@ class OffboardManager(QWidget):
         groups_path = getattr(self, "current_groups_csv_path", None)
         if not groups_path or not os.path.exists(groups_path):
             groups_dir = os.path.join(os.path.dirname(__file__), "Database_Groups")
-            csv_files = [f for f in os.listdir(groups_dir) if f.lower().endswith(".csv")]
+            csv_files = [f for f in os.listdir(groups_dir) if f.lower().endswith("_entragroups.csv")]
             if not csv_files:
                 QMessageBox.critical(self, "Missing CSV", "No Groups CSV found in Database_Groups folder.")
                 return
@@ -6012,7 +9199,7 @@ class OffboardManager(QWidget):
 
         if not groups_path or not os.path.exists(groups_path):
             groups_dir = os.path.join(os.path.dirname(__file__), "Database_Groups")
-            csv_files = [f for f in os.listdir(groups_dir) if f.lower().endswith(".csv")]
+            csv_files = [f for f in os.listdir(groups_dir) if f.lower().endswith("_entragroups.csv")]
 
             if not csv_files:
                 QMessageBox.critical(
@@ -6158,36 +9345,22 @@ class OffboardManager(QWidget):
             QMessageBox.critical(self, "Error", "Internal devices data missing.")
             return
 
-        df = self.current_devices_df
-
-        try:
-            id_col = df.columns.get_loc("AzureADDeviceId")
-            name_col = df.columns.get_loc("DeviceName")
-        except KeyError:
-            QMessageBox.critical(
-                self, "Missing Columns",
-                "CSV must contain 'AzureADDeviceId' and 'DeviceName' headers."
-            )
+        device_names = self.selected_device_names()
+        if device_names is None:
+            QMessageBox.critical(self, "Missing Columns", "No 'DeviceName' column found.")
             return
 
-        device_ids = []
-        device_names = []
-
-        for idx in selected:
-            row = idx.row()
-            device_id = self.devices_table.item(row, id_col).text()
-            device_name = self.devices_table.item(row, name_col).text()
-
-            device_ids.append(device_id)
-            device_names.append(device_name)
+        # Names → Entra device ids from the snapshot; the script only looks up what is left
+        device_ids, unresolved = self.get_device_index().resolve(device_names)
 
         # Initialize Dialog WITH IDs & Names
         dlg = RetrieveLAPSDialog(
             self,
             device_names=device_names,
-            console=getattr(self, "console", None)
+            console=getattr(self, "console", None),
+            device_ids=device_ids,
+            unresolved=unresolved
         )
-        dlg.device_ids = device_ids
 
         # Show dialog
         dlg.exec()
@@ -6278,25 +9451,43 @@ class OffboardManager(QWidget):
         )
         dlg.exec()
 
+    def get_device_index(self):
+        """DeviceName → id index over the loaded devices snapshot (rebuilt when another snapshot is loaded)."""
+        df = self.loaded_dataset("devices")
+        index = getattr(self, "device_index", None)
+        if index is None or index.df is not df:
+            index = DeviceIndex(df)
+            self.device_index = index
+        return index
+
+    def selected_device_names(self):
+        """Device names of the selected Devices table rows, or None without a DeviceName column."""
+        headers = [self.devices_table.horizontalHeaderItem(i).text() for i in range(self.devices_table.columnCount())]
+        if "DeviceName" not in headers:
+            return None
+        col = headers.index("DeviceName")
+
+        names = []
+        for idx in self.devices_table.selectionModel().selectedRows():
+            item = self.devices_table.item(idx.row(), col)
+            if item and item.text().strip() and item.text().strip() not in names:
+                names.append(item.text().strip())
+        return names
+
     def launch_bitlocker_dialog(self):
         selected = self.devices_table.selectionModel().selectedRows()
         if not selected:
             QMessageBox.warning(self, "No selection", "Select a device first.")
             return
 
-        headers = [self.devices_table.horizontalHeaderItem(i).text() for i in range(self.devices_table.columnCount())]
-
-        try:
-            devname_idx = headers.index("DeviceName")
-        except ValueError:
+        device_names = self.selected_device_names()
+        if device_names is None:
             QMessageBox.critical(self, "Error", "No 'DeviceName' column found")
             return
 
-        device_names = [self.devices_table.item(row.row(), devname_idx).text() for row in selected]
-
-        print("DEBUG Names:", device_names)
+        device_ids, unresolved = self.get_device_index().resolve(device_names)
 
-        dlg = BitlockerKeysDialog(device_names=device_names, parent=self)
+        dlg = BitlockerKeysDialog(device_names=device_names, parent=self, device_ids=device_ids, unresolved=unresolved)
         dlg.exec()
 
     def launch_offboarding_wizard(self):
@@ -6391,6 +9582,7 @@ class OffboardManager(QWidget):
             "Database_Apps",
             "Database_Groups",
             "Database_Exchange",
+            "Database_History",
             "Devices_Returned",
             "Accessories_Returned",
             "Supplied_Materials",
@@ -6505,14 +9697,96 @@ class OffboardManager(QWidget):
 
         QMessageBox.information(self, "Refreshed", "Dashboard successfully refreshed!")
 
+    def table_load_due(self, name, path):
+        """
+        Full snapshot loads wait until their table page is shown (or the data is needed elsewhere,
+        see loaded_dataset); dashboards only need the summary sidecars. True when the load should run now.
+        Loaders record loaded_tables / shown_tables themselves once the load has succeeded.
+        """
+        if name in (self.forced_table_load, self.forced_table_show):
+            return True
+        return self.stacked.currentWidget() is self.page_map.get(name)
+
+    def table_data_pending(self, name, path):
+        """True when a data-only load already read `path` and the table widget has not shown it yet."""
+        return self.loaded_tables.get(name) == path and self.shown_tables.get(name) != path
+
+    def ensure_table_loaded(self, name, show=False):
+        """
+        Run a table page's deferred load if its selected snapshot is not the one in memory. Data access
+        only reads the snapshot; show=True (or the page being on screen) also fills the table widget.
+        True when the selected snapshot's data is in memory.
+        """
+        selector_attr, loader, _ = self.TABLE_PAGES[name]
+        selector = getattr(self, selector_attr, None)
+        if selector is None:
+            return True
+        path = selector.currentText()
+        if not path.endswith(".csv"):
+            return True
+        show = show or self.stacked.currentWidget() is self.page_map.get(name)
+        if show and self.shown_tables.get(name) != path:
+            self.forced_table_show = name
+            try:
+                getattr(self, loader)()
+            finally:
+                self.forced_table_show = None
+        elif not show and self.loaded_tables.get(name) != path:
+            self.forced_table_load = name
+            try:
+                getattr(self, loader)()
+            finally:
+                self.forced_table_load = None
+        return self.loaded_tables.get(name) == path
+
+    def read_snapshot(self, name, path):
+        """A table page's snapshot as a DataFrame: the background prefetch when still current, else parsed now."""
+        stamp, df = self.prefetched.pop(path, (None, None))
+        if df is not None and stamp == DashboardMetricsEngine.file_stamp(path):
+            return df
+        with PerfMonitor.span(f"load.parse.{name}"):
+            return DashboardMetrics.read_csv(path, sep=";" if name == "identity" else None)
+
+    def prefetch_snapshots(self):
+        """Start parsing every table page's selected snapshot that is not loaded yet."""
+        items = []
+        for name, (selector_attr, _, _) in self.TABLE_PAGES.items():
+            path = getattr(self, selector_attr).currentText()
+            if path.endswith(".csv") and os.path.exists(path) and self.loaded_tables.get(name) != path:
+                items.append((name, path))
+        worker = getattr(self, "prefetch_worker", None)
+        if not items or (worker is not None and worker.isRunning()):
+            return
+        self.prefetch_worker = SnapshotPrefetchWorker(items)
+        self.prefetch_worker.loaded.connect(self.on_snapshot_prefetched)
+        self.prefetch_worker.start()
+
+    def on_snapshot_prefetched(self, name, path, df):
+        # Keep it only while it is still the page's selection and the page has not loaded it on its own
+        selector = getattr(self, self.TABLE_PAGES[name][0])
+        if selector.currentText() == path and self.loaded_tables.get(name) != path:
+            self.prefetched[path] = (DashboardMetricsEngine.file_stamp(path), df)
+
+    def loaded_dataset(self, name):
+        """DataFrame of a table page's selected snapshot, loaded on first use (None if that load failed)."""
+        if not self.ensure_table_loaded(name):
+            return None
+        return getattr(self, self.TABLE_PAGES[name][2], None)
+
     def load_selected_csv(self):
         path = self.csv_selector.currentText()
         if not path.endswith(".csv"):
             return
+        if not self.table_load_due("identity", path):
+            return
         try:
-            df = pd.read_csv(path, dtype=str, sep=";").fillna("")
-            # store the dataframe so the search can use it
-            self.current_df = df.copy()
+            if not self.table_data_pending("identity", path):
+                df = self.read_snapshot("identity", path)
+                # store the dataframe so the search can use it
+                self.current_df = df.copy()
+                self.loaded_tables["identity"] = path
+            if self.forced_table_load == "identity":
+                return  # data access only: the table widget fills when the page is shown
 
             # show full table first
             self.display_dataframe(self.current_df)
@@ -6525,6 +9799,7 @@ class OffboardManager(QWidget):
                     self.display_dataframe,
                     ["Id", "DisplayName", "GivenName", "Surname", "UserPrincipalName"]
                 )
+            self.shown_tables["identity"] = path
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load CSV:\n{e}")
@@ -6533,17 +9808,17 @@ class OffboardManager(QWidget):
         path = self.devices_csv_selector.currentText()
         if not path.endswith(".csv"):
             return
+        if not self.table_load_due("devices", path):
+            return
         try:
-            # Auto-detect delimiter
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
+            if not self.table_data_pending("devices", path):
+                df = self.read_snapshot("devices", path)
 
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-
-            # store dataframe for search/filter
-            self.current_devices_df = df.copy()
+                # store dataframe for search/filter
+                self.current_devices_df = df.copy()
+                self.loaded_tables["devices"] = path
+            if self.forced_table_load == "devices":
+                return  # data access only: the table widget fills when the page is shown
 
             # show full table first
             self.display_devices_dataframe(self.current_devices_df)
@@ -6556,6 +9831,7 @@ class OffboardManager(QWidget):
                     self.display_devices_dataframe,
                     ["DeviceName", "UserDisplayName", "OperatingSystem", "Model", "SerialNumber"]
                 )
+            self.shown_tables["devices"] = path
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load Devices CSV:\n{e}")
@@ -6565,21 +9841,18 @@ class OffboardManager(QWidget):
         path = self.autopilot_csv_selector.currentText()
         if not path or not path.endswith(".csv"):
             return
+        if not self.table_load_due("autopilot", path):
+            return
 
         try:
-            # Auto-detect delimiter
-            import csv
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                try:
-                    delimiter = csv.Sniffer().sniff(sample).delimiter
-                except Exception:
-                    delimiter = ";" if ";" in sample else "," if "," in sample else "\t"
-
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
+            if not self.table_data_pending("autopilot", path):
+                df = self.read_snapshot("autopilot", path)
 
-            # Store dataframe for filtering/search
-            self.current_autopilot_df = df.copy()
+                # Store dataframe for filtering/search
+                self.current_autopilot_df = df.copy()
+                self.loaded_tables["autopilot"] = path
+            if self.forced_table_load == "autopilot":
+                return  # data access only: the table widget fills when the page is shown
 
             # Show full table
             self.display_autopilot_dataframe(self.current_autopilot_df)
@@ -6596,6 +9869,7 @@ class OffboardManager(QWidget):
                         "ManagedDeviceId", "UserlessEnrollmentStatus", "LastContact"
                     ]
                 )
+            self.shown_tables["autopilot"] = path
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load Autopilot CSV:\n{e}")
@@ -6605,19 +9879,18 @@ class OffboardManager(QWidget):
         path = self.apps_csv_selector.currentText()
         if not path.endswith(".csv"):
             return
+        if not self.table_load_due("apps", path):
+            return
 
         try:
-            # Auto-detect delimiter
-            import csv
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
+            if not self.table_data_pending("apps", path):
+                df = self.read_snapshot("apps", path)
 
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-
-            # Store dataframe for filtering/search
-            self.current_apps_df = df.copy()
+                # Store dataframe for filtering/search
+                self.current_apps_df = df.copy()
+                self.loaded_tables["apps"] = path
+            if self.forced_table_load == "apps":
+                return  # data access only: the table widget fills when the page is shown
 
             # Show full table
             self.display_apps_dataframe(self.current_apps_df)
@@ -6630,6 +9903,7 @@ class OffboardManager(QWidget):
                     self.display_apps_dataframe,
                     ["AppDisplayName", "Users", "Devices", "Publisher", "Version"]
                 )
+            self.shown_tables["apps"] = path
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load Apps CSV:\n{e}")
@@ -6639,19 +9913,26 @@ class OffboardManager(QWidget):
         path = self.groups_csv_selector.currentText()
         if not path.endswith(".csv"):
             return
+        if not self.table_load_due("groups", path):
+            return
 
         try:
-            # Auto-detect delimiter
-            import csv
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
+            if not self.table_data_pending("groups", path):
+                df = self.read_snapshot("groups", path)
 
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
+                # Store dataframe for filtering/search
+                self.current_groups_df = df.copy()
 
-            # Store dataframe for filtering/search
-            self.current_groups_df = df.copy()
+                # Membership edges exported with this snapshot (if any)
+                try:
+                    self.group_index = GroupMembershipIndex.for_groups_csv(path)
+                except Exception as e:
+                    print(f"⚠️ Could not load group membership edges: {e}")
+                    self.group_index = None
+                self.membership_engine = None
+                self.loaded_tables["groups"] = path
+            if self.forced_table_load == "groups":
+                return  # data access only: the table widget fills when the page is shown
 
             # Show full table
             self.display_groups_dataframe(self.current_groups_df)
@@ -6664,6 +9945,7 @@ class OffboardManager(QWidget):
                     self.display_groups_dataframe,
                     ["Display Name", "Group Type", "Owners", "Members"]
                 )
+            self.shown_tables["groups"] = path
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load Apps CSV:\n{e}")
@@ -6673,20 +9955,16 @@ class OffboardManager(QWidget):
         path = self.exchange_csv_selector.currentText()
         if not path or not path.endswith(".csv"):
             return
+        if not self.table_load_due("exchange", path):
+            return
 
         try:
-            import csv
-            # --- Auto detect delimiter ---
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                try:
-                    delimiter = csv.Sniffer().sniff(sample).delimiter
-                except Exception:
-                    delimiter = ";" if ";" in sample else "," if "," in sample else "\t"
-
-            # --- Load CSV into DataFrame ---
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-            self.current_exchange_df = df.copy()
+            if not self.table_data_pending("exchange", path):
+                df = self.read_snapshot("exchange", path)
+                self.current_exchange_df = df.copy()
+                self.loaded_tables["exchange"] = path
+            if self.forced_table_load == "exchange":
+                return  # data access only: the table widget fills when the page is shown
 
             # --- Show full table first ---
             self.display_exchange_dataframe(self.current_exchange_df)
@@ -6699,10 +9977,12 @@ class OffboardManager(QWidget):
                     self.display_exchange_dataframe,
                     ["Shared Mailbox", "Email Address", "Full Access Users", "SendAs Users"]
                 )
+            self.shown_tables["exchange"] = path
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load Exchange CSV:\n{e}")
 
+    @PerfMonitor.timed("render.apps")
     def display_apps_dataframe(self, df: pd.DataFrame):
         """Render Detected Apps summary report into the Applications table."""
         self.apps_table.clear()
@@ -6765,6 +10045,7 @@ class OffboardManager(QWidget):
 
         self.apps_table.setStyleSheet(style)
 
+    @PerfMonitor.timed("render.groups")
     def display_groups_dataframe(self, df: pd.DataFrame):
         """Render dataframe into groups_table with auto light/dark theme."""
         self.groups_table.clear()
@@ -6822,6 +10103,7 @@ class OffboardManager(QWidget):
                 QTableCornerButton::section { background-color:#e6e6e6; border:none; }
             """)
 
+    @PerfMonitor.timed("render.exchange")
     def display_exchange_dataframe(self, df: pd.DataFrame):
         """Render dataframe into exchange_table with auto light/dark theme."""
         self.exchange_table.clear()
@@ -6879,6 +10161,7 @@ class OffboardManager(QWidget):
                 QTableCornerButton::section { background-color:#e6e6e6; border:none; }
             """)
 
+    @PerfMonitor.timed("render.identity")
     def display_dataframe(self, df: pd.DataFrame):
         """Render a pandas DataFrame into the identity_table with automatic light/dark styling."""
         self.identity_table.clear()
@@ -6970,6 +10253,7 @@ class OffboardManager(QWidget):
                 }
             """)
 
+    @PerfMonitor.timed("render.devices")
     def display_devices_dataframe(self, df: pd.DataFrame):
         """Render dataframe into devices_table with automatic light/dark styling."""
         self.devices_table.clear()
@@ -7029,6 +10313,7 @@ class OffboardManager(QWidget):
                 QTableCornerButton::section { background-color:#e6e6e6; border:none; }
             """)
 
+    @PerfMonitor.timed("render.autopilot")
     def display_autopilot_dataframe(self, df: pd.DataFrame):
         """Render DataFrame into autopilot_table with auto light/dark theme."""
         self.autopilot_table.clear()
@@ -7038,16 +10323,25 @@ class OffboardManager(QWidget):
             self.autopilot_table.setColumnCount(0)
             return
 
+        # Large fleets (100k+ rows): no re-sort / repaint per inserted item
+        sorting = self.autopilot_table.isSortingEnabled()
+        self.autopilot_table.setSortingEnabled(False)
+        self.autopilot_table.setUpdatesEnabled(False)
+
         self.autopilot_table.setRowCount(len(df))
         self.autopilot_table.setColumnCount(len(df.columns))
         self.autopilot_table.setHorizontalHeaderLabels(df.columns.astype(str).tolist())
 
-        for r, row in enumerate(df.itertuples(index=False)):
-            for c, value in enumerate(row):
-                text = "" if pd.isna(value) else str(value)
-                item = QTableWidgetItem(text)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.autopilot_table.setItem(r, c, item)
+        try:
+            for r, row in enumerate(df.itertuples(index=False)):
+                for c, value in enumerate(row):
+                    text = "" if pd.isna(value) else str(value)
+                    item = QTableWidgetItem(text)
+                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                    self.autopilot_table.setItem(r, c, item)
+        finally:
+            self.autopilot_table.setUpdatesEnabled(True)
+            self.autopilot_table.setSortingEnabled(sorting)
 
         self.autopilot_table.resizeColumnsToContents()
         self.autopilot_table.horizontalHeader().setStretchLastSection(True)
@@ -7088,7 +10382,7 @@ class OffboardManager(QWidget):
 
     def filter_identity_table(self, filter_type: str):
         """Filter Identity table based on dashboard card clicked."""
-        if not hasattr(self, "current_df") or self.current_df is None:
+        if not self.ensure_table_loaded("identity", show=True) or getattr(self, "current_df", None) is None:
             return
 
         df = self.current_df.copy()
@@ -7166,6 +10460,7 @@ class OffboardManager(QWidget):
             )
         )
 
+    @PerfMonitor.timed("filter.search")
     def _filter_generic(self, search_box, df_attr, display_func, columns):
         query = search_box.text().strip().lower()
         df = getattr(self, df_attr, None)
@@ -7195,6 +10490,7 @@ class OffboardManager(QWidget):
 
         display_func(df[mask])
 
+    @PerfMonitor.timed("filter.identity")
     def filter_identity_fast(self, text):
         text = text.strip().lower()
         if not text:
@@ -7246,6 +10542,7 @@ class OffboardManager(QWidget):
             self.log_selector.addItem("No matches found")
             self.console_output.setPlainText("No log contains: " + query)
 
+    @PerfMonitor.timed("filter.devices")
     def filter_devices_fast(self, text):
         text = text.strip().lower()
         if not text:
@@ -7271,6 +10568,7 @@ class OffboardManager(QWidget):
 
         self.display_devices_dataframe(df[mask])
 
+    @PerfMonitor.timed("filter.autopilot")
     def filter_autopilot_fast(self, text):
         text = text.strip().lower()
         if not text:
@@ -7295,6 +10593,7 @@ class OffboardManager(QWidget):
 
         self.display_autopilot_dataframe(df[mask])
 
+    @PerfMonitor.timed("filter.groups")
     def filter_groups_fast(self, text):
         text = text.strip().lower()
         if not text:
@@ -7319,6 +10618,7 @@ class OffboardManager(QWidget):
 
         self.display_groups_dataframe(df[mask])
 
+    @PerfMonitor.timed("filter.apps")
     def filter_apps_fast(self, text):
         text = text.strip().lower()
         if not text:
@@ -7343,6 +10643,7 @@ class OffboardManager(QWidget):
 
         self.display_apps_dataframe(df[mask])
 
+    @PerfMonitor.timed("filter.exchange")
     def filter_exchange_fast(self, text):
         text = text.strip().lower()
         if not text:
@@ -7516,6 +10817,8 @@ class OffboardManager(QWidget):
         self.run_powershell_with_output(script_path, params)
 
     def generate_fake_users(self, domain, count):
+        from faker import Faker
+
         if count <= 0:
             raise ValueError("Number of users must be greater than 0")
 
@@ -7609,12 +10912,10 @@ class OffboardManager(QWidget):
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         log_path = os.path.join(log_dir, f"{timestamp}_create_random_users.log")
 
-        # --- Step C: Build PowerShell command (without pwsh prefix!)
+        # --- Step C: Script parameters only (the worker adds the pwsh flags)
         script_path = os.path.join(base_dir, "Powershell_Scripts", "create_random_users.ps1")
 
-        cmd = [
-            "-ExecutionPolicy", "Bypass",
-            "-File", script_path,
+        args = [
             "-CsvPath", csv_path,
             "-LogPath", log_path
         ]
@@ -7622,7 +10923,15 @@ class OffboardManager(QWidget):
         # --- Step D: Run using portable PowerShell ---
         pwsh = self.get_pwsh_path()  # IMPORTANT
 
-        self.random_worker = PowerShellWorker(pwsh, cmd)
+        # The script writes log_path itself, so the worker keeps no log of its own
+        self.random_worker = PowerShellWorker(
+            pwsh_path=pwsh,
+            script_path=script_path,
+            args=args
+        )
+
+        self.random_worker.output.connect(self.console_output.append)
+        self.random_worker.error.connect(lambda msg: self.on_random_user_done("error", msg))
 
         # Only ONE handler
         self.random_worker.finished.connect(self.on_random_user_done)
@@ -7682,25 +10991,75 @@ class OffboardManager(QWidget):
             QMessageBox.warning(self, "No CSV", "Please drop a CSV file first.")
             return
 
-        # Confirm action
-        reply = QMessageBox.question(
-            self,
-            "Confirm Bulk Creation",
-            f"Proceed with bulk creation from:\n{self.csv_path}?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-        if reply != QMessageBox.StandardButton.Yes:
-            return
+        journal_path = self.bulk_journal_path(self.csv_path)
+        statuses = self.read_bulk_journal(journal_path)
+        mode = "Resume"
+
+        if statuses:
+            # A previous run left a checkpoint journal: offer to resume it
+            summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+            box = QMessageBox(self)
+            box.setIcon(QMessageBox.Icon.Question)
+            box.setWindowTitle("Resume Bulk Creation")
+            box.setText(
+                f"A previous run of this CSV was recorded ({summary}).\n\n"
+                "Resume skips the completed rows and retries the rest.\n"
+                "Start Over processes every row again (existing users are still skipped)."
+            )
+            resume_btn = box.addButton("Resume", QMessageBox.ButtonRole.AcceptRole)
+            restart_btn = box.addButton("Start Over", QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton(QMessageBox.StandardButton.Cancel)
+            box.setDefaultButton(resume_btn)
+            box.exec()
+
+            if box.clickedButton() == restart_btn:
+                mode = "Restart"
+            elif box.clickedButton() != resume_btn:
+                return
+        else:
+            # Confirm action
+            reply = QMessageBox.question(
+                self,
+                "Confirm Bulk Creation",
+                f"Proceed with bulk creation from:\n{self.csv_path}?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
 
         # Call PS script with CSV path
         script_path = os.path.abspath("Powershell_Scripts/bulk_create_users.ps1")
-        params = {"CsvPath": self.csv_path}
+        params = {"CsvPath": self.csv_path, "JournalPath": journal_path, "JournalMode": mode}
 
         self.run_powershell_with_output(script_path, params)
 
         # Switch to console page so they see logs
         self.show_named_page("console")
 
+    def bulk_journal_path(self, csv_path):
+        """Checkpoint journal of a bulk creation CSV (one per CSV name, kept with the logs)."""
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        return os.path.join(self.logs_dir, "Bulk_Journals", f"{stem}.journal.jsonl")
+
+    def read_bulk_journal(self, journal_path):
+        """Return {status: row count} from a checkpoint journal, last entry per row hash winning."""
+        if not os.path.isfile(journal_path):
+            return {}
+
+        latest = {}
+        with open(journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # truncated line from an interrupted run
+                latest[entry.get("Hash")] = entry.get("Status", "unknown")
+
+        counts = {}
+        for status in latest.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
     def handle_csv_drop(self, file_path: str):
         """Handle CSV dropped in the drop zone."""
         try:
@@ -8044,6 +11403,9 @@ class OffboardManager(QWidget):
 
     def try_populate_comboboxes(self):
         """Try to populate comboboxes if a CSV is loaded, using default path if set."""
+        if "create_user" in self.page_builders:
+            return   # Create User page not built yet; filled when it is first shown
+
         path = None
 
         # Case 1: last loaded file from identity combo
@@ -8069,6 +11431,12 @@ class OffboardManager(QWidget):
             self.identity_dash_selector.clear()
             self.identity_dash_selector.addItem(path)
 
+    def try_populate_identity_csv(self):
+        """Re-list Identities snapshots after an export and summarize the newest one for the dashboard."""
+        self.refresh_csv_lists("identity")
+        if self.csv_selector.currentText().endswith(".csv"):
+            self.ingest_snapshot("identity", self.csv_selector.itemText(0))
+
     def try_populate_devices_csv(self):
         """Populate the devices_csv_selector with files from Database_Devices"""
         folder = os.path.join(os.path.dirname(__file__), "Database_Devices")
@@ -8078,10 +11446,11 @@ class OffboardManager(QWidget):
             for f in sorted(files, reverse=True):
                 self.devices_csv_selector.addItem(os.path.join(folder, f))
 
-        # Auto-load the most recent CSV if available
+        # Select the most recent CSV (fully loaded once the page is shown) and make sure it has a summary
         if self.devices_csv_selector.count() > 0:
             self.devices_csv_selector.setCurrentIndex(0)
             self.load_selected_devices_csv()
+            self.ingest_snapshot("devices", self.devices_csv_selector.itemText(0))
 
     def try_populate_autopilot_csv(self):
         """Populate the autopilot_csv_selector with files from Database_Autopilot_Devices"""
@@ -8100,6 +11469,7 @@ class OffboardManager(QWidget):
         if self.autopilot_csv_selector.count() > 0:
             self.autopilot_csv_selector.setCurrentIndex(0)
             self.load_selected_autopilot_csv()
+            self.ingest_snapshot("autopilot", self.autopilot_csv_selector.itemText(0))
 
     def try_populate_apps_csv(self):
         """Populate the apps_csv_selector with files from Database_Apps"""
@@ -8110,10 +11480,11 @@ class OffboardManager(QWidget):
             for f in sorted(files, reverse=True):
                 self.apps_csv_selector.addItem(os.path.join(folder, f))
 
-        # Auto-load the most recent CSV if available
+        # Select the most recent CSV (fully loaded once the page is shown) and make sure it has a summary
         if self.apps_csv_selector.count() > 0:
             self.apps_csv_selector.setCurrentIndex(0)
             self.load_selected_apps_csv()
+            self.ingest_snapshot("apps", self.apps_csv_selector.itemText(0))
 
     def try_populate_groups_csv(self):
         """Populate the groups_csv_selector with files from Database_Groups"""
@@ -8124,10 +11495,11 @@ class OffboardManager(QWidget):
             for f in sorted(files, reverse=True):
                 self.groups_csv_selector.addItem(os.path.join(folder, f))
 
-        # Auto-load the most recent CSV if available
+        # Select the most recent CSV (fully loaded once the page is shown) and make sure it has a summary
         if self.groups_csv_selector.count() > 0:
             self.groups_csv_selector.setCurrentIndex(0)
             self.load_selected_groups_csv()
+            self.ingest_snapshot("groups", self.groups_csv_selector.itemText(0))
 
     def try_populate_exchange_csv(self):
         """Populate the exchange_csv_selector with files from Database_Exchange"""
@@ -8138,10 +11510,11 @@ class OffboardManager(QWidget):
             for f in sorted(files, reverse=True):
                 self.exchange_csv_selector.addItem(os.path.join(folder, f))
 
-        # Auto-load the most recent CSV if available
+        # Select the most recent CSV (fully loaded once the page is shown) and make sure it has a summary
         if self.exchange_csv_selector.count() > 0:
             self.exchange_csv_selector.setCurrentIndex(0)
             self.load_selected_exchange_csv()
+            self.ingest_snapshot("exchange", self.exchange_csv_selector.itemText(0))
 
     def set_default_path(self):
         """Let user select a default CSV directory (e.g. SharePoint sync folder)."""
@@ -8170,1235 +11543,431 @@ class OffboardManager(QWidget):
     def populate_comboboxes_from_csv(self, csv_path: str):
         """Reads the CSV and fills comboboxes with unique values if columns match."""
         try:
-            df = pd.read_csv(csv_path, dtype=str, sep=";").fillna("")
-
-            def safe_set(combo_attr, column_name, values_override=None):
-                """Attach unique values from CSV or override list to the combo with autocomplete."""
-                if hasattr(self, combo_attr):
-                    combo = getattr(self, combo_attr)
-
-                    # use override if provided, otherwise load from CSV
-                    if values_override is not None:
-                        values = values_override
-                    elif column_name in df.columns:
-                        values = (
-                            df[column_name].astype(str).fillna("")
-                            .str.strip()
-                            .replace({"nan": ""})
-                            .drop_duplicates()
-                            .sort_values()
-                            .tolist()
-                        )
-                    else:
-                        return
-
-                    if values:
-                        combo.blockSignals(True)
-
-                        if combo.count() == 0:
-                            combo.addItem("")
-                            combo.addItems([v for v in values if v])
-
-                        combo.blockSignals(False)
-
-                        # Attach case-insensitive popup completer
-                        combo.setEditable(True)
-                        comp = QCompleter(values, combo)
-                        comp.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-                        comp.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-                        combo.setCompleter(comp)
-
-            # standard CSV-driven fields
-            safe_set("field_domain", "Domain name")
-            safe_set("field_jobtitle", "JobTitle")
-            safe_set("field_company", "CompanyName")
-            safe_set("field_department", "Department")
-            safe_set("field_city", "City")
-            safe_set("field_country", "Country")
-            safe_set("field_state", "State")
-            safe_set("field_office", "OfficeLocation")
-            safe_set("field_accountenabled", "AccountEnabled")
-            safe_set("field_usagelocation", "UsageLocation")
-            safe_set("field_agegroup", "AgeGroup")
-            safe_set("field_minorconsent", "ConsentProvidedForMinor")
-            safe_set("field_domain", "Domain name")
-            safe_set("field_manager", "UserPrincipalName")
-            safe_set("field_sponsors", "UserPrincipalName")
-
-            # Special case: Access Package values from JSON
-            json_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "JSONs", "AccessPackages.json"))
-            if os.path.exists(json_path):
-                with open(json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                    # Preserve order (first blank, then others)
-                    ap_names = [ap["AccessPackageName"] for ap in data if "AccessPackageName" in ap]
-
-                    if ap_names and ap_names[0] != "":
-                        ap_names.insert(0, "")  # fallback safety in case file has no blank
-
-                    safe_set("field_accesspackage", None, ap_names)
-            else:
-                print(f"⚠️ AccessPackages.json not found at {json_path}")
-
-        except Exception as e:
-            print(f"Failed to populate comboboxes: {e}")
-
-    def make_autocomplete_combobox(self, width=200):
-        cb = QComboBox()
-        cb.setEditable(True)
-        cb.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
-        completer = QCompleter()
-        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        cb.setCompleter(completer)
-
-        cb.setFixedWidth(width)
-        return cb
-
-    def generate_password(self, length: int = 12) -> str:
-        chars = string.ascii_letters + string.digits + "!@#$%^&*()-_=+"
-        return ''.join(random.choice(chars) for _ in range(length))
-
-    def on_displayname_finished(self):
-        """After finishing Display Name, autofill and generate password."""
-        self.process_display_name()  # keep names & UPN synced
-
-        if hasattr(self, "field_password") and self.field_password is not None:
-            pwd = self.generate_password()
-            self.field_password.setText(pwd)
-
-    def load_dropped_csv(self, file_path: str):
-        """Load a dropped CSV into the Dropped CSV table."""
-        try:
-            with open(file_path, newline='', encoding="utf-8") as f:
-                # Auto-detect delimiter
-                sample = f.read(1024)
-                f.seek(0)
-                dialect = csv.Sniffer().sniff(sample, delimiters=";,")
-                reader = csv.reader(f, dialect)
-                rows = list(reader)
-
-            if not rows:
-                raise ValueError("CSV is empty")
-
-            # Configure table
-            self.table_dropped_csv.setRowCount(len(rows) - 1)
-            self.table_dropped_csv.setColumnCount(len(rows[0]))
-            self.table_dropped_csv.setHorizontalHeaderLabels(rows[0])
-
-            # Fill table
-            for i, row in enumerate(rows[1:]):  # skip header
-                for j, val in enumerate(row):
-                    self.table_dropped_csv.setItem(i, j, QTableWidgetItem(val))
-
-            self.show_named_page("dropped_csv")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load CSV:\n{e}")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load CSV:\n{e}")
-
-    # --- Dashboard update ---
-    def update_dashboard_from_csv(self, combo, layout, kind):
-        """
-        Builds a rich dashboard from the selected CSV:
-          - 12 stat cards (total, enabled/disabled, guests, cloud-only/synced, licensed,
-            MFA capable, stale >90d, never signed in, with devices, no manager)
-          - 3 small “Top …” tables (Departments, Countries, Domains)
-        """
-        # 1) Clear existing widgets
-        for i in reversed(range(layout.count())):
-            item = layout.itemAt(i)
-            if item:
-                widget = item.widget()
-                if widget is not None:
-                    layout.removeWidget(widget)
-                    widget.deleteLater()
-
-        # 2) Load CSV
-        path = combo.currentText()
-        if not path.endswith(".csv"):
-            layout.addWidget(QLabel("No CSV loaded"), 0, 0)
-            return
-
-        try:
-            df = pd.read_csv(path, dtype=str, sep=";").fillna("")
-        except Exception as e:
-            layout.addWidget(QLabel(f"Failed to load CSV: {e}"), 0, 0)
-            return
-
-        total = len(df)
-        if total == 0:
-            layout.addWidget(QLabel("No data available in this CSV"), 0, 0)
-            return
-
-        # -------- Helpers --------
-        def s(name: str) -> pd.Series:
-            """Return column as string series (safe)."""
-            if name in df.columns:
-                return df[name].astype(str).fillna("")
-            return pd.Series([""] * total, dtype=str)
-
-        def b(name: str) -> pd.Series:
-            """Return boolean series from 'True'/'False' strings."""
-            return s(name).str.lower().eq("true")
-
-        # -------- Metrics --------
-        enabled = b("AccountEnabled").sum()
-        disabled = total - enabled
-
-        guests = s("UserType").str.lower().str.contains("guest").sum()
-        synced = b("OnPremisesSyncEnabled").sum()
-        cloud_only = total - synced
-
-        licensed = s("LicensesSkuType").str.strip().ne("").sum()
-
-        # MFA-capable if any auth method/value present
-        mfa_capable_series = (
-                s("AuthenticationMethod").str.strip().ne("") |
-                b("WindowsHelloEnabled") |
-                b("SoftwareOATHEnabled") |
-                s("MicrosoftAuthenticatorDisplayName").str.strip().ne("") |
-                s("FIDO2DisplayName").str.strip().ne("") |
-                s("SMSPhoneNumber").str.strip().ne("") |
-                s("EmailAuthAddress").str.strip().ne("")
-        )
-        mfa_capable = int(mfa_capable_series.sum())
-
-        # Last sign-in recency
-        lsi = pd.to_datetime(
-            s("LastSignInDateTime"),
-            dayfirst=True,
-            errors="coerce",
-            utc=True
-        )
-
-        never_signed = int(lsi.isna().sum())
-        inactive_90 = int(((pd.Timestamp.utcnow() - lsi) > pd.Timedelta(days=90)).fillna(False).sum())
-
-        # Devices & manager
-        with_devices = s("Devices").str.strip().ne("").sum()
-        no_manager = s("ManagerDisplayName").str.strip().eq("").sum()
-
-        # -------- Card factory --------
-        def make_card(title, value, color="#2c3e50", icon=None, subtitle="", on_click=None):
-            card = QFrame()
-            card.setStyleSheet(f"""
-                QFrame {{
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:1,
-                        stop:0 {color}, stop:1 #1a1a1a
-                    );
-                    border-radius: 12px;
-                    padding: 16px;
-                }}
-                QFrame:hover {{
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:1,
-                        stop:0 {color}, stop:1 #333333
-                    );
-                }}
-                QLabel {{
-                    color: white;
-                    background: transparent;   /* prevent labels from drawing boxes */
-                }}
-            """)
-
-            # Drop shadow
-            shadow = QGraphicsDropShadowEffect()
-            shadow.setBlurRadius(25)
-            shadow.setOffset(0, 4)
-            shadow.setColor(QColor(0, 0, 0, 160))
-            card.setGraphicsEffect(shadow)
-
-            vbox = QVBoxLayout(card)
-
-            # Title row
-            title_row = QHBoxLayout()
-            if icon:
-                icon_lbl = QLabel(icon)
-                icon_lbl.setStyleSheet("font-size: 20px; margin-right: 8px; background: transparent;")
-                title_row.addWidget(icon_lbl)
-            title_lbl = QLabel(title)
-            title_lbl.setStyleSheet("font-size: 14px; font-weight: bold; background: transparent;")
-            title_row.addWidget(title_lbl)
-            title_row.addStretch()
-            vbox.addLayout(title_row)
-
-            # Value
-            value_lbl = QLabel(str(value))
-            value_lbl.setStyleSheet("font-size: 28px; font-weight: bold; background: transparent;")
-            vbox.addWidget(value_lbl)
-
-            # Subtitle
-            if subtitle:
-                sub_lbl = QLabel(subtitle)
-                sub_lbl.setStyleSheet("font-size: 12px; color: #bdc3c7; background: transparent;")
-                vbox.addWidget(sub_lbl)
-
-            # Make clickable
-            if on_click:
-                card.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-                card.mousePressEvent = lambda event: on_click()
-
-            return card
-
-        # -------- Place 12 stat cards (3 cols x 4 rows) --------
-        cards = [
-            ("Identity Total", total, "#34495e", "👥", "Total users"),
-            ("Enabled", enabled, "#27ae60", "✅", "Active accounts"),
-            ("Disabled", disabled, "#c0392b", "❌", "Inactive accounts"),
-
-            ("Guests", guests, "#8e44ad", "🌍", "External users"),
-            ("Cloud-only", cloud_only, "#2980b9", "☁️", "Not synced"),
-            ("Synced", synced, "#16a085", "🔄", "Hybrid AD"),
-
-            ("Licensed", licensed, "#2c3e50", "🧾", "Users with licenses"),
-            ("MFA Capable", mfa_capable, "#f39c12", "🔐", f"{(mfa_capable / total) * 100:.1f}% of users"),
-            ("Stale > 90 days", inactive_90, "#d35400", "⏳", "No sign-in in 90+ days"),
-
-            ("Never signed in", never_signed, "#7f8c8d", "🚫", "No recorded sign-in"),
-            ("With devices", int(with_devices), "#2980b9", "💻", "Registered devices"),
-            ("No manager", int(no_manager), "#95a5a6", "🧭", "Manager not set"),
-        ]
-
-        cols = 3
-        r = c = 0
-        for title, val, col_hex, icon, sub in cards:
-            card = make_card(
-                title, val, col_hex, icon, sub,
-                on_click=lambda t=title: self.filter_identity_table(t)
-            )
-            layout.addWidget(card, r, c)
-            c += 1
-            if c == cols:
-                r += 1
-                c = 0
-
-        # -------- Small "Top ..." tables (Departments, Countries, Domains) --------
-        def make_table(title, series: pd.Series, n=None):
-            """
-            Creates a taller card with a scrollable table.
-            n=None → show all values instead of just head(n).
-            """
-            # value counts (ignore blanks)
-            vc = series[series.str.strip().ne("")].value_counts()
-            if n:
-                vc = vc.head(n)
-
-            frame = QFrame()
-            frame.setStyleSheet("""
-                QFrame {
-                    background-color: #2c3e50;
-                    border-radius: 12px;
-                    padding: 12px;
-                }
-                QLabel { color: white; }
-                QTableWidget { background-color: #2c3e50; color: white; gridline-color: #555; }
-                QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
-            """)
-            v = QVBoxLayout(frame)
-
-            # Title
-            t_lbl = QLabel(title)
-            t_lbl.setStyleSheet("font-size: 14px; font-weight: bold; color: white;")
-            v.addWidget(t_lbl)
-
-            # Table
-            table = QTableWidget()
-            table.setRowCount(len(vc))
-            table.setColumnCount(2)
-            table.setHorizontalHeaderLabels(["Value", "Count"])
-            table.verticalHeader().setVisible(False)
-            table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-            table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
-
-            # New: allow horizontal scroll for long values
-            table.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-            table.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
-
-            header = table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # Value column
-            header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)  # Count column
-
-            # Fill rows
-            for i, (k, cnt) in enumerate(vc.items()):
-                item_val = QTableWidgetItem(str(k))
-                item_cnt = QTableWidgetItem(str(cnt))
-                item_val.setForeground(Qt.GlobalColor.white)
-                item_cnt.setForeground(Qt.GlobalColor.white)
-                table.setItem(i, 0, item_val)
-                table.setItem(i, 1, item_cnt)
-
-            table.resizeColumnsToContents()
-            table.setFixedHeight(250)
-            v.addWidget(table)
-            return frame
-
-        # Extract domain from UPN
-        domains = s("UserPrincipalName").str.split("@").str[-1]
-        layout.addWidget(make_table("Top Departments", s("Department")), r, 0)
-        layout.addWidget(make_table("Top Countries", s("Country")), r, 1)
-        layout.addWidget(make_table("Top Domains", domains), r, 2)
-
-    def update_devices_dashboard_from_csv(self, combo, layout):
-        # 1) Clear existing widgets
-        for i in reversed(range(layout.count())):
-            item = layout.itemAt(i)
-            if item:
-                widget = item.widget()
-                if widget is not None:
-                    layout.removeWidget(widget)
-                    widget.deleteLater()
-
-        # 2) Load CSV
-        path = combo.currentText()
-        if not path.endswith(".csv"):
-            layout.addWidget(QLabel("No CSV loaded"), 0, 0)
-            return
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-        except Exception as e:
-            layout.addWidget(QLabel(f"Failed to load CSV: {e}"), 0, 0)
-            return
-
-        total = len(df)
-        if total == 0:
-            layout.addWidget(QLabel("No data available in this CSV"), 0, 0)
-            return
-
-        # -------- Helpers --------
-        def s(name: str) -> pd.Series:
-            if name in df.columns:
-                return df[name].astype(str).fillna("")
-            return pd.Series([""] * total, dtype=str)
-
-        def b(name: str) -> pd.Series:
-            return s(name).str.lower().eq("true")
-
-        # -------- Metrics --------
-        compliant = (s("ComplianceState").str.lower() == "compliant").sum()
-        non_compliant = total - compliant
-        encrypted = b("IsEncrypted").sum()
-        unencrypted = total - encrypted
-        autopilot = b("AutopilotEnrolled").sum()
-
-        windows = s("OperatingSystem").str.contains("Windows", case=False).sum()
-        macos = s("OperatingSystem").str.contains("Mac", case=False).sum()
-        ios = s("OperatingSystem").str.contains("iOS", case=False).sum()
-        android = s("OperatingSystem").str.contains("Android", case=False).sum()
-
-        last_sync = pd.to_datetime(s("LastSyncDateTime"), errors="coerce", utc=True)
-        stale = int(((pd.Timestamp.utcnow() - last_sync) > pd.Timedelta(days=30)).fillna(False).sum())
-
-        # -------- Card factory (with on_click) --------
-        def make_card(title, value, color="#2c3e50", icon=None, subtitle="", on_click=None):
-            card = QFrame()
-            card.setStyleSheet(f"""
-                QFrame {{
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:1,
-                        stop:0 {color}, stop:1 #1a1a1a
-                    );
-                    border-radius: 12px;
-                    padding: 16px;
-                }}
-                QFrame:hover {{
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:1,
-                        stop:0 {color}, stop:1 #333333
-                    );
-                }}
-                QLabel {{
-                    color: white;
-                    background: transparent;
-                }}
-            """)
+            df = pd.read_csv(csv_path, dtype=str, sep=";").fillna("")
 
-            shadow = QGraphicsDropShadowEffect()
-            shadow.setBlurRadius(25)
-            shadow.setOffset(0, 4)
-            shadow.setColor(QColor(0, 0, 0, 160))
-            card.setGraphicsEffect(shadow)
-
-            vbox = QVBoxLayout(card)
-
-            # Title row
-            title_row = QHBoxLayout()
-            if icon:
-                icon_lbl = QLabel(icon)
-                icon_lbl.setStyleSheet("font-size: 20px; margin-right: 8px; background: transparent;")
-                title_row.addWidget(icon_lbl)
-            title_lbl = QLabel(title)
-            title_lbl.setStyleSheet("font-size: 14px; font-weight: bold; background: transparent;")
-            title_row.addWidget(title_lbl)
-            title_row.addStretch()
-            vbox.addLayout(title_row)
-
-            # Value
-            value_lbl = QLabel(str(value))
-            value_lbl.setStyleSheet("font-size: 28px; font-weight: bold; background: transparent;")
-            vbox.addWidget(value_lbl)
-
-            if subtitle:
-                sub_lbl = QLabel(subtitle)
-                sub_lbl.setStyleSheet("font-size: 12px; color: #bdc3c7; background: transparent;")
-                vbox.addWidget(sub_lbl)
-
-            # Make clickable
-            if on_click:
-                card.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-                card.mousePressEvent = lambda event: on_click()
-
-            return card
-
-        # -------- Add device cards --------
-        cards = [
-            ("Devices Total", total, "#34495e", "💻", "All devices",
-             lambda: self.show_filtered_devices("Id", "")),  # show all
-            ("Compliant", compliant, "#27ae60", "✅", "ComplianceState = compliant",
-             lambda: self.show_filtered_devices("ComplianceState", "compliant")),
-            ("Non-Compliant", non_compliant, "#c0392b", "❌", "Other states",
-             lambda: self.show_filtered_devices("ComplianceState", "noncompliant")),
-            ("Encrypted", encrypted, "#16a085", "🔒", "BitLocker/FileVault on",
-             lambda: self.show_filtered_devices("IsEncrypted", "True")),
-            ("Unencrypted", unencrypted, "#d35400", "🔓", "No encryption",
-             lambda: self.show_filtered_devices("IsEncrypted", "False")),
-            ("Autopilot Enrolled", autopilot, "#2980b9", "🚀", "Devices in Autopilot",
-             lambda: self.show_filtered_devices("AutopilotEnrolled", "True")),
-            ("Windows", windows, "#3498db", "🪟", "OS breakdown",
-             lambda: self.show_filtered_devices("OperatingSystem", "Windows")),
-            ("macOS", macos, "#9b59b6", "🍎", "OS breakdown",
-             lambda: self.show_filtered_devices("OperatingSystem", "Mac")),
-            ("iOS", ios, "#e67e22", "📱", "OS breakdown",
-             lambda: self.show_filtered_devices("OperatingSystem", "iOS")),
-            ("Android", android, "#27ae60", "🤖", "OS breakdown",
-             lambda: self.show_filtered_devices("OperatingSystem", "Android")),
-            ("Stale >30d", stale, "#7f8c8d", "⏳", "Last sync older than 30 days",
-             lambda: self.show_filtered_devices("LastSyncDateTime", "stale")),
-        ]
+            def safe_set(combo_attr, column_name, values_override=None):
+                """Attach unique values from CSV or override list to the combo with autocomplete."""
+                if hasattr(self, combo_attr):
+                    combo = getattr(self, combo_attr)
 
-        cols = 3
-        r = c = 0
-        for title, val, col_hex, icon, sub, on_click in cards:
-            card = make_card(title, val, col_hex, icon, sub, on_click=on_click)
-            layout.addWidget(card, r, c)
-            c += 1
-            if c == cols:
-                r += 1
-                c = 0
-
-        # Ensure next section starts on a new row
-        if c != 0:
-            r += 1
-
-        # ---- Top tables for Devices Dashboard ----
-        def make_top_table(title, series: pd.Series, n=10):
-            """Reusable function to create dark, compact summary tables."""
-            vc = series[series.str.strip().ne("")].value_counts().head(n)
-
-            frame = QFrame()
-            frame.setStyleSheet("""
-                QFrame { background-color: #2c3e50; border-radius: 12px; padding: 12px; }
-                QLabel { color: white; }
-                QTableWidget { background-color: #2c3e50; color: white; gridline-color: #555; }
-                QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
-            """)
-            v = QVBoxLayout(frame)
+                    # use override if provided, otherwise load from CSV
+                    if values_override is not None:
+                        values = values_override
+                    elif column_name in df.columns:
+                        values = (
+                            df[column_name].astype(str).fillna("")
+                            .str.strip()
+                            .replace({"nan": ""})
+                            .drop_duplicates()
+                            .sort_values()
+                            .tolist()
+                        )
+                    else:
+                        return
 
-            t = QLabel(title)
-            t.setStyleSheet("font-size:14px; font-weight:bold;")
-            v.addWidget(t)
+                    if values:
+                        combo.blockSignals(True)
 
-            table = QTableWidget()
-            table.setRowCount(len(vc))
-            table.setColumnCount(2)
-            table.setHorizontalHeaderLabels(["Value", "Count"])
-            table.verticalHeader().setVisible(False)
-            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-            table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
-
-            header = table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-            header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-
-            for i, (val, count) in enumerate(vc.items()):
-                table.setItem(i, 0, QTableWidgetItem(str(val)))
-                table.setItem(i, 1, QTableWidgetItem(str(count)))
-
-            table.resizeColumnsToContents()
-            table.setFixedHeight(250)
-            v.addWidget(table)
-            return frame
-
-        # ---- Add top summaries (auto-safe if columns exist) ----
-        top_sections = []
-
-        if "Model" in df.columns:
-            top_sections.append(("Top Models", s("Model")))
-        if "Manufacturer" in df.columns:
-            top_sections.append(("Top Manufacturers", s("Manufacturer")))
-        if "OperatingSystem" in df.columns:
-            top_sections.append(("Top Operating Systems", s("OperatingSystem")))
-        if "ComplianceState" in df.columns:
-            top_sections.append(("Top Compliance States", s("ComplianceState")))
-        if "UserPrincipalName" in df.columns:
-            top_sections.append(("Top Users", s("UserPrincipalName")))
-        if "ManagementState" in df.columns:
-            top_sections.append(("Top Management States", s("ManagementState")))
-
-        # Place 3 tables per row (like other dashboards)
-        c = 0
-        for title, series in top_sections:
-            layout.addWidget(make_top_table(title, series), r, c)
-            c += 1
-            if c == 3:
-                r += 1
-                c = 0
+                        if combo.count() == 0:
+                            combo.addItem("")
+                            combo.addItems([v for v in values if v])
 
-    def update_apps_dashboard_from_csv(self, combo, layout):
-        """
-        Rebuild the Apps dashboard using the same visual and interactive logic as the Devices dashboard.
-        Cards are fully clickable (no internal hover flicker), and clicking switches to the Apps table view.
-        """
-        if getattr(self, "_apps_dash_refreshing", False):
-            return
-        self._apps_dash_refreshing = True
+                        combo.blockSignals(False)
 
-        try:
-            if combo is None or layout is None:
-                return
+                        # Attach case-insensitive popup completer
+                        combo.setEditable(True)
+                        comp = QCompleter(values, combo)
+                        comp.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+                        comp.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+                        combo.setCompleter(comp)
 
-            from PyQt6.QtCore import QSignalBlocker
-            _blocker = QSignalBlocker(combo)
-
-            # ---- Clear layout ----
-            for i in reversed(range(layout.count())):
-                item = layout.itemAt(i)
-                if item and item.widget():
-                    w = item.widget()
-                    layout.removeWidget(w)
-                    w.deleteLater()
-
-            # ---- Load CSV ----
-            path = combo.currentText()
-            if not path or not path.endswith(".csv") or not os.path.exists(path):
-                layout.addWidget(QLabel("No CSV loaded"), 0, 0)
-                return
+            # standard CSV-driven fields
+            safe_set("field_domain", "Domain name")
+            safe_set("field_jobtitle", "JobTitle")
+            safe_set("field_company", "CompanyName")
+            safe_set("field_department", "Department")
+            safe_set("field_city", "City")
+            safe_set("field_country", "Country")
+            safe_set("field_state", "State")
+            safe_set("field_office", "OfficeLocation")
+            safe_set("field_accountenabled", "AccountEnabled")
+            safe_set("field_usagelocation", "UsageLocation")
+            safe_set("field_agegroup", "AgeGroup")
+            safe_set("field_minorconsent", "ConsentProvidedForMinor")
+            safe_set("field_domain", "Domain name")
+            safe_set("field_manager", "UserPrincipalName")
+            safe_set("field_sponsors", "UserPrincipalName")
 
-            import csv
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    sample = f.read(2048)
-                    try:
-                        delimiter = csv.Sniffer().sniff(sample).delimiter
-                    except Exception:
-                        delimiter = ";" if ";" in sample else "," if "," in sample else "\t"
-                df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-            except Exception as e:
-                layout.addWidget(QLabel(f"Failed to load CSV: {e}"), 0, 0)
-                return
+            # Special case: Access Package values from JSON
+            json_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "JSONs", "AccessPackages.json"))
+            if os.path.exists(json_path):
+                with open(json_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
 
-            total = len(df)
-            if total == 0:
-                layout.addWidget(QLabel("No data available in this CSV"), 0, 0)
-                return
+                    # Preserve order (first blank, then others)
+                    ap_names = [ap["AccessPackageName"] for ap in data if "AccessPackageName" in ap]
 
-            # ---- Helpers ----
-            def s(col):
-                return df[col].astype(str).fillna("") if col in df.columns else pd.Series([""] * total, dtype=str)
-
-            # ---- Metrics ----
-            installs = total
-            unique_apps = s("AppDisplayName").replace("", pd.NA).dropna().nunique()
-            unique_devices = s("DeviceName").replace("", pd.NA).dropna().nunique()
-            unique_users = s("UserPrincipalName").replace("", pd.NA).dropna().nunique()
-
-            platform_series = s("Platform").str.lower()
-            win_count = (platform_series == "windows").sum()
-            mac_count = (platform_series == "macos").sum()
-            ios_count = (platform_series == "ios").sum()
-            android_count = (platform_series == "android").sum()
-            other_platform = total - (win_count + mac_count + ios_count + android_count)
-
-            publisher_empty = s("Publisher").str.strip().eq("").sum()
-
-            # ---- Card Factory (Devices-style) ----
-            def make_card(title, value, color="#2c3e50", icon=None, subtitle="", on_click=None):
-                card = QFrame()
-                card.setStyleSheet(f"""
-                    QFrame {{
-                        background: qlineargradient(
-                            x1:0, y1:0, x2:1, y2:1,
-                            stop:0 {color}, stop:1 #1a1a1a
-                        );
-                        border-radius: 12px;
-                        padding: 16px;
-                    }}
-                    QFrame:hover {{
-                        background: qlineargradient(
-                            x1:0, y1:0, x2:1, y2:1,
-                            stop:0 {color}, stop:1 #333333
-                        );
-                    }}
-                    QLabel {{
-                        color: white;
-                        background: transparent;
-                    }}
-                """)
-
-                shadow = QGraphicsDropShadowEffect()
-                shadow.setBlurRadius(25)
-                shadow.setOffset(0, 4)
-                shadow.setColor(QColor(0, 0, 0, 160))
-                card.setGraphicsEffect(shadow)
-
-                vbox = QVBoxLayout(card)
-                row = QHBoxLayout()
-
-                if icon:
-                    icon_lbl = QLabel(icon)
-                    icon_lbl.setStyleSheet("font-size: 20px; margin-right: 8px; background: transparent;")
-                    row.addWidget(icon_lbl)
-
-                title_lbl = QLabel(title)
-                title_lbl.setStyleSheet("font-size: 14px; font-weight: bold; background: transparent;")
-                row.addWidget(title_lbl)
-                row.addStretch()
-                vbox.addLayout(row)
-
-                value_lbl = QLabel(str(value))
-                value_lbl.setStyleSheet("font-size: 28px; font-weight: bold; background: transparent;")
-                vbox.addWidget(value_lbl)
-
-                if subtitle:
-                    sub_lbl = QLabel(subtitle)
-                    sub_lbl.setStyleSheet("font-size: 12px; color: #bdc3c7; background: transparent;")
-                    vbox.addWidget(sub_lbl)
-
-                # Make the whole card clickable
-                if on_click:
-                    card.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-                    card.mousePressEvent = lambda e: on_click()
-
-                return card
-
-            # ---- Cards ----
-            cards = [
-                ("Installations", installs, "#34495e", "📦", "All rows",
-                 lambda: self.show_filtered_apps("ALL")),
-                ("Unique Apps", unique_apps, "#2c3e50", "🧩", "Distinct AppDisplayName",
-                 lambda: self.show_filtered_apps("DEDUP_APPS")),
-                ("Unique Devices", unique_devices, "#2980b9", "💻", "Distinct DeviceName",
-                 lambda: self.show_filtered_apps("DEDUP_DEVICES")),
-                ("Unique Users", unique_users, "#16a085", "👤", "Distinct UserPrincipalName",
-                 lambda: self.show_filtered_apps("DEDUP_USERS")),
-
-                ("Windows", win_count, "#3498db", "🪟", "Platform = Windows",
-                 lambda: self.show_filtered_apps("PLATFORM", "windows")),
-                ("macOS", mac_count, "#9b59b6", "🍎", "Platform = macOS",
-                 lambda: self.show_filtered_apps("PLATFORM", "macos")),
-                ("iOS", ios_count, "#e67e22", "📱", "Platform = iOS",
-                 lambda: self.show_filtered_apps("PLATFORM", "ios")),
-                ("Android", android_count, "#27ae60", "🤖", "Platform = Android",
-                 lambda: self.show_filtered_apps("PLATFORM", "android")),
-                ("Other", other_platform, "#7f8c8d", "❓", "Other platforms",
-                 lambda: self.show_filtered_apps("PLATFORM", "")),
-
-                ("Publisher missing", publisher_empty, "#d35400", "⚠️", "Publisher empty",
-                 lambda: self.show_filtered_apps("PUBLISHER_EMPTY")),
-            ]
+                    if ap_names and ap_names[0] != "":
+                        ap_names.insert(0, "")  # fallback safety in case file has no blank
 
-            cols = 3
-            r = c = 0
-            for title, val, color, icon, sub, cb in cards:
-                layout.addWidget(make_card(title, val, color, icon, sub, on_click=cb), r, c)
-                c += 1
-                if c == cols:
-                    r += 1
-                    c = 0
-
-            # ---- Top tables ----
-            def make_top_table(title, series: pd.Series, n=10):
-                vc = series[series.str.strip().ne("")].value_counts().head(n)
-
-                frame = QFrame()
-                frame.setStyleSheet("""
-                    QFrame { background-color: #2c3e50; border-radius: 12px; padding: 12px; }
-                    QLabel { color: white; }
-                    QTableWidget { background-color: #2c3e50; color: white; gridline-color: #555; }
-                    QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
-                """)
-                v = QVBoxLayout(frame)
-                t = QLabel(title)
-                t.setStyleSheet("font-size: 14px; font-weight: bold;")
-                v.addWidget(t)
-
-                tbl = QTableWidget()
-                tbl.setRowCount(len(vc))
-                tbl.setColumnCount(2)
-                tbl.setHorizontalHeaderLabels(["Value", "Count"])
-                tbl.verticalHeader().setVisible(False)
-                tbl.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-                tbl.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
-
-                hdr = tbl.horizontalHeader()
-                hdr.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-                hdr.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-
-                for i, (k, cnt) in enumerate(vc.items()):
-                    tbl.setItem(i, 0, QTableWidgetItem(str(k)))
-                    tbl.setItem(i, 1, QTableWidgetItem(str(cnt)))
-
-                tbl.resizeColumnsToContents()
-                tbl.setFixedHeight(250)
-                v.addWidget(tbl)
-                return frame
-
-            layout.addWidget(make_top_table("Top Apps", s("AppDisplayName")), r, 0)
-            layout.addWidget(make_top_table("Top Publishers", s("Publisher")), r, 1)
-            layout.addWidget(make_top_table("Top Platforms", s("Platform")), r, 2)
+                    safe_set("field_accesspackage", None, ap_names)
+            else:
+                print(f"⚠️ AccessPackages.json not found at {json_path}")
 
         except Exception as e:
-            print(f"❌ update_apps_dashboard_from_csv error: {e}")
-            try:
-                layout.addWidget(QLabel(f"Failed to render: {e}"), 0, 0)
-            except Exception:
-                pass
+            print(f"Failed to populate comboboxes: {e}")
 
-        finally:
-            self._apps_dash_refreshing = False
-            try:
-                combo.blockSignals(False)
-            except Exception:
-                pass
+    def make_autocomplete_combobox(self, width=200):
+        cb = QComboBox()
+        cb.setEditable(True)
+        cb.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        completer = QCompleter()
+        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+        cb.setCompleter(completer)
 
-    def update_groups_dashboard_from_csv(self, combo, layout):
-        """
-        Build the Groups dashboard from the selected CSV file (Devices-dashboard style).
-        Each card is fully clickable and filters the table below.
-        """
-        # ---- Clear layout ----
-        for i in reversed(range(layout.count())):
-            item = layout.itemAt(i)
-            if item and item.widget():
-                w = item.widget()
-                layout.removeWidget(w)
-                w.deleteLater()
-
-        # ---- Load CSV ----
-        path = combo.currentText()
-        if not path or not path.endswith(".csv") or not os.path.exists(path):
-            layout.addWidget(QLabel("No CSV loaded"), 0, 0)
-            return
+        cb.setFixedWidth(width)
+        return cb
 
-        import csv
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                try:
-                    delimiter = csv.Sniffer().sniff(sample).delimiter
-                except Exception:
-                    delimiter = ";" if ";" in sample else "," if "," in sample else "\t"
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-            self.current_groups_df = df
-        except Exception as e:
-            layout.addWidget(QLabel(f"Failed to load CSV: {e}"), 0, 0)
-            return
+    def generate_password(self, length: int = 12) -> str:
+        chars = string.ascii_letters + string.digits + "!@#$%^&*()-_=+"
+        return ''.join(random.choice(chars) for _ in range(length))
 
-        total = len(df)
-        if total == 0:
-            layout.addWidget(QLabel("No data available in this CSV"), 0, 0)
-            return
+    def on_displayname_finished(self):
+        """After finishing Display Name, autofill and generate password."""
+        self.process_display_name()  # keep names & UPN synced
 
-        # ---- Helpers ----
-        def s(col):
-            return df[col].astype(str).fillna("") if col in df.columns else pd.Series([""] * total, dtype=str)
-
-        # ---- Metrics ----
-        total_groups = total
-        mail_enabled = (s("Mail Enabled").str.lower() == "true").sum()
-        teams_enabled = (s("Is Teams Team").str.lower() == "true").sum()
-        dynamic_groups = (s("Membership Type").str.lower().str.contains("dynamic")).sum()
-        assigned_owners = s("Assigned Owners").replace("", pd.NA).dropna().count()
-        nested_groups = (s("Nested Groups").astype(str) != "0").sum()
-        role_assigned = s("Assigned Roles").replace("", pd.NA).dropna().count()
-        ca_include = s("Referenced In CA Policy Include").replace("", pd.NA).dropna().count()
-        ca_exclude = s("Referenced In CA Policy Exclude").replace("", pd.NA).dropna().count()
-
-        # ---- Card Factory (same as Devices style) ----
-        def make_card(title, value, color="#2c3e50", icon=None, subtitle="", on_click=None):
-            card = QFrame()
-            card.setStyleSheet(f"""
-                QFrame {{
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1, stop:0 {color}, stop:1 #1a1a1a);
-                    border-radius: 12px;
-                    padding: 16px;
-                }}
-                QFrame:hover {{
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1, stop:0 {color}, stop:1 #333333);
-                }}
-                QLabel {{
-                    color: white;
-                    background: transparent;
-                }}
-            """)
-            shadow = QGraphicsDropShadowEffect()
-            shadow.setBlurRadius(25)
-            shadow.setOffset(0, 4)
-            shadow.setColor(QColor(0, 0, 0, 160))
-            card.setGraphicsEffect(shadow)
-
-            vbox = QVBoxLayout(card)
-            title_row = QHBoxLayout()
-            if icon:
-                icon_lbl = QLabel(icon)
-                icon_lbl.setStyleSheet("font-size: 20px; margin-right: 8px; background: transparent;")
-                title_row.addWidget(icon_lbl)
-            title_lbl = QLabel(title)
-            title_lbl.setStyleSheet("font-size: 14px; font-weight: bold; background: transparent;")
-            title_row.addWidget(title_lbl)
-            title_row.addStretch()
-            vbox.addLayout(title_row)
-
-            value_lbl = QLabel(str(value))
-            value_lbl.setStyleSheet("font-size: 28px; font-weight: bold; background: transparent;")
-            vbox.addWidget(value_lbl)
-
-            if subtitle:
-                sub_lbl = QLabel(subtitle)
-                sub_lbl.setStyleSheet("font-size: 12px; color: #bdc3c7; background: transparent;")
-                vbox.addWidget(sub_lbl)
+        if hasattr(self, "field_password") and self.field_password is not None:
+            pwd = self.generate_password()
+            self.field_password.setText(pwd)
 
-            if on_click:
-                card.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-                card.mousePressEvent = lambda e: on_click()
+    def load_dropped_csv(self, file_path: str):
+        """Load a dropped CSV into the Dropped CSV table."""
+        try:
+            with open(file_path, newline='', encoding="utf-8") as f:
+                # Auto-detect delimiter
+                sample = f.read(1024)
+                f.seek(0)
+                dialect = csv.Sniffer().sniff(sample, delimiters=";,")
+                reader = csv.reader(f, dialect)
+                rows = list(reader)
 
-            return card
+            if not rows:
+                raise ValueError("CSV is empty")
 
-        # ---- Filtering behavior (uses same pattern as Devices dashboard) ----
-        def filter_groups(column, condition=None):
-            if column == "ALL":
-                filtered = df
-            elif column == "Mail Enabled":
-                filtered = df[df["Mail Enabled"].astype(str).str.lower() == "true"]
-            elif column == "Is Teams Team":
-                filtered = df[df["Is Teams Team"].astype(str).str.lower() == "true"]
-            elif column == "Membership Type":
-                filtered = df[df["Membership Type"].astype(str).str.contains("dynamic", case=False, na=False)]
-            elif column == "Assigned Owners":
-                filtered = df[df["Assigned Owners"].astype(str).str.strip() != ""]
-            elif column == "Nested Groups":
-                filtered = df[df["Nested Groups"].astype(str) != "0"]
-            elif column == "Assigned Roles":
-                filtered = df[df["Assigned Roles"].astype(str).str.strip() != ""]
-            elif column == "CA Include":
-                filtered = df[df["Referenced In CA Policy Include"].astype(str).str.strip() != ""]
-            elif column == "CA Exclude":
-                filtered = df[df["Referenced In CA Policy Exclude"].astype(str).str.strip() != ""]
-            else:
-                filtered = df
-            self.display_groups_dataframe(filtered)
+            # Configure table
+            self.table_dropped_csv.setRowCount(len(rows) - 1)
+            self.table_dropped_csv.setColumnCount(len(rows[0]))
+            self.table_dropped_csv.setHorizontalHeaderLabels(rows[0])
 
-        # ---- Cards ----
-        cards = [
-            ("Total Groups", total_groups, "#34495e", "📦", "All groups", lambda: self.show_filtered_groups("ALL")),
-            ("Mail-enabled", mail_enabled, "#2980b9", "📧", "", lambda: self.show_filtered_groups("MAIL_ENABLED")),
-            ("Teams-enabled", teams_enabled, "#9b59b6", "💬", "", lambda: self.show_filtered_groups("TEAMS_ENABLED")),
-            ("Dynamic Groups", dynamic_groups, "#16a085", "⚙️", "", lambda: self.show_filtered_groups("DYNAMIC")),
-            ("With Owners", assigned_owners, "#27ae60", "👤", "", lambda: self.show_filtered_groups("WITH_OWNERS")),
-            ("Nested Groups", nested_groups, "#d35400", "🧩", "", lambda: self.show_filtered_groups("NESTED")),
-            ("Role-assigned", role_assigned, "#8e44ad", "🔐", "", lambda: self.show_filtered_groups("ROLE_ASSIGNED")),
-            ("CA Include", ca_include, "#3498db", "🛡️", "", lambda: self.show_filtered_groups("CA_INCLUDE")),
-            ("CA Exclude", ca_exclude, "#e67e22", "🚫", "", lambda: self.show_filtered_groups("CA_EXCLUDE")),
-        ]
+            # Fill table
+            for i, row in enumerate(rows[1:]):  # skip header
+                for j, val in enumerate(row):
+                    self.table_dropped_csv.setItem(i, j, QTableWidgetItem(val))
 
-        # ---- Add cards to layout ----
-        cols = 3
-        r = c = 0
-        for title, val, col_hex, icon, sub, cb in cards:
-            layout.addWidget(make_card(title, val, col_hex, icon, sub, on_click=cb), r, c)
-            c += 1
-            if c == cols:
-                r += 1
-                c = 0
-
-        # ---- Top tables for Groups Dashboard ----
-        def make_top_table(title, series: pd.Series, n=10):
-            """Create a compact Top-N summary table with dark theme."""
-            vc = series[series.str.strip().ne("")].value_counts().head(n)
-
-            frame = QFrame()
-            frame.setStyleSheet("""
-                QFrame { background-color: #2c3e50; border-radius: 12px; padding: 12px; }
-                QLabel { color: white; }
-                QTableWidget { background-color: #2c3e50; color: white; gridline-color: #555; }
-                QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
-            """)
+            self.show_named_page("dropped_csv")
 
-            v = QVBoxLayout(frame)
-            t = QLabel(title)
-            t.setStyleSheet("font-size:14px; font-weight:bold;")
-            v.addWidget(t)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load CSV:\n{e}")
 
-            table = QTableWidget()
-            table.setRowCount(len(vc))
-            table.setColumnCount(2)
-            table.setHorizontalHeaderLabels(["Value", "Count"])
-            table.verticalHeader().setVisible(False)
-            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-            table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load CSV:\n{e}")
+
+    # --- Dashboard update ---
+    def dashboard_grid(self, layout):
+        """Return the persistent DashboardGrid bound to a dashboard layout (created on first use)."""
+        if not hasattr(self, "dashboard_grids"):
+            self.dashboard_grids = {}
+        grid = self.dashboard_grids.get(id(layout))
+        if grid is None or grid.layout is not layout:
+            grid = DashboardGrid(layout)
+            self.dashboard_grids[id(layout)] = grid
+        return grid
 
-            header = table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-            header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+    def update_dashboard_from_csv(self, combo, layout, kind):
+        """
+        Identity dashboard for the selected CSV:
+          - 12 stat cards (total, enabled/disabled, guests, cloud-only/synced, licensed,
+            MFA capable, stale >90d, never signed in, with devices, no manager)
+          - 3 small “Top …” tables (Departments, Countries, Domains)
+        """
+        self.refresh_dashboard("identity", combo, layout)
 
-            for i, (val, count) in enumerate(vc.items()):
-                table.setItem(i, 0, QTableWidgetItem(str(val)))
-                table.setItem(i, 1, QTableWidgetItem(str(count)))
+    def update_devices_dashboard_from_csv(self, combo, layout):
+        self.refresh_dashboard("devices", combo, layout)
 
-            table.resizeColumnsToContents()
-            table.setFixedHeight(250)
-            v.addWidget(table)
-            return frame
+    def update_apps_dashboard_from_csv(self, combo, layout):
+        """Apps dashboard; clicking a card switches to the Apps table view."""
+        self.refresh_dashboard("apps", combo, layout)
 
-        layout.addWidget(make_top_table("Top Group Types", s("Group Type")), r, 0)
-        layout.addWidget(make_top_table("Top Roles Assigned", s("Assigned Roles")), r, 1)
-        layout.addWidget(make_top_table("Top Owners", s("Assigned Owners")), r, 2)
+    def update_groups_dashboard_from_csv(self, combo, layout):
+        """Groups dashboard; each card filters the Groups table."""
+        self.refresh_dashboard("groups", combo, layout)
 
     def update_exchange_dashboard_from_csv(self, combo, layout):
         """
-        Build the Exchange dashboard from the selected CSV file (Devices/Groups style).
-        Cards are clickable and filter the Exchange table view.
+        Exchange dashboard; cards filter the Exchange table view.
         Expected headers:
           "Shared Mailbox","Email Address","Last Sent By","Subject of Last Sent","Last Sent Date",
           "Last Received From","Received Subject of Last Received","Last Received Date",
           "Is Last Received Read?","Full Access Users","SendAs Users","Has X400 Address"
         """
-        # ---- Clear layout ----
-        for i in reversed(range(layout.count())):
-            item = layout.itemAt(i)
-            if item and item.widget():
-                w = item.widget()
-                layout.removeWidget(w)
-                w.deleteLater()
-
-        # ---- Load CSV ----
-        path = combo.currentText()
-        if not path or not path.endswith(".csv") or not os.path.exists(path):
-            layout.addWidget(QLabel("No CSV loaded"), 0, 0)
+        self.refresh_dashboard("exchange", combo, layout)
+
+    def refresh_dashboard(self, kind, combo, layout):
+        """
+        Render a dashboard from the metrics cache or the snapshot's summary sidecar; otherwise compute it
+        in a DashboardMetricsWorker. Only finished numbers reach the GUI thread.
+        """
+        if combo is None or layout is None:
             return
 
-        import csv
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                sample = f.read(2048)
-                try:
-                    delimiter = csv.Sniffer().sniff(sample).delimiter
-                except Exception:
-                    delimiter = ";" if ";" in sample else "," if "," in sample else "\t"
-            df = pd.read_csv(path, dtype=str, sep=delimiter).fillna("")
-            self.current_exchange_df = df  # keep around for filters/table view
-        except Exception as e:
-            layout.addWidget(QLabel(f"Failed to load CSV: {e}"), 0, 0)
+        grid = self.dashboard_grid(layout)
+        path = combo.currentText()
+        if not path or not path.endswith(".csv") or not os.path.exists(path):
+            grid.show_message("No CSV loaded")
             return
 
-        total = len(df)
-        if total == 0:
-            layout.addWidget(QLabel("No data available in this CSV"), 0, 0)
+        result = self.get_dashboard_metrics().lookup(kind, path)
+        if result is not None:
+            self.render_dashboard(kind, layout, result)
             return
 
-        # ---- Helpers ----
-        def s(col):
-            return df[col].astype(str).fillna("") if col in df.columns else pd.Series([""] * total, dtype=str)
+        grid.show_message("⏳ Computing dashboard…")
+        self.summarize_snapshot(kind, path)
 
-        # Robust date parsing
-        sent_dt = pd.to_datetime(s("Last Sent Date"), errors="coerce", utc=True)
-        recv_dt = pd.to_datetime(s("Last Received Date"), errors="coerce", utc=True)
-        now = pd.Timestamp.utcnow()
-        days_30 = pd.Timedelta(days=30)
+    def get_dashboard_metrics(self):
+        if not hasattr(self, "dashboard_metrics"):
+            self.dashboard_metrics = DashboardMetricsEngine()
+            self.dashboard_workers = {}
+        return self.dashboard_metrics
 
-        # Booleans
-        def non_empty(series):
-            return series.str.strip() != ""
-
-        unread_last_recv = s("Is Last Received Read?").str.strip().str.lower().isin(["false", "no", "0"])
-        has_full_access = non_empty(s("Full Access Users"))
-        has_send_as = non_empty(s("SendAs Users"))
-        has_x400 = s("Has X400 Address").str.strip().str.lower().isin(["true", "yes", "1"]) | non_empty(
-            s("Has X400 Address"))
-
-        recent_sent = sent_dt.notna() & ((now - sent_dt) <= days_30)
-        recent_recv = recv_dt.notna() & ((now - recv_dt) <= days_30)
-
-        # ---- Metrics ----
-        total_mailboxes = total
-        with_full_access = int(has_full_access.sum())
-        with_send_as = int(has_send_as.sum())
-        recent_activity_sent = int(recent_sent.sum())
-        recent_activity_recv = int(recent_recv.sum())
-        unread_last = int(unread_last_recv.sum())
-        with_x400 = int(has_x400.sum())
-
-        # ---- Card Factory ----
-        def make_card(title, value, color="#2c3e50", icon=None, subtitle="", on_click=None):
-            card = QFrame()
-            card.setStyleSheet(f"""
-                QFrame {{
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1, stop:0 {color}, stop:1 #1a1a1a);
-                    border-radius: 12px;
-                    padding: 16px;
-                }}
-                QFrame:hover {{
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1, stop:0 {color}, stop:1 #333333);
-                }}
-                QLabel {{ color: white; background: transparent; }}
-            """)
-            shadow = QGraphicsDropShadowEffect()
-            shadow.setBlurRadius(25)
-            shadow.setOffset(0, 4)
-            shadow.setColor(QColor(0, 0, 0, 160))
-            card.setGraphicsEffect(shadow)
-
-            vbox = QVBoxLayout(card)
-            title_row = QHBoxLayout()
-            if icon:
-                icon_lbl = QLabel(icon)
-                icon_lbl.setStyleSheet("font-size: 20px; margin-right: 8px; background: transparent;")
-                title_row.addWidget(icon_lbl)
-            title_lbl = QLabel(title)
-            title_lbl.setStyleSheet("font-size: 14px; font-weight: bold; background: transparent;")
-            title_row.addWidget(title_lbl)
-            title_row.addStretch()
-            vbox.addLayout(title_row)
-
-            value_lbl = QLabel(str(value))
-            value_lbl.setStyleSheet("font-size: 28px; font-weight: bold; background: transparent;")
-            vbox.addWidget(value_lbl)
-
-            if subtitle:
-                sub_lbl = QLabel(subtitle)
-                sub_lbl.setStyleSheet("font-size: 12px; color: #bdc3c7; background: transparent;")
-                vbox.addWidget(sub_lbl)
+    def summarize_snapshot(self, kind, path):
+        """
+        Compute a snapshot's dashboard metrics (and its summary sidecar) in the background.
+        Called when a dashboard shows it and when a new snapshot is ingested; one worker per (dashboard, file).
+        """
+        engine = self.get_dashboard_metrics()
+        if (kind, path) in self.dashboard_workers:
+            return
+        worker = DashboardMetricsWorker(engine, kind, path)
+        worker.finished.connect(self.on_dashboard_metrics)
+        worker.error.connect(
+            lambda k, p, msg: self.on_dashboard_metrics(k, p, {"message": f"Failed to load CSV: {msg}"})
+        )
+        self.dashboard_workers[(kind, path)] = worker
+        worker.start()
 
-            if on_click:
-                card.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-                card.mousePressEvent = lambda e: on_click()
+    def ingest_snapshot(self, kind, path):
+        """
+        Make sure a freshly exported snapshot has its summary sidecar and is stored in the history database
+        (no-op when both are already current).
+        """
+        if not path or not os.path.exists(path):
+            return
+        self.store_snapshot_history([(kind, path)])
+        if kind in self.DASHBOARDS and self.get_dashboard_metrics().lookup(kind, path) is None:
+            self.summarize_snapshot(kind, path)
 
-            return card
+    def snapshot_sources(self):
+        """Dataset -> (folder, file pattern) of its exported snapshots."""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        return {
+            "identity": (self.get_default_csv_path(), "*_EntraIdentities.csv"),
+            "devices": (os.path.join(base_dir, "Database_Devices"), "*_EntraDevices.csv"),
+            "autopilot": (os.path.join(base_dir, "Database_Autopilot_Devices"), "*_AutopilotDevices.csv"),
+            "apps": (os.path.join(base_dir, "Database_Apps"), "*_IntuneDetectedApps.csv"),
+            "groups": (os.path.join(base_dir, "Database_Groups"), "*_EntraGroups.csv"),
+            "exchange": (os.path.join(base_dir, "Database_Exchange"), "*_ExchangeReport.csv"),
+        }
 
-        # ---- Filter + bridge to table view ----
-        def show_filtered_exchange(key):
-            if key == "ALL":
-                filtered = df
-            elif key == "FULL_ACCESS":
-                filtered = df[has_full_access]
-            elif key == "SEND_AS":
-                filtered = df[has_send_as]
-            elif key == "RECENT_SENT":
-                filtered = df[recent_sent]
-            elif key == "RECENT_RECV":
-                filtered = df[recent_recv]
-            elif key == "UNREAD_LAST":
-                filtered = df[unread_last_recv]
-            elif key == "HAS_X400":
-                filtered = df[has_x400]
-            else:
-                filtered = df
+    def get_history_store(self):
+        if not hasattr(self, "history_store"):
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            self.history_store = SnapshotHistoryStore(os.path.join(base_dir, "Database_History", "history.sqlite"))
+            self.history_worker = None
+            self.history_queue = []
+        return self.history_store
+
+    def store_snapshot_history(self, items):
+        """Ingest (kind, path) snapshots into the history database, one background worker at a time."""
+        store = self.get_history_store()
+        self.history_queue.extend((kind, path) for kind, path in items if path and os.path.exists(path))
+        if self.history_worker is not None or not self.history_queue:
+            return
+        items, self.history_queue = self.history_queue, []
+        self.history_worker = HistoryIngestWorker(store, items, self.get_dashboard_metrics())
+        self.history_worker.progress.connect(self.console_output.append)
+        self.history_worker.finished.connect(self.on_history_ingested)
+        self.history_worker.start()
+
+    def on_history_ingested(self, _count):
+        self.history_worker.wait()
+        self.history_worker = None
+        self.store_snapshot_history([])   # files queued while the worker ran
+        if self.history_worker is None and getattr(self, "retention_after_backfill", False):
+            self.retention_after_backfill = False
+            self.apply_snapshot_retention()
+
+    def backfill_snapshot_history(self):
+        """Queue every snapshot on disk for the history database (already stored files are skipped cheaply)."""
+        items = []
+        for kind, (folder, pattern) in self.snapshot_sources().items():
+            files = sorted(glob.glob(os.path.join(folder, pattern)), key=os.path.getmtime)
+            items.extend((kind, path) for path in files)
+        self.retention_after_backfill = bool(self.get_snapshot_retention().settings["auto_apply"])
+        self.store_snapshot_history(items)
+
+    def get_snapshot_retention(self):
+        if not hasattr(self, "snapshot_retention"):
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            self.snapshot_retention = SnapshotRetention(os.path.join(base_dir, "Database_History", "retention.json"))
+            self.retention_worker = None
+        return self.snapshot_retention
+
+    def apply_snapshot_retention(self, on_done=None):
+        """Run the retention policy in the background; snapshot lists are reloaded when files were removed."""
+        retention = self.get_snapshot_retention()
+        if self.retention_worker is not None:
+            return
+        self.retention_worker = SnapshotRetentionWorker(retention, self.get_history_store(), self.snapshot_sources())
+
+        def finished(report):
+            self.retention_worker.wait()
+            self.retention_worker = None
+            self.console_output.append(
+                f"🧹 Retention: {report['pruned']} snapshot(s) pruned, {report['files_removed']} CSV file(s) "
+                f"removed ({report['bytes_freed'] / 1e6:.1f} MB freed)"
+            )
+            if report["files_removed"]:
+                self.reload_snapshot_lists()
+            if on_done:
+                on_done(report)
+
+        def failed(message):
+            self.retention_worker.wait()
+            self.retention_worker = None
+            self.console_output.append(f"⚠️ Retention failed: {message}")
+            if on_done:
+                on_done({"pruned": 0, "files_removed": 0, "bytes_freed": 0})
+
+        self.retention_worker.finished.connect(finished)
+        self.retention_worker.error.connect(failed)
+        self.retention_worker.start()
+
+    def reload_snapshot_lists(self):
+        """Re-list the snapshot files of every dataset (after retention removed or restored some)."""
+        self.refresh_csv_lists()
+        for name in self.TABLE_PAGES:
+            if name != "identity":
+                getattr(self, f"try_populate_{name}_csv")()
 
-            # Switch to Exchange Table View
-            try:
-                if "exchange" in self.page_map:
-                    self.stacked.setCurrentWidget(self.page_map["exchange"])
-            except Exception:
-                pass
+    def open_snapshot_retention(self):
+        SnapshotRetentionDialog(self, self).exec()
 
-            # Display filtered results
-            self.display_exchange_dataframe(filtered)
+    def current_page_name(self):
+        current = self.stacked.currentWidget()
+        return next((name for name, page in self.page_map.items() if page is current), "")
 
-        # ---- Cards ----
-        cards = [
-            ("Total Shared Mailboxes", total_mailboxes, "#34495e", "📬", "All shared mailboxes",
-             lambda: show_filtered_exchange("ALL")),
-            ("With Full Access", with_full_access, "#2980b9", "🗝️", "",
-             lambda: show_filtered_exchange("FULL_ACCESS")),
-            ("With SendAs", with_send_as, "#9b59b6", "✉️", "",
-             lambda: show_filtered_exchange("SEND_AS")),
-            ("Active (Sent ≤30d)", recent_activity_sent, "#16a085", "📤", "",
-             lambda: show_filtered_exchange("RECENT_SENT")),
-            ("Active (Recv ≤30d)", recent_activity_recv, "#27ae60", "📥", "",
-             lambda: show_filtered_exchange("RECENT_RECV")),
-            ("Last Received Unread", unread_last, "#d35400", "🔔", "",
-             lambda: show_filtered_exchange("UNREAD_LAST")),
-            ("Has X400 Address", with_x400, "#8e44ad", "🧬", "",
-             lambda: show_filtered_exchange("HAS_X400")),
-        ]
+    def start_stall_watchdog(self):
+        """Watch the event loop from its first turn on (startup itself is timed by PerfMonitor)."""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.stall_watchdog = StallWatchdog(
+            os.path.join(base_dir, "Diagnostics", "gui_stalls.log"), self.current_page_name, self
+        )
+        self.stall_watchdog.start()
+
+    def open_performance_panel(self):
+        # Modeless, so it keeps updating while the app is used
+        if not hasattr(self, "performance_panel"):
+            self.performance_panel = PerformancePanelDialog(self)
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
+    def snapshot_selector_row(self, selector, kind):
+        """A table page's snapshot selector with its Compare Snapshots button."""
+        row = QHBoxLayout()
+        row.addWidget(selector, 1)
+        compare_btn = QPushButton("🆚 Compare Snapshots")
+        compare_btn.clicked.connect(lambda: self.open_snapshot_diff(kind))
+        row.addWidget(compare_btn)
+        return row
+
+    def open_snapshot_diff(self, kind):
+        folder, pattern = self.snapshot_sources()[kind]
+        files = sorted(glob.glob(os.path.join(folder, pattern)), reverse=True)
+        if len(files) < 2:
+            QMessageBox.information(self, "Compare Snapshots", "At least two snapshots are needed to compare.")
+            return
+        SnapshotDiffDialog(kind, files, self).exec()
+
+    def open_snapshot_trends(self, trend=None):
+        SnapshotTrendsDialog(self.get_history_store(), trend, self).exec()
+
+    def on_dashboard_metrics(self, kind, path, result):
+        worker = self.dashboard_workers.pop((kind, path), None)
+        if worker is not None:
+            worker.wait()   # run() returns right after emitting; don't drop a still-running QThread
+        selector_attr, layout_attr = self.DASHBOARDS[kind]
+        combo = getattr(self, selector_attr, None)
+        # Ignore results for a snapshot the dashboard is not showing (they stay cached)
+        if combo is not None and combo.currentText() == path:
+            self.render_dashboard(kind, getattr(self, layout_attr), result)
+
+    def get_facet_engine(self, kind):
+        """FacetEngine over a dataset's loaded snapshot (rebuilt when another snapshot is loaded)."""
+        df = self.loaded_dataset(kind)
+        if df is None:
+            return None
+        if not hasattr(self, "facet_engines"):
+            self.facet_engines = {}
+        engine = self.facet_engines.get(kind)
+        if engine is None or engine.df is not df:
+            engine = FacetEngine(df)
+            self.facet_engines[kind] = engine
+        return engine
+
+    def open_facet_explorer(self, kind):
+        engine = self.get_facet_engine(kind)
+        if engine is None or engine.df.empty:
+            QMessageBox.information(self, "No Data", "Load a snapshot for this dataset first.")
+            return
 
-        cols = 3
-        r = c = 0
-        for title, val, col_hex, icon, sub, cb in cards:
-            layout.addWidget(make_card(title, val, col_hex, icon, sub, on_click=cb), r, c)
-            c += 1
-            if c == cols:
-                r += 1
-                c = 0
-
-        # ---- Top tables (compact, dark) ----
-        def make_top_table(title, series: pd.Series, n=10):
-            vc = series[series.str.strip().ne("")].value_counts().head(n)
-
-            frame = QFrame()
-            frame.setStyleSheet("""
-                QFrame { background-color: #2c3e50; border-radius: 12px; padding: 12px; }
-                QLabel { color: white; }
-                QTableWidget { background-color: #2c3e50; color: white; gridline-color: #555; }
-                QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
-            """)
-            v = QVBoxLayout(frame)
-            t = QLabel(title)
-            t.setStyleSheet("font-size:14px; font-weight:bold;")
-            v.addWidget(t)
+        display = {
+            "identity": self.display_dataframe,
+            "devices": self.display_devices_dataframe,
+            "apps": self.display_apps_dataframe,
+            "groups": self.display_groups_dataframe,
+            "exchange": self.display_exchange_dataframe,
+        }[kind]
+
+        def show_rows(frame):
+            self.show_named_page(kind)
+            display(frame)
+
+        title = os.path.basename(getattr(self, self.TABLE_PAGES[kind][0]).currentText())
+        FacetExplorerDialog(engine, title, self.FACET_PATHS.get(kind, ()), show_rows, self).exec()
+
+    @PerfMonitor.timed(lambda self, kind, *_: f"dashboard.render.{kind}")
+    def render_dashboard(self, kind, layout, result):
+        """Push computed metrics into the dashboard's persistent card grid."""
+        grid = self.dashboard_grid(layout)
+        if "message" in result:
+            grid.show_message(result["message"])
+            return
 
-            table = QTableWidget()
-            table.setRowCount(len(vc))
-            table.setColumnCount(2)
-            table.setHorizontalHeaderLabels(["Value", "Count"])
-            table.verticalHeader().setVisible(False)
-            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-            table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
-
-            header = table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-            header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-
-            for i, (val, count) in enumerate(vc.items()):
-                table.setItem(i, 0, QTableWidgetItem(str(val)))
-                table.setItem(i, 1, QTableWidgetItem(str(count)))
-
-            table.resizeColumnsToContents()
-            table.setFixedHeight(250)
-            v.addWidget(table)
-            return frame
-
-        # explode helpers for multi-valued columns (semicolon-separated)
-        def explode_top(series: pd.Series):
-            return (series.str.split(";")
-                    .explode()
-                    .astype(str)
-                    .str.strip()
-                    .replace("", pd.NA)
-                    .dropna())
-
-        layout.addWidget(make_top_table("Top 'Last Sent By'", s("Last Sent By")), r, 0)
-        layout.addWidget(make_top_table("Top Full Access Users", explode_top(s("Full Access Users"))), r, 1)
-        layout.addWidget(make_top_table("Top SendAs Users", explode_top(s("SendAs Users"))), r, 2)
+        handler = {
+            "identity": self.filter_identity_table,
+            "devices": self.show_filtered_devices,
+            "apps": self.show_filtered_apps,
+            "groups": self.show_filtered_groups,
+            "exchange": self.show_filtered_exchange,
+        }[kind]
+
+        grid.update(
+            [(title, value, color, icon, sub, lambda args=args: handler(*args))
+             for title, value, color, icon, sub, args in result["cards"]],
+            result["tables"],
+        )
 
     def show_filtered_users(self, column_name, filter_value):
         """Switch to Identity tab and show only users matching filter."""
@@ -9470,7 +12039,7 @@ class OffboardManager(QWidget):
         Show the Groups table and apply a filter based on the clicked dashboard card.
         """
         try:
-            if not hasattr(self, "current_groups_df"):
+            if not self.ensure_table_loaded("groups", show=True) or not hasattr(self, "current_groups_df"):
                 QMessageBox.warning(self, "No Data", "No Groups data is loaded yet.")
                 return
 
@@ -9519,21 +12088,22 @@ class OffboardManager(QWidget):
         Show the Exchange table and apply a filter based on the dashboard cards.
         """
         try:
-            if not hasattr(self, "current_exchange_df"):
+            if not self.ensure_table_loaded("exchange", show=True) or not hasattr(self, "current_exchange_df"):
                 QMessageBox.warning(self, "No Data", "No Exchange data is loaded yet.")
                 return
 
             df = self.current_exchange_df.copy()
 
             # --- Apply filters ---
+            masks = DashboardMetrics.exchange_masks(df)
             if filter_type == "ALL":
                 filtered = df
             elif filter_type == "UNREAD":
                 filtered = df[df["Is Last Received Read?"].astype(str).str.lower() == "false"]
-            elif filter_type == "FULL_ACCESS":
-                filtered = df[df["Full Access Users"].astype(str).str.strip() != ""]
             elif filter_type == "SENDAS":
-                filtered = df[df["SendAs Users"].astype(str).str.strip() != ""]
+                filtered = df[masks["SEND_AS"]]
+            elif filter_type in masks:
+                filtered = df[masks[filter_type]]
             else:
                 filtered = df
 
@@ -9558,7 +12128,11 @@ class OffboardManager(QWidget):
 
 
 if __name__ == "__main__":
+    started = time.perf_counter()
     app = QApplication(sys.argv)
-    window = OffboardManager()
+    with PerfMonitor.span("startup.init"):
+        window = OffboardManager()
     window.show()
+    # First event-loop turn: the window is on screen and responsive
+    QTimer.singleShot(0, lambda: PerfMonitor.record("startup.window", time.perf_counter() - started, started))
     sys.exit(app.exec())
\ No newline at end of file
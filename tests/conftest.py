@@ -0,0 +1,16 @@
+"""id-toolbox.py is a script, not a package: load it once as a module for the engine tests."""
+import importlib.util
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def toolbox():
+    pytest.importorskip("PyQt6.QtWidgets")
+    pytest.importorskip("pandas")
+    spec = importlib.util.spec_from_file_location(
+        "id_toolbox", os.path.join(os.path.dirname(__file__), os.pardir, "id-toolbox.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
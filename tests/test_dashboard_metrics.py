@@ -0,0 +1,118 @@
+"""Card values and Top-N tables of DashboardMetrics.compute, one small snapshot per dashboard."""
+import datetime
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+RECENT = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=2)
+RECENT_ISO = RECENT.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def cards(result):
+    return {title: value for title, value, *_ in result["cards"]}
+
+
+def tables(result):
+    return {title: dict(counts) for title, counts in result["tables"]}
+
+
+def test_identity(toolbox):
+    df = pd.DataFrame({
+        "AccountEnabled": ["True", "False", "True"],
+        "UserType": ["Member", "Guest", "Member"],
+        "OnPremisesSyncEnabled": ["True", "", ""],
+        "LicensesSkuType": ["E3", "", "E5"],
+        "SMSPhoneNumber": ["+3212345678", "", ""],
+        "LastSignInDateTime": [RECENT.strftime("%d/%m/%Y %H:%M:%S"), "01/01/2020 10:00:00", ""],
+        "Devices": ["PC-1", "", ""],
+        "ManagerDisplayName": ["Boss", "Boss", ""],
+        "Department": ["IT", "", "IT"],
+        "UserPrincipalName": ["a@contoso.com", "b_ext#EXT#@contoso.com", "c@fabrikam.com"],
+    })
+    result = toolbox.DashboardMetrics.compute("identity", df)
+
+    assert cards(result) == {
+        "Identity Total": 3, "Enabled": 2, "Disabled": 1, "Guests": 1, "Cloud-only": 2, "Synced": 1,
+        "Licensed": 2, "MFA Capable": 1, "Stale > 90 days": 1, "Never signed in": 1, "With devices": 1,
+        "No manager": 1,
+    }
+    # Identity cards filter on their own title
+    assert all(card[5] == (card[0],) for card in result["cards"])
+    assert tables(result)["Top Departments"] == {"IT": 2}
+    assert tables(result)["Top Domains"] == {"contoso.com": 2, "fabrikam.com": 1}
+
+
+def test_devices(toolbox):
+    df = pd.DataFrame({
+        "ComplianceState": ["compliant", "noncompliant", "compliant", "unknown"],
+        "IsEncrypted": ["True", "False", "True", "True"],
+        "OperatingSystem": ["Windows", "Windows", "macOS", "Android"],
+        "LastSyncDateTime": [RECENT_ISO, "2020-01-01T00:00:00Z", RECENT_ISO, ""],
+        "Model": ["X1", "X1", "MacBook", ""],
+    })
+    result = toolbox.DashboardMetrics.compute("devices", df)
+
+    values = cards(result)
+    assert (values["Devices Total"], values["Compliant"], values["Non-Compliant"]) == (4, 2, 2)
+    assert (values["Encrypted"], values["Unencrypted"]) == (3, 1)
+    assert (values["Windows"], values["macOS"], values["iOS"], values["Android"]) == (2, 1, 0, 1)
+    assert values["Stale >30d"] == 1
+    # Only tables whose column exists in the snapshot
+    assert list(tables(result)) == ["Top Models", "Top Operating Systems", "Top Compliance States"]
+    assert tables(result)["Top Models"] == {"X1": 2, "MacBook": 1}
+
+
+def test_apps(toolbox):
+    df = pd.DataFrame({
+        "AppDisplayName": ["AppA", "AppA", "AppB", "AppC"],
+        "Platform": ["Windows", "Windows", "macOS", "Linux"],
+        "DeviceName": ["dev1", "dev2", "dev1", "dev3"],
+        "UserPrincipalName": ["u1", "u1", "u2", "u3"],
+        "Publisher": ["Contoso", "Contoso", "", "Fabrikam"],
+    })
+    values = cards(toolbox.DashboardMetrics.compute("apps", df))
+
+    assert (values["Installations"], values["Unique Apps"], values["Unique Devices"], values["Unique Users"]) == (4, 3, 3, 3)
+    assert (values["Windows"], values["macOS"], values["Other"]) == (2, 1, 1)
+    assert values["Publisher missing"] == 1
+
+
+def test_groups(toolbox):
+    df = pd.DataFrame({
+        "Group Type": ["Microsoft365", "Security"],
+        "Mail Enabled": ["True", "False"],
+        "Is Teams Team": ["True", "False"],
+        "Membership Type": ["Dynamic", "Assigned"],
+        "Assigned Owners": ["Ann", ""],
+        "Nested Groups": ["0", "Sub"],
+        "Assigned Roles": ["", "Global Reader"],
+    })
+    result = toolbox.DashboardMetrics.compute("groups", df)
+
+    values = cards(result)
+    assert values["Total Groups"] == 2
+    assert [values[t] for t in ("Mail-enabled", "Teams-enabled", "Dynamic Groups", "With Owners",
+                                "Nested Groups", "Role-assigned", "CA Include")] == [1, 1, 1, 1, 1, 1, 0]
+    assert tables(result)["Top Roles Assigned"] == {"Global Reader": 1}
+
+
+def test_exchange(toolbox):
+    df = pd.DataFrame({
+        "Full Access Users": ["a@contoso.com; b@contoso.com", ""],
+        "SendAs Users": ["a@contoso.com", ""],
+        "Last Sent Date": [RECENT_ISO, "2020-01-01T00:00:00Z"],
+        "Is Last Received Read?": ["False", "True"],
+    })
+    result = toolbox.DashboardMetrics.compute("exchange", df)
+
+    assert cards(result) == {
+        "Total Shared Mailboxes": 2, "With Full Access": 1, "With SendAs": 1, "Active (Sent ≤30d)": 1,
+        "Active (Recv ≤30d)": 0, "Last Received Unread": 1, "Has X400 Address": 0,
+    }
+    assert tables(result)["Top Full Access Users"] == {"a@contoso.com": 1, "b@contoso.com": 1}
+
+
+def test_unknown_dashboard(toolbox):
+    with pytest.raises(ValueError):
+        toolbox.DashboardMetrics.compute("printers", pd.DataFrame({"A": ["1"]}))
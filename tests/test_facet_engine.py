@@ -0,0 +1,43 @@
+"""Value counts and drill-down paths of FacetEngine."""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def engine(toolbox):
+    return toolbox.FacetEngine(pd.DataFrame({
+        "Country": ["BE", "BE", "NL", "BE", "", "NL"],
+        "Department": ["IT", "HR", "IT", "IT", "IT", " "],
+        "City": ["Gent", "Gent", "Delft", "Brussel", "Gent", "Delft"],
+    }))
+
+
+def test_root_counts_ignore_blanks(engine):
+    assert engine.row_count() == 6
+    assert engine.counts_for("Country") == [("BE", 3), ("NL", 2)]
+    # Values are stripped, so a whitespace-only cell is blank too
+    assert engine.counts_for("Department") == [("IT", 4), ("HR", 1)]
+
+
+def test_ties_keep_first_seen_order(engine):
+    assert engine.counts_for("City") == [("Gent", 3), ("Delft", 2), ("Brussel", 1)]
+    assert engine.counts_for("Department", (("Country", "NL"),)) == [("IT", 1)]
+
+
+def test_drill_path(engine):
+    be = (("Country", "BE"),)
+    assert engine.row_count(be) == 3
+    assert engine.counts_for("Department", be) == [("IT", 2), ("HR", 1)]
+
+    be_it = be + (("Department", "IT"),)
+    assert engine.row_count(be_it) == 2
+    assert engine.counts_for("City", be_it) == [("Gent", 1), ("Brussel", 1)]
+    assert engine.frame(be_it)["City"].tolist() == ["Gent", "Brussel"]
+
+
+def test_unknown_value_selects_nothing(engine):
+    path = (("Country", "FR"),)
+    assert engine.row_count(path) == 0
+    assert engine.counts_for("City", path) == []
+    assert engine.frame(path).empty
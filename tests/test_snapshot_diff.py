@@ -0,0 +1,62 @@
+"""Added / removed / changed objects between two snapshots (SnapshotDiff.compute)."""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+
+def frame(rows, columns=("Id", "DisplayName", "Department")):
+    return pd.DataFrame(rows, columns=list(columns))
+
+
+def test_added_removed_changed(toolbox):
+    old = frame([["1", "Ann", "IT"], ["2", "Bob", "HR"], ["3", "Cas", "IT"]])
+    new = frame([["1", "Ann", "IT"], ["3", "Cas", "Sales"], ["4", "Dirk", "HR"]])
+    diff = toolbox.SnapshotDiff.compute("identity", old, new)
+
+    assert diff["key"] == "Id"
+    assert diff["added"]["Id"].tolist() == ["4"]
+    assert diff["removed"]["Id"].tolist() == ["2"]
+    assert (diff["changed_count"], diff["unchanged_count"]) == (1, 1)
+    assert diff["changed"].to_dict("records") == [{"Key": "3", "Column": "Department", "Old": "IT", "New": "Sales"}]
+
+
+def test_blank_and_duplicate_keys(toolbox):
+    old = frame([["1", "Ann", "IT"], ["", "Nobody", "IT"], [" ", "Blank", "HR"]])
+    new = frame([["1", "Ann (old row)", "IT"], ["1", "Ann", "IT"], ["", "Nobody", "HR"]])
+    diff = toolbox.SnapshotDiff.compute("identity", old, new)
+
+    # Blank keys never match anything; the last row of a duplicated key wins
+    assert diff["added"].empty and diff["removed"].empty
+    assert (diff["changed_count"], diff["unchanged_count"]) == (0, 1)
+
+
+def test_column_added_and_removed(toolbox):
+    old = frame([["1", "Ann", "IT"], ["2", "Bob", "HR"]])
+    new = frame([["1", "Ann", "BE"], ["2", "Bobby", "NL"]], columns=("Id", "DisplayName", "Country"))
+    diff = toolbox.SnapshotDiff.compute("identity", old, new)
+
+    assert diff["columns_added"] == ["Country"]
+    assert diff["columns_removed"] == ["Department"]
+    # Only columns both snapshots have are compared
+    assert diff["changed"].to_dict("records") == [{"Key": "2", "Column": "DisplayName", "Old": "Bob", "New": "Bobby"}]
+    assert (diff["changed_count"], diff["unchanged_count"]) == (1, 1)
+
+
+def test_apps_key_is_name_version_publisher(toolbox):
+    columns = ("AppDisplayName", "Version", "Publisher", "Installs")
+    old = frame([["Edge", "1.0", "Microsoft", "10"], ["Zoom", "5", "Zoom", "3"]], columns)
+    new = frame([["Edge", "1.0", "Microsoft", "12"], ["Edge", "2.0", "Microsoft", "1"]], columns)
+    diff = toolbox.SnapshotDiff.compute("apps", old, new)
+
+    assert diff["key"] == "AppDisplayName + Version + Publisher"
+    assert diff["added"]["Version"].tolist() == ["2.0"]
+    assert diff["removed"]["AppDisplayName"].tolist() == ["Zoom"]
+    assert diff["changed"]["Key"].tolist() == ["Edge | 1.0 | Microsoft"]
+
+
+def test_fallback_key_and_missing_key(toolbox):
+    old = pd.DataFrame({"SerialNumber": ["A"], "Model": ["X1"]})
+    assert toolbox.SnapshotDiff.compute("devices", old, old)["key"] == "SerialNumber"
+
+    with pytest.raises(ValueError):
+        toolbox.SnapshotDiff.compute("groups", old.drop(columns="SerialNumber"), old.drop(columns="SerialNumber"))
@@ -0,0 +1,67 @@
+"""SnapshotHistoryStore: byte-exact rebuilds, chunk dedup across snapshots, pruning that keeps metrics."""
+import pytest
+
+
+def write_groups(folder, name, count, extra=()):
+    lines = ["Object ID,Display Name,Group Type"]
+    lines += [f"{i:08d}-grp,Group {i},Security" for i in range(count)]
+    lines += list(extra)
+    path = folder / name
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode("utf-8"))
+    return str(path)
+
+
+def chunk_count(store):
+    with store.connect() as con:
+        return con.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+@pytest.fixture
+def store(toolbox, tmp_path):
+    return toolbox.SnapshotHistoryStore(str(tmp_path / "Database_History" / "history.sqlite"))
+
+
+def test_rebuild_is_byte_exact(store, tmp_path):
+    path = write_groups(tmp_path, "20261018-080000_groups.csv", 500, extra=['x-grp,"Quoted, name",Microsoft365'])
+    assert store.ingest("groups", path)
+    assert not store.ingest("groups", path)   # unchanged file is skipped
+
+    (snapshot_id, kind, name, *_), = store.snapshots()
+    assert (kind, name) == ("groups", "20261018-080000_groups.csv")
+    with open(path, "rb") as f:
+        assert store.rebuild(snapshot_id) == f.read()
+    assert len(store.load_rows(snapshot_id)) == 501
+
+
+def test_repeated_rows_are_stored_once(store, tmp_path):
+    store.ingest("groups", write_groups(tmp_path, "20261018-080000_groups.csv", 2000))
+    first = chunk_count(store)
+    assert first > 4
+
+    # Next day's export only appends a group: every earlier chunk is shared
+    store.ingest("groups", write_groups(tmp_path, "20261019-080000_groups.csv", 2000, extra=["new-grp,New,Security"]))
+    assert chunk_count(store) <= first + 1
+
+    stats = store.stats()
+    assert (stats["snapshots"], stats["stored"], stats["pruned"]) == (2, 2, 0)
+    assert stats["chunk_bytes"] < stats["raw_bytes"] / 2
+
+
+def test_prune_keeps_metrics(store, tmp_path):
+    old = write_groups(tmp_path, "20261018-080000_groups.csv", 300)
+    new = write_groups(tmp_path, "20261019-080000_groups.csv", 300, extra=["new-grp,New,Security"])
+    store.ingest("groups", old)
+    store.ingest("groups", new)
+    new_id, old_id = [row[0] for row in store.snapshots("groups")]
+
+    assert store.prune([old_id]) == 1
+
+    assert store.rebuild(old_id) is None
+    assert [row[8] for row in store.snapshots("groups")] == [0, 1]
+    assert store.trend("groups", "Total Groups") == [("2026-10-18T08:00:00", 300.0), ("2026-10-19T08:00:00", 301.0)]
+    with pytest.raises(ValueError):
+        store.restore(old_id, str(tmp_path))
+    # Chunks the pruned snapshot shared are still there for the one that is kept
+    with open(new, "rb") as f:
+        assert store.rebuild(new_id) == f.read()
+    assert store.stats()["pruned"] == 1
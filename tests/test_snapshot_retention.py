@@ -0,0 +1,40 @@
+"""Output of the snapshot retention policy (SnapshotRetention.kept)."""
+import datetime
+
+import pytest
+
+# Monday of ISO week 43; snapshot ids below are their age in days (one per day, same time of day)
+NOW = datetime.datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.fixture
+def kept(toolbox, tmp_path):
+    def run(days, **settings):
+        policy = toolbox.SnapshotRetention(str(tmp_path / "retention.json"))
+        policy.settings.update(settings)
+        return policy.kept([(age, NOW - datetime.timedelta(days=age)) for age in range(days)], NOW)
+    return run
+
+
+def test_keep_all_window(kept):
+    assert kept(10, keep_all_days=9, daily_days=0, weekly_days=0) == set(range(10))
+
+
+def test_daily_kept_snapshot_covers_its_week(kept):
+    # Days 1-3 are kept daily; day 1 (Sunday) already stands for ISO week 42, so days 4-7 go
+    assert kept(21, keep_all_days=0, daily_days=3, weekly_days=30) == {0, 1, 2, 3, 8, 15}
+
+
+def test_keep_all_snapshot_covers_its_week(kept):
+    assert kept(21, keep_all_days=1, daily_days=0, weekly_days=30) == {0, 1, 8, 15}
+
+
+def test_monthly_tier(kept):
+    ages = kept(120, keep_all_days=0, daily_days=0, weekly_days=0, monthly_days=120)
+    assert sorted(NOW - datetime.timedelta(days=a) for a in ages) == [
+        datetime.datetime(2026, 6, 30, 12, 0),
+        datetime.datetime(2026, 7, 31, 12, 0),
+        datetime.datetime(2026, 8, 31, 12, 0),
+        datetime.datetime(2026, 9, 30, 12, 0),
+        datetime.datetime(2026, 10, 19, 12, 0),
+    ]